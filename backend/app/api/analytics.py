@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
 from typing import Optional, Dict, Any, List
 import pandas as pd
+from ..core.compute import offload
 from ..core.config import settings
-from ..data.loader import load_lap_times, load_race_telemetry_wide
+from ..core.formats import negotiate_format, tabular_response
+from ..core.responses import FastJSONRoute
+from ..data.loader import load_lap_times
+from ..data.telemetry_cache import get_telemetry_cache
+from ..data.track_segments import get_track_segment_store, time_loss, SegmentationError
 from ..ml.tire_degradation import (
     TireDegradationModel, 
     DrivingStyleAnalyzer,
@@ -10,12 +15,14 @@ from ..ml.tire_degradation import (
     load_pit_stops_from_endurance_data,
     classify_race_type
 )
+from ..services.materialize import get_materialized_store
 
-router = APIRouter(prefix="/analytics", tags=["analytics"])
+router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=FastJSONRoute)
 
 
 @router.get("/degradation/{track}/{race}")
-async def get_tire_degradation_analysis(
+@offload("analytics.degradation")
+def get_tire_degradation_analysis(
     track: str,
     race: str,
     vehicle_id: Optional[str] = Query(None, description="Filter by specific vehicle ID")
@@ -25,6 +32,15 @@ async def get_tire_degradation_analysis(
     
     Returns degradation metrics, model performance, predictions, and strategic recommendations.
     """
+    if vehicle_id is None:
+        materialized = get_materialized_store().response(track, race, "degradation")
+        if materialized is not None:
+            return materialized
+    return degradation_analysis(track, race, vehicle_id)
+
+
+def degradation_analysis(track: str, race: str, vehicle_id: Optional[str] = None) -> Dict[str, Any]:
+    """Compute the degradation analysis response (also materialized per race)."""
     try:
         # Load lap time data
         start, end, lapt = load_lap_times(settings.dataset_root, track, race)
@@ -59,16 +75,16 @@ async def get_tire_degradation_analysis(
         
         # Generate summary statistics
         summary_stats = {
-            "total_vehicles": int(degradation_df['vehicle_id'].nunique()),
-            "total_laps_analyzed": int(len(degradation_df)),
+            "total_vehicles": degradation_df['vehicle_id'].nunique(),
+            "total_laps_analyzed": len(degradation_df),
             "total_pit_stops_detected": sum(len(stops) for stops in pit_stops.values()),
-            "avg_degradation_per_lap": {int(k): float(v) for k, v in degradation_df.groupby('lap_number')['degradation_pct'].mean().to_dict().items()},
-            "degradation_by_vehicle": {str(k): float(v) for k, v in degradation_df.groupby('vehicle_id')['degradation_pct'].mean().to_dict().items()}
+            "avg_degradation_per_lap": degradation_df.groupby('lap_number')['degradation_pct'].mean().to_dict(),
+            "degradation_by_vehicle": degradation_df.groupby('vehicle_id')['degradation_pct'].mean().to_dict()
         }
         
         # Sample predictions for next 10 laps
-        sample_vehicle = str(degradation_df['vehicle_id'].iloc[0])
-        baseline_time = float(degradation_df[degradation_df['vehicle_id'] == sample_vehicle]['baseline_time'].iloc[0])
+        sample_vehicle = degradation_df['vehicle_id'].iloc[0]
+        baseline_time = degradation_df[degradation_df['vehicle_id'] == sample_vehicle]['baseline_time'].iloc[0]
         max_tire_age = int(degradation_df[degradation_df['vehicle_id'] == sample_vehicle]['tire_age'].max())
         
         predictions = tire_model.estimate_remaining_performance(
@@ -103,7 +119,8 @@ async def get_tire_degradation_analysis(
 
 
 @router.get("/degradation/{track}/{race}/{vehicle_id}/predictions")
-async def get_tire_degradation_predictions(
+@offload("analytics.degradation_predictions")
+def get_tire_degradation_predictions(
     track: str,
     race: str,
     vehicle_id: str,
@@ -128,7 +145,7 @@ async def get_tire_degradation_predictions(
         
         # Use provided baseline or calculate from data
         if baseline_time is None:
-            baseline_time = float(degradation_df[degradation_df['vehicle_id'] == vehicle_id]['baseline_time'].iloc[0])
+            baseline_time = degradation_df[degradation_df['vehicle_id'] == vehicle_id]['baseline_time'].iloc[0]
         
         # Generate predictions
         predictions = tire_model.estimate_remaining_performance(
@@ -157,7 +174,8 @@ async def get_tire_degradation_predictions(
 
 
 @router.get("/driving-style/{track}/{race}/{vehicle_id}")
-async def get_driving_style_analysis(
+@offload("analytics.driving_style")
+def get_driving_style_analysis(
     track: str,
     race: str,
     vehicle_id: str,
@@ -167,17 +185,15 @@ async def get_driving_style_analysis(
     Analyze driving style and its impact on tire degradation - optimized with sampling.
     """
     try:
-        # Load telemetry data with early filtering
-        df_telemetry = load_race_telemetry_wide(settings.dataset_root, track, race)
+        # Cached, indexed telemetry: the vehicle's rows are a contiguous slice
+        cached = get_telemetry_cache().get(track, race)
         
-        if df_telemetry.empty:
+        if cached.frame.empty:
             raise HTTPException(status_code=404, detail="No telemetry data found")
         
-        # Filter to vehicle early to reduce data size
-        df_vehicle = df_telemetry[df_telemetry['vehicle_id'] == vehicle_id]
-        
-        if df_vehicle.empty:
+        if vehicle_id not in cached.vehicle_ranges:
             raise HTTPException(status_code=404, detail=f"Vehicle {vehicle_id} not found")
+        df_vehicle = cached.vehicle_frame(vehicle_id)
         
         # Sample data for faster processing while maintaining statistical validity
         if len(df_vehicle) > sample_size:
@@ -196,9 +212,9 @@ async def get_driving_style_analysis(
         if not degradation_df.empty:
             tire_model.fit_degradation_model(degradation_df)
             degradation_summary = {
-                "avg_degradation_rate": float(degradation_df['degradation_pct'].mean()),
-                "max_degradation": float(degradation_df['degradation_pct'].max()),
-                "degradation_variability": float(degradation_df['degradation_pct'].std())
+                "avg_degradation_rate": degradation_df['degradation_pct'].mean(),
+                "max_degradation": degradation_df['degradation_pct'].max(),
+                "degradation_variability": degradation_df['degradation_pct'].std()
             }
         
         # Correlate driving style with degradation
@@ -218,10 +234,56 @@ async def get_driving_style_analysis(
             "recommendations": _generate_driving_recommendations(aggression_metrics, degradation_summary)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing driving style: {str(e)}")
 
 
+@router.get("/segments/{track}/{race}")
+def get_segment_time_loss(
+    request: Request,
+    track: str,
+    race: str,
+    vehicle_id: Optional[str] = None,
+    format: Optional[str] = Query(None, description="'records' (default) or 'columns'")
+):
+    """
+    Per-corner (and straight) time loss across the field.
+    
+    Every telemetry row is assigned to a track segment once per loaded race;
+    segment times per lap come from those assignments. Loss is measured against
+    the field's best time in each segment.
+    """
+    response_format = negotiate_format(request, format)
+    try:
+        cached = get_telemetry_cache().get(track, race)
+        segment_map, _, lap_times = get_track_segment_store().race_segments(cached)
+    except SegmentationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail=f"No telemetry data found for {track} {race}")
+    
+    if vehicle_id and vehicle_id not in cached.vehicle_ranges:
+        raise HTTPException(status_code=404, detail=f"Vehicle {vehicle_id} not found")
+    
+    df = time_loss(segment_map, lap_times)
+    if vehicle_id and not df.empty:
+        df = df[df["vehicle_id"] == vehicle_id]
+    
+    worst = df.sort_values("mean_loss", ascending=False).head(3)["segment"].tolist() if vehicle_id and not df.empty else None
+    meta = {
+        "track": track,
+        "race": race,
+        "vehicle_id": vehicle_id,
+        "segments": len(segment_map.segments),
+        "corners": sum(s.kind == "corner" for s in segment_map.segments),
+        "laps_analyzed": len(lap_times) if not vehicle_id else int((lap_times["vehicle_id"] == vehicle_id).sum()),
+        "biggest_losses": worst
+    }
+    return tabular_response(meta, df, "time_loss", response_format)
+
+
 def _generate_driving_recommendations(aggression_metrics: Dict[str, float], degradation_summary: Dict[str, Any]) -> List[str]:
     """Generate driving recommendations based on style analysis."""
     recommendations = []
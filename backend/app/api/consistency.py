@@ -1,19 +1,28 @@
 """
 API endpoints for driver consistency analysis
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import List, Optional
 import logging
 
 from ..ml.driver_consistency import get_consistency_model
+from ..core.compute import offload
+from ..core.config import settings
+from ..core.formats import negotiate_format, tabular_response
+from ..core.responses import FastJSONRoute
+from ..data.telemetry_cache import get_telemetry_cache
+from ..data.events import brake_point_consistency, shift_summary
+from ..data.loader import load_lap_times
+from ..services.materialize import get_materialized_store
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/consistency", tags=["consistency"])
+router = APIRouter(prefix="/consistency", tags=["consistency"], route_class=FastJSONRoute)
 
 
 @router.get("/{track}/{race}/{vehicle_id}")
-async def get_driver_consistency(
+@offload("consistency.driver")
+def get_driver_consistency(
     track: str,
     race: str,
     vehicle_id: str
@@ -28,6 +37,10 @@ async def get_driver_consistency(
         - Behavioral consistency (throttle, brake, G-forces)
     """
     try:
+        materialized = get_materialized_store().load(track, race, "consistency")
+        if materialized is not None and vehicle_id in materialized["vehicles"]:
+            return materialized["vehicles"][vehicle_id]
+        
         model = get_consistency_model()
         analysis = model.calculate_consistency_score(track, race, vehicle_id)
         
@@ -40,8 +53,25 @@ async def get_driver_consistency(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def race_consistency_scores(track: str, race: str) -> dict:
+    """
+    Consistency analysis of every vehicle with enough laps (materialized per race).
+    """
+    start, end, lapt = load_lap_times(settings.dataset_root, track, race)
+    model = get_consistency_model(settings.dataset_root)
+    vehicles = {}
+    skipped = {}
+    for vehicle_id in sorted(lapt['vehicle_id'].dropna().unique()):
+        try:
+            vehicles[vehicle_id] = model.calculate_consistency_score(track, race, vehicle_id)
+        except ValueError as e:
+            skipped[vehicle_id] = str(e)
+    return {"track": track, "race": race, "vehicles": vehicles, "skipped": skipped}
+
+
 @router.get("/{track}/{race}/{vehicle_id}/strengths")
-async def get_driver_strengths(
+@offload("consistency.strengths")
+def get_driver_strengths(
     track: str,
     race: str,
     vehicle_id: str
@@ -68,8 +98,55 @@ async def get_driver_strengths(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{track}/{race}/{vehicle_id}/brake-points")
+def get_brake_point_consistency(
+    request: Request,
+    track: str,
+    race: str,
+    vehicle_id: str,
+    format: Optional[str] = Query(None, description="'records' (default) or 'columns'")
+):
+    """
+    Brake point consistency per corner across laps, from the race's brake zone table.
+    
+    Corners are found by clustering brake start distances over the whole field.
+    
+    Returns:
+        - Per corner: laps, brake start mean/std/min/max, field mean and how
+          much later (m) than the field the driver brakes, peak pressure, duration
+        - Shift RPM summary per gear change
+    """
+    response_format = negotiate_format(request, format)
+    try:
+        cached = get_telemetry_cache().get(track, race)
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(f"Failed to load telemetry data for {track}/{race}: {e}")
+        raise HTTPException(status_code=404, detail=f"No telemetry data found for {track} {race}")
+    
+    if vehicle_id not in cached.vehicle_ranges:
+        raise HTTPException(status_code=404, detail=f"Vehicle {vehicle_id} not found")
+    
+    corners = brake_point_consistency(cached.events.brake_zones.frame, vehicle_id)
+    if corners.empty:
+        raise HTTPException(status_code=404, detail="No brake zones with lap distance found for this vehicle")
+    
+    own_zones = cached.events.brake_zones.select(vehicle_id)
+    meta = {
+        "track": track,
+        "race": race,
+        "vehicle_id": vehicle_id,
+        "total_brake_zones": len(own_zones),
+        "laps_analyzed": int(own_zones["lap"].nunique()),
+        "most_consistent_corner": int(corners.loc[corners["brake_start_std"].idxmin(), "corner"])
+            if corners["brake_start_std"].notna().any() else None,
+        "gear_shifts": shift_summary(cached.events.gear_shifts.select(vehicle_id)).to_dict(orient="records")
+    }
+    return tabular_response(meta, corners, "corners", response_format)
+
+
 @router.get("/{track}/{race}/compare")
-async def compare_driver_consistency(
+@offload("consistency.compare")
+def compare_driver_consistency(
     track: str,
     race: str,
     vehicle_ids: List[str] = Query(None)
@@ -0,0 +1,55 @@
+"""
+Dataset catalog endpoints: what was found under the dataset root, rescans and
+the watcher's log of file changes and the invalidations they caused.
+"""
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from ..core.responses import FastJSONRoute
+from ..data.catalog import get_dataset_catalog
+from ..services.watcher import get_data_watcher
+
+router = APIRouter(prefix="/datasets", tags=["datasets"], route_class=FastJSONRoute)
+
+
+@router.get("")
+def get_dataset_catalog_summary():
+    """Tracks, races and the kinds of data file found for each race."""
+    return get_dataset_catalog().summary()
+
+
+@router.get("/{track}/{race}/files")
+def get_race_files(track: str, race: str):
+    """Every catalogued file of a race with its kind, size and mtime."""
+    entries = get_dataset_catalog().race_files(track, race)
+    if not entries:
+        raise HTTPException(status_code=404, detail=f"No files found for {track} {race}")
+    return {"track": track, "race": race, "files": [entry.to_dict() for entry in entries]}
+
+
+@router.get("/events")
+def get_dataset_events(limit: int = Query(100, ge=1, le=500), kind: Optional[str] = None):
+    """
+    Most recent watcher events first. ``kind`` filters to one of dataset,
+    model, invalidate or materialize.
+    """
+    watcher = get_data_watcher()
+    return {
+        "watching": watcher.enabled,
+        "interval_s": watcher.interval,
+        "events": watcher.recent(limit, kind)
+    }
+
+
+@router.post("/refresh")
+def refresh_dataset_catalog():
+    """
+    Rescan the dataset and model files now, invalidating whatever the changes
+    affect, and report which files were added, removed or changed.
+    """
+    watcher = get_data_watcher()
+    events = watcher.check()
+    changes = {"added": [], "removed": [], "changed": []}
+    for event in events:
+        if event["kind"] == "dataset":
+            changes[event["change"]].append(event["path"])
+    return {"scanned_at": watcher.catalog.scanned_at, **changes, "events": events}
@@ -0,0 +1,70 @@
+"""
+Health endpoints: liveness, readiness (warm-up done), compute pool and
+response cache metrics, startup profile.
+"""
+from fastapi import APIRouter
+import asyncio
+import time
+from ..core.coalesce import get_response_cache
+from ..core.compute import get_compute_dispatcher
+from ..core.responses import FastJSONResponse, FastJSONRoute
+from ..core.startup import get_startup_profile
+from ..services.warmup import get_warmup
+
+router = APIRouter(prefix="/health", tags=["health"], route_class=FastJSONRoute)
+
+_started = time.time()
+
+
+@router.get("")
+async def get_health():
+    """
+    Liveness check, answered on the event loop.
+    
+    ``loop_lag_ms`` is how long a zero-length sleep took to come back; it stays
+    near zero while analytics run in the compute pool.
+    """
+    loop = asyncio.get_running_loop()
+    before = loop.time()
+    await asyncio.sleep(0)
+    return {
+        "status": "ok",
+        "uptime_s": round(time.time() - _started, 1),
+        "loop_lag_ms": round((loop.time() - before) * 1000, 3)
+    }
+
+
+@router.get("/ready")
+async def get_readiness():
+    """
+    Readiness, separate from liveness: 503 until the startup warm-up has
+    preloaded the configured races and models, then 200. Per-item timings are
+    included either way.
+    """
+    report = get_warmup().report()
+    return FastJSONResponse(
+        status_code=200 if report["ready"] else 503,
+        content={"status": "ready" if report["ready"] else "warming_up", **report}
+    )
+
+
+@router.get("/compute")
+async def get_compute_health():
+    """Compute pool size, per-endpoint limits, running/waiting counts and queue/run time percentiles."""
+    return get_compute_dispatcher().snapshot()
+
+
+@router.get("/cache")
+async def get_cache_health():
+    """Response cache hits, misses, coalesced requests and 304s since start."""
+    cache = get_response_cache()
+    return {"ttl_s": cache.ttl, **cache.stats}
+
+
+@router.get("/startup")
+async def get_startup_health():
+    """
+    Import and startup phase durations, and which heavy ML/AI modules
+    (scikit-learn, XGBoost, Gemini ...) startup loaded versus are loaded now.
+    """
+    return get_startup_profile().report()
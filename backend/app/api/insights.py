@@ -2,6 +2,7 @@
 API endpoints for Driver Training & Insights, Pre-Event Prediction, and Post-Event Analysis
 """
 from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+import asyncio
 from typing import Optional, Dict, Any, List
 import pandas as pd
 import json
@@ -10,44 +11,99 @@ from pathlib import Path
 import os
 from datetime import datetime
 
+from ..core.compute import ComputeBusyError, run_compute
 from ..core.config import settings
+from ..core.responses import FastJSONRoute
+from ..data.catalog import get_dataset_catalog
 from ..data.loader import load_lap_times, load_race_telemetry_wide
 from ..data.sector_mapper import get_sector_mapper
 from ..ml.tire_degradation import TireDegradationModel
 from ..ml.pit_strategy import PitStrategyOptimizer
 from ..ml.lap_time_predictor import get_lap_time_predictor
+from ..services.insights import get_insight_service
+from ..services.materialize import get_materialized_store
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/insights", tags=["insights"])
+router = APIRouter(prefix="/insights", tags=["insights"], route_class=FastJSONRoute)
 
-# Gemini API integration
-# GEMINI_API_KEY is now loaded from settings
 
-try:
-    from google.generativeai import configure, GenerativeModel
-    configure(api_key=settings.gemini_api_key)
-    gemini_model = GenerativeModel('gemini-2.5-flash')
-except ImportError:
-    logger.warning("Google Generative AI not installed. Some features may not work.")
-    gemini_model = None
-except Exception as e:
-    logger.warning(f"Failed to initialize Gemini: {e}")
-    gemini_model = None
+async def generate_ai_insights(prompt: str, inputs: Optional[Dict[str, Any]] = None) -> str:
+    """Generate AI insights through the insight service (cached by ``inputs``, off the event loop)."""
+    return await get_insight_service().generate(prompt, inputs)
 
 
-async def generate_ai_insights(prompt: str) -> str:
-    """Generate AI insights using Gemini"""
-    if not gemini_model:
-        return "AI insights unavailable. Please install google-generativeai package."
-    
+def _driver_training_metrics(track: str, race: str, vehicle_id: str) -> Dict[str, Any]:
+    """Lap, sector and telemetry summaries behind the driver training prompt (blocking)."""
+    # Load performance data
+    start, end, lapt = load_lap_times(settings.dataset_root, track, race)
+    df_telemetry = load_race_telemetry_wide(settings.dataset_root, track, race)
+
+    # Filter to vehicle
+    vehicle_laps = lapt[lapt['vehicle_id'] == vehicle_id].copy()
+    vehicle_telemetry = df_telemetry[df_telemetry['vehicle_id'] == vehicle_id]
+
+    if vehicle_laps.empty:
+        raise HTTPException(status_code=404, detail=f"No data for vehicle {vehicle_id}")
+
+    # Sort by lap number and calculate lap times
+    vehicle_laps = vehicle_laps.sort_values("lap").reset_index(drop=True)
+    vehicle_laps['lap_time'] = vehicle_laps['timestamp'].diff().dt.total_seconds()
+
+    # Calculate key metrics
+    lap_times = vehicle_laps['lap_time'].dropna()
+    avg_lap_time = float(lap_times.mean())
+    best_lap_time = float(lap_times.min())
+    worst_lap_time = float(lap_times.max())
+    consistency = float(lap_times.std())
+
+
+    # Sector analysis - use SectorMapper to load actual sector data
+    sectors = {}
     try:
-        response = gemini_model.generate_content(prompt)
-        return response.text
+        mapper = get_sector_mapper(settings.dataset_root)
+        df_sectors = mapper.load_sector_data(track, race)
+
+        # Filter to vehicle
+        vehicle_sectors = df_sectors[df_sectors['vehicle_id'] == vehicle_id]
+
+        if not vehicle_sectors.empty:
+            # Get sector consistency stats
+            sector_stats = mapper.get_sector_consistency(df_sectors, vehicle_id)
+
+            # Format for frontend
+            for sector_name, stats in sector_stats.items():
+                sectors[sector_name] = {
+                    'avg': stats['mean'],
+                    'best': stats['min'],
+                    'consistency': stats['std']
+                }
     except Exception as e:
-        logger.error(f"Error generating AI insights: {e}")
-        return f"Error generating insights: {str(e)}"
+        logger.warning(f"Could not load sector data for {track}/{race}/{vehicle_id}: {e}")
+        # sectors will remain empty dict
+
+
+    # Telemetry analysis
+    telemetry_insights = {}
+    if not vehicle_telemetry.empty:
+        telemetry_insights = {
+            'avg_speed': float(vehicle_telemetry['speed'].mean()),
+            'max_speed': float(vehicle_telemetry['speed'].max()),
+            'avg_throttle': float(vehicle_telemetry.get('aps', vehicle_telemetry.get('throttle', pd.Series([0]))).mean()),
+            'avg_brake': float(vehicle_telemetry.get('pbrake_f', pd.Series([0])).mean()),
+            'avg_g_force': float(vehicle_telemetry.get('accx_can', pd.Series([0])).abs().mean())
+        }
+    
+    return {
+        "avg_lap_time": avg_lap_time,
+        "best_lap_time": best_lap_time,
+        "worst_lap_time": worst_lap_time,
+        "consistency": consistency,
+        "total_laps": len(lap_times),
+        "sectors": sectors,
+        "telemetry_insights": telemetry_insights
+    }
 
 
 @router.get("/driver-training/{track}/{race}/{vehicle_id}")
@@ -61,64 +117,15 @@ async def get_driver_training_insights(
     understand performance patterns.
     """
     try:
-        # Load performance data
-        start, end, lapt = load_lap_times(settings.dataset_root, track, race)
-        df_telemetry = load_race_telemetry_wide(settings.dataset_root, track, race)
-        
-        # Filter to vehicle
-        vehicle_laps = lapt[lapt['vehicle_id'] == vehicle_id].copy()
-        vehicle_telemetry = df_telemetry[df_telemetry['vehicle_id'] == vehicle_id]
-        
-        if vehicle_laps.empty:
-            raise HTTPException(status_code=404, detail=f"No data for vehicle {vehicle_id}")
-        
-        # Sort by lap number and calculate lap times
-        vehicle_laps = vehicle_laps.sort_values("lap").reset_index(drop=True)
-        vehicle_laps['lap_time'] = vehicle_laps['timestamp'].diff().dt.total_seconds()
-        
-        # Calculate key metrics
-        lap_times = vehicle_laps['lap_time'].dropna()
-        avg_lap_time = float(lap_times.mean())
-        best_lap_time = float(lap_times.min())
-        worst_lap_time = float(lap_times.max())
-        consistency = float(lap_times.std())
-        
-        
-        # Sector analysis - use SectorMapper to load actual sector data
-        sectors = {}
-        try:
-            mapper = get_sector_mapper(settings.dataset_root)
-            df_sectors = mapper.load_sector_data(track, race)
-            
-            # Filter to vehicle
-            vehicle_sectors = df_sectors[df_sectors['vehicle_id'] == vehicle_id]
-            
-            if not vehicle_sectors.empty:
-                # Get sector consistency stats
-                sector_stats = mapper.get_sector_consistency(df_sectors, vehicle_id)
-                
-                # Format for frontend
-                for sector_name, stats in sector_stats.items():
-                    sectors[sector_name] = {
-                        'avg': stats['mean'],
-                        'best': stats['min'],
-                        'consistency': stats['std']
-                    }
-        except Exception as e:
-            logger.warning(f"Could not load sector data for {track}/{race}/{vehicle_id}: {e}")
-            # sectors will remain empty dict
-        
-        
-        # Telemetry analysis
-        telemetry_insights = {}
-        if not vehicle_telemetry.empty:
-            telemetry_insights = {
-                'avg_speed': float(vehicle_telemetry['speed'].mean()),
-                'max_speed': float(vehicle_telemetry['speed'].max()),
-                'avg_throttle': float(vehicle_telemetry.get('aps', vehicle_telemetry.get('throttle', pd.Series([0]))).mean()),
-                'avg_brake': float(vehicle_telemetry.get('pbrake_f', pd.Series([0])).mean()),
-                'avg_g_force': float(vehicle_telemetry.get('accx_can', pd.Series([0])).abs().mean())
-            }
+        metrics = await run_compute(
+            "insights.driver_training", _driver_training_metrics, track, race, vehicle_id
+        )
+        avg_lap_time = metrics["avg_lap_time"]
+        best_lap_time = metrics["best_lap_time"]
+        worst_lap_time = metrics["worst_lap_time"]
+        consistency = metrics["consistency"]
+        sectors = metrics["sectors"]
+        telemetry_insights = metrics["telemetry_insights"]
         
         # Generate AI insights
         prompt = f"""
@@ -145,7 +152,9 @@ Provide:
 Format as JSON with keys: areasForImprovement, racingLineTips, performanceInsights, trainingRecommendations
 """
         
-        ai_analysis = await generate_ai_insights(prompt)
+        ai_analysis = await generate_ai_insights(prompt, {
+            "kind": "driver_training", "track": track, "race": race, "vehicle_id": vehicle_id, "metrics": metrics
+        })
         
         # Try to parse JSON from AI response
         try:
@@ -169,18 +178,118 @@ Format as JSON with keys: areasForImprovement, racingLineTips, performanceInsigh
                 "best_lap_time": best_lap_time,
                 "worst_lap_time": worst_lap_time,
                 "consistency": consistency,
-                "total_laps": len(lap_times)
+                "total_laps": metrics["total_laps"]
             },
             "sector_analysis": sectors,
             "telemetry_insights": telemetry_insights,
             "ai_analysis": ai_data
         }
         
+    except ComputeBusyError:
+        raise
     except Exception as e:
         logger.error(f"Error generating driver training insights: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def race_history(track: str, race: str) -> Dict[str, Any]:
+    """
+    Historical pace and degradation of one race behind the pre-event prompt
+    (blocking; materialized per race).
+    """
+    start, end, lapt = load_lap_times(settings.dataset_root, track, race)
+
+    if lapt.empty:
+        raise ValueError(f"No lap time data for {track}/{race}")
+
+    # Calculate lap_time from timestamps if not present
+    if 'lap_time' not in lapt.columns and 'timestamp' in lapt.columns:
+        lapt = lapt.copy()
+        lapt['timestamp'] = pd.to_datetime(lapt['timestamp'], errors='coerce')
+        lapt = lapt.sort_values(['vehicle_id', 'lap']).reset_index(drop=True)
+        lapt['lap_time'] = lapt.groupby('vehicle_id')['timestamp'].diff().dt.total_seconds()
+
+    # Filter out invalid lap times (NaN, negative, or unreasonably large)
+    lapt_valid = lapt[lapt['lap_time'].notna() & (lapt['lap_time'] > 5) & (lapt['lap_time'] < 600)].copy()
+
+    if lapt_valid.empty:
+        raise ValueError(f"No valid lap times found for {track}/{race}")
+
+    # Ensure required columns exist for degradation calculation
+    if 'vehicle_id' not in lapt_valid.columns:
+        raise ValueError(f"No vehicle_id column for {track}/{race}")
+
+    # Calculate baseline predictions from historical data
+    avg_lap_time = float(lapt_valid['lap_time'].mean())
+
+    # For qualifying pace, use realistic lap times only (filter out likely sector times)
+    # Realistic lap times for racing are typically 30s - 5min (300s)
+    realistic_laps = lapt_valid[(lapt_valid['lap_time'] >= 30) & (lapt_valid['lap_time'] <= 300)]
+
+    if not realistic_laps.empty:
+        # Use the 5th percentile instead of absolute minimum to avoid outliers
+        best_lap_time = float(realistic_laps['lap_time'].quantile(0.05))
+    else:
+        # Fallback to average if no realistic laps found
+        best_lap_time = avg_lap_time
+
+    # Tire degradation prediction - use full lapt dataframe, not filtered
+    tire_model = TireDegradationModel()
+    try:
+        degradation_df = tire_model.calculate_lap_degradation(lapt_valid)
+        degradation_rate = 0.0
+        if not degradation_df.empty:
+            model_stats = tire_model.fit_degradation_model(degradation_df)
+            degradation_rate = abs(model_stats.get('avg_degradation_rate_per_lap', 0))
+    except Exception as e:
+        logger.warning(f"Could not calculate degradation for {track}/{race}: {e}")
+        degradation_rate = 0.0
+
+    return {
+        # Predict qualifying pace (best lap + 1-2% for qualifying simulation)
+        "predicted_qualifying_pace": best_lap_time * 1.01,
+        # Predict race pace (average lap time)
+        "predicted_race_pace": avg_lap_time,
+        "predicted_tire_degradation_per_lap": degradation_rate,
+        # Predict tire degradation over 30 laps
+        "predicted_degradation_30_laps": degradation_rate * 30,
+        "baseline_lap_time": avg_lap_time,
+        "best_historical_lap": best_lap_time
+    }
+
+
+def track_summary(histories: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Track-level aggregate of per-race histories (materialized per track)."""
+    values = list(histories.values())
+    return {
+        "history": histories,
+        "best_lap": min(h["best_historical_lap"] for h in values),
+        "qualifying_pace": min(h["predicted_qualifying_pace"] for h in values),
+        "race_pace": sum(h["predicted_race_pace"] for h in values) / len(values),
+        "degradation_rate": sum(h["predicted_tire_degradation_per_lap"] for h in values) / len(values)
+    }
+
+
+async def _pre_event_history(track: str, races: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Per-race history from the materialized artifacts, computing missing races concurrently."""
+    store = get_materialized_store()
+
+    async def one(r: str) -> Optional[Dict[str, Any]]:
+        history = store.load(track, r, "race_history")
+        if history is not None:
+            return history
+        try:
+            return await run_compute("insights.pre_event", race_history, track, r)
+        except ComputeBusyError:
+            raise
+        except Exception as e:
+            logger.error(f"Error loading data for {track}/{r}: {e}")
+            return None
+
+    histories = await asyncio.gather(*(one(r) for r in races))
+    return {r: history for r, history in zip(races, histories) if history is not None}
+
+
 @router.get("/pre-event-prediction/{track}")
 async def get_pre_event_prediction(
     track: str,
@@ -193,93 +302,28 @@ async def get_pre_event_prediction(
     before the green flag drops.
     """
     try:
-        # Load historical data for this track
-        races = ["R1", "R2"] if not race else [race]
-        
-        all_predictions = {}
-        for r in races:
-            try:
-                start, end, lapt = load_lap_times(settings.dataset_root, track, r)
-                
-                if lapt.empty:
-                    continue
-                
-                # Calculate lap_time from timestamps if not present
-                if 'lap_time' not in lapt.columns and 'timestamp' in lapt.columns:
-                    lapt = lapt.copy()
-                    lapt['timestamp'] = pd.to_datetime(lapt['timestamp'], errors='coerce')
-                    lapt = lapt.sort_values(['vehicle_id', 'lap']).reset_index(drop=True)
-                    lapt['lap_time'] = lapt.groupby('vehicle_id')['timestamp'].diff().dt.total_seconds()
-                
-                # Filter out invalid lap times (NaN, negative, or unreasonably large)
-                lapt_valid = lapt[lapt['lap_time'].notna() & (lapt['lap_time'] > 5) & (lapt['lap_time'] < 600)].copy()
-                
-                if lapt_valid.empty:
-                    logger.warning(f"No valid lap times found for {track}/{r}")
-                    continue
-                
-                # Ensure required columns exist for degradation calculation
-                if 'vehicle_id' not in lapt_valid.columns:
-                    logger.warning(f"No vehicle_id column for {track}/{r}")
-                    continue
-                
-                # Calculate baseline predictions from historical data
-                avg_lap_time = float(lapt_valid['lap_time'].mean())
-                
-                # For qualifying pace, use realistic lap times only (filter out likely sector times)
-                # Realistic lap times for racing are typically 30s - 5min (300s)
-                realistic_laps = lapt_valid[(lapt_valid['lap_time'] >= 30) & (lapt_valid['lap_time'] <= 300)]
-                
-                if not realistic_laps.empty:
-                    # Use the 5th percentile instead of absolute minimum to avoid outliers
-                    best_lap_time = float(realistic_laps['lap_time'].quantile(0.05))
-                else:
-                    # Fallback to average if no realistic laps found
-                    best_lap_time = avg_lap_time
-                
-                # Tire degradation prediction - use full lapt dataframe, not filtered
-                tire_model = TireDegradationModel()
-                try:
-                    degradation_df = tire_model.calculate_lap_degradation(lapt_valid)
-                    degradation_rate = 0.0
-                    if not degradation_df.empty:
-                        model_stats = tire_model.fit_degradation_model(degradation_df)
-                        degradation_rate = abs(model_stats.get('avg_degradation_rate_per_lap', 0))
-                except Exception as e:
-                    logger.warning(f"Could not calculate degradation for {track}/{r}: {e}")
-                    degradation_rate = 0.0
-                
-                # Predict qualifying pace (best lap + 1-2% for qualifying simulation)
-                predicted_qualifying_pace = best_lap_time * 1.01
-                
-                # Predict race pace (average lap time)
-                predicted_race_pace = avg_lap_time
-                
-                # Predict tire degradation over 30 laps
-                predicted_degradation_30_laps = degradation_rate * 30
-                
-                all_predictions[r] = {
-                    "predicted_qualifying_pace": predicted_qualifying_pace,
-                    "predicted_race_pace": predicted_race_pace,
-                    "predicted_tire_degradation_per_lap": degradation_rate,
-                    "predicted_degradation_30_laps": predicted_degradation_30_laps,
-                    "baseline_lap_time": avg_lap_time,
-                    "best_historical_lap": best_lap_time,
-                    "weather_factor": weather or "unknown",
-                    "track_temp": track_temp
-                }
-            except Exception as e:
-                logger.error(f"Error loading data for {track}/{r}: {e}", exc_info=True)
-                continue
-        
-        if not all_predictions:
+        # Load historical data for this track: the materialized aggregate of all its races if current
+        races = [race] if race else get_dataset_catalog().races(track)
+        summary = get_materialized_store().track(track, races) if not race else None
+        if summary is None:
+            histories = await _pre_event_history(track, races)
+            summary = track_summary(histories) if histories else None
+        
+        if summary is None:
             raise HTTPException(status_code=404, detail=f"No historical data for track {track}")
         
+        all_predictions = {
+            r: {**history, "weather_factor": weather or "unknown", "track_temp": track_temp}
+            for r, history in summary["history"].items()
+        }
+        aggregate = {k: summary[k] for k in ("best_lap", "qualifying_pace", "race_pace", "degradation_rate")}
+        
         # Generate AI predictions with structured output
         prompt = f"""
 You are a GR Cup race strategist. Provide predictions for {track} in valid JSON format.
 
 HISTORICAL DATA: {json.dumps(all_predictions, indent=2)}
+TRACK SUMMARY (all races): {json.dumps(aggregate)}
 CONDITIONS: Weather={weather or 'Unknown'}, Track Temp={track_temp or 'Unknown'}°C
 
 Return ONLY a valid JSON object with these exact keys:
@@ -315,7 +359,10 @@ IMPORTANT: Return ONLY the JSON object, no markdown formatting, no explanations.
 Use actual numbers from the historical data provided.
 """
         
-        ai_predictions = await generate_ai_insights(prompt)
+        ai_predictions = await generate_ai_insights(prompt, {
+            "kind": "pre_event", "track": track, "weather": weather, "track_temp": track_temp,
+            "predictions": all_predictions, "track_summary": aggregate
+        })
         
         try:
             # Clean any markdown formatting
@@ -365,10 +412,13 @@ Use actual numbers from the historical data provided.
         return {
             "track": track,
             "predictions": all_predictions,
+            "track_summary": aggregate,
             "ai_analysis": ai_data,
             "timestamp": datetime.now().isoformat()
         }
         
+    except (ComputeBusyError, HTTPException):
+        raise
     except Exception as e:
         logger.error(f"Error generating pre-event predictions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -397,7 +447,7 @@ async def analyze_post_event_data(
         
         # Load and parse CSV
         try:
-            df = pd.read_csv(file_path)
+            df = await run_compute("insights.post_event_upload", pd.read_csv, file_path)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Could not parse CSV: {str(e)}")
         
@@ -477,6 +527,8 @@ Format as JSON with keys: raceNarrative, strategicDecisions, criticalMoments, pe
             "ai_story": ai_data
         }
         
+    except ComputeBusyError:
+        raise
     except HTTPException:
         raise
     except Exception as e:
@@ -484,6 +536,56 @@ Format as JSON with keys: raceNarrative, strategicDecisions, criticalMoments, pe
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _post_event_summary(track: str, race: str) -> Dict[str, Any]:
+    """Lap data, totals and key moments behind the post-event prompt (blocking)."""
+    # Load race data
+    start, end, lapt = load_lap_times(settings.dataset_root, track, race)
+    df_telemetry = load_race_telemetry_wide(settings.dataset_root, track, race)
+
+    if lapt.empty:
+        raise HTTPException(status_code=404, detail=f"No data for {track} {race}")
+
+    # Sort by vehicle and lap
+    lapt = lapt.sort_values(["vehicle_id", "lap"]).reset_index(drop=True)
+
+    # Calculate lap_time from timestamps only if not present
+    if 'lap_time' not in lapt.columns and 'timestamp' in lapt.columns:
+        lapt['lap_time'] = lapt.groupby("vehicle_id")["timestamp"].diff().dt.total_seconds()
+
+    # Filter out invalid lap times (negative or zero)
+    if 'lap_time' in lapt.columns:
+        lapt = lapt[lapt['lap_time'] > 0]
+
+    # Race summary
+    if lapt.empty:
+         raise HTTPException(status_code=404, detail=f"No valid lap data for {track} {race}")
+
+    total_laps = int(lapt['lap'].max())
+    total_vehicles = lapt['vehicle_id'].nunique()
+
+    # Key moments
+    key_moments = []
+
+    # Fastest lap (excluding NaN values from lap_time calculation)
+    valid_laps = lapt[lapt['lap_time'].notna()]
+    if not valid_laps.empty:
+        fastest_lap = valid_laps.loc[valid_laps['lap_time'].idxmin()]
+        key_moments.append({
+            "type": "fastest_lap",
+            "vehicle": str(fastest_lap['vehicle_id']),
+            "lap": int(fastest_lap['lap']),
+            "time": float(fastest_lap['lap_time']),
+            "description": f"Fastest lap by {fastest_lap['vehicle_id']}"
+        })
+    
+    return {
+        "lapt": lapt,
+        "total_laps": total_laps,
+        "total_vehicles": total_vehicles,
+        "key_moments": key_moments
+    }
+
+
 @router.get("/post-event-analysis/{track}/{race}")
 async def get_post_event_analysis(
     track: str,
@@ -493,45 +595,11 @@ async def get_post_event_analysis(
     Post-Event Analysis: Analyze existing race data and generate comprehensive report.
     """
     try:
-        # Load race data
-        start, end, lapt = load_lap_times(settings.dataset_root, track, race)
-        df_telemetry = load_race_telemetry_wide(settings.dataset_root, track, race)
-        
-        if lapt.empty:
-            raise HTTPException(status_code=404, detail=f"No data for {track} {race}")
-        
-        # Sort by vehicle and lap
-        lapt = lapt.sort_values(["vehicle_id", "lap"]).reset_index(drop=True)
-        
-        # Calculate lap_time from timestamps only if not present
-        if 'lap_time' not in lapt.columns and 'timestamp' in lapt.columns:
-            lapt['lap_time'] = lapt.groupby("vehicle_id")["timestamp"].diff().dt.total_seconds()
-            
-        # Filter out invalid lap times (negative or zero)
-        if 'lap_time' in lapt.columns:
-            lapt = lapt[lapt['lap_time'] > 0]
-        
-        # Race summary
-        if lapt.empty:
-             raise HTTPException(status_code=404, detail=f"No valid lap data for {track} {race}")
-
-        total_laps = int(lapt['lap'].max())
-        total_vehicles = lapt['vehicle_id'].nunique()
-        
-        # Key moments
-        key_moments = []
-        
-        # Fastest lap (excluding NaN values from lap_time calculation)
-        valid_laps = lapt[lapt['lap_time'].notna()]
-        if not valid_laps.empty:
-            fastest_lap = valid_laps.loc[valid_laps['lap_time'].idxmin()]
-            key_moments.append({
-                "type": "fastest_lap",
-                "vehicle": str(fastest_lap['vehicle_id']),
-                "lap": int(fastest_lap['lap']),
-                "time": float(fastest_lap['lap_time']),
-                "description": f"Fastest lap by {fastest_lap['vehicle_id']}"
-            })
+        summary = await run_compute("insights.post_event", _post_event_summary, track, race)
+        lapt = summary["lapt"]
+        total_laps = summary["total_laps"]
+        total_vehicles = summary["total_vehicles"]
+        key_moments = summary["key_moments"]
         
         # Generate AI race story
         prompt = f"""
@@ -554,7 +622,10 @@ Analyze the race and provide a JSON response with the following structure:
 Ensure the response is valid JSON. Do not include markdown formatting like ```json.
 """
         
-        ai_story = await generate_ai_insights(prompt)
+        ai_story = await generate_ai_insights(prompt, {
+            "kind": "post_event", "track": track, "race": race, "total_laps": total_laps,
+            "total_vehicles": total_vehicles, "key_moments": key_moments
+        })
         
         try:
             ai_data = json.loads(ai_story)
@@ -580,6 +651,8 @@ Ensure the response is valid JSON. Do not include markdown formatting like ```js
             "ai_story": ai_data
         }
         
+    except ComputeBusyError:
+        raise
     except HTTPException:
         raise
     except Exception as e:
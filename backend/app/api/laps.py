@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
+import logging
 import pandas as pd
 import numpy as np
 from ..core.config import settings
+from ..core.formats import negotiate_format, tabular_response
+from ..core.responses import FastJSONRoute
 from ..data.loader import load_lap_times, load_race_telemetry_wide, segment_laps_by_time
+from ..data.telemetry_cache import get_telemetry_cache
+from ..data.lap_comparison import (
+    get_lap_comparison_engine, ReferenceLapError, DEFAULT_STEP_M, DRIVER_BEST, SPECIFIC_LAP, REFERENCES
+)
 
-router = APIRouter(prefix="/laps", tags=["laps"])
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/laps", tags=["laps"], route_class=FastJSONRoute)
 
 
 @router.get("")
-def get_laps(track: str = Query("barber"), race: str = Query("R1"), vehicle_id: Optional[str] = None):
+def get_laps(request: Request, track: str = Query("barber"), race: str = Query("R1"), vehicle_id: Optional[str] = None,
+             format: Optional[str] = Query(None, description="'records' (default) or 'columns'")):
     """Get lap data - optimized for fast response by returning lap times without full telemetry segmentation."""
+    response_format = negotiate_format(request, format)
     try:
         start, end, lapt = load_lap_times(settings.dataset_root, track=track, race=race)
     except (ValueError, FileNotFoundError) as e:
@@ -35,22 +46,21 @@ def get_laps(track: str = Query("barber"), race: str = Query("R1"), vehicle_id:
                 "lap_numbers": group["lap"].tolist() if "lap" in group.columns else []
             }
     
-    # Replace NaN values with None for JSON serialization
-    lapt_sample = lapt_filtered.head(100).replace({np.nan: None})
-
-    return {
+    meta = {
         "track": track,
         "race": race,
         "total_lap_records": len(lapt_filtered),
         "laps_by_vehicle": laps_by_vehicle,
-        "sample_lap_times": lapt_sample.to_dict(orient="records"),
         "note": "Full telemetry segmentation available via /telemetry endpoint"
     }
+    return tabular_response(meta, lapt_filtered.head(100), "sample_lap_times", response_format)
 
 
 @router.get("/times")
-def get_lap_times(track: str = Query("barber"), race: str = Query("R1"), vehicle_id: Optional[str] = None):
+def get_lap_times(request: Request, track: str = Query("barber"), race: str = Query("R1"), vehicle_id: Optional[str] = None,
+                  format: Optional[str] = Query(None, description="'records' (default) or 'columns'")):
     """Get actual lap times with timing data for visualization."""
+    response_format = negotiate_format(request, format)
     try:
         start, end, lapt = load_lap_times(settings.dataset_root, track=track, race=race)
     except (ValueError, FileNotFoundError) as e:
@@ -84,13 +94,83 @@ def get_lap_times(track: str = Query("barber"), race: str = Query("R1"), vehicle
                 # For multiple vehicles, calculate within each vehicle group
                 lapt_filtered["lap_time"] = lapt_filtered.groupby("vehicle_id")["timestamp"].diff().dt.total_seconds()
     
-    # Replace NaN values with None for JSON serialization
-    lap_times_clean = lapt_filtered.replace({np.nan: None})
-
-    return {
+    meta = {
         "track": track,
         "race": race,
         "vehicle_id": vehicle_id,
-        "total_records": len(lap_times_clean),
-        "lap_times": lap_times_clean.to_dict(orient="records")
+        "total_records": len(lapt_filtered)
     }
+    return tabular_response(meta, lapt_filtered, "lap_times", response_format)
+
+
+@router.get("/compare")
+def compare_laps(request: Request, track: str = Query("barber"), race: str = Query("R1"),
+                 reference: str = Query(DRIVER_BEST, description="driver_best, field_best or lap"),
+                 reference_vehicle_id: Optional[str] = Query(None, description="Reference vehicle when reference=lap"),
+                 reference_lap: Optional[int] = Query(None, description="Reference lap when reference=lap"),
+                 vehicle_id: Optional[str] = None,
+                 lap_number: Optional[int] = Query(None, description="With vehicle_id: return the per-distance trace"),
+                 step_m: float = Query(DEFAULT_STEP_M, description="Distance grid spacing in metres"),
+                 format: Optional[str] = Query(None, description="'records' (default) or 'columns'")):
+    """
+    Compare laps against a reference lap on a common distance grid.
+
+    Without lap_number: one summary row per complete lap (optionally one vehicle),
+    all computed in a single batch. With vehicle_id and lap_number: the
+    cumulative time delta and channel deltas at every grid point.
+    """
+    response_format = negotiate_format(request, format)
+    if reference not in REFERENCES:
+        raise HTTPException(status_code=400, detail=f"Unknown reference '{reference}'. Use one of {list(REFERENCES)}")
+    if reference == SPECIFIC_LAP and (reference_vehicle_id is None or reference_lap is None):
+        raise HTTPException(status_code=400, detail="reference=lap needs reference_vehicle_id and reference_lap")
+    if lap_number is not None and not vehicle_id:
+        raise HTTPException(status_code=400, detail="lap_number needs vehicle_id")
+    if step_m < 1 or step_m > 50:
+        raise HTTPException(status_code=400, detail="step_m must be between 1 and 50")
+
+    try:
+        cached = get_telemetry_cache().get(track, race)
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(f"Failed to load telemetry data for {track}/{race}: {e}")
+        raise HTTPException(status_code=404, detail=f"No telemetry data found for {track} {race}")
+    if vehicle_id and vehicle_id not in cached.vehicle_ranges:
+        raise HTTPException(status_code=404, detail=f"Vehicle {vehicle_id} not found. Available vehicles: {cached.vehicles[:5]}")
+
+    resampled = get_lap_comparison_engine().get(cached, step_m)
+    try:
+        references = resampled.reference_rows(reference, reference_vehicle_id, reference_lap)
+    except ReferenceLapError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    meta = {
+        "track": track,
+        "race": race,
+        "reference": reference,
+        "step_m": step_m,
+        "grid_start": float(resampled.grid[0]),
+        "grid_end": float(resampled.grid[-1]),
+        "grid_points": len(resampled.grid)
+    }
+
+    if lap_number is not None:
+        row = resampled.find(vehicle_id, lap_number)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Lap {lap_number} of {vehicle_id} is missing or incomplete")
+        ref_row = int(references[row])
+        df = resampled.trace(row, ref_row)
+        meta.update({
+            "vehicle_id": vehicle_id,
+            "lap_number": lap_number,
+            "grid_elapsed": float(resampled.grid_elapsed[row]),
+            "reference_vehicle_id": resampled.vehicle_ids[ref_row],
+            "reference_lap": int(resampled.laps[ref_row]),
+            "reference_grid_elapsed": float(resampled.grid_elapsed[ref_row]),
+            "time_delta": float(df["time_delta"].iloc[-1])
+        })
+        return tabular_response(meta, df, "trace", response_format)
+
+    rows = np.flatnonzero(resampled.vehicle_ids == vehicle_id) if vehicle_id else None
+    df = resampled.compare_all(references, rows)
+    meta.update({"vehicle_id": vehicle_id, "total_laps": len(df)})
+    return tabular_response(meta, df, "laps", response_format)
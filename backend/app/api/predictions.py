@@ -1,26 +1,43 @@
 """
 API endpoints for lap time predictions using XGBoost model
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Dict, Optional, List
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 import logging
-import os
-import pandas as pd
-from pathlib import Path
 
-from ..ml.lap_time_predictor import get_lap_time_predictor, LapTimePredictor
+from ..ml.lap_time_predictor import get_lap_time_predictor, get_model_path, evict_lap_time_predictor
 from ..data.lap_segmenter import get_lap_segmenter
 from ..data.feature_engine import get_feature_engine
-from ..data.loader import load_lap_times, load_race_telemetry_wide
+from ..data.telemetry_cache import get_telemetry_cache
+from ..services.training_jobs import get_training_job_manager, QueueFullError
+from ..core.compute import offload
 from ..core.config import settings
+from ..core.responses import FastJSONRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/predictions", tags=["predictions"])
+router = APIRouter(prefix="/predictions", tags=["predictions"], route_class=FastJSONRoute)
+
+
+@router.get("/laptime/train/{track}/status")
+async def get_training_status(track: str):
+    """
+    Get the most recent training job for a track.
+    Declared before the prediction routes so "train" is not taken as a track name.
+    
+    Returns:
+        Job record with status (queued/running/done/failed/cancelled), progress,
+        metrics and artifact path
+    """
+    jobs = get_training_job_manager().list_jobs(track=track)
+    if not jobs:
+        raise HTTPException(status_code=404, detail=f"No training jobs found for {track}")
+    return jobs[0]
 
 
 @router.get("/laptime/{track}/{race}/{vehicle_id}")
-async def predict_lap_time(
+@offload("predictions.laptime")
+def predict_lap_time(
     track: str,
     race: str,
     vehicle_id: str,
@@ -40,12 +57,8 @@ async def predict_lap_time(
         Predicted lap time and confidence metrics
     """
     try:
-        # Normalize track name for model file lookup
-        # The model files use title case for multi-word tracks
-        normalized_track = track.title() if " " in track.lower() else track.lower()
-        
         # Try to load offline model - this is now the preferred path
-        model_path = Path("models") / f"lap_time_predictor_{normalized_track}.pkl"
+        model_path = get_model_path(track)
         
         if not model_path.exists():
             logger.warning(f"Model not found at {model_path}")
@@ -57,7 +70,7 @@ async def predict_lap_time(
                 "predicted_lap_time": None,
                 "confidence": 0.0,
                 "status": "model_not_available",
-                "message": f"ML model for {track} not found. Run /predictions/laptime/train/{track} to train.",
+                "message": f"ML model for {track} not found. POST /predictions/laptime/train/{track} to train.",
                 "error": f"Missing model file: {model_path}"
             }
         
@@ -69,7 +82,7 @@ async def predict_lap_time(
             segmenter = get_lap_segmenter(str(settings.dataset_root))
             engine = get_feature_engine()
             
-            lap_data = segmenter.segment_by_lap(track, race, vehicle_id)
+            lap_data = segmenter.segment_by_lap(track, race, vehicle_id, cached=get_telemetry_cache().get(track, race))
             
             if not lap_data:
                 raise HTTPException(status_code=404, detail="No lap data found for vehicle")
@@ -129,7 +142,8 @@ async def predict_lap_time(
 
 
 @router.get("/laptime/train/{track}/{race}")
-async def train_lap_predictor(
+@offload("predictions.train")
+def train_lap_predictor(
     track: str,
     race: str
 ):
@@ -158,8 +172,9 @@ async def train_lap_predictor(
         metrics = predictor.train(X, y, feature_names)
         
         # Save model
-        model_path = f"models/lap_time_predictor_{track}.pkl"
+        model_path = str(get_model_path(track).with_suffix(".json"))
         predictor.save_model(model_path)
+        evict_lap_time_predictor(model_path)
         
         # Get feature importance
         importance = predictor.get_feature_importance(top_n=10)
@@ -179,7 +194,8 @@ async def train_lap_predictor(
 
 
 @router.get("/laptime/next/{track}/{race}/{vehicle_id}")
-async def predict_next_lap(
+@offload("predictions.next_lap")
+def predict_next_lap(
     track: str,
     race: str,
     vehicle_id: str
@@ -192,18 +208,14 @@ async def predict_next_lap(
         Prediction for upcoming lap
     """
     try:
-        # Normalize track name for model file lookup
-        # The model files use title case for multi-word tracks
-        normalized_track = track.title() if " " in track.lower() else track.lower()
-        
         # Try to load offline model - prefer this
-        model_path = Path("models") / f"lap_time_predictor_{normalized_track}.pkl"
+        model_path = get_model_path(track)
         
         if not model_path.exists():
             logger.warning(f"Model not found at {model_path}")
             return {
                 "status": "model_not_available",
-                "message": f"ML model for {track} not found. Run /predictions/laptime/train/{track} to train.",
+                "message": f"ML model for {track} not found. POST /predictions/laptime/train/{track} to train.",
                 "vehicle_id": vehicle_id,
                 "track": track,
                 "race": race
@@ -214,7 +226,7 @@ async def predict_next_lap(
         engine = get_feature_engine()
         
         # Get latest lap
-        lap_data = segmenter.segment_by_lap(track, race, vehicle_id)
+        lap_data = segmenter.segment_by_lap(track, race, vehicle_id, cached=get_telemetry_cache().get(track, race))
         latest_lap = max(lap_data.keys())
         
         # Calculate features from latest lap
@@ -249,135 +261,73 @@ async def predict_next_lap(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/laptime/train/{track}")
+@router.post("/laptime/train/{track}", status_code=202)
 async def train_lap_time_model(
     track: str,
-    background_tasks: BackgroundTasks,
     races: Optional[str] = "R1,R2"  # Comma-separated list of races
 ):
     """
     Train a lap time prediction model for a specific track.
-    This endpoint triggers background training using available race data.
+    Queues a training job in the background worker pool; identical active
+    requests share the same job.
     """
+    race_list = [r.strip() for r in races.split(",") if r.strip()] if races else ["R1", "R2"]
+    
     try:
-        # Create models directory if it doesn't exist
-        models_dir = Path("models")
-        models_dir.mkdir(exist_ok=True)
-        
-        race_list = races.split(",") if races else ["R1", "R2"]
-        
-        # Start training in background
-        background_tasks.add_task(
-            train_model_background, 
-            track, 
-            race_list
-        )
-        
-        return {
-            "status": "training_started",
-            "track": track,
-            "races": race_list,
-            "message": f"Model training started for {track}. Check /predictions/laptime/train/{track}/status for progress.",
-            "model_path": f"models/lap_time_predictor_{track}.pkl"
-        }
-        
+        job = get_training_job_manager().submit(track, race_list)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Error starting model training: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to start training: {str(e)}")
+    
+    return {
+        **job,
+        "status_url": f"/predictions/laptime/jobs/{job['job_id']}",
+        "model_path": str(get_model_path(track))
+    }
 
 
-async def train_model_background(track: str, races: List[str]):
-    """Background task to train the lap time model"""
+@router.post("/laptime/update/{track}/{race}", status_code=202)
+async def update_lap_time_model(track: str, race: str):
+    """
+    Incrementally update a track's model with laps completed since the last update.
+    The update is rejected (model unchanged) if it regresses validation MAE.
+    """
     try:
-        logger.info(f"Starting background training for {track} with races {races}")
-        
-        # Initialize predictor
-        predictor = LapTimePredictor()
-        
-        # Collect training data from all races
-        all_features = []
-        all_targets = []
-        
-        for race in races:
-            try:
-                logger.info(f"Loading data for {track} {race}")
-                
-                # Load basic lap time data
-                start, end, lapt = load_lap_times(settings.dataset_root, track, race)
-                
-                if lapt.empty:
-                    logger.warning(f"No lap data for {track} {race}")
-                    continue
-                
-                # Create simple features from lap times
-                features_df = create_simple_features(lapt)
-                
-                if not features_df.empty:
-                    all_features.append(features_df)
-                    logger.info(f"Added {len(features_df)} training samples from {track} {race}")
-                    
-            except Exception as e:
-                logger.error(f"Error loading data for {track} {race}: {e}")
-                continue
-        
-        if not all_features:
-            logger.error(f"No training data available for {track}")
-            return
-            
-        # Combine all features
-        combined_features = pd.concat(all_features, ignore_index=True)
-        logger.info(f"Total training samples: {len(combined_features)}")
-        
-        # Train the model
-        X = combined_features.drop(['lap_time'], axis=1)
-        y = combined_features['lap_time']
-        
-        # Train the model with the collected data
-        metrics = predictor.train_model(X, y)
-        
-        # Save the trained model
-        model_path = f"models/lap_time_predictor_{track}.pkl"
-        predictor.save_model(model_path)
-        
-        logger.info(f"Model training completed for {track}. MAE: {metrics.get('mae', 'N/A')}")
-        
-    except Exception as e:
-        logger.error(f"Background training failed for {track}: {e}")
+        job = get_training_job_manager().submit(track, [race], kind="incremental")
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return {
+        **job,
+        "status_url": f"/predictions/laptime/jobs/{job['job_id']}"
+    }
 
 
-def create_simple_features(lapt: pd.DataFrame) -> pd.DataFrame:
-    """Create simple features from lap time data for training"""
-    try:
-        features = []
-        
-        for vehicle_id in lapt['vehicle_id'].unique():
-            vehicle_laps = lapt[lapt['vehicle_id'] == vehicle_id].sort_values('timestamp')
-            
-            for i, (_, lap) in enumerate(vehicle_laps.iterrows()):
-                if pd.isna(lap['lap_time']) or lap['lap_time'] <= 0:
-                    continue
-                    
-                feature_row = {
-                    'lap_time': lap['lap_time'],
-                    'lap_number': lap.get('lap', i + 1),
-                    'tire_age': i + 1,  # Simple tire age approximation
-                    'vehicle_id_encoded': hash(vehicle_id) % 1000,  # Simple encoding
-                    'sector1': lap.get('sector1', lap['lap_time'] * 0.3),  # Rough sector approximation
-                    'sector2': lap.get('sector2', lap['lap_time'] * 0.4),
-                    'sector3': lap.get('sector3', lap['lap_time'] * 0.3),
-                }
-                
-                # Add previous lap time as feature if available
-                if i > 0:
-                    prev_lap = vehicle_laps.iloc[i-1]
-                    feature_row['prev_lap_time'] = prev_lap.get('lap_time', lap['lap_time'])
-                else:
-                    feature_row['prev_lap_time'] = lap['lap_time']
-                
-                features.append(feature_row)
-        
-        return pd.DataFrame(features)
-        
-    except Exception as e:
-        logger.error(f"Error creating features: {e}")
-        return pd.DataFrame()
+@router.get("/laptime/jobs")
+async def list_training_jobs(
+    status: Optional[str] = Query(None, description="Filter by job status"),
+    track: Optional[str] = Query(None, description="Filter by track")
+):
+    """List training jobs, newest first."""
+    jobs = get_training_job_manager().list_jobs(status=status, track=track)
+    return {"jobs": jobs, "total_jobs": len(jobs)}
+
+
+@router.get("/laptime/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    """Get a single training job record."""
+    job = get_training_job_manager().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job
+
+
+@router.delete("/laptime/jobs/{job_id}")
+async def cancel_training_job(job_id: str):
+    """Cancel a queued job, or request a running job to stop at its next checkpoint."""
+    job = get_training_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job
@@ -1,48 +1,31 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, List
 import pandas as pd
-import os
+from ..core.compute import offload
 from ..core.config import settings
+from ..core.responses import FastJSONRoute
+from ..data.catalog import get_dataset_catalog
+from ..services.materialize import get_materialized_store
 
-router = APIRouter(prefix="/results", tags=["results"])
+router = APIRouter(prefix="/results", tags=["results"], route_class=FastJSONRoute)
 
 
 @router.get("/{track}/{race}")
-async def get_race_results(track: str, race: str) -> Dict[str, Any]:
+@offload("results.race")
+def get_race_results(track: str, race: str) -> Dict[str, Any]:
     """
     Get race results from the CSV files.
     """
+    materialized = get_materialized_store().response(track, race, "results")
+    if materialized is not None:
+        return materialized
+    return race_results(track, race)
+
+
+def race_results(track: str, race: str) -> Dict[str, Any]:
+    """Parse the results CSV of a race into the results response (also materialized per race)."""
     try:
-        # Try different file naming patterns for different tracks
-        possible_files = []
-        
-        if track.lower() in ["cota", "sebring", "road america", "sonoma", "vir"]:
-            # These tracks have subdirectories
-            race_dir = f"Race {race.replace('R', '')}"
-            possible_files = [
-                os.path.join(settings.dataset_root, track, race_dir, f"03_Provisional Results_{race.replace('R', 'Race ')}_Anonymized.CSV"),
-                os.path.join(settings.dataset_root, track, race_dir, f"03_Provisional Results_ {race.replace('R', 'Race ')}_Anonymized.CSV"),  # COTA pattern with space
-                os.path.join(settings.dataset_root, track, race_dir, f"00_Results GR Cup {race.replace('R', 'Race ')} Official_Anonymized.CSV"),
-                os.path.join(settings.dataset_root, track, race_dir, f"03_Results_Anonymized.CSV"),  # Sonoma pattern
-            ]
-        elif track.lower() == "indianapolis":
-            # Indianapolis has different naming without _Anonymized
-            possible_files = [
-                os.path.join(settings.dataset_root, track, f"03_Provisional Results_{race.replace('R', 'Race ')}.CSV"),
-                os.path.join(settings.dataset_root, track, f"03_GR Cup {race.replace('R', 'Race ')} Official Results.CSV"),
-            ]
-        else:
-            # Default pattern for barber and other tracks
-            possible_files = [
-                os.path.join(settings.dataset_root, track, f"03_Provisional Results_{race.replace('R', 'Race ')}_Anonymized.CSV"),
-                os.path.join(settings.dataset_root, track, f"03_Results GR Cup {race.replace('R', 'Race ')} Official_Anonymized.CSV"),
-            ]
-        
-        results_file = None
-        for file_path in possible_files:
-            if os.path.exists(file_path):
-                results_file = file_path
-                break
+        results_file = get_dataset_catalog().resolve(track, race, "results")
         
         if not results_file:
             raise HTTPException(status_code=404, detail=f"Race results not found for {track} {race}")
@@ -99,36 +82,7 @@ async def get_race_results(track: str, race: str) -> Dict[str, Any]:
 async def get_weather_data(track: str, race: str):
     """Get weather data for a specific track and race"""
     try:
-        dataset_path = settings.dataset_root
-        race_num = race.replace('R', '')
-        
-        # Try different patterns for finding weather file
-        if track.lower() in ["cota", "sebring", "road america", "sonoma", "vir"]:
-            # These tracks have subdirectories
-            race_dir = f"Race {race_num}"
-            possible_files = [
-                os.path.join(dataset_path, track, race_dir, f"26_Weather_{race.replace('R', 'Race ')}_Anonymized.CSV"),
-                os.path.join(dataset_path, track, race_dir, f"26_Weather_ {race.replace('R', 'Race ')}_Anonymized.CSV"),  # COTA pattern with space
-                os.path.join(dataset_path, track, race_dir, f"26_Weather_Race {race_num}_Anonymized.CSV"),
-            ]
-        elif track.lower() == "indianapolis":
-            # Indianapolis has different naming without _Anonymized
-            possible_files = [
-                os.path.join(dataset_path, track, f"26_Weather_{race.replace('R', 'Race ')}.CSV"),
-                os.path.join(dataset_path, track, f"26_Weather_Race {race_num}.CSV"),
-            ]
-        else:
-            # Default pattern for barber and other tracks
-            possible_files = [
-                os.path.join(dataset_path, track, f"26_Weather_{race.replace('R', 'Race ')}_Anonymized.CSV"),
-                os.path.join(dataset_path, track, f"26_Weather_Race {race_num}_Anonymized.CSV"),
-            ]
-        
-        weather_file = None
-        for file_path in possible_files:
-            if os.path.exists(file_path):
-                weather_file = file_path
-                break
+        weather_file = get_dataset_catalog().resolve(track, race, "weather")
         
         if not weather_file:
             raise HTTPException(status_code=404, detail=f"Weather data not found for {track} {race}")
@@ -168,31 +122,7 @@ async def get_weather_data(track: str, race: str) -> Dict[str, Any]:
     Get weather data for a race.
     """
     try:
-        # Try different file naming patterns for different tracks
-        possible_files = []
-        
-        if track.lower() in ["cota", "sebring", "road america", "sonoma", "vir"]:
-            # These tracks have subdirectories
-            race_dir = f"Race {race.replace('R', '')}"
-            possible_files = [
-                os.path.join(settings.dataset_root, track, race_dir, f"26_Weather_{race.replace('R', 'Race ')}_Anonymized.CSV"),
-            ]
-        elif track.lower() == "indianapolis":
-            # Indianapolis has different naming without _Anonymized
-            possible_files = [
-                os.path.join(settings.dataset_root, track, f"26_Weather_{race.replace('R', 'Race ')}.CSV"),
-            ]
-        else:
-            # Default pattern for barber and other tracks
-            possible_files = [
-                os.path.join(settings.dataset_root, track, f"26_Weather_{race.replace('R', 'Race ')}_Anonymized.CSV"),
-            ]
-        
-        weather_file = None
-        for file_path in possible_files:
-            if os.path.exists(file_path):
-                weather_file = file_path
-                break
+        weather_file = get_dataset_catalog().resolve(track, race, "weather")
         
         if not weather_file:
             raise HTTPException(status_code=404, detail=f"Weather data not found for {track} {race}")
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional, Dict, Any, List
 import pandas as pd
+from ..core.compute import offload
 from ..core.config import settings
+from ..core.responses import FastJSONRoute
 from ..data.loader import load_lap_times
 from ..ml.race_simulator import (
     RaceSimulator,
@@ -10,12 +12,14 @@ from ..ml.race_simulator import (
     TireCompound
 )
 from ..ml.tire_degradation import TireDegradationModel
+from ..services.materialize import get_materialized_store
 
-router = APIRouter(prefix="/simulation", tags=["simulation"])
+router = APIRouter(prefix="/simulation", tags=["simulation"], route_class=FastJSONRoute)
 
 
 @router.get("/race/{track}/{race}")
-async def simulate_full_race(
+@offload("simulation.race")
+def simulate_full_race(
     track: str,
     race: str,
     strategies: Optional[str] = Query(
@@ -28,6 +32,15 @@ async def simulate_full_race(
     
     Returns lap-by-lap simulation data showing how different strategies perform.
     """
+    if strategies == "all":
+        materialized = get_materialized_store().response(track, race, "simulation")
+        if materialized is not None:
+            return materialized
+    return race_simulation(track, race, strategies)
+
+
+def race_simulation(track: str, race: str, strategies: str = "all") -> Dict[str, Any]:
+    """Compute the full-race simulation response (the default strategies are materialized per race)."""
     try:
         # Load race data to get baseline lap time and race length
         start, end, lapt = load_lap_times(settings.dataset_root, track, race)
@@ -42,7 +55,7 @@ async def simulate_full_race(
         if degradation_df.empty:
             raise HTTPException(status_code=404, detail="Insufficient data for simulation")
         
-        baseline_lap_time = float(degradation_df['baseline_time'].mean())
+        baseline_lap_time = degradation_df['baseline_time'].mean()
         total_laps = int(lapt['lap'].max())
         
         # Initialize simulator
@@ -111,7 +124,8 @@ async def simulate_full_race(
 
 
 @router.post("/race/custom")
-async def simulate_custom_strategy(
+@offload("simulation.custom")
+def simulate_custom_strategy(
     track: str,
     race: str,
     strategy_name: str,
@@ -138,7 +152,7 @@ async def simulate_custom_strategy(
         # Calculate baseline
         tire_model = TireDegradationModel()
         degradation_df = tire_model.calculate_lap_degradation(lapt)
-        baseline_lap_time = float(degradation_df['baseline_time'].mean())
+        baseline_lap_time = degradation_df['baseline_time'].mean()
         total_laps = int(lapt['lap'].max())
         
         # Parse strategy
@@ -213,7 +227,8 @@ async def simulate_custom_strategy(
 
 
 @router.get("/compare/{track}/{race}")
-async def compare_strategies(
+@offload("simulation.compare")
+def compare_strategies(
     track: str,
     race: str,
     strategy1: str = Query("one_stop_early", description="First strategy to compare"),
@@ -229,7 +244,7 @@ async def compare_strategies(
         start, end, lapt = load_lap_times(settings.dataset_root, track, race)
         tire_model = TireDegradationModel()
         degradation_df = tire_model.calculate_lap_degradation(lapt)
-        baseline_lap_time = float(degradation_df['baseline_time'].mean())
+        baseline_lap_time = degradation_df['baseline_time'].mean()
         total_laps = int(lapt['lap'].max())
         
         # Initialize simulator
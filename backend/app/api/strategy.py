@@ -1,16 +1,75 @@
 from fastapi import APIRouter, Query, HTTPException
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import pandas as pd
+from ..core.compute import offload
 from ..core.config import settings
+from ..core.responses import FastJSONRoute
 from ..data.loader import load_lap_times, load_race_telemetry_wide
 from ..ml.tire_degradation import TireDegradationModel
 from ..ml.pit_strategy import PitStrategyOptimizer
+from ..services.materialize import get_materialized_store
 
-router = APIRouter(prefix="/strategy", tags=["strategy"])
+router = APIRouter(prefix="/strategy", tags=["strategy"], route_class=FastJSONRoute)
+
+
+def _compute_pit_inputs(lapt: pd.DataFrame, vehicle_id: str) -> Tuple[float, float]:
+    """Baseline laptime and absolute degradation rate per lap of one vehicle."""
+    tire_model = TireDegradationModel()
+    degradation_df = tire_model.calculate_lap_degradation(lapt, vehicle_id)
+    
+    if degradation_df.empty:
+        raise HTTPException(status_code=404, detail=f"No data for vehicle {vehicle_id}")
+    
+    model_stats = tire_model.fit_degradation_model(degradation_df)
+    
+    baseline_time = float(degradation_df[degradation_df['vehicle_id'] == vehicle_id]['baseline_time'].iloc[0])
+    return baseline_time, abs(float(model_stats['avg_degradation_rate_per_lap']))
+
+
+def _vehicle_pit_inputs(track: str, race: str, vehicle_id: str) -> Tuple[float, float]:
+    """Pit model inputs of a vehicle, from the materialized race when current."""
+    materialized = get_materialized_store().load(track, race, "pit_inputs")
+    if materialized is not None and vehicle_id in materialized["vehicles"]:
+        entry = materialized["vehicles"][vehicle_id]
+        return entry["baseline_laptime"], entry["degradation_rate_per_lap"]
+    start, end, lapt = load_lap_times(settings.dataset_root, track, race)
+    return _compute_pit_inputs(lapt, vehicle_id)
+
+
+def race_pit_inputs(track: str, race: str) -> Dict[str, Any]:
+    """
+    Pit model inputs and the race-start pit window of every vehicle in a race
+    (materialized per race; the pit endpoints reuse the inputs).
+    """
+    start, end, lapt = load_lap_times(settings.dataset_root, track, race)
+    if lapt.empty:
+        raise HTTPException(status_code=404, detail="No lap time data found")
+    
+    total_race_laps = int(lapt['lap'].max())
+    pit_optimizer = PitStrategyOptimizer()
+    vehicles = {}
+    for vehicle_id in sorted(lapt['vehicle_id'].dropna().unique()):
+        try:
+            baseline_time, degradation_rate = _compute_pit_inputs(lapt, vehicle_id)
+        except HTTPException:
+            continue
+        vehicles[vehicle_id] = {
+            "baseline_laptime": baseline_time,
+            "degradation_rate_per_lap": degradation_rate,
+            "pit_window": pit_optimizer.calculate_pit_window(
+                current_lap=1,
+                total_race_laps=total_race_laps,
+                current_tire_age=0,
+                degradation_rate=degradation_rate,
+                baseline_laptime=baseline_time
+            )
+        }
+    return {"track": track, "race": race, "total_race_laps": total_race_laps, "vehicles": vehicles}
 
 
 @router.get("/pit/{track}/{race}/{vehicle_id}")
-async def get_pit_strategy(
+@offload("strategy.pit")
+def get_pit_strategy(
     track: str,
     race: str,
     vehicle_id: str,
@@ -27,20 +86,8 @@ async def get_pit_strategy(
     Returns pit window recommendations, time loss/gain projections, and strategic advice.
     """
     try:
-        # Load data and build degradation model
-        start, end, lapt = load_lap_times(settings.dataset_root, track, race)
-        
-        tire_model = TireDegradationModel()
-        degradation_df = tire_model.calculate_lap_degradation(lapt, vehicle_id)
-        
-        if degradation_df.empty:
-            raise HTTPException(status_code=404, detail=f"No data for vehicle {vehicle_id}")
-        
-        model_stats = tire_model.fit_degradation_model(degradation_df)
-        
-        # Get baseline laptime and degradation rate
-        baseline_time = float(degradation_df[degradation_df['vehicle_id'] == vehicle_id]['baseline_time'].iloc[0])
-        degradation_rate = model_stats['avg_degradation_rate_per_lap']
+        # Baseline laptime and degradation rate
+        baseline_time, degradation_rate = _vehicle_pit_inputs(track, race, vehicle_id)
         
         # Initialize pit strategy optimizer
         pit_optimizer = PitStrategyOptimizer()
@@ -50,7 +97,7 @@ async def get_pit_strategy(
             current_lap=current_lap,
             total_race_laps=total_race_laps,
             current_tire_age=current_tire_age,
-            degradation_rate=abs(degradation_rate) if degradation_rate < 0 else degradation_rate,
+            degradation_rate=degradation_rate,
             baseline_laptime=baseline_time,
             track_position=track_position,
             gap_to_leader=gap_to_leader,
@@ -64,7 +111,7 @@ async def get_pit_strategy(
             "current_lap": current_lap,
             "current_tire_age": current_tire_age,
             "baseline_laptime": baseline_time,
-            "degradation_rate_per_lap": abs(degradation_rate),
+            "degradation_rate_per_lap": degradation_rate,
             "pit_strategy": strategy
         }
         
@@ -73,7 +120,8 @@ async def get_pit_strategy(
 
 
 @router.get("/pit/{track}/{race}/{vehicle_id}/undercut")
-async def analyze_undercut_opportunity(
+@offload("strategy.undercut")
+def analyze_undercut_opportunity(
     track: str,
     race: str,
     vehicle_id: str,
@@ -88,19 +136,8 @@ async def analyze_undercut_opportunity(
     Determines if pitting before the competitor would result in a position gain.
     """
     try:
-        # Load data and build model
-        start, end, lapt = load_lap_times(settings.dataset_root, track, race)
-        
-        tire_model = TireDegradationModel()
-        degradation_df = tire_model.calculate_lap_degradation(lapt, vehicle_id)
-        
-        if degradation_df.empty:
-            raise HTTPException(status_code=404, detail=f"No data for vehicle {vehicle_id}")
-        
-        model_stats = tire_model.fit_degradation_model(degradation_df)
-        
-        baseline_time = float(degradation_df[degradation_df['vehicle_id'] == vehicle_id]['baseline_time'].iloc[0])
-        degradation_rate = abs(model_stats['avg_degradation_rate_per_lap'])
+        # Baseline laptime and degradation rate
+        baseline_time, degradation_rate = _vehicle_pit_inputs(track, race, vehicle_id)
         
         # Calculate undercut opportunity
         pit_optimizer = PitStrategyOptimizer()
@@ -131,7 +168,8 @@ async def analyze_undercut_opportunity(
 
 
 @router.post("/pit/{track}/{race}/{vehicle_id}/simulate")
-async def simulate_race_strategy(
+@offload("strategy.simulate")
+def simulate_race_strategy(
     track: str,
     race: str,
     vehicle_id: str,
@@ -146,19 +184,8 @@ async def simulate_race_strategy(
     Returns projected finish time and lap-by-lap analysis.
     """
     try:
-        # Load data and build model
-        start, end, lapt = load_lap_times(settings.dataset_root, track, race)
-        
-        tire_model = TireDegradationModel()
-        degradation_df = tire_model.calculate_lap_degradation(lapt, vehicle_id)
-        
-        if degradation_df.empty:
-            raise HTTPException(status_code=404, detail=f"No data for vehicle {vehicle_id}")
-        
-        model_stats = tire_model.fit_degradation_model(degradation_df)
-        
-        baseline_time = float(degradation_df[degradation_df['vehicle_id'] == vehicle_id]['baseline_time'].iloc[0])
-        degradation_rate = abs(model_stats['avg_degradation_rate_per_lap'])
+        # Baseline laptime and degradation rate
+        baseline_time, degradation_rate = _vehicle_pit_inputs(track, race, vehicle_id)
         
         # Run simulation
         pit_optimizer = PitStrategyOptimizer()
@@ -186,7 +213,8 @@ async def simulate_race_strategy(
 
 
 @router.get("/compare/{track}/{race}")
-async def compare_strategies(
+@offload("strategy.compare")
+def compare_strategies(
     track: str,
     race: str,
     vehicle_id: str = Query(..., description="Vehicle to analyze"),
@@ -200,19 +228,8 @@ async def compare_strategies(
     Evaluates 1-stop, 2-stop, and no-stop strategies.
     """
     try:
-        # Load data
-        start, end, lapt = load_lap_times(settings.dataset_root, track, race)
-        
-        tire_model = TireDegradationModel()
-        degradation_df = tire_model.calculate_lap_degradation(lapt, vehicle_id)
-        
-        if degradation_df.empty:
-            raise HTTPException(status_code=404, detail=f"No data for vehicle {vehicle_id}")
-        
-        model_stats = tire_model.fit_degradation_model(degradation_df)
-        
-        baseline_time = float(degradation_df[degradation_df['vehicle_id'] == vehicle_id]['baseline_time'].iloc[0])
-        degradation_rate = abs(model_stats['avg_degradation_rate_per_lap'])
+        # Baseline laptime and degradation rate
+        baseline_time, degradation_rate = _vehicle_pit_inputs(track, race, vehicle_id)
         
         pit_optimizer = PitStrategyOptimizer()
         
@@ -1,28 +1,78 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
 from typing import Optional
-from pathlib import Path
 import pandas as pd
-import numpy as np
 import logging
-from ..core.config import settings
-from ..data.loader import load_race_telemetry_wide
+from ..core.formats import negotiate_format, tabular_response
+from ..core.responses import FastJSONRoute
+from ..data.telemetry_cache import get_telemetry_cache, InvalidCursorError, DISTANCE_COLUMN
+from ..data.decimation import METHODS
+from ..data.spatial_index import SAMPLE_CELL_M
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+router = APIRouter(prefix="/telemetry", tags=["telemetry"], route_class=FastJSONRoute)
+
+
+def _parse_time(value: Optional[str], name: str) -> Optional[pd.Timestamp]:
+    if value is None:
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts
 
 
 @router.get("")
-def get_telemetry(track: str = Query("barber"), race: str = Query("R1"), vehicle_id: Optional[str] = None,
-                  lap_number: Optional[int] = None, limit: int = 1000):
-    """Get telemetry data for any supported track/race combination. Optimized for fast response."""
+def get_telemetry(request: Request, track: str = Query("barber"), race: str = Query("R1"), vehicle_id: Optional[str] = None,
+                  lap_number: Optional[int] = None, limit: int = 1000,
+                  cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+                  start_time: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+                  end_time: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+                  channels: Optional[str] = Query(None, description="Comma-separated channels, e.g. speed,gear"),
+                  format: Optional[str] = Query(None, description="'records' (default) or 'columns'"),
+                  target_points: Optional[int] = Query(None, description="Decimate to at most N points per vehicle"),
+                  decimation: str = Query("lttb", description="'lttb' or 'minmax'"),
+                  x_axis: str = Query("time", description="Decimation axis: 'time' or 'distance'")):
+    """
+    Get telemetry data for any supported track/race combination.
+
+    Rows are ordered by vehicle and timestamp and served in pages from an in-memory
+    cache. Pass the returned next_cursor back as ``cursor`` to fetch the next page;
+    it is null once the race (or filtered window) is exhausted.
+
+    ``format=columns`` returns ``rows`` as {column: values} arrays; an Accept header of
+    application/msgpack or application/vnd.apache.arrow.stream selects a binary encoding.
+
+    ``target_points`` returns a shape-preserving, chart-ready trace of the whole
+    window instead of a page (LTTB or per-bucket min/max over time or lap distance).
+    """
     try:
+        response_format = negotiate_format(request, format)
+
         # Validate inputs
         if limit <= 0 or limit > 10000:
             raise HTTPException(status_code=400, detail="Limit must be between 1 and 10000")
-            
+        if lap_number is not None and lap_number <= 0:
+            raise HTTPException(status_code=400, detail="Lap number must be positive")
+
+        if target_points is not None:
+            if target_points < 10 or target_points > 20000:
+                raise HTTPException(status_code=400, detail="target_points must be between 10 and 20000")
+            if cursor:
+                raise HTTPException(status_code=400, detail="cursor cannot be combined with target_points")
+            if decimation not in METHODS:
+                raise HTTPException(status_code=400, detail=f"decimation must be one of {list(METHODS)}")
+            if x_axis not in ("time", "distance"):
+                raise HTTPException(status_code=400, detail="x_axis must be 'time' or 'distance'")
+
+        start_ts = _parse_time(start_time, "start_time")
+        end_ts = _parse_time(end_time, "end_time")
+        if start_ts is not None and end_ts is not None and start_ts > end_ts:
+            raise HTTPException(status_code=400, detail="start_time must not be after end_time")
+
         # Load data with comprehensive error handling
         try:
-            df = load_race_telemetry_wide(settings.dataset_root, track=track, race=race)
+            cached = get_telemetry_cache().get(track, race)
         except (ValueError, FileNotFoundError) as e:
             logger.error(f"Failed to load telemetry data for {track}/{race}: {e}")
             raise HTTPException(status_code=404, detail=f"No telemetry data found for {track} {race}")
@@ -31,53 +81,99 @@ def get_telemetry(track: str = Query("barber"), race: str = Query("R1"), vehicle
             raise HTTPException(status_code=500, detail="Internal server error loading telemetry data")
 
         # Validate data exists
-        if df.empty:
+        if cached.frame.empty:
             raise HTTPException(status_code=404, detail=f"No telemetry data available for {track} {race}")
 
-        # Apply filters with validation
-        original_count = len(df)
-        
-        if vehicle_id:
-            if vehicle_id not in df["vehicle_id"].values:
-                available_vehicles = df["vehicle_id"].unique().tolist()
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"Vehicle {vehicle_id} not found. Available vehicles: {available_vehicles[:5]}"
-                )
-            df = df[df["vehicle_id"] == vehicle_id]
-        
-        if lap_number:
-            if lap_number <= 0:
-                raise HTTPException(status_code=400, detail="Lap number must be positive")
-            if "lap" in df.columns and lap_number not in df["lap"].values:
-                available_laps = sorted(df["lap"].unique().tolist()) if "lap" in df.columns else []
+        if vehicle_id and vehicle_id not in cached.vehicle_ranges:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Vehicle {vehicle_id} not found. Available vehicles: {cached.vehicles[:5]}"
+            )
+
+        selected_channels = None
+        if channels:
+            selected_channels = [c.strip() for c in channels.split(",") if c.strip()]
+            unknown = [c for c in selected_channels if c not in cached.channels]
+            if unknown:
                 raise HTTPException(
-                    status_code=404,
-                    detail=f"Lap {lap_number} not found. Available laps: {available_laps[:10]}"
+                    status_code=400,
+                    detail=f"Unknown channels {unknown}. Available channels: {cached.channels}"
                 )
-            df = df[df["lap"] == lap_number]
-    
-        # Limit to first N rows for fast response (can be increased per request)
-        df = df.head(limit)
-        
-        # Replace NaN values with None for JSON serialization
-        df = df.replace({np.nan: None})
-        
+
+        if target_points is not None:
+            if x_axis == "distance" and DISTANCE_COLUMN not in cached.channels:
+                raise HTTPException(status_code=400, detail=f"No {DISTANCE_COLUMN} channel for distance decimation")
+            df, source_rows = cached.trace(
+                vehicle_id=vehicle_id,
+                lap_number=lap_number,
+                start_time=start_ts,
+                end_time=end_ts,
+                channels=selected_channels,
+                target_points=target_points,
+                method=decimation,
+                x_axis=x_axis
+            )
+            meta = {
+                "track": track,
+                "race": race,
+                "vehicle_id": vehicle_id,
+                "lap_number": lap_number,
+                "start_time": start_time,
+                "end_time": end_time,
+                "count": len(df),
+                "original_count": len(cached.frame),
+                "decimation": {
+                    "method": decimation,
+                    "x_axis": x_axis,
+                    "target_points": target_points,
+                    "source_rows": source_rows
+                },
+                "next_cursor": None,
+                "has_more": False,
+                "columns": list(df.columns),
+                "status": "success"
+            }
+            return tabular_response(meta, df, "rows", response_format)
+
+        try:
+            page = cached.page(
+                vehicle_id=vehicle_id,
+                lap_number=lap_number,
+                start_time=start_ts,
+                end_time=end_ts,
+                channels=selected_channels,
+                cursor=cursor,
+                limit=limit
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        df = page.frame
+        if lap_number and df.empty and not cursor and not cached.index.has_lap(lap_number):
+            available_laps = cached.index.laps()
+            raise HTTPException(
+                status_code=404,
+                detail=f"Lap {lap_number} not found. Available laps: {available_laps[:10]}"
+            )
+
         # Return enhanced data with metadata
-        return {
+        meta = {
             "track": track,
             "race": race,
             "vehicle_id": vehicle_id,
             "lap_number": lap_number,
+            "start_time": start_time,
+            "end_time": end_time,
             "count": len(df),
-            "original_count": original_count,
+            "original_count": len(cached.frame),
             "limit_applied": limit,
-            "total_available": "Use limit parameter to control response size",
+            "next_cursor": page.next_cursor,
+            "has_more": page.next_cursor is not None,
             "columns": list(df.columns),
-            "rows": df.to_dict(orient="records"),
             "status": "success"
         }
-        
+        return tabular_response(meta, df, "rows", response_format)
+
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
@@ -85,3 +181,129 @@ def get_telemetry(track: str = Query("barber"), race: str = Query("R1"), vehicle
         # Log unexpected errors and return generic error
         logger.error(f"Unexpected error in get_telemetry: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/lod")
+def get_telemetry_lod(request: Request, track: str = Query("barber"), race: str = Query("R1"),
+                      vehicle_id: str = Query(..., description="Vehicle to aggregate"),
+                      start_time: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+                      end_time: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+                      channels: Optional[str] = Query(None, description="Comma-separated channels, e.g. speed,gear"),
+                      max_buckets: int = Query(2000, description="Upper bound on returned rows"),
+                      format: Optional[str] = Query(None, description="'records' (default) or 'columns'")):
+    """
+    Zoomable telemetry: min/max/mean per bucket from the level-of-detail pyramid.
+
+    The finest level (raw, 10x, 100x or 1000x) whose buckets covering the window
+    fit in ``max_buckets`` is used, so each zoom level reads a bounded number of rows.
+    """
+    response_format = negotiate_format(request, format)
+    if max_buckets < 10 or max_buckets > 20000:
+        raise HTTPException(status_code=400, detail="max_buckets must be between 10 and 20000")
+
+    start_ts = _parse_time(start_time, "start_time")
+    end_ts = _parse_time(end_time, "end_time")
+    if start_ts is not None and end_ts is not None and start_ts > end_ts:
+        raise HTTPException(status_code=400, detail="start_time must not be after end_time")
+
+    try:
+        cached = get_telemetry_cache().get(track, race)
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(f"Failed to load telemetry data for {track}/{race}: {e}")
+        raise HTTPException(status_code=404, detail=f"No telemetry data found for {track} {race}")
+
+    if vehicle_id not in cached.vehicle_ranges:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Vehicle {vehicle_id} not found. Available vehicles: {cached.vehicles[:5]}"
+        )
+
+    selected_channels = None
+    if channels:
+        selected_channels = [c.strip() for c in channels.split(",") if c.strip()]
+        unknown = [c for c in selected_channels if c not in cached.numeric_channels]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown channels {unknown}. Available channels: {cached.numeric_channels}"
+            )
+
+    factor, df = cached.pyramid.query(
+        vehicle_id,
+        start_ns=start_ts.value if start_ts is not None else None,
+        end_ns=end_ts.value if end_ts is not None else None,
+        max_buckets=max_buckets,
+        channels=selected_channels
+    )
+
+    meta = {
+        "track": track,
+        "race": race,
+        "vehicle_id": vehicle_id,
+        "start_time": start_time,
+        "end_time": end_time,
+        "level": factor,
+        "count": len(df),
+        "columns": list(df.columns),
+        "status": "success"
+    }
+    return tabular_response(meta, df, "rows", response_format)
+
+
+@router.get("/nearest")
+def get_nearest_samples(request: Request, track: str = Query("barber"), race: str = Query("R1"),
+                        lat: float = Query(..., description="Map point latitude, decimal degrees"),
+                        lon: float = Query(..., description="Map point longitude, decimal degrees"),
+                        radius_m: float = Query(10.0, description=f"Search radius in metres (max {SAMPLE_CELL_M:g})"),
+                        vehicle_id: Optional[str] = None,
+                        channels: Optional[str] = Query(None, description="Comma-separated channels, e.g. speed,gear"),
+                        format: Optional[str] = Query(None, description="'records' (default) or 'columns'")):
+    """
+    What every car was doing at a point on the track map.
+
+    Returns the closest sample of each (vehicle, lap) within ``radius_m`` of the
+    point, looked up in the race's GPS grid index rather than by scanning the race.
+    """
+    response_format = negotiate_format(request, format)
+    if not 0 < radius_m <= SAMPLE_CELL_M:
+        raise HTTPException(status_code=400, detail=f"radius_m must be greater than 0 and at most {SAMPLE_CELL_M:g}")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise HTTPException(status_code=400, detail="lat/lon must be decimal degrees")
+
+    try:
+        cached = get_telemetry_cache().get(track, race)
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(f"Failed to load telemetry data for {track}/{race}: {e}")
+        raise HTTPException(status_code=404, detail=f"No telemetry data found for {track} {race}")
+
+    if vehicle_id and vehicle_id not in cached.vehicle_ranges:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Vehicle {vehicle_id} not found. Available vehicles: {cached.vehicles[:5]}"
+        )
+    if cached.spatial is None:
+        raise HTTPException(status_code=404, detail=f"No GPS data recorded for {track} {race}")
+
+    selected_channels = None
+    if channels:
+        selected_channels = [c.strip() for c in channels.split(",") if c.strip()]
+        unknown = [c for c in selected_channels if c not in cached.channels]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown channels {unknown}. Available channels: {cached.channels}"
+            )
+
+    df = cached.samples_near(lat, lon, radius_m, vehicle_id=vehicle_id, channels=selected_channels)
+    meta = {
+        "track": track,
+        "race": race,
+        "lat": lat,
+        "lon": lon,
+        "radius_m": radius_m,
+        "vehicle_id": vehicle_id,
+        "count": len(df),
+        "vehicles": int(df["vehicle_id"].nunique()) if len(df) else 0,
+        "status": "success"
+    }
+    return tabular_response(meta, df, "samples", response_format)
@@ -1,55 +1,42 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from dataclasses import asdict
+import logging
+from ..core.responses import FastJSONRoute
+from ..data.catalog import get_dataset_catalog
+from ..data.telemetry_cache import get_telemetry_cache
+from ..data.track_segments import get_track_segment_store, SegmentationError
 
-router = APIRouter(prefix="/tracks", tags=["tracks"])
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/tracks", tags=["tracks"], route_class=FastJSONRoute)
+
+
+# Circuit coordinates for the weather API
+TRACK_LOCATIONS = {
+    "barber": {"lat": 33.5370, "lon": -86.0697},  # Barber Motorsports Park, Alabama
+    "indianapolis": {"lat": 39.7950, "lon": -86.2344},  # Indianapolis Motor Speedway, Indiana
+    "cota": {"lat": 30.1328, "lon": -97.6411},  # Circuit of The Americas, Texas
+    "road america": {"lat": 43.7985, "lon": -87.9897},  # Road America, Wisconsin
+    "sebring": {"lat": 27.4506, "lon": -81.3481},  # Sebring International Raceway, Florida
+    "sonoma": {"lat": 38.1617, "lon": -122.4544},  # Sonoma Raceway, California
+    "vir": {"lat": 36.5876, "lon": -79.2027},  # Virginia International Raceway, Virginia
+}
 
 
 @router.get("")
 def get_available_tracks():
-    """Get list of available tracks and races - fast hardcoded version."""
-    # Hardcoded list with GPS coordinates for weather API
+    """Get list of available tracks and races, as found in the dataset catalog."""
+    catalog = get_dataset_catalog()
+    found = catalog.tracks()
+    ordered = [t for t in TRACK_LOCATIONS if t in found] + [t for t in found if t not in TRACK_LOCATIONS]
     tracks = [
         {
-            "name": "barber",
-            "location": {"lat": 33.5370, "lon": -86.0697},  # Barber Motorsports Park, Alabama
-            "races": ["R1", "R2"],
-            "has_maps": False
-        },
-        {
-            "name": "indianapolis",
-            "location": {"lat": 39.7950, "lon": -86.2344},  # Indianapolis Motor Speedway, Indiana
-            "races": ["R1", "R2"],
-            "has_maps": False
-        }, 
-        {
-            "name": "COTA",
-            "location": {"lat": 30.1328, "lon": -97.6411},  # Circuit of The Americas, Texas
-            "races": ["R1", "R2"],
-            "has_maps": False
-        },
-        {
-            "name": "Road America",
-            "location": {"lat": 43.7985, "lon": -87.9897},  # Road America, Wisconsin
-            "races": ["R1", "R2"],
-            "has_maps": False
-        },
-        {
-            "name": "Sebring",
-            "location": {"lat": 27.4506, "lon": -81.3481},  # Sebring International Raceway, Florida
-            "races": ["R1", "R2"],
-            "has_maps": False
-        },
-        {
-            "name": "Sonoma",
-            "location": {"lat": 38.1617, "lon": -122.4544},  # Sonoma Raceway, California
-            "races": ["R1", "R2"],
-            "has_maps": False
-        },
-        {
-            "name": "VIR",
-            "location": {"lat": 36.5876, "lon": -79.2027},  # Virginia International Raceway, Virginia
-            "races": ["R1", "R2"],
+            "name": catalog.track_directory(track).name,
+            "location": TRACK_LOCATIONS.get(track),
+            "races": catalog.races(track),
             "has_maps": False
         }
+        for track in ordered if catalog.races(track)
     ]
     
     return {
@@ -61,8 +48,40 @@ def get_available_tracks():
 @router.get("/{track}/races")
 def get_track_races(track: str):
     """Get available races for a specific track."""
-    # Hardcoded race list
+    races = get_dataset_catalog().races(track)
+    if not races:
+        raise HTTPException(status_code=404, detail=f"No races found for track {track}")
     return {
         "track": track,
-        "races": ["R1", "R2"]
+        "races": races
+    }
+
+
+@router.get("/{track}/segments")
+def get_track_segments(
+    track: str,
+    race: str = Query("R1", description="Race to derive the map from if the track has none yet"),
+    include_line: bool = Query(False, description="Include the reference racing line (x/y metres per distance)")
+):
+    """Corner and straight segments of a track, derived once from GPS and lateral g."""
+    store = get_track_segment_store()
+    try:
+        try:
+            segment_map = store.get_map(track)
+        except SegmentationError:
+            segment_map = store.get_map(track, get_telemetry_cache().get(track, race))
+    except SegmentationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(f"Failed to load telemetry data for {track}/{race}: {e}")
+        raise HTTPException(status_code=404, detail=f"No telemetry data found for {track} {race}")
+
+    result = {
+        "track": track,
+        "reference": segment_map.reference,
+        "total_corners": sum(s.kind == "corner" for s in segment_map.segments),
+        "segments": [asdict(s) for s in segment_map.segments]
     }
+    if include_line:
+        result["line"] = segment_map.to_dict()["line"]
+    return result
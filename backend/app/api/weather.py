@@ -4,9 +4,10 @@ Weather API endpoints for fetching real-time weather data for race tracks.
 
 from fastapi import APIRouter, HTTPException
 from app.services.weather import WeatherService
-from app.api.tracks import get_available_tracks
+from app.api.tracks import TRACK_LOCATIONS
+from app.core.responses import FastJSONRoute
 
-router = APIRouter(prefix="/weather", tags=["weather"])
+router = APIRouter(prefix="/weather", tags=["weather"], route_class=FastJSONRoute)
 
 
 @router.get("/{track}")
@@ -23,27 +24,12 @@ async def get_track_weather(track: str):
     Raises:
         HTTPException: If track not found or weather API fails
     """
-    # Get track data including coordinates
-    tracks_data = get_available_tracks()
-    tracks = tracks_data.get("tracks", [])
-    
-    # Find the track
-    track_info = next(
-        (t for t in tracks if t["name"].lower() == track.lower()),
-        None
-    )
-    
-    if not track_info:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Track '{track}' not found. Available tracks: {[t['name'] for t in tracks]}"
-        )
-    
-    location = track_info.get("location")
+    # Coordinates are configured per track, whether or not its data is on disk
+    location = TRACK_LOCATIONS.get(track.lower())
     if not location:
         raise HTTPException(
-            status_code=500,
-            detail=f"Track '{track}' does not have location coordinates configured"
+            status_code=404,
+            detail=f"Track '{track}' not found. Available tracks: {list(TRACK_LOCATIONS)}"
         )
     
     try:
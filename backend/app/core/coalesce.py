@@ -0,0 +1,220 @@
+"""
+Request Coalescing
+Single-flight and a short-TTL response cache for expensive GET endpoints.
+
+When many clients ask for the same analytics URL at once (a race result goes
+live), only the first request runs the endpoint; identical requests arriving
+while it is in flight wait for it and get the same response. Successful
+responses are then kept for ``response_cache_ttl`` seconds with an ETag, so
+clients revalidating with If-None-Match get an empty 304.
+
+Requests are identical when method, path, query string (order-insensitive)
+and Accept header match - the Accept header picks the response format.
+The shared computation runs as its own task, so a client that disconnects
+does not cancel the work other clients are waiting for.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from .config import settings
+
+Headers = List[Tuple[bytes, bytes]]
+
+# Path segment naming a race ("R1", "r2")
+_RACE_SEGMENT = re.compile(r"^r\d+$")
+
+# Headers that describe one transfer rather than the content
+_HOP_HEADERS = {b"content-length", b"etag", b"cache-control", b"x-cache"}
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: Headers
+    body: bytes
+    etag: str
+    created: float
+
+
+class ResponseCache:
+    """LRU of recent GET responses keyed by request identity, each valid for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "not_modified": 0}
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedResponse):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path_prefix: Optional[str] = None):
+        """Drop every entry, or those whose path starts with ``path_prefix``."""
+        with self._lock:
+            for key in list(self._entries):
+                if path_prefix is None or key.split(" ", 2)[1].startswith(path_prefix):
+                    del self._entries[key]
+
+    def invalidate_race(self, track: str, race: Optional[str] = None):
+        """
+        Drop entries whose path names ``track`` as a segment and either ``race``
+        or no race at all (track-wide endpoints such as pre-event prediction).
+        """
+        track, race = track.lower(), race.lower() if race else None
+        with self._lock:
+            for key in list(self._entries):
+                segments = key.split(" ", 2)[1].lower().split("/")
+                if track not in segments:
+                    continue
+                if race is None or race in segments or not any(_RACE_SEGMENT.match(s) for s in segments):
+                    del self._entries[key]
+
+
+def request_key(scope) -> str:
+    query = sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+    accept = dict(scope.get("headers") or []).get(b"accept", b"").decode("latin-1")
+    return f"{scope['method']} {scope['path']} {urlencode(query)} {accept}"
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def _etag_matches(if_none_match: Optional[bytes], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.decode("latin-1").split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class CoalescingMiddleware:
+    """ASGI middleware applying single-flight and the response cache to GETs under ``prefixes``."""
+
+    def __init__(self, app, prefixes: Sequence[str], cache: Optional["ResponseCache"] = None):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.cache = cache
+        self._in_flight: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+
+    def _applies(self, scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and any(scope["path"].startswith(p) for p in self.prefixes)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        cache = self.cache or get_response_cache()
+        key = request_key(scope)
+        if_none_match = dict(scope.get("headers") or []).get(b"if-none-match")
+
+        entry = cache.get(key)
+        if entry is not None:
+            cache.stats["hits"] += 1
+            await self._send(send, entry, if_none_match, cache, "HIT")
+            return
+
+        loop = asyncio.get_running_loop()
+        flight = self._in_flight.get(key)
+        if flight is not None and flight[0] is loop:
+            cache.stats["coalesced"] += 1
+            entry = await asyncio.shield(flight[1])
+            await self._send(send, entry, if_none_match, cache, "COALESCED")
+            return
+
+        cache.stats["misses"] += 1
+        task = loop.create_task(self._compute(scope, key, cache))
+        self._in_flight[key] = (loop, task)
+        task.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+        entry = await asyncio.shield(task)
+        await self._send(send, entry, if_none_match, cache, "MISS")
+
+    async def _compute(self, scope, key: str, cache: "ResponseCache") -> CachedResponse:
+        """Run the endpoint once with a synthetic body-less request and capture its response."""
+        start: Dict = {}
+        chunks: List[bytes] = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        headers = [(k, v) for k, v in start.get("headers", []) if k.lower() not in _HOP_HEADERS]
+        entry = CachedResponse(
+            status=start.get("status", 500),
+            headers=headers,
+            body=body,
+            etag=_etag(body),
+            created=time.monotonic()
+        )
+        if entry.status == 200:
+            cache.put(key, entry)
+        return entry
+
+    async def _send(self, send, entry: CachedResponse, if_none_match: Optional[bytes],
+                    cache: "ResponseCache", state: str):
+        headers = list(entry.headers)
+        if entry.status == 200:
+            headers += [
+                (b"etag", entry.etag.encode()),
+                (b"cache-control", f"max-age={int(cache.ttl)}".encode()),
+            ]
+        headers.append((b"x-cache", state.encode()))
+
+        if entry.status == 200 and _etag_matches(if_none_match, entry.etag):
+            cache.stats["not_modified"] += 1
+            keep = [(k, v) for k, v in headers if k.lower() not in (b"content-type",)]
+            await send({"type": "http.response.start", "status": 304, "headers": keep})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers.append((b"content-length", str(len(entry.body)).encode()))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+# Singleton instance
+_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Get singleton response cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(ttl=settings.response_cache_ttl)
+    return _cache
@@ -0,0 +1,218 @@
+"""
+Compute Dispatch
+Runs CPU-bound handler bodies (pandas, XGBoost, race simulation) off the event loop.
+
+Handlers hand their synchronous work to one bounded thread pool. Every endpoint
+name also has its own concurrency limit, so a burst on one slow analytics
+endpoint cannot take all the workers, and a bounded number of waiting requests:
+past that the request is turned away with 503 instead of queueing forever.
+Queue wait and run time are recorded per endpoint (see /health/compute).
+
+Threads rather than processes: handler bodies read the in-process telemetry
+cache and loaded models, and the heavy numpy/pandas/XGBoost loops release the GIL.
+"""
+from __future__ import annotations
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Recent samples kept per endpoint for percentiles
+STATS_WINDOW = 256
+
+# Endpoint groups that need a tighter limit than COMPUTE_ENDPOINT_LIMIT
+ENDPOINT_LIMITS = {
+    "simulation": 1,
+    "predictions.train": 1,
+}
+
+
+class ComputeBusyError(RuntimeError):
+    """Raised when an endpoint already has COMPUTE_MAX_QUEUE requests waiting."""
+
+
+@dataclass
+class EndpointStats:
+    limit: int
+    submitted: int = 0
+    completed: int = 0
+    errors: int = 0
+    rejected: int = 0
+    waiting: int = 0
+    running: int = 0
+    max_queue_ms: float = 0.0
+    queue_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+    run_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+
+    def snapshot(self) -> Dict[str, Any]:
+        def percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+            if not samples:
+                return {"p50": None, "p95": None}
+            p50, p95 = np.percentile(np.fromiter(samples, dtype=float), [50, 95])
+            return {"p50": round(float(p50), 2), "p95": round(float(p95), 2)}
+
+        return {
+            "limit": self.limit,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "waiting": self.waiting,
+            "running": self.running,
+            "queue_ms": {**percentiles(self.queue_ms), "max": round(self.max_queue_ms, 2)},
+            "run_ms": percentiles(self.run_ms)
+        }
+
+
+class ComputeDispatcher:
+    """Bounded thread pool with per-endpoint concurrency limits and queue-time metrics."""
+
+    def __init__(self, max_workers: int, default_limit: int, max_queue: int,
+                 limits: Optional[Dict[str, int]] = None):
+        self.max_workers = max_workers
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.limits = dict(limits or {})
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats: Dict[str, EndpointStats] = {}
+        self._semaphores: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="compute")
+            return self._executor
+
+    def limit_for(self, name: str) -> int:
+        """Limit for an endpoint name ("group.endpoint"), falling back to its group, then the default."""
+        if name in self.limits:
+            return self.limits[name]
+        return self.limits.get(name.split(".", 1)[0], self.default_limit)
+
+    def _stats_for(self, name: str) -> EndpointStats:
+        with self._lock:
+            if name not in self._stats:
+                self._stats[name] = EndpointStats(limit=self.limit_for(name))
+            return self._stats[name]
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        # asyncio primitives belong to one loop; a new loop (tests, reload) gets fresh ones
+        loop = asyncio.get_running_loop()
+        entry = self._semaphores.get(name)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Semaphore(self.limit_for(name)))
+            self._semaphores[name] = entry
+        return entry[1]
+
+    async def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` in the pool under endpoint ``name`` and return its result."""
+        stats = self._stats_for(name)
+        with self._lock:
+            if stats.waiting >= self.max_queue:
+                stats.rejected += 1
+                raise ComputeBusyError(f"Too many pending requests for {name}")
+            stats.submitted += 1
+            stats.waiting += 1
+        queued_at = time.perf_counter()
+        state = {"started": False, "abandoned": False}
+
+        def call():
+            begin = time.perf_counter()
+            with self._lock:
+                if state["abandoned"]:
+                    return None
+                state["started"] = True
+                stats.waiting -= 1
+                stats.running += 1
+                wait_ms = (begin - queued_at) * 1000
+                stats.queue_ms.append(wait_ms)
+                stats.max_queue_ms = max(stats.max_queue_ms, wait_ms)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    stats.running -= 1
+                    stats.run_ms.append((time.perf_counter() - begin) * 1000)
+
+        semaphore = self._semaphore(name)
+        try:
+            async with semaphore:
+                result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+        except Exception:
+            with self._lock:
+                stats.errors += 1
+            raise
+        finally:
+            with self._lock:
+                if not state["started"]:
+                    # Cancelled (client gone) before a worker picked it up
+                    state["abandoned"] = True
+                    stats.waiting -= 1
+        with self._lock:
+            stats.completed += 1
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pool configuration and per-endpoint counters."""
+        with self._lock:
+            endpoints = {name: stats.snapshot() for name, stats in sorted(self._stats.items())}
+            return {
+                "workers": self.max_workers,
+                "default_limit": self.default_limit,
+                "max_queue": self.max_queue,
+                "running": sum(s["running"] for s in endpoints.values()),
+                "waiting": sum(s["waiting"] for s in endpoints.values()),
+                "endpoints": endpoints
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def offload(name: str):
+    """
+    Decorator for synchronous route handlers: the handler body runs through the
+    compute dispatcher under ``name`` while the event loop keeps serving.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await get_compute_dispatcher().run(name, fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def run_compute(name: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run one blocking call from an async handler through the compute dispatcher."""
+    return await get_compute_dispatcher().run(name, fn, *args, **kwargs)
+
+
+# Singleton instance
+_dispatcher = None
+
+def get_compute_dispatcher() -> ComputeDispatcher:
+    """Get singleton compute dispatcher instance."""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = ComputeDispatcher(
+            max_workers=settings.compute_workers,
+            default_limit=settings.compute_endpoint_limit,
+            max_queue=settings.compute_max_queue,
+            limits=ENDPOINT_LIMITS
+        )
+    return _dispatcher
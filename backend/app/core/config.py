@@ -9,8 +9,51 @@ class Settings(BaseModel):
     dataset_root: Path = Path(os.getenv("DATASET_ROOT", "./data")).resolve()
     default_track: str = os.getenv("DEFAULT_TRACK", "barber")
     default_race: str = os.getenv("DEFAULT_RACE", "R1")
+    # Number of parsed races kept in the in-memory telemetry cache
+    telemetry_cache_size: int = int(os.getenv("TELEMETRY_CACHE_SIZE", "4"))
+    # Trained model artifacts and background training job records
+    models_dir: Path = Path(os.getenv("MODELS_DIR", "./models")).resolve()
+    jobs_dir: Path = Path(os.getenv("JOBS_DIR", "./models/jobs")).resolve()
+    # Derived per-track corner/straight segment maps
+    segments_dir: Path = Path(os.getenv("SEGMENTS_DIR", "./models/segments")).resolve()
+    # Precomputed per-race analytics, refreshed in the background at startup when enabled,
+    # computing up to MATERIALIZE_WORKERS races in parallel
+    materialized_dir: Path = Path(os.getenv("MATERIALIZED_DIR", "./models/materialized")).resolve()
+    materialize_on_startup: bool = os.getenv("MATERIALIZE_ON_STARTUP", "0") == "1"
+    materialize_workers: int = int(os.getenv("MATERIALIZE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Parsed race frames kept as memory-mapped column files shared by all worker
+    # processes (start.py turns this on when WORKERS > 1)
+    shared_frames: bool = os.getenv("SHARED_FRAMES", "0") == "1"
+    shared_frames_dir: Path = Path(os.getenv("SHARED_FRAMES_DIR", "./models/frames")).resolve()
+    # Races ("track:race,...") whose telemetry and lap time model are preloaded after startup
+    warmup_sessions: str = os.getenv("WARMUP_SESSIONS", "")
+    warmup_models: bool = os.getenv("WARMUP_MODELS", "1") == "1"
+    # Poll dataset_root and models_dir for changed files every N seconds (0 = off)
+    watch_interval: float = float(os.getenv("WATCH_INTERVAL", "10"))
+    training_workers: int = int(os.getenv("TRAINING_WORKERS", "1"))
+    # Lock file electing the one worker process that runs the scheduler and watcher
+    background_lock: Path = Path(os.getenv("BACKGROUND_LOCK", "./models/.background.lock")).resolve()
+    # Thread pool for CPU-bound request handlers, per-endpoint concurrency and waiting requests
+    compute_workers: int = int(os.getenv("COMPUTE_WORKERS", str(min(8, os.cpu_count() or 2))))
+    compute_endpoint_limit: int = int(os.getenv("COMPUTE_ENDPOINT_LIMIT", "2"))
+    compute_max_queue: int = int(os.getenv("COMPUTE_MAX_QUEUE", "16"))
+    # GET path prefixes whose identical concurrent requests share one computation,
+    # and how long successful responses are then served from cache (0 = coalesce only)
+    coalesce_paths: str = os.getenv("COALESCE_PATHS", "/analytics,/strategy")
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", "10"))
+    max_pending_training_jobs: int = int(os.getenv("MAX_PENDING_TRAINING_JOBS", "4"))
+    # Live sessions ("track:race,...") refreshed by incremental model updates every N seconds (0 = off)
+    live_sessions: str = os.getenv("LIVE_SESSIONS", "")
+    incremental_update_interval: int = int(os.getenv("INCREMENTAL_UPDATE_INTERVAL", "0"))
     # Make gemini_api_key optional to prevent crashes when not set
     gemini_api_key: Optional[str] = os.getenv("GEMINI_API_KEY")
+    # AI insights: provider ("gemini" or "stub"), per-call timeout, parallel calls and response cache
+    insights_provider: str = os.getenv("INSIGHTS_PROVIDER", "gemini")
+    insights_model: str = os.getenv("INSIGHTS_MODEL", "gemini-2.5-flash")
+    insights_timeout: float = float(os.getenv("INSIGHTS_TIMEOUT", "30"))
+    insights_max_concurrent: int = int(os.getenv("INSIGHTS_MAX_CONCURRENT", "2"))
+    insights_cache_dir: Path = Path(os.getenv("INSIGHTS_CACHE_DIR", "./models/insights")).resolve()
+    insights_cache_ttl: int = int(os.getenv("INSIGHTS_CACHE_TTL", "21600"))
     
     class Config:
         arbitrary_types_allowed = True
@@ -0,0 +1,120 @@
+"""
+Tabular Response Formats
+Serializes DataFrame-backed endpoint payloads as records, column arrays,
+MessagePack or Arrow IPC.
+
+``records`` (the default) keeps the historical list-of-dicts shape. The other
+formats never build a dict per row: each column is converted once with a
+vectorized NaN -> None pass and emitted as an array, so column names appear a
+single time in the payload.
+
+Binary formats are chosen with the ``Accept`` header and need their optional
+packages (``msgpack``, ``pyarrow``). When a package is missing the response
+falls back to columnar JSON, which is a valid answer to any Accept header.
+"""
+from __future__ import annotations
+import json
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+RECORDS = "records"
+COLUMNS = "columns"
+MSGPACK = "msgpack"
+ARROW = "arrow"
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def negotiate_format(request: Request, format: Optional[str] = None) -> str:
+    """Pick the response format from the Accept header, then the ``format`` query value."""
+    accept = request.headers.get("accept", "")
+    if ARROW_MEDIA_TYPE in accept:
+        if pa is not None:
+            return ARROW
+        logger.debug("pyarrow not installed, falling back to columnar JSON")
+        return COLUMNS
+    if any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        if msgpack is not None:
+            return MSGPACK
+        logger.debug("msgpack not installed, falling back to columnar JSON")
+        return COLUMNS
+
+    format = (format or RECORDS).lower()
+    if format not in (RECORDS, COLUMNS):
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Use 'records' or 'columns'")
+    return format
+
+
+def _column_values(series: pd.Series) -> list:
+    """One column as a JSON-ready list: NaN/NaT -> None, datetimes -> ISO strings."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.tz_convert("UTC") if series.dt.tz is not None else series
+        strings = np.datetime_as_string(values.to_numpy(dtype="datetime64[ns]"), unit="ms", timezone="UTC")
+        return np.where(series.isna().to_numpy(), None, strings).tolist()
+
+    if series.dtype.kind in "iub":
+        return series.tolist()  # No missing values possible
+
+    mask = series.isna().to_numpy()
+    if not mask.any():
+        return series.tolist()
+    values = series.to_numpy(dtype=object)
+    values[mask] = None
+    return values.tolist()
+
+
+def frame_to_columns(df: pd.DataFrame) -> Dict[str, list]:
+    """{column: values} without materializing per-row dicts."""
+    return {str(col): _column_values(df[col]) for col in df.columns}
+
+
+def frame_to_records(df: pd.DataFrame) -> List[dict]:
+    """The historical row-oriented shape."""
+    return df.replace({np.nan: None}).to_dict(orient="records")
+
+
+def _arrow_payload(meta: dict, df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({b"meta": json.dumps(meta, default=str).encode()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def tabular_response(meta: dict, df: pd.DataFrame, key: str, format: str):
+    """
+    Build an endpoint result with ``df`` placed under ``key`` in the requested format.
+
+    Returns a dict for the JSON formats (records / columns) and a binary
+    Response for MessagePack and Arrow. For Arrow the remaining payload keys
+    travel as JSON in the schema metadata under ``meta``.
+    """
+    if format == RECORDS:
+        return {**meta, key: frame_to_records(df)}
+
+    if format == ARROW:
+        return Response(_arrow_payload({**meta, "format": ARROW}, df), media_type=ARROW_MEDIA_TYPE)
+
+    payload = {**meta, "format": COLUMNS, "columns": [str(c) for c in df.columns], key: frame_to_columns(df)}
+    if format == MSGPACK:
+        return Response(msgpack.packb(payload, use_bin_type=True, default=str), media_type=MSGPACK_MEDIA_TYPES[0])
+    return payload
@@ -0,0 +1,60 @@
+"""
+Background service leader.
+
+With several server workers (start.py, WORKERS > 1) every worker runs the app
+lifespan, but the incremental update scheduler and the data watcher must only
+run once. The first worker to take an exclusive lock on ``background_lock``
+runs them. The lock is held for the life of the process and released by the
+OS when it exits, so a worker started to replace it takes over.
+"""
+from __future__ import annotations
+import logging
+import os
+from pathlib import Path
+from typing import Optional, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, every worker runs the services
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_lock_file: Optional[TextIO] = None
+
+
+def acquire_leadership(lock_path: Path) -> bool:
+    """Try to become the process that runs background services (non-blocking, idempotent)."""
+    global _lock_file
+    if _lock_file is not None or fcntl is None:
+        return True
+
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(lock_path, "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        logger.info("Background services run in another worker")
+        return False
+
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    _lock_file = lock_file
+    logger.info(f"Worker {os.getpid()} runs background services")
+    return True
+
+
+def release_leadership():
+    global _lock_file
+    if _lock_file is not None:
+        fcntl.flock(_lock_file, fcntl.LOCK_UN)
+        _lock_file.close()
+        _lock_file = None
+
+
+def is_leader() -> bool:
+    return _lock_file is not None or fcntl is None
@@ -0,0 +1,118 @@
+"""
+Fast JSON Responses
+orjson-backed response class and route class used by every router.
+
+Endpoints return plain dicts full of NumPy and pandas values. FastAPI would walk
+those through ``jsonable_encoder`` and the standard ``json`` module; instead
+FastJSONRoute hands results straight to FastJSONResponse, which serializes
+NumPy arrays/scalars, datetimes and NaN natively and only falls back to a
+Python ``default`` hook for pandas objects.
+
+If orjson is not installed the same types are handled by the standard
+library encoder, just more slowly.
+"""
+from __future__ import annotations
+import asyncio
+import dataclasses
+import datetime
+import decimal
+import enum
+import functools
+import json
+from pathlib import PurePath
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def _default(obj: Any) -> Any:
+    """Convert values the serializer cannot handle natively."""
+    if obj is None or obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, (pd.Timedelta, datetime.timedelta)):
+        return obj.total_seconds()
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        return None if isinstance(value, float) and value != value else value
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient="records")
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, PurePath):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, with NumPy/pandas/datetime support."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Route that serializes endpoint results with FastJSONResponse.
+
+    The endpoint is wrapped (keeping its signature for dependency injection) so
+    dict results become a FastJSONResponse directly, skipping jsonable_encoder.
+    Responses returned explicitly by an endpoint pass through untouched.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, self._wrap_endpoint(endpoint), **kwargs)
+
+    def _to_response(self, content: Any) -> Any:
+        if isinstance(content, Response):
+            return content
+        return FastJSONResponse(content, status_code=self.status_code or 200)
+
+    def _wrap_endpoint(self, endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        if getattr(endpoint, "_fast_json", False):
+            return endpoint  # include_router re-creates routes from the wrapped endpoint
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                return self._to_response(await endpoint(*args, **kwargs))
+        else:
+            # Stays a plain function so FastAPI keeps running it in the threadpool
+            @functools.wraps(endpoint)
+            def wrapper(*args, **kwargs):
+                return self._to_response(endpoint(*args, **kwargs))
+        wrapper._fast_json = True
+        return wrapper
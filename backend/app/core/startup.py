@@ -0,0 +1,133 @@
+"""
+Startup profile: how long importing and starting the app took, phase by
+phase, and which heavy optional modules are loaded.
+
+scikit-learn, XGBoost, SciPy, the Gemini client and httpx are imported by the
+code that uses them, so a cold start only pays for FastAPI, pandas and NumPy.
+``profile_imports`` checks that in a fresh interpreter; run
+
+    python -m app.core.startup [--top N]
+
+for a report of the slowest packages imported by ``app.main``.
+"""
+from __future__ import annotations
+import argparse
+import json
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Modules that must not be imported until a request needs them
+HEAVY_MODULES = ("sklearn", "xgboost", "scipy", "google.generativeai", "httpx")
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def loaded_heavy_modules() -> List[str]:
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+class StartupProfile:
+    """Durations of the import and startup phases of this process."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.heavy_at_startup: Optional[List[str]] = None
+        self.started_at: Optional[float] = None
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = round(seconds * 1000, 1)
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def finish(self):
+        """Mark startup complete, noting which heavy modules it loaded."""
+        self.heavy_at_startup = loaded_heavy_modules()
+        self.started_at = time.time()
+
+    def report(self) -> dict:
+        return {
+            "phases_ms": dict(self.phases),
+            "total_ms": round(sum(self.phases.values()), 1),
+            "started_at": self.started_at,
+            "heavy_modules_at_startup": self.heavy_at_startup,
+            "heavy_modules_loaded": loaded_heavy_modules()
+        }
+
+
+def profile_imports(module: str = "app.main", top: int = 15) -> dict:
+    """
+    Import ``module`` in a fresh interpreter with ``-X importtime``.
+
+    Returns the wall time of the import, the heavy modules it loaded and the
+    ``top`` slowest packages by cumulative import time (a package's time
+    includes the packages it imports, so entries overlap).
+    """
+    code = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - started\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'seconds': seconds, 'heavy_modules': heavy}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+
+    own_package = module.split(".")[0]
+    packages: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        if package != own_package:
+            packages[package] = max(packages.get(package, 0), int(cumulative))
+
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "seconds": round(summary["seconds"], 3),
+        "heavy_modules": summary["heavy_modules"],
+        "packages_ms": {name: round(us / 1000, 1) for name, us in slowest}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report what importing the app costs")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15, help="Slowest packages to list")
+    args = parser.parse_args()
+
+    profile = profile_imports(args.module, args.top)
+    print(f"import {profile['module']}: {profile['seconds']:.3f}s")
+    print(f"heavy modules loaded: {', '.join(profile['heavy_modules']) or 'none'}")
+    for name, ms in profile["packages_ms"].items():
+        print(f"  {ms:>9.1f} ms  {name}")
+
+
+# Singleton instance
+_profile = None
+
+def get_startup_profile() -> StartupProfile:
+    """Get singleton startup profile instance."""
+    global _profile
+    if _profile is None:
+        _profile = StartupProfile()
+    return _profile
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Dataset Catalog
+One scan of ``dataset_root`` mapping (track, race, file kind) to files.
+
+The tracks ship with different directory layouts ("Race 1" folders or flat
+track directories) and filename conventions (``R1_barber_lap_time.csv``,
+``COTA_lap_time_R1.csv``, ``sebring_telemetry_R1.csv`` ...). Rather than every
+loader probing its own list of candidate paths on each call, the catalog walks
+the tree once, classifies each file by kind and race from its name and
+location, and answers lookups from a dict. It records size and mtime per file
+and is rescanned on demand (``refresh``) when the dataset changes.
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..core.config import settings
+
+# Normalized track name -> directory name in the dataset
+TRACK_DIRECTORIES = {
+    "barber": "barber",
+    "indianapolis": "indianapolis",
+    "cota": "COTA",
+    "vir": "VIR",
+    "road america": "Road America",
+    "sebring": "Sebring",
+    "sonoma": "Sonoma",
+}
+
+# File kinds, first matching pattern wins (lap start/end before lap time)
+FILE_KINDS: List[Tuple[str, re.Pattern]] = [
+    ("lap_start", re.compile(r"lap_start", re.I)),
+    ("lap_end", re.compile(r"lap_end", re.I)),
+    ("lap_time", re.compile(r"lap_time", re.I)),
+    ("telemetry", re.compile(r"telemetry", re.I)),
+    ("sectors", re.compile(r"endurance", re.I)),
+    ("results", re.compile(r"results", re.I)),
+    ("weather", re.compile(r"weather", re.I)),
+]
+
+_RACE_FOLDER = re.compile(r"^race\s*(\d+)$", re.I)
+_RACE_IN_NAME = [
+    re.compile(r"(?:^|[_\s])R(\d+)(?=[_.\s]|$)"),  # R1_barber_lap_time.csv, COTA_lap_time_R1.csv
+    re.compile(r"Race\s*(\d+)", re.I),            # 03_Provisional Results_Race 1_Anonymized.CSV
+]
+
+
+def normalize_track(track: str) -> str:
+    return track.strip().lower()
+
+
+def _kind_of(name: str) -> str:
+    for kind, pattern in FILE_KINDS:
+        if pattern.search(name):
+            return kind
+    return "other"
+
+
+def _race_of(relative: Path) -> Optional[str]:
+    for part in relative.parts[1:-1]:
+        match = _RACE_FOLDER.match(part)
+        if match:
+            return f"R{match.group(1)}"
+    for pattern in _RACE_IN_NAME:
+        match = pattern.search(relative.name)
+        if match:
+            return f"R{match.group(1)}"
+    return None
+
+
+def _priority(entry: "CatalogEntry") -> Tuple:
+    # Provisional results are the complete classification; official files can omit DNFs
+    return ("provisional" not in entry.path.name.lower(), entry.path.name)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    track: str
+    race: Optional[str]
+    kind: str
+    path: Path
+    size: int
+    mtime_ns: int
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["path"] = str(self.path)
+        return data
+
+
+class DatasetCatalog:
+    """Index of the files under a dataset root by (track, race, kind)."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.scanned_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._directories: Dict[str, Path] = {}
+        self._files: Dict[Tuple[str, Optional[str], str], List[CatalogEntry]] = {}
+        self._entries: Dict[Path, CatalogEntry] = {}
+
+    def _scan(self):
+        known = {name.lower(): track for track, name in TRACK_DIRECTORIES.items()}
+        directories: Dict[str, Path] = {}
+        entries: Dict[Path, CatalogEntry] = {}
+        if self.root.is_dir():
+            for track_dir in sorted(self.root.iterdir()):
+                if not track_dir.is_dir() or track_dir.name.startswith("."):
+                    continue
+                track = known.get(track_dir.name.lower(), normalize_track(track_dir.name))
+                directories[track] = track_dir
+                for dirpath, dirnames, filenames in os.walk(track_dir):
+                    dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+                    for filename in sorted(filenames):
+                        if filename.startswith("."):
+                            continue
+                        path = Path(dirpath) / filename
+                        stat = path.stat()
+                        entries[path] = CatalogEntry(
+                            track=track,
+                            race=_race_of(path.relative_to(self.root)),
+                            kind=_kind_of(filename),
+                            path=path,
+                            size=stat.st_size,
+                            mtime_ns=stat.st_mtime_ns
+                        )
+
+        files: Dict[Tuple[str, Optional[str], str], List[CatalogEntry]] = {}
+        for entry in entries.values():
+            files.setdefault((entry.track, entry.race, entry.kind), []).append(entry)
+        for group in files.values():
+            group.sort(key=_priority)
+        return directories, files, entries
+
+    def rescan(self) -> Dict[str, List[CatalogEntry]]:
+        """Rescan the dataset root; returns the entries added, removed and changed since the last scan."""
+        directories, files, entries = self._scan()
+        with self._lock:
+            previous = self._entries
+            self._directories, self._files, self._entries = directories, files, entries
+            self.scanned_at = time.time()
+        return {
+            "added": [entries[p] for p in sorted(entries.keys() - previous.keys())],
+            "removed": [previous[p] for p in sorted(previous.keys() - entries.keys())],
+            "changed": [
+                entries[p] for p in sorted(entries.keys() & previous.keys())
+                if (entries[p].size, entries[p].mtime_ns) != (previous[p].size, previous[p].mtime_ns)
+            ],
+        }
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """Rescan the dataset root; returns the paths added, removed and changed since the last scan."""
+        return {change: [str(e.path) for e in found] for change, found in self.rescan().items()}
+
+    def _ensure(self):
+        if self.scanned_at is None:
+            self.refresh()
+
+    def track_directory(self, track: str) -> Optional[Path]:
+        self._ensure()
+        return self._directories.get(normalize_track(track))
+
+    def files(self, track: str, race: Optional[str], kind: str) -> List[CatalogEntry]:
+        """Files of one kind for a race (``race=None``: files not tied to a race), best first."""
+        self._ensure()
+        return list(self._files.get((normalize_track(track), race.upper() if race else None, kind), ()))
+
+    def resolve(self, track: str, race: Optional[str], kind: str) -> Optional[Path]:
+        found = self.files(track, race, kind)
+        return found[0].path if found else None
+
+    def require(self, track: str, race: Optional[str], kind: str) -> Path:
+        """Like ``resolve`` but raises FileNotFoundError naming what is missing."""
+        path = self.resolve(track, race, kind)
+        if path is None:
+            raise FileNotFoundError(f"No {kind} file for {track} {race} in {self.root}")
+        return path
+
+    def race_files(self, track: str, race: str) -> List[CatalogEntry]:
+        """Every file belonging to one race."""
+        self._ensure()
+        key = (normalize_track(track), race.upper())
+        return sorted(
+            (e for (t, r, _), group in self._files.items() if (t, r) == key for e in group),
+            key=lambda e: e.path
+        )
+
+    def tracks(self) -> List[str]:
+        self._ensure()
+        return sorted(self._directories)
+
+    def races(self, track: str) -> List[str]:
+        """Races of a track that have lap timing data."""
+        self._ensure()
+        track = normalize_track(track)
+        return sorted({r for (t, r, kind) in self._files if t == track and r and kind == "lap_time"})
+
+    def summary(self) -> dict:
+        """Tracks with their races and the file kinds found for each race."""
+        self._ensure()
+        tracks = []
+        for track in self.tracks():
+            races = sorted({r for (t, r, _) in self._files if t == track and r})
+            tracks.append({
+                "track": track,
+                "directory": self._directories[track].name,
+                "races": {
+                    race: sorted(kind for (t, r, kind) in self._files if (t, r) == (track, race))
+                    for race in races
+                },
+                "files": sum(1 for e in self._entries.values() if e.track == track),
+                "bytes": sum(e.size for e in self._entries.values() if e.track == track)
+            })
+        return {"root": str(self.root), "scanned_at": self.scanned_at, "tracks": tracks}
+
+
+# Singleton instances, one per dataset root
+_catalogs: Dict[Path, DatasetCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_dataset_catalog(root: Optional[Path] = None) -> DatasetCatalog:
+    """Get the catalog of ``root`` (default ``settings.dataset_root``)."""
+    root = Path(root if root is not None else settings.dataset_root).resolve()
+    with _catalogs_lock:
+        if root not in _catalogs:
+            _catalogs[root] = DatasetCatalog(root)
+        return _catalogs[root]
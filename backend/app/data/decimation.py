@@ -0,0 +1,158 @@
+"""
+Telemetry Decimation
+Shape-preserving downsampling of telemetry traces for charts.
+
+Two selectors are provided, both returning row *indices* so the caller keeps
+real samples (no interpolation):
+- LTTB (Largest-Triangle-Three-Buckets): picks the visually most significant
+  point per bucket; best for line charts.
+- Min-max: keeps the minimum and maximum of each bucket; fully vectorized and
+  guarantees peaks (top speed, max brake pressure) survive.
+
+Multi-channel frames are decimated per channel with a share of the point budget
+and the selected rows are unioned, so every channel keeps its shape.
+"""
+from __future__ import annotations
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+LTTB = "lttb"
+MINMAX = "minmax"
+METHODS = (LTTB, MINMAX)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of ``n_out`` points chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Bucket averages are computed in
+    one vectorized pass; only the (inherently sequential) point selection loops
+    over buckets.
+    """
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # n_out - 2 buckets over the interior points; spacing >= 1 so none is empty
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # The bucket after the last interior bucket is the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _first_index_per_bucket(mask: np.ndarray, bucket: np.ndarray) -> np.ndarray:
+    idx = np.flatnonzero(mask)
+    _, first = np.unique(bucket[idx], return_index=True)
+    return idx[first]
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the min and max sample in each of ``n_out // 2`` equal-count buckets."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    n_buckets = max(1, n_out // 2)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+
+    nan = np.isnan(y)
+    low = np.where(nan, np.inf, y)
+    high = np.where(nan, -np.inf, y)
+    mins = np.minimum.reduceat(low, starts)
+    maxs = np.maximum.reduceat(high, starts)
+
+    selected = np.concatenate([
+        _first_index_per_bucket(low == mins[bucket], bucket),
+        _first_index_per_bucket(high == maxs[bucket], bucket),
+        [0, n - 1]
+    ])
+    return np.unique(selected)
+
+
+def select_indices(x: np.ndarray, y: np.ndarray, n_out: int, method: str = LTTB) -> np.ndarray:
+    """Decimate one channel, ignoring missing samples. Returns positions into y."""
+    valid = np.flatnonzero(~np.isnan(np.asarray(y, dtype=float)))
+    if len(valid) <= n_out:
+        return valid
+    if method == MINMAX:
+        chosen = minmax_indices(y[valid], n_out)
+    else:
+        chosen = lttb_indices(x[valid], y[valid], n_out)
+    return valid[chosen]
+
+
+def decimate_rows(
+    x: np.ndarray,
+    values: pd.DataFrame,
+    target_points: int,
+    method: str = LTTB
+) -> np.ndarray:
+    """
+    Positions (0..len-1) of the rows to keep so each channel in ``values`` keeps its shape.
+
+    Each channel gets an equal share of ``target_points``; the result is the sorted
+    union and never exceeds ``target_points`` rows.
+    """
+    n = len(values)
+    if n <= target_points:
+        return np.arange(n)
+
+    channels = [c for c in values.columns if pd.api.types.is_numeric_dtype(values[c])]
+    if not channels:
+        return np.unique(np.linspace(0, n - 1, target_points).astype(np.int64))
+
+    per_channel = max(3, target_points // len(channels))
+    selected = [select_indices(x, values[c].to_numpy(dtype=float), per_channel, method) for c in channels]
+    rows = np.unique(np.concatenate(selected + [np.array([0, n - 1])]))
+    if len(rows) > target_points:
+        # Rounding up to 3 points per channel can overshoot with many channels
+        rows = rows[np.unique(np.linspace(0, len(rows) - 1, target_points).astype(np.int64))]
+    return rows
+
+
+def time_axis(timestamps: np.ndarray) -> np.ndarray:
+    """Seconds since the first sample (float), from int64 nanosecond timestamps."""
+    if len(timestamps) == 0:
+        return np.array([], dtype=float)
+    return (timestamps - timestamps[0]) / 1e9
+
+
+def decimate_frame(
+    df: pd.DataFrame,
+    target_points: int,
+    method: str = LTTB,
+    x_column: str = "timestamp",
+    channels: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Decimate a single-vehicle frame ordered along ``x_column``."""
+    if x_column == "timestamp":
+        x = time_axis(df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64"))
+    else:
+        x = df[x_column].to_numpy(dtype=float)
+    values = df[channels] if channels else df.drop(columns=[c for c in ("vehicle_id", "timestamp", "lap") if c in df.columns])
+    return df.iloc[decimate_rows(x, values, target_points, method)]
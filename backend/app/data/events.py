@@ -0,0 +1,277 @@
+"""
+Telemetry Events
+Brake zones and gear shifts extracted from a whole race in one vectorized pass.
+
+The input is a wide frame sorted by (vehicle_id, timestamp). Sparse channels
+are forward-filled within each vehicle, then event edges are found with shifted
+comparisons (reset at vehicle boundaries) and per-event aggregates with
+``reduceat`` - no per-lap or per-event Python loops.
+
+Events are kept in compact tables (categorical vehicle ids, int16 laps,
+float32 measures) with row offsets per (vehicle, lap). Brake zones are matched
+to corners by clustering their start distances across the field, which gives
+per-corner brake point consistency without a track map.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .telemetry_index import DISTANCE_COLUMN
+
+BRAKE_THRESHOLD = 10.0  # bar, front + rear
+CORNER_GAP_M = 150.0
+MIN_CORNER_LAP_FRACTION = 0.5
+
+
+def _vehicle_starts(df: pd.DataFrame) -> np.ndarray:
+    """True on the first row of each vehicle (the whole frame is one vehicle without vehicle_id)."""
+    first = np.zeros(len(df), dtype=bool)
+    if len(df) == 0:
+        return first
+    first[0] = True
+    if "vehicle_id" in df.columns:
+        vehicles = df["vehicle_id"].to_numpy()
+        first[1:] = vehicles[1:] != vehicles[:-1]
+    return first
+
+
+def ffill_within(values: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs without carrying values across the ``first`` boundaries."""
+    positions = np.arange(len(values))
+    source = np.maximum.accumulate(np.where(~np.isnan(values), positions, -1))
+    group_start = np.maximum.accumulate(np.where(first, positions, 0))
+    filled = values[np.maximum(source, 0)] if len(values) else values.astype(float)
+    return np.where(source >= group_start, filled, np.nan)
+
+
+def _channel(df: pd.DataFrame, name: str, first: np.ndarray) -> Optional[np.ndarray]:
+    if name not in df.columns:
+        return None
+    return ffill_within(df[name].to_numpy(dtype=float), first)
+
+
+def _event_keys(df: pd.DataFrame, rows: np.ndarray) -> Dict[str, np.ndarray]:
+    keys = {
+        "vehicle_id": df["vehicle_id"].to_numpy()[rows] if "vehicle_id" in df.columns else np.full(len(rows), ""),
+        "lap": pd.to_numeric(df["lap"], errors="coerce").fillna(-1).to_numpy(dtype=np.int16)[rows]
+               if "lap" in df.columns else np.full(len(rows), -1, dtype=np.int16),
+        "timestamp": df["timestamp"].to_numpy()[rows],
+    }
+    return keys
+
+
+def extract_brake_zones(
+    df: pd.DataFrame,
+    threshold: float = BRAKE_THRESHOLD,
+    distance_col: str = DISTANCE_COLUMN
+) -> pd.DataFrame:
+    """
+    Every braking zone in a frame sorted by (vehicle_id, timestamp).
+
+    A zone is a run of samples with front + rear pressure above ``threshold``.
+    Columns: vehicle_id, lap, timestamp (zone start), start_distance,
+    end_distance, brake_distance, duration (s), peak_pressure and, when a speed
+    channel exists, entry_speed and min_speed.
+    """
+    first = _vehicle_starts(df)
+    front = _channel(df, "pbrake_f", first)
+    if front is None or len(df) == 0:
+        return pd.DataFrame()
+    rear = _channel(df, "pbrake_r", first)
+    total = front + (np.nan_to_num(rear) if rear is not None else 0.0)
+
+    on = total > threshold
+    last = np.concatenate([first[1:], [True]])
+    prev_on = np.concatenate([[False], on[:-1]]) & ~first
+    next_on = np.concatenate([on[1:], [False]]) & ~last
+    starts = np.flatnonzero(on & ~prev_on)
+    ends = np.flatnonzero(on & ~next_on)
+    if len(starts) == 0:
+        return pd.DataFrame()
+
+    # Rows between one zone's end and the next start are all off, so each
+    # reduceat segment only aggregates its own zone
+    peak = np.maximum.reduceat(np.where(on, total, -np.inf), starts)
+    ns = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+
+    zones = _event_keys(df, starts)
+    distance = _channel(df, distance_col, first)
+    if distance is not None:
+        zones["start_distance"] = distance[starts].astype(np.float32)
+        zones["end_distance"] = distance[ends].astype(np.float32)
+        length = distance[ends] - distance[starts]
+        zones["brake_distance"] = np.where(length >= 0, length, np.nan).astype(np.float32)  # NaN across the line
+    zones["duration"] = ((ns[ends] - ns[starts]) / 1e9).astype(np.float32)
+    zones["peak_pressure"] = peak.astype(np.float32)
+
+    speed = _channel(df, "speed", first)
+    if speed is not None:
+        zones["entry_speed"] = speed[starts].astype(np.float32)
+        zones["min_speed"] = np.fmin.reduceat(np.where(on, speed, np.nan), starts).astype(np.float32)
+    return pd.DataFrame(zones)
+
+
+def extract_gear_shifts(df: pd.DataFrame, distance_col: str = DISTANCE_COLUMN) -> pd.DataFrame:
+    """
+    Every gear change in a frame sorted by (vehicle_id, timestamp).
+
+    Columns: vehicle_id, lap, timestamp (first sample in the new gear),
+    from_gear, to_gear, shift_rpm (last RPM in the old gear), rpm_after,
+    time_in_gear (s since the vehicle's previous shift) and distance.
+    """
+    first = _vehicle_starts(df)
+    gear = _channel(df, "gear", first)
+    if gear is None or len(df) == 0:
+        return pd.DataFrame()
+
+    prev_gear = np.concatenate([[np.nan], gear[:-1]])
+    prev_gear[first] = np.nan
+    rows = np.flatnonzero((gear != prev_gear) & ~np.isnan(gear) & ~np.isnan(prev_gear))
+    if len(rows) == 0:
+        return pd.DataFrame()
+
+    shifts = _event_keys(df, rows)
+    shifts["from_gear"] = prev_gear[rows].astype(np.int8)
+    shifts["to_gear"] = gear[rows].astype(np.int8)
+
+    rpm = _channel(df, "nmot", first)
+    if rpm is not None:
+        shifts["shift_rpm"] = rpm[rows - 1].astype(np.float32)
+        shifts["rpm_after"] = rpm[rows].astype(np.float32)
+
+    ns = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+    vehicle_of_row = np.cumsum(first) - 1
+    same_vehicle = np.concatenate([[False], vehicle_of_row[rows[1:]] == vehicle_of_row[rows[:-1]]])
+    gaps = np.concatenate([[0], np.diff(ns[rows])]) / 1e9
+    shifts["time_in_gear"] = np.where(same_vehicle, gaps, np.nan).astype(np.float32)
+
+    distance = _channel(df, distance_col, first)
+    if distance is not None:
+        shifts["distance"] = distance[rows].astype(np.float32)
+    return pd.DataFrame(shifts)
+
+
+@dataclass
+class EventTable:
+    """Events in (vehicle, time) order with row offsets per (vehicle, lap)."""
+    frame: pd.DataFrame
+    rows: Dict[Tuple[str, int], np.ndarray] = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "EventTable":
+        if frame.empty:
+            return cls(frame)
+        frame = frame.assign(vehicle_id=frame["vehicle_id"].astype("category"))
+        groups = frame.groupby(["vehicle_id", "lap"], sort=False, observed=True).indices
+        return cls(frame, {(str(v), int(l)): rows for (v, l), rows in groups.items()})
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def select(self, vehicle_id: Optional[str] = None, lap: Optional[int] = None) -> pd.DataFrame:
+        if self.frame.empty or (vehicle_id is None and lap is None):
+            return self.frame
+        if vehicle_id is not None and lap is not None:
+            return self.frame.iloc[self.rows.get((vehicle_id, lap), np.array([], dtype=int))]
+        keys = [k for k in self.rows if (vehicle_id is None or k[0] == vehicle_id) and (lap is None or k[1] == lap)]
+        if not keys:
+            return self.frame.iloc[:0]
+        return self.frame.iloc[np.sort(np.concatenate([self.rows[k] for k in keys]))]
+
+
+@dataclass
+class RaceEvents:
+    """Brake zone and gear shift tables for one race."""
+    brake_zones: EventTable
+    gear_shifts: EventTable
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame) -> "RaceEvents":
+        return cls(
+            brake_zones=EventTable.from_frame(extract_brake_zones(frame)),
+            gear_shifts=EventTable.from_frame(extract_gear_shifts(frame))
+        )
+
+
+def assign_corners(
+    zones: pd.DataFrame,
+    gap_m: float = CORNER_GAP_M,
+    min_lap_fraction: float = MIN_CORNER_LAP_FRACTION
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster brake start distances across the field into corners.
+
+    Sorted start distances are split wherever consecutive starts are more than
+    ``gap_m`` apart. Clusters braked in on fewer than ``min_lap_fraction`` of
+    all laps (a lift, a lock-up, a pit entry) are dropped.
+
+    Returns (corner per zone, -1 if none; corner reference distances).
+    """
+    if zones.empty or "start_distance" not in zones.columns:
+        return np.full(len(zones), -1), np.array([])
+    start = zones["start_distance"].to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(start))
+    order = valid[np.argsort(start[valid], kind="stable")]
+    if len(order) == 0:
+        return np.full(len(zones), -1), np.array([])
+
+    cluster = np.concatenate([[0], np.cumsum(np.diff(start[order]) > gap_m)])
+    lap_keys = zones["vehicle_id"].astype(str).to_numpy()[order] + "|" + zones["lap"].astype(str).to_numpy()[order]
+    total_laps = len(set(lap_keys))
+    laps_per_cluster = pd.Series(lap_keys).groupby(cluster).nunique().to_numpy()
+    keep = laps_per_cluster >= min_lap_fraction * total_laps
+
+    corner_of_cluster = np.where(keep, np.cumsum(keep) - 1, -1)
+    corners = np.full(len(zones), -1)
+    corners[order] = corner_of_cluster[cluster]
+    reference = pd.Series(start[order]).groupby(cluster).median().to_numpy()[keep]
+    return corners, reference
+
+
+def brake_point_consistency(zones: pd.DataFrame, vehicle_id: str) -> pd.DataFrame:
+    """
+    Per-corner brake point statistics of one vehicle, against the field.
+
+    Only the first zone of each lap in a corner counts. Columns: corner,
+    corner_distance, laps, brake_start_mean/std/min/max, field_brake_start_mean,
+    brake_later_than_field (m), peak_pressure_mean/std, duration_mean.
+    """
+    corners, reference = assign_corners(zones)
+    if len(reference) == 0:
+        return pd.DataFrame()
+    zones = zones.assign(corner=corners)
+    zones = zones[zones["corner"] >= 0].drop_duplicates(["vehicle_id", "lap", "corner"])
+
+    field_mean = zones.groupby("corner")["start_distance"].mean()
+    own = zones[zones["vehicle_id"] == vehicle_id]
+    if own.empty:
+        return pd.DataFrame()
+
+    stats = own.groupby("corner").agg(
+        laps=("lap", "nunique"),
+        brake_start_mean=("start_distance", "mean"),
+        brake_start_std=("start_distance", "std"),
+        brake_start_min=("start_distance", "min"),
+        brake_start_max=("start_distance", "max"),
+        peak_pressure_mean=("peak_pressure", "mean"),
+        peak_pressure_std=("peak_pressure", "std"),
+        duration_mean=("duration", "mean")
+    )
+    stats.insert(0, "corner_distance", reference[stats.index])
+    stats["field_brake_start_mean"] = field_mean.reindex(stats.index)
+    stats["brake_later_than_field"] = stats["brake_start_mean"] - stats["field_brake_start_mean"]
+    return stats.reset_index().astype({c: float for c in stats.columns if c != "laps"})
+
+
+def shift_summary(shifts: pd.DataFrame) -> pd.DataFrame:
+    """Shift count and RPM spread per (from_gear, to_gear)."""
+    if shifts.empty or "shift_rpm" not in shifts.columns:
+        return pd.DataFrame()
+    return (
+        shifts.groupby(["from_gear", "to_gear"])["shift_rpm"]
+        .agg(count="count", shift_rpm_mean="mean", shift_rpm_std="std")
+        .reset_index()
+    )
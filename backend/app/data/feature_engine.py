@@ -7,6 +7,9 @@ import numpy as np
 from typing import Dict, List, Optional
 import logging
 
+from .lap_comparison import DEFAULT_STEP_M, compare_laps
+from .events import extract_brake_zones, extract_gear_shifts
+
 logger = logging.getLogger(__name__)
 
 
@@ -164,34 +167,34 @@ class FeatureEngine:
     def calculate_speed_delta(
         df_telemetry: pd.DataFrame,
         reference_lap: pd.DataFrame,
-        distance_col: str = 'Laptrigger_lapdist_dls'
+        distance_col: str = 'Laptrigger_lapdist_dls',
+        step_m: float = DEFAULT_STEP_M
     ) -> pd.DataFrame:
         """
         Calculate speed delta vs reference lap at each track position.
         
+        Both laps are resampled onto a shared distance grid (see lap_comparison);
+        speed comes from the speed channel or, if absent, from elapsed time per
+        grid step.
+        
         Args:
             df_telemetry: Current lap telemetry
             reference_lap: Reference lap telemetry (e.g., best lap)
             distance_col: Column with distance from start/finish
+            step_m: Grid spacing in metres
         
         Returns:
-            DataFrame with speed deltas
+            DataFrame with distance, speed, speed_ref, speed_delta and the
+            cumulative time_delta (positive = behind the reference)
         """
-        # This is complex - requires GPS/distance interpolation
-        # Simplified version: just compare average speeds in distance buckets
-        
-        if distance_col not in df_telemetry.columns:
+        if distance_col not in df_telemetry.columns or distance_col not in reference_lap.columns:
             logger.warning(f"Distance column {distance_col} not found")
             return pd.DataFrame()
         
-        # Create distance buckets (e.g., every 100m)
-        df_telemetry['distance_bucket'] = (df_telemetry[distance_col] // 100) * 100
-        reference_lap['distance_bucket'] = (reference_lap[distance_col] // 100) * 100
-        
-        # Calculate average speed per bucket (estimated from GPS or distance changes)
-        # TODO: Implement proper speed calculation
-        
-        return pd.DataFrame()
+        comparison = compare_laps(df_telemetry, reference_lap, step_m=step_m, channels=['speed'], distance_col=distance_col)
+        if comparison.empty:
+            return comparison
+        return comparison[['distance', 'speed', 'speed_ref', 'speed_delta', 'time_delta']]
     
     @staticmethod
     def calculate_brake_point_metrics(
@@ -207,17 +210,16 @@ class FeatureEngine:
         if 'pbrake_f' not in df_telemetry.columns or distance_col not in df_telemetry.columns:
             return {}
         
-        total_brake = df_telemetry['pbrake_f'] + df_telemetry.get('pbrake_r', 0)
-        brake_on = total_brake > 10
-        
-        # Find brake zones (where braking starts/ends)
-        brake_starts = df_telemetry.loc[brake_on.diff() == True, distance_col].tolist()
-        brake_ends = df_telemetry.loc[brake_on.diff() == False, distance_col].tolist()
+        zones = extract_brake_zones(df_telemetry.sort_values('timestamp', kind='stable'), distance_col=distance_col)
+        if zones.empty:
+            return {'num_brake_zones': 0, 'brake_zone_distances': [], 'total_brake_distance': 0}
         
         return {
-            'num_brake_zones': len(brake_starts),
-            'brake_zone_distances': brake_starts,
-            'total_brake_distance': (brake_ends[0] - brake_starts[0]) if brake_starts and brake_ends else 0
+            'num_brake_zones': len(zones),
+            'brake_zone_distances': zones['start_distance'].round(1).tolist(),
+            'total_brake_distance': float(zones['brake_distance'].sum()),
+            'avg_peak_pressure': float(zones['peak_pressure'].mean()),
+            'avg_brake_duration': float(zones['duration'].mean())
         }
     
     @staticmethod
@@ -233,14 +235,17 @@ class FeatureEngine:
         if 'gear' not in df_telemetry.columns or 'nmot' not in df_telemetry.columns:
             return {}
         
-        # Find gear shifts
-        gear_shifts = df_telemetry['gear'].diff() != 0
-        shift_rpms = df_telemetry.loc[gear_shifts, 'nmot'].tolist()
+        shifts = extract_gear_shifts(df_telemetry.sort_values('timestamp', kind='stable'))
+        if shifts.empty:
+            return {'total_shifts': 0, 'avg_shift_rpm': 0, 'shift_rpm_variance': 0}
         
+        upshifts = shifts[shifts['to_gear'] > shifts['from_gear']]
         return {
-            'total_shifts': gear_shifts.sum(),
-            'avg_shift_rpm': np.mean(shift_rpms) if shift_rpms else 0,
-            'shift_rpm_variance': np.var(shift_rpms) if shift_rpms else 0
+            'total_shifts': len(shifts),
+            'avg_shift_rpm': float(shifts['shift_rpm'].mean()),
+            'shift_rpm_variance': float(shifts['shift_rpm'].var(ddof=0)),
+            'upshifts': len(upshifts),
+            'avg_upshift_rpm': float(upshifts['shift_rpm'].mean()) if len(upshifts) else 0
         }
 
 
@@ -0,0 +1,371 @@
+"""
+Lap Comparison
+Distance-aligned comparison of laps against a reference lap.
+
+Each lap is resampled onto a common distance grid:
+- The lap distance channel (``Laptrigger_lapdist_dls``) only updates at beacon
+  samples. Elapsed time at each grid point is interpolated from those beacons,
+  and every other sample gets a distance interpolated from its timestamp.
+- Channels are interpolated onto the grid from those per-sample distances
+  (step channels such as gear take the last value instead).
+- Speed is taken from the ``speed`` channel when present, otherwise derived
+  from elapsed time per grid step.
+
+Once a race is resampled every lap is a row of an (laps x grid points) matrix,
+so comparing all laps of all vehicles against their references is a handful of
+array operations. Resampled races are cached per (track, race, grid step).
+"""
+from __future__ import annotations
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..core.config import settings
+from .telemetry_index import DISTANCE_COLUMN
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STEP_M = 5.0
+DEFAULT_CHANNELS = ("speed", "aps", "pbrake_f", "pbrake_r", "gear", "nmot", "Steering_Angle", "accx_can", "accy_can")
+STEP_CHANNELS = ("gear",)
+
+# The grid covers this share of the typical lap distance; laps must span all of it
+GRID_START_FRACTION = 0.01
+GRID_END_FRACTION = 0.98
+
+DRIVER_BEST = "driver_best"
+FIELD_BEST = "field_best"
+SPECIFIC_LAP = "lap"
+REFERENCES = (DRIVER_BEST, FIELD_BEST, SPECIFIC_LAP)
+
+
+class ReferenceLapError(ValueError):
+    """Raised when the requested reference lap cannot be resolved."""
+
+
+def distance_profile(seconds: np.ndarray, distance: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (times, distances) of the beacon samples, strictly increasing in distance.
+
+    Samples where the distance went backwards (a stale lap field carrying the
+    next lap's first metres) or repeated are dropped.
+    """
+    beacon = ~np.isnan(distance)
+    times, dist = seconds[beacon], distance[beacon]
+    if len(dist) < 2:
+        return None
+    running = np.maximum.accumulate(dist)
+    keep = np.concatenate([[True], np.diff(running) > 0])
+    return times[keep], running[keep]
+
+
+def resample_lap(
+    seconds: np.ndarray,
+    distance: np.ndarray,
+    values: Dict[str, np.ndarray],
+    grid: np.ndarray
+) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+    """
+    Resample one lap onto ``grid`` (metres).
+
+    Args:
+        seconds: Sample times in seconds, ascending
+        distance: Raw lap distance per sample (NaN between beacon updates)
+        values: Channel name -> per-sample values (NaN where not sampled)
+
+    Returns:
+        (elapsed seconds since grid[0], {channel: values on grid}) or None if
+        the lap does not cover the whole grid.
+    """
+    profile = distance_profile(seconds, distance)
+    if profile is None or len(grid) < 2:
+        return None
+    beacon_t, beacon_d = profile
+    if beacon_d[0] > grid[0] or beacon_d[-1] < grid[-1]:
+        return None
+
+    elapsed = np.interp(grid, beacon_d, beacon_t)
+    elapsed -= elapsed[0]
+    sample_distance = np.interp(seconds, beacon_t, beacon_d)
+
+    resampled = {}
+    for name, v in values.items():
+        valid = ~np.isnan(v)
+        if valid.sum() < 2:
+            resampled[name] = np.full(len(grid), np.nan)
+        elif name in STEP_CHANNELS:
+            xs, ys = sample_distance[valid], v[valid]
+            resampled[name] = ys[np.clip(np.searchsorted(xs, grid, side="right") - 1, 0, len(ys) - 1)]
+        else:
+            resampled[name] = np.interp(grid, sample_distance[valid], v[valid])
+
+    if "speed" not in values:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            resampled["speed"] = 3.6 * np.gradient(grid) / np.gradient(elapsed)
+    return elapsed, resampled
+
+
+def distance_grid(lap_length: float, step_m: float = DEFAULT_STEP_M) -> np.ndarray:
+    """Grid points (metres) spanning the comparable part of a lap."""
+    start = np.ceil(lap_length * GRID_START_FRACTION / step_m) * step_m
+    return np.arange(start, lap_length * GRID_END_FRACTION, step_m)
+
+
+def _frame_arrays(df: pd.DataFrame, channels: List[str],
+                  distance_col: str) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    df = df.sort_values("timestamp", kind="stable")
+    ns = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+    seconds = (ns - ns[0]) / 1e9 if len(ns) else np.array([], dtype=float)
+    values = {c: df[c].to_numpy(dtype=float) for c in channels if c in df.columns}
+    return seconds, df[distance_col].to_numpy(dtype=float), values
+
+
+def compare_laps(
+    lap: pd.DataFrame,
+    reference: pd.DataFrame,
+    step_m: float = DEFAULT_STEP_M,
+    channels: Optional[List[str]] = None,
+    distance_col: str = DISTANCE_COLUMN
+) -> pd.DataFrame:
+    """
+    Distance-aligned comparison of two single-lap telemetry frames.
+
+    The grid is the distance range both laps cover. Returns one row per grid
+    point: distance, elapsed, reference_elapsed, time_delta (positive = lap is
+    behind the reference) and ``<channel>``, ``<channel>_ref``, ``<channel>_delta``.
+    """
+    channels = list(channels or [c for c in DEFAULT_CHANNELS if c in lap.columns])
+    arrays = [_frame_arrays(df, channels, distance_col) for df in (lap, reference)]
+    profiles = [distance_profile(seconds, distance) for seconds, distance, _ in arrays]
+    if any(p is None for p in profiles):
+        return pd.DataFrame()
+
+    start = max(p[1][0] for p in profiles)
+    end = min(p[1][-1] for p in profiles)
+    grid = np.arange(np.ceil(start / step_m) * step_m, end, step_m)
+    results = [resample_lap(seconds, distance, values, grid) for seconds, distance, values in arrays]
+    if any(r is None for r in results):
+        return pd.DataFrame()
+
+    (elapsed, values), (ref_elapsed, ref_values) = results
+    data = {
+        "distance": grid,
+        "elapsed": elapsed,
+        "reference_elapsed": ref_elapsed,
+        "time_delta": elapsed - ref_elapsed
+    }
+    for name in values:
+        if name in ref_values:
+            data[name] = values[name]
+            data[f"{name}_ref"] = ref_values[name]
+            data[f"{name}_delta"] = values[name] - ref_values[name]
+    return pd.DataFrame(data)
+
+
+@dataclass
+class ResampledRace:
+    """
+    Every complete lap of a cached race on one distance grid; row i is laps[i].
+
+    ``grid_elapsed`` is the time from the first to the last grid point, which
+    covers GRID_START_FRACTION..GRID_END_FRACTION of the lap rather than the
+    full lap time. ``source`` is a weak reference to the CachedRace so a race
+    evicted from the telemetry cache is not kept alive by its resampled laps.
+    """
+    track: str
+    race: str
+    step_m: float
+    grid: np.ndarray
+    vehicle_ids: np.ndarray
+    laps: np.ndarray
+    grid_elapsed: np.ndarray
+    elapsed: np.ndarray
+    channels: Dict[str, np.ndarray]
+    source: Optional[weakref.ref] = field(default=None, repr=False)
+
+    @classmethod
+    def build(cls, cached, step_m: float = DEFAULT_STEP_M) -> "ResampledRace":
+        """Resample every (vehicle, lap) of a CachedRace that covers the grid."""
+        index = cached.index
+        channels = [c for c in DEFAULT_CHANNELS if c in cached.numeric_channels]
+        empty = cls(cached.track, cached.race, step_m, np.array([]), np.array([], dtype=object),
+                    np.array([], dtype=int), np.array([]), np.empty((0, 0)), {}, weakref.ref(cached))
+        if DISTANCE_COLUMN not in cached.frame.columns:
+            return empty
+
+        distance = cached.frame[DISTANCE_COLUMN].to_numpy(dtype=float)
+        values = {c: cached.frame[c].to_numpy(dtype=float) for c in channels}
+        keys = [(vid, lap) for vid in cached.vehicles for lap in index.laps(vid)]
+
+        # Typical lap length: median of each lap's furthest beacon
+        lap_ends = [np.nanmax(distance[rows]) for rows in (index.rows_for_lap(v, l) for v, l in keys)
+                    if len(rows) and not np.isnan(distance[rows]).all()]
+        if not lap_ends:
+            return empty
+        grid = distance_grid(float(np.median(lap_ends)), step_m)
+
+        kept, elapsed_rows = [], []
+        channel_rows = {c: [] for c in channels + ["speed"]}
+        for vehicle_id, lap in keys:
+            rows = index.rows_for_lap(vehicle_id, lap)
+            seconds = (index.timestamps[rows] - index.timestamps[rows[0]]) / 1e9 if len(rows) else rows
+            result = resample_lap(seconds, distance[rows], {c: values[c][rows] for c in channels}, grid)
+            if result is None:
+                continue
+            elapsed, resampled = result
+            kept.append((vehicle_id, lap))
+            elapsed_rows.append(elapsed)
+            for name, row in resampled.items():
+                channel_rows[name].append(row.astype(np.float32))
+
+        if not kept:
+            return empty
+        elapsed = np.vstack(elapsed_rows)
+        logger.info(f"Resampled {len(kept)} of {len(keys)} laps onto {len(grid)} points for {cached.track}/{cached.race}")
+        return cls(
+            track=cached.track,
+            race=cached.race,
+            step_m=step_m,
+            grid=grid,
+            vehicle_ids=np.array([k[0] for k in kept], dtype=object),
+            laps=np.array([k[1] for k in kept], dtype=int),
+            grid_elapsed=elapsed[:, -1],
+            elapsed=elapsed,
+            channels={name: np.vstack(rows) for name, rows in channel_rows.items() if rows},
+            source=weakref.ref(cached)
+        )
+
+    def __len__(self) -> int:
+        return len(self.laps)
+
+    def find(self, vehicle_id: str, lap: int) -> Optional[int]:
+        match = np.flatnonzero((self.vehicle_ids == vehicle_id) & (self.laps == lap))
+        return int(match[0]) if len(match) else None
+
+    def reference_rows(self, reference: str = DRIVER_BEST, vehicle_id: Optional[str] = None,
+                       lap: Optional[int] = None) -> np.ndarray:
+        """Row of the reference lap for every lap (same length as the race)."""
+        if len(self) == 0:
+            raise ReferenceLapError("No complete laps to compare")
+
+        if reference == FIELD_BEST:
+            return np.full(len(self), int(np.argmin(self.grid_elapsed)))
+
+        if reference == SPECIFIC_LAP:
+            row = self.find(vehicle_id, lap) if vehicle_id is not None and lap is not None else None
+            if row is None:
+                raise ReferenceLapError(f"Reference lap {lap} of {vehicle_id} is missing or incomplete")
+            return np.full(len(self), row)
+
+        if reference == DRIVER_BEST:
+            # Fastest lap per vehicle: sort by (vehicle, grid time) and take each group's first row
+            order = np.lexsort((self.grid_elapsed, self.vehicle_ids.astype(str)))
+            vehicles_sorted = self.vehicle_ids[order]
+            first = np.concatenate([[True], vehicles_sorted[1:] != vehicles_sorted[:-1]])
+            best = dict(zip(vehicles_sorted[first], order[first]))
+            return np.array([best[v] for v in self.vehicle_ids])
+
+        raise ReferenceLapError(f"Unknown reference '{reference}'. Use one of {list(REFERENCES)}")
+
+    def compare_all(self, reference_rows: np.ndarray, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Summary of each lap (or ``rows``) against its reference, computed in one batch.
+
+        Columns: vehicle_id, lap, grid_elapsed, reference_vehicle_id, reference_lap,
+        time_delta (at the end of the grid), max_gain/max_loss (extremes of the
+        cumulative delta), worst_segment_start (metres, start of the 100 m window
+        losing most time) and ``<channel>_delta_mean`` per channel.
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        refs = reference_rows[rows]
+        delta = self.elapsed[rows] - self.elapsed[refs]
+
+        # Time lost over each 100 m window, from the cumulative delta
+        window = max(1, int(round(100.0 / self.step_m)))
+        window_loss = delta[:, window:] - delta[:, :-window] if delta.shape[1] > window else delta[:, -1:]
+        worst = np.argmax(window_loss, axis=1)
+
+        data = {
+            "vehicle_id": self.vehicle_ids[rows],
+            "lap": self.laps[rows],
+            "grid_elapsed": self.grid_elapsed[rows],
+            "reference_vehicle_id": self.vehicle_ids[refs],
+            "reference_lap": self.laps[refs],
+            "time_delta": delta[:, -1],
+            "max_gain": delta.min(axis=1),
+            "max_loss": delta.max(axis=1),
+            "worst_segment_start": self.grid[worst],
+            "worst_segment_loss": window_loss[np.arange(len(rows)), worst]
+        }
+        with np.errstate(invalid="ignore"):
+            for name, matrix in self.channels.items():
+                data[f"{name}_delta_mean"] = np.nanmean(matrix[rows] - matrix[refs], axis=1) if len(rows) else []
+        return pd.DataFrame(data)
+
+    def trace(self, row: int, reference_row: int, channels: Optional[List[str]] = None) -> pd.DataFrame:
+        """Per grid point comparison of one lap with its reference."""
+        data = {
+            "distance": self.grid,
+            "elapsed": self.elapsed[row],
+            "reference_elapsed": self.elapsed[reference_row],
+            "time_delta": self.elapsed[row] - self.elapsed[reference_row]
+        }
+        for name in (channels or list(self.channels)):
+            data[name] = self.channels[name][row]
+            data[f"{name}_ref"] = self.channels[name][reference_row]
+            data[f"{name}_delta"] = self.channels[name][row] - self.channels[name][reference_row]
+        return pd.DataFrame(data)
+
+
+class LapComparisonEngine:
+    """LRU cache of ResampledRace objects keyed by (track, race, grid step)."""
+
+    def __init__(self, max_races: int = 8):
+        self.max_races = max_races
+        self._races: "OrderedDict[Tuple[str, str, float], ResampledRace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cached, step_m: float = DEFAULT_STEP_M) -> ResampledRace:
+        """Resampled laps for a CachedRace; rebuilt if the cached race was reloaded."""
+        key = (cached.track.lower(), cached.race.upper(), float(step_m))
+        with self._lock:
+            resampled = self._races.get(key)
+            if resampled is not None and resampled.source is not None and resampled.source() is cached:
+                self._races.move_to_end(key)
+                return resampled
+
+        resampled = ResampledRace.build(cached, step_m)
+
+        with self._lock:
+            self._races[key] = resampled
+            self._races.move_to_end(key)
+            while len(self._races) > self.max_races:
+                self._races.popitem(last=False)
+        return resampled
+
+    def invalidate(self, track: Optional[str] = None, race: Optional[str] = None):
+        """Drop resampled races (all, one track, or one track/race)."""
+        with self._lock:
+            for key in list(self._races):
+                if track is not None and key[0] != track.lower():
+                    continue
+                if race is not None and key[1] != race.upper():
+                    continue
+                del self._races[key]
+
+
+# Singleton instance
+_engine = None
+
+def get_lap_comparison_engine() -> LapComparisonEngine:
+    """Get singleton lap comparison engine instance."""
+    global _engine
+    if _engine is None:
+        _engine = LapComparisonEngine(settings.telemetry_cache_size)
+    return _engine
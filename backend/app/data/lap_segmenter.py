@@ -8,6 +8,9 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from .catalog import get_dataset_catalog
+from ..core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,50 +30,22 @@ class LapSegmenter:
         Load lap start/end times.
         Handles lap number 32768 corruption by ignoring lap field.
         """
-        t = track.lower()
-        base = self.data_dir / track
-        if t == "barber":
-            lap_start_file = base / f"{race}_barber_lap_start.csv"
-            lap_end_file = base / f"{race}_barber_lap_end.csv"
-        elif t == "indianapolis":
-            lap_start_file = base / f"{race}_indianapolis_motor_speedway_lap_start.csv"
-            lap_end_file = base / f"{race}_indianapolis_motor_speedway_lap_end.csv"
-        elif t == "cota":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            lap_start_file = sub / f"COTA_lap_start_time_{race}.csv"
-            lap_end_file = sub / f"COTA_lap_end_time_{race}.csv"
-        elif t == "vir":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            lap_start_file = sub / f"vir_lap_start_{race}.csv"
-            lap_end_file = sub / f"vir_lap_end_{race}.csv"
-        elif t == "road america":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            lap_start_file = sub / f"road_america_lap_start_{race}.csv"
-            lap_end_file = sub / f"road_america_lap_end_{race}.csv"
-        elif t == "sebring":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            lap_start_file = sub / f"sebring_lap_start_time_{race}.csv"
-            lap_end_file = sub / f"sebring_lap_end_time_{race}.csv"
-        elif t == "sonoma":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            lap_start_file = sub / f"sonoma_lap_start_time_{race}.csv"
-            lap_end_file = sub / f"sonoma_lap_end_time_{race}.csv"
-        else:
-            lap_start_file = base / f"{race}_{track}_lap_start.csv"
-            lap_end_file = base / f"{race}_{track}_lap_end.csv"
+        catalog = get_dataset_catalog(self.data_dir)
+        lap_start_file = catalog.resolve(track, race, "lap_start")
+        lap_end_file = catalog.resolve(track, race, "lap_end")
         
         # Load lap starts
-        if lap_start_file.exists():
+        if lap_start_file is not None:
             df_start = pd.read_csv(lap_start_file)
             df_start['timestamp'] = pd.to_datetime(df_start['timestamp'])
             if vehicle_id:
                 df_start = df_start[df_start['vehicle_id'] == vehicle_id]
             df_start = df_start.sort_values('timestamp').reset_index(drop=True)
         else:
-            raise FileNotFoundError(f"Lap start file not found: {lap_start_file}")
+            raise FileNotFoundError(f"Lap start file not found for {track} {race} in {self.data_dir}")
         
         # Load lap ends
-        if lap_end_file.exists():
+        if lap_end_file is not None:
             df_end = pd.read_csv(lap_end_file)
             df_end['timestamp'] = pd.to_datetime(df_end['timestamp'])
             if vehicle_id:
@@ -190,14 +165,23 @@ class LapSegmenter:
         self,
         track: str,
         race: str,
-        vehicle_id: str
+        vehicle_id: str,
+        cached=None
     ) -> Dict[int, pd.DataFrame]:
         """
         Load telemetry and segment into separate DataFrames per lap.
         
+        Args:
+            cached: Optional CachedRace for the same track/race. Its frame is used
+                instead of re-reading the CSV and laps are cut with binary
+                searches over its index.
+        
         Returns:
             Dictionary mapping lap_number -> telemetry DataFrame for that lap
         """
+        if cached is not None:
+            return self.segment_cached(cached, self.load_lap_boundaries(track, race, vehicle_id), vehicle_id)
+        
         from .telemetry_loader import get_telemetry_loader
         
         # Load telemetry
@@ -221,6 +205,44 @@ class LapSegmenter:
         
         return lap_data
     
+    def segment_cached(
+        self,
+        cached,
+        df_laps: pd.DataFrame,
+        vehicle_id: str
+    ) -> Dict[int, pd.DataFrame]:
+        """
+        Split a cached race's vehicle rows into laps.
+        
+        Same assignment as assign_laps_to_telemetry (first sample aligned to the
+        first lap start, later laps win overlaps), but each lap is a row range
+        found by binary search instead of a boolean mask over the telemetry.
+        """
+        if vehicle_id not in cached.vehicle_ranges or df_laps.empty:
+            return {}
+        
+        starts = pd.to_datetime(df_laps['lap_start_time'], utc=True).to_numpy(dtype='datetime64[ns]').view('int64')
+        ends = pd.to_datetime(df_laps['lap_end_time'], utc=True)
+        missing_end = ends.isna().to_numpy()
+        ends = ends.to_numpy(dtype='datetime64[ns]').view('int64')
+        
+        # Align the vehicle's first telemetry sample with the first lap start
+        first_row, _ = cached.vehicle_ranges[vehicle_id]
+        offset = starts.min() - int(cached.timestamps[first_row])
+        row_lo, row_hi = cached.index.window_offsets(
+            vehicle_id, starts - offset, np.where(missing_end, -1, ends - offset)
+        )
+        
+        columns = [c for c in cached.frame.columns if c != 'lap']
+        lap_data = {}
+        for lap_num, lo, hi in zip(df_laps['lap_number'].astype(int), row_lo, row_hi):
+            if hi > lo:
+                lap_data[int(lap_num)] = cached.frame.iloc[lo:hi][columns].assign(lap_number=int(lap_num))
+        
+        logger.info(f"Segmented cached telemetry into {len(lap_data)} laps")
+        
+        return lap_data
+    
     def get_lap_summary_features(
         self,
         df_lap: pd.DataFrame
@@ -277,9 +299,10 @@ class LapSegmenter:
 # Singleton instance
 _segmenter = None
 
-def get_lap_segmenter(data_dir: str = "../dataset") -> LapSegmenter:
-    """Get singleton lap segmenter instance."""
+def get_lap_segmenter(data_dir: Optional[str] = None) -> LapSegmenter:
+    """Get singleton lap segmenter instance for ``data_dir`` (default: ``settings.dataset_root``)."""
     global _segmenter
-    if _segmenter is None:
-        _segmenter = LapSegmenter(data_dir)
+    data_dir = Path(data_dir or settings.dataset_root)
+    if _segmenter is None or Path(_segmenter.data_dir) != data_dir:
+        _segmenter = LapSegmenter(str(data_dir))
     return _segmenter
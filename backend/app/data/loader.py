@@ -1,8 +1,11 @@
 from __future__ import annotations
+import hashlib
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import pandas as pd
 
+from ..core.config import settings
+from .catalog import TRACK_DIRECTORIES, get_dataset_catalog
 from .schemas import TelemetryRow
 
 
@@ -47,61 +50,20 @@ def pivot_telemetry_wide(df_long: pd.DataFrame) -> pd.DataFrame:
 
 def get_track_directory(dataset_root: Path, track: str) -> Path:
     """Find the correct track directory handling different naming conventions."""
-    track_lower = track.lower()
-    
-    # Map normalized track names to actual directory names
-    track_map = {
-        "barber": "barber",
-        "indianapolis": "indianapolis",
-        "cota": "COTA",
-        "vir": "VIR",
-        "road america": "Road America",
-        "sebring": "Sebring",
-        "sonoma": "Sonoma",
-    }
-    
-    if track_lower not in track_map:
+    track_dir = get_dataset_catalog(dataset_root).track_directory(track)
+    if track_dir is not None:
+        return track_dir
+    if track.lower() not in TRACK_DIRECTORIES:
         raise ValueError(f"Unsupported track: {track}")
-    
-    actual_dir_name = track_map[track_lower]
-    track_dir = dataset_root / actual_dir_name
-    
-    if not track_dir.exists():
-        raise FileNotFoundError(f"Track directory not found: {track_dir}")
-    
-    return track_dir
+    raise FileNotFoundError(f"Track directory not found: {dataset_root / TRACK_DIRECTORIES[track.lower()]}")
 
 
 def load_race_telemetry_wide(dataset_root: Path, track: str, race: str) -> pd.DataFrame:
     """Load and pivot telemetry data for any track/race combination."""
-    track_dir = get_track_directory(dataset_root, track)
-    
-    # Handle different naming conventions across tracks
-    if track.lower() == "barber":
-        telemetry_file = track_dir / f"{race}_barber_telemetry_data.csv"
-    elif track.lower() == "indianapolis":
-        telemetry_file = track_dir / f"{race}_indianapolis_motor_speedway_telemetry.csv"
-    elif track.lower() == "cota":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        telemetry_file = track_dir / race_folder / f"{race}_cota_telemetry_data.csv"
-    elif track.lower() == "vir":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        telemetry_file = track_dir / race_folder / f"{race}_vir_telemetry_data.csv"
-    elif track.lower() == "road america":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        telemetry_file = track_dir / race_folder / f"{race}_road_america_telemetry_data.csv"
-    elif track.lower() == "sebring":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        telemetry_file = track_dir / race_folder / f"sebring_telemetry_{race}.csv"
-    elif track.lower() == "sonoma":
-        # Sonoma files use a different convention: sonoma_telemetry_R1.csv
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        telemetry_file = track_dir / race_folder / f"sonoma_telemetry_{race}.csv"
-    else:
-        raise ValueError(f"Unsupported track: {track}")
-    
-    if not telemetry_file.exists():
-        raise FileNotFoundError(f"Telemetry file not found: {telemetry_file}")
+    get_track_directory(dataset_root, track)
+    telemetry_file = get_dataset_catalog(dataset_root).resolve(track, race, "telemetry")
+    if telemetry_file is None:
+        raise FileNotFoundError(f"Telemetry file not found for {track} {race}")
     
     df_long = load_long_telemetry_csv(telemetry_file)
     return pivot_telemetry_wide(df_long)
@@ -113,53 +75,27 @@ def load_barber_race_wide(dataset_root: Path, race: str = "R1") -> pd.DataFrame:
 
 
 def load_lap_times(dataset_root: Path, track: str, race: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    """Load lap start, end, and time files for any track/race combination."""
-    track_dir = get_track_directory(dataset_root, track)
-    
-    # Handle different naming conventions across tracks
-    if track.lower() == "barber":
-        start = pd.read_csv(track_dir / f"{race}_barber_lap_start.csv")
-        end = pd.read_csv(track_dir / f"{race}_barber_lap_end.csv")
-        lapt = pd.read_csv(track_dir / f"{race}_barber_lap_time.csv")
-    elif track.lower() == "indianapolis":
-        prefix = "indianapolis_motor_speedway"
-        start = pd.read_csv(track_dir / f"{race}_{prefix}_lap_start.csv")
-        end = pd.read_csv(track_dir / f"{race}_{prefix}_lap_end.csv")
-        lapt = pd.read_csv(track_dir / f"{race}_{prefix}_lap_time.csv")
-    elif track.lower() == "cota":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        sub = track_dir / race_folder
-        start = pd.read_csv(sub / f"COTA_lap_start_time_{race}.csv")
-        end = pd.read_csv(sub / f"COTA_lap_end_time_{race}.csv")
-        lapt = pd.read_csv(sub / f"COTA_lap_time_{race}.csv")
-    elif track.lower() == "vir":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        sub = track_dir / race_folder
-        # Actual files are lowercase and without "_time_" in name
-        start = pd.read_csv(sub / f"vir_lap_start_{race}.csv")
-        end = pd.read_csv(sub / f"vir_lap_end_{race}.csv")
-        lapt = pd.read_csv(sub / f"vir_lap_time_{race}.csv")
-    elif track.lower() == "road america":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        sub = track_dir / race_folder
-        # Actual files are lowercase, with race suffix at end
-        start = pd.read_csv(sub / f"road_america_lap_start_{race}.csv")
-        end = pd.read_csv(sub / f"road_america_lap_end_{race}.csv")
-        lapt = pd.read_csv(sub / f"road_america_lap_time_{race}.csv")
-    elif track.lower() == "sebring":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        sub = track_dir / race_folder
-        start = pd.read_csv(sub / f"Sebring_lap_start_time_{race}.csv")
-        end = pd.read_csv(sub / f"Sebring_lap_end_time_{race}.csv")
-        lapt = pd.read_csv(sub / f"Sebring_lap_time_{race}.csv")
-    elif track.lower() == "sonoma":
-        race_folder = "Race 1" if race.upper() == "R1" else "Race 2"
-        sub = track_dir / race_folder
-        start = pd.read_csv(sub / f"sonoma_lap_start_time_{race}.csv")
-        end = pd.read_csv(sub / f"sonoma_lap_end_time_{race}.csv")
-        lapt = pd.read_csv(sub / f"sonoma_lap_time_{race}.csv")
-    else:
-        raise ValueError(f"Unsupported track: {track}")
+    """
+    Load lap start, end, and time files for any track/race combination.
+
+    With ``settings.shared_frames`` the parsed tables come from the shared
+    memory-mapped column store (see shared_frames) instead of the CSVs.
+    """
+    if settings.shared_frames:
+        from .shared_frames import get_shared_frame_store
+        store = get_shared_frame_store()
+        if store.dataset_root == Path(dataset_root).resolve():
+            return store.lap_times(track, race)
+    return read_lap_times(dataset_root, track, race)
+
+
+def read_lap_times(dataset_root: Path, track: str, race: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Parse the lap start, end, and time CSVs of a race."""
+    get_track_directory(dataset_root, track)
+    catalog = get_dataset_catalog(dataset_root)
+    start = pd.read_csv(catalog.require(track, race, "lap_start"))
+    end = pd.read_csv(catalog.require(track, race, "lap_end"))
+    lapt = pd.read_csv(catalog.require(track, race, "lap_time"))
 
     # Normalize column names and parse timestamps
     for d in (start, end, lapt):
@@ -170,6 +106,27 @@ def load_lap_times(dataset_root: Path, track: str, race: str) -> Tuple[pd.DataFr
     return start, end, lapt
 
 
+def race_source_files(dataset_root: Path, track: str, race: str) -> List[Path]:
+    """Data files belonging to one race (its "Race N" folder, or its files in a flat track directory)."""
+    get_track_directory(dataset_root, track)
+    return [entry.path for entry in get_dataset_catalog(dataset_root).race_files(track, race)]
+
+
+def source_fingerprint(dataset_root: Path, track: str, race: str) -> str:
+    """Hash of the name, size and mtime of every source file of a race."""
+    digest = hashlib.sha1()
+    for path in race_source_files(dataset_root, track, race):
+        stat = path.stat()
+        digest.update(f"{path.name}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def discover_races(dataset_root: Path) -> List[Tuple[str, str]]:
+    """(track, race) pairs under ``dataset_root`` that have lap timing data."""
+    catalog = get_dataset_catalog(dataset_root)
+    return [(track, race) for track in catalog.tracks() for race in catalog.races(track)]
+
+
 def segment_laps_by_time(df_wide: pd.DataFrame, lap_starts: pd.DataFrame, lap_ends: pd.DataFrame) -> pd.DataFrame:
     # Creates lap_id per vehicle by aligning timestamps between start/end windows
     # Assumes df_wide has columns: vehicle_id, timestamp
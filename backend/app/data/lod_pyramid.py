@@ -0,0 +1,165 @@
+"""
+Telemetry Level-of-Detail Pyramid
+Per-vehicle min/max/mean aggregates at 10x, 100x and 1000x coarser resolutions.
+
+Level 1 is the raw frame and is read on demand (only ever for windows that
+already fit the budget). Each coarser level merges ``LOD_FACTOR`` buckets of the
+level below it, so building the pyramid is a few ``reduceat`` passes. A window
+query picks the finest level whose bucket count fits the caller's budget, so
+any zoom reads a bounded number of rows.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+LOD_FACTOR = 10
+LOD_LEVELS = (10, 100, 1000)
+
+
+@dataclass
+class PyramidLevel:
+    """Aggregates for one vehicle at one resolution; arrays are (buckets, channels)."""
+    factor: int
+    t_start: np.ndarray
+    t_end: np.ndarray
+    mins: np.ndarray
+    maxs: np.ndarray
+    sums: np.ndarray
+    counts: np.ndarray
+    n_rows: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.t_start)
+
+    def coarsen(self, factor: int = LOD_FACTOR) -> "PyramidLevel":
+        """Merge every ``factor`` consecutive buckets into one."""
+        starts = np.arange(0, len(self), factor)
+        ends = np.append(starts[1:], len(self)) - 1
+        return PyramidLevel(
+            factor=self.factor * factor,
+            t_start=self.t_start[starts],
+            t_end=self.t_end[ends],
+            mins=np.fmin.reduceat(self.mins, starts, axis=0),
+            maxs=np.fmax.reduceat(self.maxs, starts, axis=0),
+            sums=np.add.reduceat(self.sums, starts, axis=0),
+            counts=np.add.reduceat(self.counts, starts, axis=0),
+            n_rows=np.add.reduceat(self.n_rows, starts)
+        )
+
+    @classmethod
+    def from_samples(cls, timestamps: np.ndarray, values: np.ndarray) -> "PyramidLevel":
+        """Level 1: every sample is its own bucket."""
+        missing = np.isnan(values)
+        return cls(
+            factor=1,
+            t_start=timestamps,
+            t_end=timestamps,
+            mins=values,
+            maxs=values,
+            sums=np.where(missing, 0.0, values),
+            counts=(~missing).astype(np.int32),
+            n_rows=np.ones(len(timestamps), dtype=np.int32)
+        )
+
+
+class TelemetryPyramid:
+    """LOD pyramid for every vehicle of a cached race."""
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        vehicle_ranges: Dict[str, Tuple[int, int]],
+        timestamps: np.ndarray,
+        channels: List[str],
+        levels: Dict[str, Dict[int, PyramidLevel]]
+    ):
+        self.frame = frame
+        self.vehicle_ranges = vehicle_ranges
+        self.timestamps = timestamps
+        self.channels = channels
+        self.levels = levels
+
+    @classmethod
+    def build(
+        cls,
+        frame: pd.DataFrame,
+        vehicle_ranges: Dict[str, Tuple[int, int]],
+        timestamps: np.ndarray,
+        channels: List[str]
+    ) -> "TelemetryPyramid":
+        levels = {}
+        for vehicle_id, (lo, hi) in vehicle_ranges.items():
+            level = cls._raw_level(frame, timestamps, channels, lo, hi)
+            vehicle_levels = {}
+            for factor in LOD_LEVELS:
+                if len(level) <= 1:
+                    break
+                level = level.coarsen(factor // level.factor)
+                vehicle_levels[factor] = level
+            levels[vehicle_id] = vehicle_levels
+        return cls(frame, vehicle_ranges, timestamps, channels, levels)
+
+    @staticmethod
+    def _raw_level(frame: pd.DataFrame, timestamps: np.ndarray, channels: List[str],
+                   lo: int, hi: int) -> PyramidLevel:
+        values = frame[channels].iloc[lo:hi].to_numpy(dtype=float) if channels else np.empty((hi - lo, 0))
+        return PyramidLevel.from_samples(timestamps[lo:hi], values)
+
+    def choose_level(self, vehicle_id: str, start_ns: Optional[int], end_ns: Optional[int],
+                     max_buckets: int) -> Tuple[PyramidLevel, int, int]:
+        """Finest level whose buckets overlapping the window fit in ``max_buckets``."""
+        lo, hi = self.vehicle_ranges[vehicle_id]
+        ts = self.timestamps[lo:hi]
+        r0 = int(np.searchsorted(ts, start_ns, side="left")) if start_ns is not None else 0
+        r1 = int(np.searchsorted(ts, end_ns, side="right")) if end_ns is not None else len(ts)
+        if r1 - r0 <= max_buckets:
+            raw = self._raw_level(self.frame, self.timestamps, self.channels, lo + r0, lo + max(r0, r1))
+            return raw, 0, len(raw)
+
+        chosen = None
+        for factor, level in sorted(self.levels[vehicle_id].items()):
+            # Buckets overlapping [start, end]: t_end >= start and t_start <= end
+            b0 = int(np.searchsorted(level.t_end, start_ns, side="left")) if start_ns is not None else 0
+            b1 = int(np.searchsorted(level.t_start, end_ns, side="right")) if end_ns is not None else len(level)
+            chosen = (level, b0, max(b0, b1))
+            if b1 - b0 <= max_buckets:
+                break
+        return chosen
+
+    def query(
+        self,
+        vehicle_id: str,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        max_buckets: int = 2000,
+        channels: Optional[List[str]] = None
+    ) -> Tuple[int, pd.DataFrame]:
+        """
+        Aggregated rows for a vehicle window. Returns (level factor, frame).
+
+        Frame columns: vehicle_id, t_start, t_end, count (samples per bucket) and
+        ``<channel>_min/_max/_mean``. The coarsest level (1000x) is returned even
+        if it exceeds the budget.
+        """
+        level, b0, b1 = self.choose_level(vehicle_id, start_ns, end_ns, max_buckets)
+        channels = channels or self.channels
+        cols = [self.channels.index(c) for c in channels]
+
+        counts = level.counts[b0:b1][:, cols]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, level.sums[b0:b1][:, cols] / counts, np.nan)
+
+        data = {
+            "vehicle_id": vehicle_id,
+            "t_start": pd.to_datetime(level.t_start[b0:b1], utc=True),
+            "t_end": pd.to_datetime(level.t_end[b0:b1], utc=True),
+            "count": level.n_rows[b0:b1],
+        }
+        for i, channel in enumerate(channels):
+            data[f"{channel}_min"] = level.mins[b0:b1, cols[i]]
+            data[f"{channel}_max"] = level.maxs[b0:b1, cols[i]]
+            data[f"{channel}_mean"] = means[:, i]
+        return level.factor, pd.DataFrame(data)
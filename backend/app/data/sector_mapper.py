@@ -8,6 +8,9 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import logging
 
+from .catalog import get_dataset_catalog
+from ..core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,16 +33,19 @@ class SectorMapper:
         - S1_SECONDS, S2_SECONDS, S3_SECONDS: Sector times in seconds
         - IM1a, IM1, IM2a, IM2, IM3a: Intermediate split times
         """
-        # Try to find sector data file
-        sector_files = list(self.data_dir.glob(f"{track}/*Endurance*{race.replace('R', 'Race ')}*.CSV"))
+        catalog = get_dataset_catalog(self.data_dir)
+        sector_file = catalog.resolve(track, race, "sectors")
         
-        if not sector_files:
-            sector_files = list(self.data_dir.glob(f"{track}/*Endurance*Race*.CSV"))
+        if sector_file is None:
+            # Fall back to the sector file of another race at the track
+            sector_file = next(
+                (e.path for r in catalog.races(track) for e in catalog.files(track, r, "sectors")),
+                None
+            )
         
-        if not sector_files:
+        if sector_file is None:
             raise FileNotFoundError(f"No sector data file found for {track}/{race}")
         
-        sector_file = sector_files[0]
         logger.info(f"Loading sector data from {sector_file}")
         
         # Load with semicolon delimiter (common in these files)
@@ -222,9 +228,10 @@ class SectorMapper:
 # Singleton instance
 _mapper = None
 
-def get_sector_mapper(data_dir: str = "../dataset") -> SectorMapper:
-    """Get singleton sector mapper instance."""
+def get_sector_mapper(data_dir: Optional[str] = None) -> SectorMapper:
+    """Get singleton sector mapper instance for ``data_dir`` (default: ``settings.dataset_root``)."""
     global _mapper
-    if _mapper is None:
-        _mapper = SectorMapper(data_dir)
+    data_dir = Path(data_dir or settings.dataset_root)
+    if _mapper is None or Path(_mapper.data_dir) != data_dir:
+        _mapper = SectorMapper(str(data_dir))
     return _mapper
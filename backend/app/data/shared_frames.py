@@ -0,0 +1,187 @@
+"""
+Shared Frames
+Memory-mapped column store for parsed race frames (wide telemetry, lap
+tables), so several server worker processes hold one copy of each race.
+
+Whichever process needs a frame first parses it and writes one ``.npy`` file
+per column, with a ``manifest.json`` of column types, under
+``shared_frames_dir/<track>/<race>/<name>/<source fingerprint>/``. Every process
+then attaches with ``np.load(mmap_mode="r")``: numeric and timestamp columns
+are read-only views of the same page-cache pages in all workers. Text columns
+(vehicle ids) are stored as integer codes and expanded per process.
+
+Arrow IPC files would work the same way, but pyarrow is not a dependency of
+the backend and ``.npy`` gives the same zero-copy attach for these
+fixed-width columns. A source file change gives the race a new fingerprint
+directory and the previous one is removed (open mappings stay valid).
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..core.config import settings
+from .loader import load_race_telemetry_wide, read_lap_times, source_fingerprint
+
+try:
+    import fcntl
+except ImportError:  # Windows: workers may parse the same race at once; the first rename wins
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def sort_telemetry_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows without a timestamp and sort by (vehicle_id, timestamp) with a fresh RangeIndex."""
+    df = df[df["timestamp"].notna()]
+    return df.sort_values(["vehicle_id", "timestamp"], kind="stable").reset_index(drop=True)
+
+
+def _encode(series: pd.Series) -> Tuple[np.ndarray, Dict]:
+    dtype = series.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(dtype):
+        tz = str(dtype.tz) if isinstance(dtype, pd.DatetimeTZDtype) else None
+        return np.asarray(series.array.asi8), {"kind": "datetime", "unit": dtype.unit, "tz": tz}
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        return series.to_numpy(), {"kind": "numeric"}
+    if pd.api.types.is_numeric_dtype(dtype):
+        # Nullable extension types (Int64, boolean ...) are stored as float with NaN
+        return series.to_numpy(dtype=float, na_value=np.nan), {"kind": "numeric", "dtype": str(dtype)}
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    return codes.astype(np.int32), {"kind": "codes", "categories": [str(u) for u in uniques]}
+
+
+def _decode(values: np.ndarray, meta: Dict):
+    kind = meta["kind"]
+    if kind == "datetime":
+        stamps = values.view(f"M8[{meta['unit']}]")
+        if meta["tz"] is None:
+            return stamps
+        dtype = pd.DatetimeTZDtype(unit=meta["unit"], tz=meta["tz"])
+        try:
+            # Wraps the mapped buffer without a copy (the public constructors all copy)
+            return pd.arrays.DatetimeArray._simple_new(stamps, dtype=dtype)
+        except (AttributeError, TypeError):
+            return pd.DatetimeIndex(stamps).tz_localize(meta["tz"]).array
+    if kind == "numeric":
+        return values if "dtype" not in meta else pd.array(values).astype(meta["dtype"])
+    categories = np.array(meta["categories"] + [None], dtype=object)
+    return categories[values]  # -1 (missing) picks the trailing None
+
+
+class SharedFrameStore:
+    """Parsed frames of each race as memory-mapped column files shared across processes."""
+
+    def __init__(self, root: Path, dataset_root: Path):
+        self.root = Path(root)
+        self.dataset_root = Path(dataset_root).resolve()
+
+    def _frame_dir(self, track: str, race: str, name: str) -> Path:
+        return self.root / track.lower() / race.upper() / name
+
+    def load(self, track: str, race: str, name: str, fingerprint: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Attach to a stored frame if it is current for the race's source files."""
+        fingerprint = fingerprint or source_fingerprint(self.dataset_root, track, race)
+        directory = self._frame_dir(track, race, name) / fingerprint
+        try:
+            with open(directory / MANIFEST_FILE) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if manifest.get("format_version") != FORMAT_VERSION:
+            return None
+
+        columns = {}
+        for i, column in enumerate(manifest["columns"]):
+            # A plain ndarray view of the mapping (np.memmap results leak into reductions)
+            values = np.asarray(np.load(directory / f"{i}.npy", mmap_mode="r"))
+            columns[column["name"]] = _decode(values, column)
+        return pd.DataFrame(columns, copy=False)
+
+    def save(self, track: str, race: str, name: str, df: pd.DataFrame, fingerprint: str) -> Path:
+        """Write a frame into its fingerprint directory (atomically) and drop older versions."""
+        frame_dir = self._frame_dir(track, race, name)
+        frame_dir.mkdir(parents=True, exist_ok=True)
+        staging = frame_dir / f".{fingerprint}.{os.getpid()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+
+        columns = []
+        for i, column in enumerate(df.columns):
+            values, meta = _encode(df[column])
+            np.save(staging / f"{i}.npy", np.ascontiguousarray(values), allow_pickle=False)
+            columns.append({"name": column, **meta})
+        manifest = {"format_version": FORMAT_VERSION, "rows": len(df), "source_fingerprint": fingerprint,
+                    "columns": columns}
+        with open(staging / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f)
+
+        target = frame_dir / fingerprint
+        try:
+            os.rename(staging, target)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)  # Another process stored it first
+        for old in frame_dir.iterdir():
+            if old.is_dir() and old.name != fingerprint and not old.name.startswith("."):
+                shutil.rmtree(old, ignore_errors=True)
+        return target
+
+    def get_or_build(self, track: str, race: str, name: str, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Attach to the stored frame, building and storing it first if needed (once across processes)."""
+        fingerprint = source_fingerprint(self.dataset_root, track, race)
+        df = self.load(track, race, name, fingerprint)
+        if df is not None:
+            return df
+
+        frame_dir = self._frame_dir(track, race, name)
+        frame_dir.mkdir(parents=True, exist_ok=True)
+        with open(frame_dir / ".lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            df = self.load(track, race, name, fingerprint)
+            if df is None:
+                logger.info(f"Storing shared frame {track}/{race}/{name}")
+                self.save(track, race, name, build(), fingerprint)
+                df = self.load(track, race, name, fingerprint)
+        return df
+
+    def telemetry_wide(self, track: str, race: str) -> pd.DataFrame:
+        """Wide telemetry of a race, sorted as the telemetry cache expects."""
+        return self.get_or_build(
+            track, race, "telemetry_wide",
+            lambda: sort_telemetry_frame(load_race_telemetry_wide(self.dataset_root, track, race))
+        )
+
+    def lap_times(self, track: str, race: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Lap start, end and time tables of a race."""
+        tables = {}
+
+        def build(i):
+            if not tables:
+                tables.update(enumerate(read_lap_times(self.dataset_root, track, race)))
+            return tables[i]
+
+        return tuple(
+            self.get_or_build(track, race, name, lambda i=i: build(i))
+            for i, name in enumerate(("lap_start", "lap_end", "lap_time"))
+        )
+
+
+# Singleton instance
+_store = None
+
+def get_shared_frame_store() -> SharedFrameStore:
+    """Get singleton shared frame store instance."""
+    global _store
+    if _store is None:
+        _store = SharedFrameStore(settings.shared_frames_dir, settings.dataset_root)
+    return _store
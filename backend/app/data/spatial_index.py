@@ -0,0 +1,218 @@
+"""
+Spatial Index
+GPS helpers and a uniform-grid index for nearest-point lookups on the track plane.
+
+Positions are projected to local metres (equirectangular around an origin,
+accurate to well under a metre over a circuit). Points are bucketed into square
+cells sorted by cell key, so a query only inspects the 3x3 block of cells around
+it. Queries are batched: candidate pairs for a chunk of queries are expanded
+into flat arrays and reduced without a Python loop per query.
+
+RaceSpatialIndex puts every GPS-fixed sample of a cached race in one grid so
+"what was every car doing here" is a lookup in nine cells rather than a scan of
+the race.
+"""
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .telemetry_index import NO_LAP
+
+LAT_COLUMN = "VBOX_Lat_Min"
+LON_COLUMN = "VBOX_Long_Minutes"
+
+METRES_PER_DEGREE_LAT = 110_574.0
+METRES_PER_DEGREE_LON = 111_320.0
+
+QUERY_CHUNK = 50_000
+SAMPLE_CELL_M = 15.0  # Cell size (and largest query radius) of the per-race sample index
+
+
+def gps_degrees(values: np.ndarray) -> np.ndarray:
+    """
+    GPS channel as decimal degrees.
+
+    The VBOX channels are named after minutes; values outside the valid degree
+    range are treated as minutes and converted. Zeros (no fix) become NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    values = np.where(values == 0, np.nan, values)
+    if np.nanmax(np.abs(values), initial=0.0) > 180:
+        values = values / 60.0
+    return values
+
+
+def to_local_xy(lat: np.ndarray, lon: np.ndarray, origin: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Project degrees to metres east (x) and north (y) of ``origin`` (lat, lon)."""
+    lat0, lon0 = origin
+    x = (lon - lon0) * METRES_PER_DEGREE_LON * np.cos(np.radians(lat0))
+    y = (lat - lat0) * METRES_PER_DEGREE_LAT
+    return x, y
+
+
+class GridIndex:
+    """Nearest-point index over 2-D points (metres) using square cells of ``cell_size``."""
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, cell_size: float):
+        # float32 input stays float32 (per-race sample indexes); anything else becomes float64
+        self.x = np.asarray(x, dtype=np.result_type(x, np.float32))
+        self.y = np.asarray(y, dtype=np.result_type(y, np.float32))
+        self.cell_size = float(cell_size)
+        valid = np.flatnonzero(~(np.isnan(self.x) | np.isnan(self.y)))
+
+        self.x0 = float(self.x[valid].min()) if len(valid) else 0.0
+        self.y0 = float(self.y[valid].min()) if len(valid) else 0.0
+        cx, cy = self._cells(self.x[valid], self.y[valid])
+        self.ny = int(cy.max()) + 3 if len(valid) else 1  # Room for the neighbour ring
+
+        keys = self._key(cx, cy)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.points = valid[order]
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _cells(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cx = np.floor((x - self.x0) / self.cell_size).astype(np.int64) + 1
+        cy = np.floor((y - self.y0) / self.cell_size).astype(np.int64) + 1
+        return cx, cy
+
+    def _key(self, cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        return cx * self.ny + cy
+
+    def _candidates(self, qx: np.ndarray, qy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(query position, point index) pairs for every point in the 3x3 cells around each query."""
+        # Missing positions get no candidates
+        known = ~(np.isnan(qx) | np.isnan(qy))
+        cx, cy = self._cells(np.where(known, qx, self.x0), np.where(known, qy, self.y0))
+        cx = np.where(known, cx, -10)
+
+        queries, points = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                ncx, ncy = cx + dx, cy + dy
+                valid = (ncx >= 0) & (ncy >= 0) & (ncy < self.ny)
+                keys = np.where(valid, self._key(ncx, ncy), -1)
+                lo = np.searchsorted(self.keys, keys, side="left")
+                hi = np.searchsorted(self.keys, keys, side="right")
+                counts = np.where(keys >= 0, hi - lo, 0)
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                query_ids = np.repeat(np.arange(len(qx)), counts)
+                starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+                queries.append(query_ids)
+                points.append(self.points[starts + np.arange(total)])
+        if not queries:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        return np.concatenate(queries), np.concatenate(points)
+
+    def nearest(self, qx: np.ndarray, qy: np.ndarray,
+                max_distance: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest indexed point for each query.
+
+        Only points in the neighbouring cells are considered, so results are
+        exact within ``cell_size`` of the query. Returns (point index or -1,
+        distance in metres or NaN).
+        """
+        qx = np.asarray(qx, dtype=float)
+        qy = np.asarray(qy, dtype=float)
+        best = np.full(len(qx), -1, dtype=np.int64)
+        best_distance = np.full(len(qx), np.nan)
+        limit = self.cell_size if max_distance is None else min(max_distance, self.cell_size)
+
+        for start in range(0, len(qx), QUERY_CHUNK):
+            stop = min(start + QUERY_CHUNK, len(qx))
+            query_ids, point_ids = self._candidates(qx[start:stop], qy[start:stop])
+            if len(query_ids) == 0:
+                continue
+            d2 = (self.x[point_ids] - qx[start:stop][query_ids]) ** 2 + (self.y[point_ids] - qy[start:stop][query_ids]) ** 2
+            # Sort by (query, distance) and keep the first candidate of each query
+            order = np.lexsort((d2, query_ids))
+            first = np.concatenate([[True], query_ids[order][1:] != query_ids[order][:-1]])
+            winners = order[first]
+            within = d2[winners] <= limit ** 2
+            rows = start + query_ids[winners][within]
+            best[rows] = point_ids[winners][within]
+            best_distance[rows] = np.sqrt(d2[winners][within])
+        return best, best_distance
+
+    def within(self, qx: float, qy: float, radius: float) -> np.ndarray:
+        """Indices of points within ``radius`` (<= cell_size) of one position, nearest first."""
+        query_ids, point_ids = self._candidates(np.array([qx], dtype=float), np.array([qy], dtype=float))
+        if len(point_ids) == 0:
+            return point_ids
+        d2 = (self.x[point_ids] - qx) ** 2 + (self.y[point_ids] - qy) ** 2
+        keep = d2 <= min(radius, self.cell_size) ** 2
+        return point_ids[keep][np.argsort(d2[keep], kind="stable")]
+
+
+class RaceSpatialIndex:
+    """All GPS-fixed samples of one race, mapped back to (vehicle, lap, row)."""
+
+    def __init__(self, origin: Tuple[float, float], grid: GridIndex,
+                 vehicle_ids: np.ndarray, vehicle_starts: np.ndarray, laps: np.ndarray):
+        self.origin = origin
+        self.grid = grid
+        self.vehicle_ids = vehicle_ids
+        self.vehicle_starts = vehicle_starts
+        self.laps = laps
+
+    def __len__(self) -> int:
+        return len(self.grid)
+
+    @classmethod
+    def build(cls, frame, vehicle_ranges: Dict[str, Tuple[int, int]]) -> Optional["RaceSpatialIndex"]:
+        """Index a frame sorted by (vehicle_id, timestamp); None if it has no GPS fixes."""
+        if LAT_COLUMN not in frame.columns or LON_COLUMN not in frame.columns:
+            return None
+        lat = gps_degrees(frame[LAT_COLUMN].to_numpy(dtype=float))
+        lon = gps_degrees(frame[LON_COLUMN].to_numpy(dtype=float))
+        fixed = ~(np.isnan(lat) | np.isnan(lon))
+        if not fixed.any():
+            return None
+
+        # Median, so a few wild fixes do not move the projection centre off the track
+        origin = (float(np.median(lat[fixed])), float(np.median(lon[fixed])))
+        x, y = to_local_xy(lat, lon, origin)
+        grid = GridIndex(x.astype(np.float32), y.astype(np.float32), SAMPLE_CELL_M)
+
+        if "lap" in frame.columns:
+            laps = frame["lap"].to_numpy(dtype=float)
+            laps = np.where(np.isnan(laps), NO_LAP, laps).astype(np.int32)
+        else:
+            laps = np.full(len(frame), NO_LAP, dtype=np.int32)
+        ranges = sorted(vehicle_ranges.items(), key=lambda item: item[1][0])
+        return cls(
+            origin=origin,
+            grid=grid,
+            vehicle_ids=np.array([vehicle_id for vehicle_id, _ in ranges], dtype=object),
+            vehicle_starts=np.array([lo for _, (lo, _) in ranges], dtype=np.int64),
+            laps=laps
+        )
+
+    def nearest_per_lap(self, lat: float, lon: float, radius: float,
+                        row_range: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The closest sample of every (vehicle, lap) within ``radius`` metres
+        (at most SAMPLE_CELL_M) of a position in degrees.
+
+        Returns (rows, distances) ordered by vehicle and lap; ``row_range``
+        limits the search to one vehicle's rows.
+        """
+        qx, qy = to_local_xy(np.array([lat]), np.array([lon]), self.origin)
+        rows = self.grid.within(float(qx[0]), float(qy[0]), radius)  # Nearest first
+        if row_range is not None:
+            rows = rows[(rows >= row_range[0]) & (rows < row_range[1])]
+        if len(rows) == 0:
+            return rows, np.array([], dtype=float)
+
+        vehicle_codes = np.searchsorted(self.vehicle_starts, rows, side="right") - 1
+        keys = vehicle_codes.astype(np.int64) << 32 | (self.laps[rows].astype(np.int64) - NO_LAP)
+        _, first = np.unique(keys, return_index=True)  # First occurrence is the nearest
+        rows = rows[first]
+        distances = np.hypot(self.grid.x[rows] - qx[0], self.grid.y[rows] - qy[0])
+        return rows, distances.astype(float)
@@ -0,0 +1,410 @@
+"""
+Telemetry Cache
+Keeps parsed, sorted wide telemetry frames in memory and serves pages from them.
+
+Each race is loaded once (CSV parse + pivot), sorted by vehicle and timestamp,
+and indexed by vehicle, lap, time and lap distance (see telemetry_index), so a
+page request is a couple of binary searches plus a slice instead of a full
+reparse.
+
+Derived structures are built on first use, once per race, so loading a race
+for paging does not pay for the others: min-max decimated row sets per vehicle
+at a few fixed resolutions, so chart traces of long windows start from a small
+candidate set rather than every raw sample; a min/max/mean level-of-detail
+pyramid (see lod_pyramid) for zoomable aggregate views; brake zone and gear
+shift tables (see events); and a spatial grid of GPS-fixed samples for
+map-point queries (see spatial_index).
+"""
+from __future__ import annotations
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..core.config import settings
+from .loader import load_race_telemetry_wide
+from .shared_frames import SharedFrameStore, get_shared_frame_store, sort_telemetry_frame
+from .decimation import LTTB, decimate_rows, minmax_indices, time_axis
+from .lod_pyramid import TelemetryPyramid
+from .events import RaceEvents
+from .spatial_index import RaceSpatialIndex
+from .telemetry_index import DISTANCE_COLUMN, TelemetryIndex
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ["vehicle_id", "timestamp", "lap"]
+
+# Rows per vehicle kept by the precomputed min-max resolutions
+DECIMATION_LEVELS = (2000, 10000, 50000)
+
+# Wide rows carry only the channels sampled at that instant; map-point samples
+# take a missing channel from at most this many earlier rows of the same vehicle
+NEAREST_LOOKBACK_ROWS = 20
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to another query."""
+
+
+@dataclass
+class TelemetryPage:
+    frame: pd.DataFrame
+    next_cursor: Optional[str]
+
+
+@dataclass
+class CachedRace:
+    """
+    A race's wide telemetry sorted by (vehicle_id, timestamp) with row indexes.
+
+    ``decimated``, ``pyramid``, ``events`` and ``spatial`` are built on first
+    access; concurrent first requests wait for one build.
+    """
+    track: str
+    race: str
+    frame: pd.DataFrame
+    index: TelemetryIndex = None
+    vehicle_ranges: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    timestamps: np.ndarray = None
+    _derived: Dict[str, object] = field(default_factory=dict, repr=False)
+    _build_locks: Dict[str, threading.Lock] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def from_frame(cls, track: str, race: str, df: pd.DataFrame, presorted: bool = False) -> "CachedRace":
+        """Index a wide frame; ``presorted`` frames (from sort_telemetry_frame) are used as is, without a copy."""
+        if not presorted:
+            df = sort_telemetry_frame(df)
+        index = TelemetryIndex.build(df)
+
+        return cls(
+            track=track,
+            race=race,
+            frame=df,
+            index=index,
+            vehicle_ranges=index.vehicle_ranges,
+            timestamps=index.timestamps
+        )
+
+    def _get_derived(self, name: str, build):
+        if name in self._derived:
+            return self._derived[name]
+        with self._lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        # One lock per structure, so a slow pyramid build does not hold up event lookups
+        with build_lock:
+            if name not in self._derived:
+                started = time.perf_counter()
+                self._derived[name] = build()
+                logger.info(f"Built {name} for {self.track}/{self.race} in {time.perf_counter() - started:.2f}s")
+        return self._derived[name]
+
+    @property
+    def decimated(self) -> Dict[str, Dict[int, np.ndarray]]:
+        return self._get_derived("decimated", self._build_decimation_levels)
+
+    @property
+    def pyramid(self) -> TelemetryPyramid:
+        return self._get_derived("pyramid", lambda: TelemetryPyramid.build(
+            self.frame, self.vehicle_ranges, self.timestamps, self.numeric_channels
+        ))
+
+    @property
+    def events(self) -> RaceEvents:
+        return self._get_derived("events", lambda: RaceEvents.build(self.frame))
+
+    @property
+    def spatial(self) -> Optional[RaceSpatialIndex]:
+        return self._get_derived("spatial", lambda: RaceSpatialIndex.build(self.frame, self.vehicle_ranges))
+
+    def _build_decimation_levels(self) -> Dict[str, Dict[int, np.ndarray]]:
+        """Min-max decimate every vehicle at each DECIMATION_LEVELS resolution."""
+        channels = self.numeric_channels
+        values = {c: self.frame[c].to_numpy(dtype=float) for c in channels}
+
+        decimated = {}
+        for vehicle_id, (lo, hi) in self.vehicle_ranges.items():
+            levels = {}
+            for level in DECIMATION_LEVELS:
+                if hi - lo <= level:
+                    break
+                per_channel = max(2, level // max(1, len(channels)))
+                picked = [minmax_indices(values[c][lo:hi], per_channel) for c in channels]
+                levels[level] = lo + np.unique(np.concatenate(picked + [np.array([0, hi - lo - 1])]))
+            decimated[vehicle_id] = levels
+        return decimated
+
+    @property
+    def vehicles(self) -> List[str]:
+        return list(self.vehicle_ranges)
+
+    @property
+    def channels(self) -> List[str]:
+        return [c for c in self.frame.columns if c not in KEY_COLUMNS]
+
+    @property
+    def numeric_channels(self) -> List[str]:
+        return [c for c in self.channels if pd.api.types.is_numeric_dtype(self.frame[c])]
+
+    def vehicle_frame(self, vehicle_id: str) -> pd.DataFrame:
+        """All rows of one vehicle (a slice, no scan). Raises KeyError if unknown."""
+        lo, hi = self.vehicle_ranges[vehicle_id]
+        return self.frame.iloc[lo:hi]
+
+    def _time_range(self, vehicle_id: str, start_ns: Optional[int], end_ns: Optional[int]) -> Tuple[int, int]:
+        return self.index.time_range(vehicle_id, start_ns, end_ns)
+
+    def _encode_position(self, row: int, query_key: str) -> str:
+        """Cursor for a row: its vehicle, timestamp and offset among equal timestamps."""
+        vehicle_id = str(self.frame.at[row, "vehicle_id"])
+        lo, hi = self.vehicle_ranges[vehicle_id]
+        ts = int(self.timestamps[row])
+        first_equal = lo + int(np.searchsorted(self.timestamps[lo:hi], ts, side="left"))
+        payload = {"v": vehicle_id, "t": ts, "k": row - first_equal, "q": query_key}
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+    def _decode_position(self, cursor: str, query_key: str) -> Tuple[str, int]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            vehicle_id, ts, offset = str(payload["v"]), int(payload["t"]), int(payload["k"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursorError(f"Malformed cursor: {e}")
+        if payload.get("q") != query_key:
+            raise InvalidCursorError("Cursor does not belong to this query")
+        if vehicle_id not in self.vehicle_ranges:
+            raise InvalidCursorError(f"Cursor refers to unknown vehicle {vehicle_id}")
+
+        lo, hi = self.vehicle_ranges[vehicle_id]
+        return vehicle_id, lo + int(np.searchsorted(self.timestamps[lo:hi], ts, side="left")) + offset
+
+    def page(
+        self,
+        vehicle_id: Optional[str] = None,
+        lap_number: Optional[int] = None,
+        start_time: Optional[pd.Timestamp] = None,
+        end_time: Optional[pd.Timestamp] = None,
+        channels: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 1000
+    ) -> TelemetryPage:
+        """
+        Return up to ``limit`` rows in (vehicle_id, timestamp) order after ``cursor``.
+
+        Only the vehicles and time windows that can match are visited, so the cost
+        of a page does not grow with how far into the race the cursor points.
+        """
+        start_ns = start_time.value if start_time is not None else None
+        end_ns = end_time.value if end_time is not None else None
+        query_key = hashlib.sha1(
+            f"{self.track}|{self.race}|{vehicle_id}|{lap_number}|{start_ns}|{end_ns}".encode()
+        ).hexdigest()[:12]
+
+        vehicles = [vehicle_id] if vehicle_id else self.vehicles
+        resume_vehicle, resume_row = (None, None)
+        if cursor:
+            resume_vehicle, resume_row = self._decode_position(cursor, query_key)
+            vehicles = [v for v in vehicles if v >= resume_vehicle]
+
+        selected: List[np.ndarray] = []
+        remaining = limit
+        next_row = None
+
+        for vid in vehicles:
+            lo, hi = self._time_range(vid, start_ns, end_ns)
+            if vid == resume_vehicle:
+                lo = max(lo, resume_row)
+            if lo >= hi:
+                continue
+
+            if lap_number is not None:
+                rows = self.index.rows_for_lap(vid, lap_number, lo, hi)
+            else:
+                rows = np.arange(lo, hi)
+            if len(rows) == 0:
+                continue
+
+            if remaining == 0:
+                next_row = int(rows[0])
+                break
+            selected.append(rows[:remaining])
+            if len(rows) > remaining:
+                next_row = int(rows[remaining])
+                break
+            remaining -= len(rows)
+
+        rows = np.concatenate(selected) if selected else np.array([], dtype=int)
+        columns = KEY_COLUMNS + [c for c in (channels or self.channels) if c not in KEY_COLUMNS]
+        frame = self.frame.iloc[rows][[c for c in columns if c in self.frame.columns]]
+
+        return TelemetryPage(
+            frame=frame,
+            next_cursor=self._encode_position(next_row, query_key) if next_row is not None else None
+        )
+
+    def samples_near(
+        self,
+        lat: float,
+        lon: float,
+        radius: float,
+        vehicle_id: Optional[str] = None,
+        channels: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        The closest sample of every (vehicle, lap) within ``radius`` metres of a
+        map position, with its distance from the position in ``offset_m``.
+
+        Channels missing on the matched row are taken from the vehicle's most
+        recent earlier value (up to NEAREST_LOOKBACK_ROWS back). Empty if the
+        race has no GPS.
+        """
+        channels = [c for c in (channels or self.numeric_channels) if c not in KEY_COLUMNS]
+        spatial = self.spatial
+        if spatial is None:
+            return pd.DataFrame(columns=KEY_COLUMNS + ["offset_m"] + channels)
+
+        row_range = self.vehicle_ranges[vehicle_id] if vehicle_id else None
+        rows, offsets = spatial.nearest_per_lap(lat, lon, radius, row_range)
+
+        keys = [c for c in KEY_COLUMNS if c in self.frame.columns]
+        frame = self.frame.iloc[rows][keys + channels].reset_index(drop=True)
+        frame.insert(len(keys), "offset_m", offsets.round(2))
+        if len(rows):
+            starts = spatial.vehicle_starts[np.searchsorted(spatial.vehicle_starts, rows, side="right") - 1]
+            for c in channels:
+                source = self.frame[c].to_numpy()
+                values = source[rows].copy()
+                missing = pd.isna(values)
+                for back in range(1, NEAREST_LOOKBACK_ROWS + 1):
+                    if not missing.any():
+                        break
+                    earlier = rows - back
+                    usable = missing & (earlier >= starts)
+                    values[usable] = source[earlier[usable]]
+                    missing = pd.isna(values)
+                frame[c] = values
+        return frame
+
+    def _candidate_rows(self, vehicle_id: str, lo: int, hi: int, target_points: int) -> np.ndarray:
+        """Coarsest precomputed row set with enough headroom inside [lo, hi), else raw rows."""
+        for level, rows in sorted(self.decimated.get(vehicle_id, {}).items()):
+            window = rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+            if len(window) >= 2 * target_points:
+                return window
+        return np.arange(lo, hi)
+
+    def trace(
+        self,
+        vehicle_id: Optional[str] = None,
+        lap_number: Optional[int] = None,
+        start_time: Optional[pd.Timestamp] = None,
+        end_time: Optional[pd.Timestamp] = None,
+        channels: Optional[List[str]] = None,
+        target_points: int = 2000,
+        method: str = LTTB,
+        x_axis: str = "time"
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Chart-ready trace: at most ``target_points`` rows per vehicle for the window.
+
+        Returns (frame, source_rows) where source_rows counts the raw samples the
+        trace summarizes.
+        """
+        start_ns = start_time.value if start_time is not None else None
+        end_ns = end_time.value if end_time is not None else None
+        channels = [c for c in (channels or self.channels) if c not in KEY_COLUMNS]
+
+        selected = []
+        source_rows = 0
+        for vid in ([vehicle_id] if vehicle_id else self.vehicles):
+            lo, hi = self._time_range(vid, start_ns, end_ns)
+            if lo >= hi:
+                continue
+
+            if lap_number is not None:
+                rows = self.index.rows_for_lap(vid, lap_number, lo, hi)
+                source_rows += len(rows)
+            else:
+                rows = self._candidate_rows(vid, lo, hi, target_points)
+                source_rows += hi - lo
+            if len(rows) == 0:
+                continue
+
+            if x_axis == "distance":
+                # Lap distance has gaps between beacon updates; carry the last value forward
+                x = self.frame[DISTANCE_COLUMN].iloc[rows].ffill().fillna(0).to_numpy(dtype=float)
+            else:
+                x = time_axis(self.timestamps[rows])
+            keep = decimate_rows(x, self.frame.iloc[rows][channels], target_points, method)
+            selected.append(rows[keep])
+
+        rows = np.concatenate(selected) if selected else np.array([], dtype=int)
+        return self.frame.iloc[rows][KEY_COLUMNS + channels], source_rows
+
+
+class TelemetryCache:
+    """
+    LRU cache of CachedRace objects keyed by (track, race).
+
+    With a ``shared`` store the wide frames are memory-mapped from it, so
+    worker processes share them and only the indexes are per process.
+    """
+
+    def __init__(self, dataset_root: Path, max_races: int = 4, shared: Optional[SharedFrameStore] = None):
+        self.dataset_root = Path(dataset_root)
+        self.max_races = max_races
+        self.shared = shared
+        self._races: "OrderedDict[Tuple[str, str], CachedRace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, track: str, race: str) -> CachedRace:
+        key = (track.lower(), race.upper())
+        with self._lock:
+            if key in self._races:
+                self._races.move_to_end(key)
+                return self._races[key]
+
+        # Parse outside the lock so other races stay servable meanwhile
+        logger.info(f"Loading telemetry into cache: {track}/{race}")
+        if self.shared is not None:
+            cached = CachedRace.from_frame(track, race, self.shared.telemetry_wide(track, race), presorted=True)
+        else:
+            cached = CachedRace.from_frame(track, race, load_race_telemetry_wide(self.dataset_root, track, race))
+
+        with self._lock:
+            self._races[key] = cached
+            self._races.move_to_end(key)
+            while len(self._races) > self.max_races:
+                evicted, _ = self._races.popitem(last=False)
+                logger.info(f"Evicted telemetry cache entry {evicted}")
+        return cached
+
+    def invalidate(self, track: Optional[str] = None, race: Optional[str] = None):
+        """Drop cached races (all, one track, or one track/race)."""
+        with self._lock:
+            for key in list(self._races):
+                if track is not None and key[0] != track.lower():
+                    continue
+                if race is not None and key[1] != race.upper():
+                    continue
+                del self._races[key]
+
+
+# Singleton instance
+_telemetry_cache = None
+
+def get_telemetry_cache() -> TelemetryCache:
+    """Get singleton telemetry cache instance."""
+    global _telemetry_cache
+    if _telemetry_cache is None:
+        shared = get_shared_frame_store() if settings.shared_frames else None
+        _telemetry_cache = TelemetryCache(settings.dataset_root, settings.telemetry_cache_size, shared)
+    return _telemetry_cache
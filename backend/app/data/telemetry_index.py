@@ -0,0 +1,178 @@
+"""
+Telemetry Index
+Row indexes over a wide telemetry frame sorted by (vehicle_id, timestamp).
+
+- Vehicle ranges: each vehicle's rows are one contiguous slice of the frame.
+- Lap offsets: rows grouped by (vehicle, lap) in CSR form, so a lap is one
+  slice of ``lap_rows`` even if the (sometimes corrupted) lap field repeats or
+  jumps within a vehicle.
+- Timestamps: int64 nanoseconds, sorted within each vehicle.
+- Lap distance: within each (vehicle, lap) group the rows are also kept ordered
+  by ``Laptrigger_lapdist_dls`` with the sorted distances alongside.
+
+Every lookup is a dict access plus binary searches instead of a boolean scan
+over the whole frame.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DISTANCE_COLUMN = "Laptrigger_lapdist_dls"
+NO_LAP = -1
+
+
+class TelemetryIndex:
+    """Vehicle, lap, time and distance indexes for one race frame."""
+
+    def __init__(
+        self,
+        vehicle_ranges: Dict[str, Tuple[int, int]],
+        timestamps: np.ndarray,
+        lap_offsets: Dict[Tuple[str, int], Tuple[int, int]],
+        lap_rows: np.ndarray,
+        distance_rows: Optional[np.ndarray] = None,
+        distances: Optional[np.ndarray] = None
+    ):
+        self.vehicle_ranges = vehicle_ranges
+        self.timestamps = timestamps
+        self.lap_offsets = lap_offsets
+        self.lap_rows = lap_rows
+        self.distance_rows = distance_rows
+        self.distances = distances
+
+        self.vehicle_laps: Dict[str, List[int]] = {}
+        for vehicle_id, lap in lap_offsets:
+            if lap != NO_LAP:
+                self.vehicle_laps.setdefault(vehicle_id, []).append(lap)
+        for laps in self.vehicle_laps.values():
+            laps.sort()
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, distance_column: str = DISTANCE_COLUMN) -> "TelemetryIndex":
+        """Index a frame already sorted by (vehicle_id, timestamp) with a fresh RangeIndex."""
+        n = len(frame)
+        vehicles = frame["vehicle_id"].to_numpy()
+        boundaries = np.flatnonzero(vehicles[1:] != vehicles[:-1]) + 1
+        starts = np.concatenate([[0], boundaries]).astype(np.int64) if n else np.array([], dtype=np.int64)
+        stops = np.concatenate([boundaries, [n]]).astype(np.int64) if n else np.array([], dtype=np.int64)
+        vehicle_ranges = {str(vehicles[lo]): (int(lo), int(hi)) for lo, hi in zip(starts, stops)}
+        vehicle_codes = np.repeat(np.arange(len(starts)), stops - starts)
+
+        if "lap" in frame.columns:
+            laps = pd.to_numeric(frame["lap"], errors="coerce").fillna(NO_LAP).to_numpy(dtype=np.int64)
+        else:
+            laps = np.full(n, NO_LAP, dtype=np.int64)
+
+        # lexsort is stable, so rows of a (vehicle, lap) group stay in timestamp order
+        lap_rows = np.lexsort((laps, vehicle_codes))
+        group_codes = vehicle_codes[lap_rows], laps[lap_rows]
+        changes = np.flatnonzero((np.diff(group_codes[0]) != 0) | (np.diff(group_codes[1]) != 0)) + 1
+        group_starts = np.concatenate([[0], changes]) if n else np.array([], dtype=np.int64)
+        group_stops = np.concatenate([changes, [n]]) if n else np.array([], dtype=np.int64)
+        lap_offsets = {
+            (str(vehicles[lap_rows[lo]]), int(laps[lap_rows[lo]])): (int(lo), int(hi))
+            for lo, hi in zip(group_starts, group_stops)
+        }
+
+        distance_rows = distances = None
+        if distance_column in frame.columns:
+            # The beacon distance only updates every few samples; carry it forward per vehicle
+            distance = frame.groupby("vehicle_id", sort=False)[distance_column].ffill().to_numpy(dtype=float)
+            distance_rows = np.lexsort((distance, laps, vehicle_codes))  # NaN sorts last in each lap
+            distances = distance[distance_rows]
+
+        return cls(
+            vehicle_ranges=vehicle_ranges,
+            timestamps=frame["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64"),
+            lap_offsets=lap_offsets,
+            lap_rows=lap_rows,
+            distance_rows=distance_rows,
+            distances=distances
+        )
+
+    def time_range(self, vehicle_id: str, start_ns: Optional[int] = None,
+                   end_ns: Optional[int] = None) -> Tuple[int, int]:
+        """Row range of a vehicle clipped to [start, end] by binary search."""
+        lo, hi = self.vehicle_ranges[vehicle_id]
+        ts = self.timestamps[lo:hi]
+        lo_offset = int(np.searchsorted(ts, start_ns, side="left")) if start_ns is not None else 0
+        hi_offset = int(np.searchsorted(ts, end_ns, side="right")) if end_ns is not None else len(ts)
+        return lo + lo_offset, lo + hi_offset
+
+    def has_lap(self, lap: int, vehicle_id: Optional[str] = None) -> bool:
+        if vehicle_id is not None:
+            return (vehicle_id, lap) in self.lap_offsets
+        return any(lap in laps for laps in self.vehicle_laps.values())
+
+    def laps(self, vehicle_id: Optional[str] = None) -> List[int]:
+        """Sorted lap numbers of one vehicle, or of the whole race."""
+        if vehicle_id is not None:
+            return list(self.vehicle_laps.get(vehicle_id, []))
+        return sorted(set().union(*self.vehicle_laps.values())) if self.vehicle_laps else []
+
+    def rows_for_lap(self, vehicle_id: str, lap: int, lo: Optional[int] = None,
+                     hi: Optional[int] = None) -> np.ndarray:
+        """Ascending frame rows of a vehicle's lap, optionally clipped to rows [lo, hi)."""
+        start, stop = self.lap_offsets.get((vehicle_id, lap), (0, 0))
+        rows = self.lap_rows[start:stop]
+        if lo is not None:
+            rows = rows[np.searchsorted(rows, lo):]
+        if hi is not None:
+            rows = rows[:np.searchsorted(rows, hi)]
+        return rows
+
+    def rows_by_distance(self, vehicle_id: str, lap: int, start_m: Optional[float] = None,
+                         end_m: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows of a vehicle's lap with lap distance in [start_m, end_m), ordered by distance.
+
+        Returns (rows, distances). Samples recorded before the first distance
+        update of the race have no distance and are left out.
+        """
+        if self.distances is None:
+            raise KeyError(f"Frame has no {DISTANCE_COLUMN} channel")
+        start, stop = self.lap_offsets.get((vehicle_id, lap), (0, 0))
+        distances = self.distances[start:stop]
+        valid = int(np.searchsorted(distances, np.inf, side="right"))  # NaNs sort after +inf
+        i0 = int(np.searchsorted(distances[:valid], start_m, side="left")) if start_m is not None else 0
+        i1 = int(np.searchsorted(distances[:valid], end_m, side="left")) if end_m is not None else valid
+        return self.distance_rows[start + i0:start + i1], distances[i0:i1]
+
+    def distance_buckets(self, vehicle_id: str, lap: int,
+                         bucket_m: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        A lap split into fixed-width distance buckets.
+
+        Returns (bucket_starts, offsets, rows): rows are ordered by distance and
+        bucket i is ``rows[offsets[i]:offsets[i + 1]]``, starting at bucket_starts[i] metres.
+        """
+        rows, distances = self.rows_by_distance(vehicle_id, lap)
+        if len(rows) == 0:
+            return np.array([], dtype=float), np.array([0], dtype=np.int64), rows
+        first = np.floor(distances[0] / bucket_m) * bucket_m
+        edges = np.arange(first, distances[-1] + bucket_m, bucket_m)
+        offsets = np.searchsorted(distances, edges, side="left")
+        offsets[-1] = len(rows)
+        return edges[:-1], offsets, rows
+
+    def window_offsets(self, vehicle_id: str, starts_ns: np.ndarray,
+                       ends_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row ranges [lo, hi) of a vehicle for sorted time windows [start, end).
+
+        A missing end (NaT, or any negative value) runs to the vehicle's last row.
+        Each window is cut off where the next one starts, so every row belongs to
+        at most one window.
+        """
+        lo, hi = self.vehicle_ranges[vehicle_id]
+        ts = self.timestamps[lo:hi]
+        starts = np.asarray(starts_ns, dtype=np.int64)
+        ends = np.asarray(ends_ns, dtype=np.int64)
+
+        window_lo = np.searchsorted(ts, starts, side="left")
+        window_hi = np.where(ends < 0, len(ts), np.searchsorted(ts, ends, side="left"))
+        window_hi[:-1] = np.minimum(window_hi[:-1], window_lo[1:])
+        window_hi = np.maximum(window_hi, window_lo)
+        return lo + window_lo, lo + window_hi
@@ -8,6 +8,9 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import logging
 
+from .catalog import get_dataset_catalog
+from ..core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,35 +41,10 @@ class TelemetryLoader:
         race: str, 
         vehicle_id: Optional[str] = None
     ) -> pd.DataFrame:
-        """Load raw telemetry in long format with per-track filename mapping."""
-        t = track.lower()
-        base = self.data_dir / track
-        if t == "barber":
-            telemetry_file = base / f"{race}_barber_telemetry_data.csv"
-        elif t == "indianapolis":
-            telemetry_file = base / f"{race}_indianapolis_motor_speedway_telemetry.csv"
-        elif t == "cota":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            telemetry_file = sub / f"{race}_cota_telemetry_data.csv"
-        elif t == "road america":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            telemetry_file = sub / f"{race}_road_america_telemetry_data.csv"
-        elif t == "sebring":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            telemetry_file = sub / f"sebring_telemetry_{race}.csv"
-        elif t == "sonoma":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            telemetry_file = sub / f"sonoma_telemetry_{race}.csv"
-        elif t == "vir":
-            sub = base / ("Race 1" if race.upper() == "R1" else "Race 2")
-            telemetry_file = sub / f"{race}_vir_telemetry_data.csv"
-        else:
-            telemetry_file = base / f"{race}_{track}_telemetry_data.csv"
-            if not telemetry_file.exists():
-                telemetry_file = base / f"{race}_{track}_telemetry.csv"
-        
-        if not telemetry_file.exists():
-            raise FileNotFoundError(f"Telemetry file not found: {telemetry_file}")
+        """Load raw telemetry in long format, resolving the file through the dataset catalog."""
+        telemetry_file = get_dataset_catalog(self.data_dir).resolve(track, race, "telemetry")
+        if telemetry_file is None:
+            raise FileNotFoundError(f"Telemetry file not found for {track} {race} in {self.data_dir}")
         
         logger.info(f"Loading telemetry from {telemetry_file}")
         
@@ -230,9 +208,10 @@ class TelemetryLoader:
 # Singleton instance
 _loader = None
 
-def get_telemetry_loader(data_dir: str = "../dataset") -> TelemetryLoader:
-    """Get singleton telemetry loader instance."""
+def get_telemetry_loader(data_dir: Optional[str] = None) -> TelemetryLoader:
+    """Get singleton telemetry loader instance for ``data_dir`` (default: ``settings.dataset_root``)."""
     global _loader
-    if _loader is None:
-        _loader = TelemetryLoader(data_dir)
+    data_dir = Path(data_dir or settings.dataset_root)
+    if _loader is None or Path(_loader.data_dir) != data_dir:
+        _loader = TelemetryLoader(str(data_dir))
     return _loader
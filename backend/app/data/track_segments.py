@@ -0,0 +1,428 @@
+"""
+Track Segments
+Corner and straight segments derived from GPS and lateral acceleration.
+
+A segment map is derived once per track from a reference lap (the field's
+fastest complete lap of the first race loaded):
+- The lap is resampled onto a lap-distance grid (see lap_comparison) with GPS
+  position and ``accy_can``.
+- Curvature is the change in GPS heading per metre of lap distance, so it does
+  not depend on the GPS units; lateral g confirms corners where the GPS line
+  is noisy or missing.
+- Grid points over the curvature or lateral-g threshold are clustered into
+  corners (close runs turning the same way are merged, short blips dropped),
+  and the gaps between corners become straights.
+
+The map is stored as JSON under ``settings.segments_dir``. Telemetry rows are
+assigned to segments by snapping their GPS position to the nearest point of
+the reference line (GridIndex); rows without a GPS fix, or past either end of
+the line, fall back to their lap distance. Per-lap segment times are then a
+single bincount over the race.
+"""
+from __future__ import annotations
+import json
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..core.config import settings
+from .events import ffill_within
+from .lap_comparison import FIELD_BEST, ReferenceLapError, get_lap_comparison_engine, resample_lap
+from .spatial_index import LAT_COLUMN, LON_COLUMN, GridIndex, gps_degrees, to_local_xy
+from .telemetry_index import DISTANCE_COLUMN, NO_LAP
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAP_VERSION = 1
+CURVATURE_MIN = 1 / 250.0  # 1/m; tighter than a 250 m radius is a corner
+LATERAL_G_MIN = 0.5
+SMOOTH_M = 30.0
+MERGE_GAP_M = 40.0
+MIN_CORNER_M = 25.0
+MAX_OFFSET_M = 30.0  # GPS further than this from the reference line (pit lane) gets no segment
+MAX_SAMPLE_GAP_S = 1.0  # Longer gaps between samples are not counted as time in a segment
+OUTLIER_LAP_FACTOR = 1.3  # Laps slower than this x the median lap are left out of time loss stats
+
+
+class SegmentationError(ValueError):
+    """Raised when a segment map cannot be derived from the available telemetry."""
+
+
+@dataclass
+class Segment:
+    segment_id: int
+    name: str
+    kind: str
+    start_m: float
+    end_m: float
+    direction: Optional[str] = None
+    apex_m: Optional[float] = None
+    min_radius_m: Optional[float] = None
+    peak_lateral_g: Optional[float] = None
+
+
+@dataclass
+class SegmentMap:
+    """Segments along the lap plus the reference line used for GPS lookups."""
+    track: str
+    reference: Dict[str, object]
+    step_m: float
+    segments: List[Segment]
+    line_distance: np.ndarray
+    line_x: np.ndarray
+    line_y: np.ndarray
+    origin: Optional[Tuple[float, float]] = None
+    _grid: Optional[GridIndex] = field(default=None, repr=False)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return np.array([s.start_m for s in self.segments])
+
+    @property
+    def has_gps(self) -> bool:
+        return self.origin is not None and not np.isnan(self.line_x).all()
+
+    @property
+    def grid(self) -> GridIndex:
+        if self._grid is None:
+            self._grid = GridIndex(self.line_x, self.line_y, MAX_OFFSET_M)
+        return self._grid
+
+    def segment_at_distance(self, distance: np.ndarray) -> np.ndarray:
+        """Segment id for lap distances (the first segment also takes anything before it)."""
+        distance = np.asarray(distance, dtype=float)
+        ids = np.clip(np.searchsorted(self.starts, distance, side="right") - 1, 0, len(self.segments) - 1)
+        return np.where(np.isnan(distance), -1, ids)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": SEGMENT_MAP_VERSION,
+            "track": self.track,
+            "reference": self.reference,
+            "step_m": self.step_m,
+            "origin": list(self.origin) if self.origin is not None else None,
+            "segments": [asdict(s) for s in self.segments],
+            "line": {
+                "distance": self.line_distance.round(2).tolist(),
+                "x": np.round(self.line_x, 2).tolist(),
+                "y": np.round(self.line_y, 2).tolist()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SegmentMap":
+        if data.get("version") != SEGMENT_MAP_VERSION:
+            raise ValueError(f"Unsupported segment map version {data.get('version')}")
+        line = data["line"]
+        return cls(
+            track=data["track"],
+            reference=data["reference"],
+            step_m=data["step_m"],
+            segments=[Segment(**s) for s in data["segments"]],
+            line_distance=np.asarray(line["distance"], dtype=float),
+            line_x=np.asarray([np.nan if v is None else v for v in line["x"]], dtype=float),
+            line_y=np.asarray([np.nan if v is None else v for v in line["y"]], dtype=float),
+            origin=tuple(data["origin"]) if data.get("origin") else None
+        )
+
+
+def _smooth(values: np.ndarray, window: int) -> np.ndarray:
+    if window <= 1:
+        return values
+    kernel = np.ones(window) / window
+    padded = np.pad(values, window // 2, mode="edge")
+    return np.convolve(padded, kernel, mode="same")[window // 2:window // 2 + len(values)]
+
+
+def detect_segments(
+    grid: np.ndarray,
+    x: Optional[np.ndarray],
+    y: Optional[np.ndarray],
+    lateral_g: Optional[np.ndarray]
+) -> List[Segment]:
+    """Split a resampled reference lap into alternating straights and corners."""
+    step = float(grid[1] - grid[0])
+    window = max(1, int(round(SMOOTH_M / step)))
+
+    curvature = None
+    if x is not None and y is not None and not (np.isnan(x).any() or np.isnan(y).any()):
+        # Smooth the line first: GPS jitter of a few decimetres swamps the heading over 5 m
+        heading = np.unwrap(np.arctan2(np.gradient(_smooth(y, window)), np.gradient(_smooth(x, window))))
+        curvature = _smooth(np.gradient(heading) / step, window)
+    lat_g = _smooth(np.nan_to_num(lateral_g), window) if lateral_g is not None else None
+    if curvature is None and lat_g is None:
+        raise SegmentationError("Need GPS (VBOX_Lat_Min/VBOX_Long_Minutes) or accy_can to find corners")
+
+    corner = np.zeros(len(grid), dtype=bool)
+    if curvature is not None:
+        corner |= np.abs(curvature) > CURVATURE_MIN
+    if lat_g is not None:
+        corner |= np.abs(lat_g) > LATERAL_G_MIN
+    # Positive curvature (counter-clockwise heading) is a left turn
+    turn = np.sign(curvature) if curvature is not None else np.sign(lat_g)
+
+    edges = np.diff(np.concatenate([[0], corner.astype(np.int8), [0]]))
+    runs = [[int(a), int(b)] for a, b in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))]
+
+    merged: List[List[int]] = []
+    for run in runs:
+        direction = np.sign(turn[run[0]:run[1]].sum())
+        if merged and (run[0] - merged[-1][1]) * step < MERGE_GAP_M and direction == merged[-1][2]:
+            merged[-1][1] = run[1]
+        else:
+            merged.append([run[0], run[1], direction])
+    corners = [(a, b, d) for a, b, d in merged if (b - a) * step >= MIN_CORNER_M]
+
+    segments: List[Segment] = []
+    position = 0.0
+    for number, (a, b, direction) in enumerate(corners, start=1):
+        start_m, end_m = float(grid[a]), float(grid[b - 1] + step)
+        if start_m > position:
+            segments.append(Segment(len(segments), f"S{number}", "straight", position, start_m))
+        span = slice(a, b)
+        apex = a + int(np.argmax(np.abs(curvature[span]) if curvature is not None else np.abs(lat_g[span])))
+        max_curvature = float(np.abs(curvature[span]).max()) if curvature is not None else 0.0
+        segments.append(Segment(
+            segment_id=len(segments),
+            name=f"T{number}",
+            kind="corner",
+            start_m=start_m,
+            end_m=end_m,
+            direction="left" if direction > 0 else "right",
+            apex_m=float(grid[apex]),
+            min_radius_m=round(1 / max_curvature, 1) if max_curvature > 0 else None,
+            peak_lateral_g=round(float(np.abs(lat_g[span]).max()), 3) if lat_g is not None else None
+        ))
+        position = end_m
+    # The last straight runs to the line; rows past the grid end also map to it
+    if position < grid[-1] + step:
+        segments.append(Segment(len(segments), f"S{len(corners) + 1}", "straight", position, float(grid[-1] + step)))
+    return segments
+
+
+def derive_segment_map(cached, step_m: float = 5.0) -> SegmentMap:
+    """Build a track's segment map from the field's fastest complete lap of a cached race."""
+    resampled = get_lap_comparison_engine().get(cached, step_m)
+    try:
+        row = int(resampled.reference_rows(FIELD_BEST)[0])
+    except ReferenceLapError as e:
+        raise SegmentationError(f"No complete lap to derive segments from: {e}")
+    vehicle_id, lap = str(resampled.vehicle_ids[row]), int(resampled.laps[row])
+
+    rows = cached.index.rows_for_lap(vehicle_id, lap)
+    frame = cached.frame
+    seconds = (cached.timestamps[rows] - cached.timestamps[rows[0]]) / 1e9
+    values = {}
+    has_gps = LAT_COLUMN in frame.columns and LON_COLUMN in frame.columns
+    if has_gps:
+        values["lat"] = gps_degrees(frame[LAT_COLUMN].to_numpy(dtype=float)[rows])
+        values["lon"] = gps_degrees(frame[LON_COLUMN].to_numpy(dtype=float)[rows])
+    if "accy_can" in frame.columns:
+        values["accy_can"] = frame["accy_can"].to_numpy(dtype=float)[rows]
+
+    result = resample_lap(seconds, frame[DISTANCE_COLUMN].to_numpy(dtype=float)[rows], values, resampled.grid)
+    if result is None:
+        raise SegmentationError(f"Reference lap {lap} of {vehicle_id} does not cover the lap")
+    _, line = result
+
+    x = y = origin = None
+    if has_gps and not (np.isnan(line["lat"]).all() or np.isnan(line["lon"]).all()):
+        origin = (float(np.nanmean(line["lat"])), float(np.nanmean(line["lon"])))
+        x, y = to_local_xy(line["lat"], line["lon"], origin)
+
+    segments = detect_segments(resampled.grid, x, y, line.get("accy_can"))
+    logger.info(f"Derived {sum(s.kind == 'corner' for s in segments)} corners for {cached.track} from {vehicle_id} lap {lap}")
+    return SegmentMap(
+        track=cached.track,
+        reference={"race": cached.race, "vehicle_id": vehicle_id, "lap": lap, "grid_elapsed": float(resampled.grid_elapsed[row])},
+        step_m=step_m,
+        segments=segments,
+        line_distance=resampled.grid,
+        line_x=x if x is not None else np.full(len(resampled.grid), np.nan),
+        line_y=y if y is not None else np.full(len(resampled.grid), np.nan),
+        origin=origin
+    )
+
+
+def assign_segments(segment_map: SegmentMap, cached) -> np.ndarray:
+    """Segment id of every row of a cached race (-1 for off-line GPS positions, e.g. the pit lane)."""
+    frame = cached.frame
+    first = np.zeros(len(frame), dtype=bool)
+    first[[lo for lo, _ in cached.vehicle_ranges.values()]] = True
+
+    distance = frame[DISTANCE_COLUMN].to_numpy(dtype=float) if DISTANCE_COLUMN in frame.columns else np.full(len(frame), np.nan)
+    distance = ffill_within(distance, first)
+    segments = segment_map.segment_at_distance(distance)
+
+    if segment_map.has_gps and LAT_COLUMN in frame.columns and LON_COLUMN in frame.columns:
+        lat = ffill_within(gps_degrees(frame[LAT_COLUMN].to_numpy(dtype=float)), first)
+        lon = ffill_within(gps_degrees(frame[LON_COLUMN].to_numpy(dtype=float)), first)
+        x, y = to_local_xy(lat, lon, segment_map.origin)
+        nearest, _ = segment_map.grid.nearest(x, y, MAX_OFFSET_M)
+        by_gps = segment_map.segment_at_distance(segment_map.line_distance[np.maximum(nearest, 0)])
+        # The line stops short of the timing line at both ends; rows there keep their lap-distance segment
+        covered = (distance >= segment_map.line_distance[0]) & (distance <= segment_map.line_distance[-1])
+        off_line = np.where(covered | np.isnan(distance), -1, segments)
+        segments = np.where(np.isnan(x), segments, np.where(nearest >= 0, by_gps, off_line))
+    return segments.astype(np.int16)
+
+
+def segment_times(segment_map: SegmentMap, cached, segments: np.ndarray) -> pd.DataFrame:
+    """
+    Time spent in each segment on every (vehicle, lap), one row per lap.
+
+    Each sample contributes the time until the vehicle's next sample (gaps over
+    MAX_SAMPLE_GAP_S are dropped). Laps missing a segment are left out.
+    """
+    index = cached.index
+    n_segments = len(segment_map.segments)
+    keys = [k for k in index.lap_offsets if k[1] != NO_LAP]
+    group = np.full(len(cached.frame), -1, dtype=np.int64)
+    for g, key in enumerate(keys):
+        lo, hi = index.lap_offsets[key]
+        group[index.lap_rows[lo:hi]] = g
+
+    ts = cached.timestamps
+    dt = np.append(np.diff(ts) / 1e9, 0.0)
+    last = np.zeros(len(ts), dtype=bool)
+    last[[hi - 1 for _, hi in cached.vehicle_ranges.values()]] = True
+    dt = np.where(last | (dt > MAX_SAMPLE_GAP_S) | (dt < 0), 0.0, dt)
+
+    counted = (group >= 0) & (segments >= 0)
+    flat = group[counted] * n_segments + segments[counted]
+    times = np.bincount(flat, weights=dt[counted], minlength=len(keys) * n_segments).reshape(len(keys), n_segments)
+
+    columns = [s.name for s in segment_map.segments]
+    df = pd.DataFrame(times, columns=columns)
+    df.insert(0, "vehicle_id", [k[0] for k in keys])
+    df.insert(1, "lap", [k[1] for k in keys])
+    complete = (times > 0).all(axis=1)
+    return df[complete].reset_index(drop=True)
+
+
+def time_loss(segment_map: SegmentMap, lap_times: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per vehicle and segment: best and mean segment time and the loss against
+    the field's best time in that segment.
+    """
+    columns = [s.name for s in segment_map.segments]
+    if lap_times.empty:
+        return pd.DataFrame()
+    totals = lap_times[columns].sum(axis=1)
+    clean = lap_times[totals <= OUTLIER_LAP_FACTOR * totals.median()]
+
+    field_best = clean[columns].min()
+    long = clean.melt(id_vars=["vehicle_id", "lap"], value_vars=columns, var_name="segment", value_name="time")
+    stats = long.groupby(["vehicle_id", "segment"], sort=False)["time"].agg(laps="count", best_time="min", mean_time="mean")
+    stats = stats.reset_index()
+    stats["field_best_time"] = stats["segment"].map(field_best)
+    stats["best_loss"] = stats["best_time"] - stats["field_best_time"]
+    stats["mean_loss"] = stats["mean_time"] - stats["field_best_time"]
+
+    info = {s.name: s for s in segment_map.segments}
+    stats.insert(2, "kind", stats["segment"].map(lambda n: info[n].kind))
+    stats.insert(3, "start_m", stats["segment"].map(lambda n: info[n].start_m))
+    order = {name: i for i, name in enumerate(columns)}
+    return stats.sort_values(["vehicle_id", "segment"], key=lambda c: c.map(order) if c.name == "segment" else c).reset_index(drop=True)
+
+
+class TrackSegmentStore:
+    """
+    Segment maps per track (memory + JSON on disk) and per-race row assignments.
+
+    Assignments hold a weak reference to their CachedRace and are bounded like
+    the telemetry cache, so a race evicted there is not kept alive here.
+    """
+
+    def __init__(self, segments_dir: Path, max_races: int = 4):
+        self.segments_dir = Path(segments_dir)
+        self.max_races = max_races
+        self._maps: Dict[str, SegmentMap] = {}
+        self._races: "OrderedDict[Tuple[str, str], Tuple[weakref.ref, np.ndarray, pd.DataFrame]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, track: str) -> Path:
+        return self.segments_dir / f"{track.lower().replace(' ', '_')}.json"
+
+    def get_map(self, track: str, cached=None) -> SegmentMap:
+        """Stored map for a track, deriving it from ``cached`` the first time."""
+        key = track.lower()
+        with self._lock:
+            if key in self._maps:
+                return self._maps[key]
+
+        path = self._path(track)
+        segment_map = None
+        if path.exists():
+            try:
+                segment_map = SegmentMap.from_dict(json.loads(path.read_text()))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable segment map {path}: {e}")
+        if segment_map is None:
+            if cached is None:
+                raise SegmentationError(f"No segment map stored for {track}")
+            segment_map = derive_segment_map(cached)
+            self.segments_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(segment_map.to_dict()))
+            tmp.replace(path)
+
+        with self._lock:
+            self._maps[key] = segment_map
+        return segment_map
+
+    def race_segments(self, cached) -> Tuple[SegmentMap, np.ndarray, pd.DataFrame]:
+        """(map, segment id per row, per-lap segment times) for a cached race; computed once per load."""
+        segment_map = self.get_map(cached.track, cached)
+        key = (cached.track.lower(), cached.race.upper())
+        with self._lock:
+            entry = self._races.get(key)
+            if entry is not None and entry[0]() is cached:
+                self._races.move_to_end(key)
+                return segment_map, entry[1], entry[2]
+
+        segments = assign_segments(segment_map, cached)
+        lap_times = segment_times(segment_map, cached, segments)
+        with self._lock:
+            self._races[key] = (weakref.ref(cached), segments, lap_times)
+            self._races.move_to_end(key)
+            while len(self._races) > self.max_races:
+                self._races.popitem(last=False)
+        return segment_map, segments, lap_times
+
+    def invalidate(self, track: Optional[str] = None, forget_map: bool = False, race: Optional[str] = None):
+        """Drop race assignments (one race, one track or all) and optionally the stored map of the track."""
+        with self._lock:
+            for key in list(self._races):
+                if track is not None and key[0] != track.lower():
+                    continue
+                if race is not None and key[1] != race.upper():
+                    continue
+                del self._races[key]
+            if forget_map:
+                for key in list(self._maps):
+                    if track is None or key == track.lower():
+                        del self._maps[key]
+                if track is not None:
+                    self._path(track).unlink(missing_ok=True)
+                elif self.segments_dir.exists():
+                    for path in self.segments_dir.glob("*.json"):
+                        path.unlink(missing_ok=True)
+
+
+# Singleton instance
+_store = None
+
+def get_track_segment_store() -> TrackSegmentStore:
+    """Get singleton track segment store instance."""
+    global _store
+    if _store is None:
+        _store = TrackSegmentStore(settings.segments_dir, settings.telemetry_cache_size)
+    return _store
@@ -1,4 +1,8 @@
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from .api.telemetry import router as telemetry_router
 from .api.laps import router as laps_router
@@ -11,9 +15,69 @@ from .api.consistency import router as consistency_router
 from .api.insights import router as insights_router
 from .api.results import router as results_router
 from .api.weather import router as weather_router
+from .api.health import router as health_router
+from .api.datasets import router as datasets_router
 from .websocket.live import router as ws_router
+from .services.incremental_training import get_incremental_scheduler
+from .services.training_jobs import get_training_job_manager
+from .services.insights import get_insight_service
+from .services.materialize import start_background_materialize
+from .services.watcher import get_data_watcher
+from .services.warmup import get_warmup
+from .core.coalesce import CoalescingMiddleware
+from .core.compute import ComputeBusyError, get_compute_dispatcher
+from .core.config import settings
+from .core.leader import acquire_leadership, release_leadership
+from .data.catalog import get_dataset_catalog
+from .core.responses import FastJSONResponse, FastJSONRoute
+from .core.startup import get_startup_profile
+
+get_startup_profile().record("import", time.perf_counter() - _import_started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    profile = get_startup_profile()
+    with profile.phase("dataset_catalog"):
+        get_dataset_catalog().refresh()
+    with profile.phase("background_services"):
+        # With several workers only one runs the scheduler and writes shared artifacts
+        leader = acquire_leadership(settings.background_lock)
+        if leader:
+            get_incremental_scheduler().start()
+        watcher = get_data_watcher()
+        watcher.rematerialize = leader
+        watcher.start()
+        if leader and settings.materialize_on_startup:
+            start_background_materialize()
+    # Runs while requests are served; /health/ready reports when it is done
+    get_warmup().start()
+    profile.finish()
+
+    yield
+
+    await get_warmup().stop()
+    await get_incremental_scheduler().stop()
+    await get_data_watcher().stop()
+    get_training_job_manager().shutdown()
+    get_compute_dispatcher().shutdown()
+    get_insight_service().shutdown()
+    release_leadership()
 
-app = FastAPI(title="GR-Insight Backend", description="Real-time race strategy & analytics for Toyota GR Cup")
+
+app = FastAPI(
+    title="GR-Insight Backend",
+    description="Real-time race strategy & analytics for Toyota GR Cup",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
+)
+app.router.route_class = FastJSONRoute
+
+# Added before CORS so CORS stays the outer layer and shared responses carry no per-origin headers
+app.add_middleware(
+    CoalescingMiddleware,
+    prefixes=[p.strip() for p in settings.coalesce_paths.split(",") if p.strip()]
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,9 +105,15 @@ app.include_router(consistency_router)
 app.include_router(insights_router)
 app.include_router(results_router)
 app.include_router(weather_router)
+app.include_router(health_router)
+app.include_router(datasets_router)
 app.include_router(ws_router)
 
 
+@app.exception_handler(ComputeBusyError)
+async def compute_busy_handler(request: Request, exc: ComputeBusyError):
+    return FastJSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 
 @app.get("/")
 async def root():
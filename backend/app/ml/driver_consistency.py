@@ -8,6 +8,7 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import logging
 
+from ..core.config import settings
 from ..data.lap_segmenter import get_lap_segmenter
 from ..data.sector_mapper import get_sector_mapper
 from ..data.feature_engine import get_feature_engine
@@ -71,8 +72,12 @@ class DriverConsistencyModel:
         except:
             logger.warning("Sector data not available")
         
-        # Load telemetry for behavioral consistency
-        lap_data = segmenter.segment_by_lap(track, race, vehicle_id)
+        # Load telemetry for behavioral consistency if available
+        lap_data = {}
+        try:
+            lap_data = segmenter.segment_by_lap(track, race, vehicle_id)
+        except FileNotFoundError:
+            logger.warning("Telemetry not available")
         
         throttle_variance = []
         brake_variance = []
@@ -231,9 +236,10 @@ class DriverConsistencyModel:
 # Singleton instance
 _model = None
 
-def get_consistency_model(data_dir: str = "../dataset") -> DriverConsistencyModel:
-    """Get singleton consistency model."""
+def get_consistency_model(data_dir: Optional[str] = None) -> DriverConsistencyModel:
+    """Get singleton consistency model for ``data_dir`` (default: ``settings.dataset_root``)."""
     global _model
-    if _model is None:
-        _model = DriverConsistencyModel(data_dir)
+    data_dir = Path(data_dir or settings.dataset_root)
+    if _model is None or Path(_model.data_dir) != data_dir:
+        _model = DriverConsistencyModel(str(data_dir))
     return _model
@@ -5,17 +5,19 @@ Predicts next lap time based on telemetry features, sector times, and tire age
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import pickle
 import logging
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import xgboost as xgb
 
 from ..data.telemetry_loader import get_telemetry_loader
 from ..data.lap_segmenter import get_lap_segmenter
 from ..data.sector_mapper import get_sector_mapper
 from ..data.feature_engine import get_feature_engine
+from ..core.config import settings
+from .model_artifact import (
+    save_model_artifact, load_model_artifact, hash_training_data, is_artifact_path,
+    METADATA_SUFFIX
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +37,12 @@ class LapTimePredictor:
         self.model = None
         self.feature_names = None
         self.model_path = model_path
+        self.metrics = {}
+        self.data_hash = None
+        self.metadata = {}
+        self.feature_medians = {}
+        self._feature_index = {}
+        self._fill_values = None
         
         if model_path and Path(model_path).exists():
             self.load_model(model_path)
@@ -148,6 +156,11 @@ class LapTimePredictor:
         """
         logger.info(f"Training XGBoost model on {len(X)} samples")
         
+        # Training dependencies load on first use; serving a saved model needs only xgboost
+        import xgboost as xgb
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=test_size, random_state=random_state, shuffle=True
@@ -172,6 +185,9 @@ class LapTimePredictor:
         )
         
         self.feature_names = feature_names
+        self.data_hash = hash_training_data(X, y)
+        self.feature_medians = self._compute_medians(X_train)
+        self._compile_features()
         
         # Evaluate
         y_pred_train = self.model.predict(X_train)
@@ -190,6 +206,8 @@ class LapTimePredictor:
             'n_test': len(X_test)
         }
         
+        self.metrics = metrics
+        
         logger.info(f"Training complete:")
         logger.info(f"  Train MAE: {metrics['train_mae']:.3f}s")
         logger.info(f"  Test MAE: {metrics['test_mae']:.3f}s")
@@ -197,37 +215,172 @@ class LapTimePredictor:
         
         return metrics
     
-    def predict(self, features: Dict) -> float:
+    def update(
+        self,
+        X_new,
+        y_new,
+        X_val=None,
+        y_val=None,
+        n_estimators: int = 25,
+        validation_fraction: float = 0.3,
+        max_mae_increase: float = 0.0
+    ) -> Dict:
         """
-        Predict lap time for given features.
+        Incrementally update the model with newly completed laps.
+        
+        Continues boosting the existing booster (XGBoost ``xgb_model`` continuation)
+        instead of retraining from scratch. The candidate is only accepted if its
+        validation MAE does not regress beyond ``max_mae_increase`` seconds.
         
         Args:
-            features: Dictionary of feature values
+            X_new: New feature rows (DataFrame matched by column name, or array in
+                feature_names order). Rows are put in time order by a ``timestamp``
+                column when there is one and otherwise taken as given.
+            y_new: New target lap times
+            X_val: Validation features (default: time-ordered tail of the new laps)
+            y_val: Validation targets
+            n_estimators: Boosting rounds to add
+            validation_fraction: Tail fraction of new laps held out when X_val is None
+            max_mae_increase: Allowed MAE regression in seconds
         
         Returns:
-            Predicted lap time in seconds
+            Dictionary describing the update and whether it was accepted
         """
         if self.model is None:
             raise ValueError("Model not trained. Call train() first.")
         
-        # Convert to DataFrame to ensure correct feature order
-        df = pd.DataFrame([features])
+        y_new = np.asarray(y_new, dtype=float)
+        if isinstance(X_new, pd.DataFrame) and 'timestamp' in X_new.columns:
+            order = np.argsort(X_new['timestamp'].to_numpy(), kind='stable')
+            X_new, y_new = X_new.iloc[order], y_new[order]
+        X_new = pd.DataFrame(self._to_matrix(X_new), columns=self.feature_names)
+        
+        if X_val is None:
+            # Hold out the most recent laps - the update must generalize forward in time
+            n_val = max(1, int(len(X_new) * validation_fraction))
+            if len(X_new) - n_val < 1:
+                raise ValueError("Not enough new laps for an incremental update")
+            X_fit, y_fit = X_new.iloc[:-n_val], y_new[:-n_val]
+            X_val, y_val = X_new.iloc[-n_val:], y_new[-n_val:]
+        else:
+            X_fit, y_fit = X_new, y_new
+            X_val = pd.DataFrame(self._to_matrix(X_val), columns=self.feature_names)
+            y_val = np.asarray(y_val, dtype=float)
+        
+        import xgboost as xgb
+        from sklearn.metrics import mean_absolute_error
+        
+        booster = self.model.get_booster()
+        rounds_before = booster.num_boosted_rounds()
+        baseline_mae = float(mean_absolute_error(y_val, self.model.predict(X_val)))
+        
+        params = self.model.get_params()
+        params.update(n_estimators=n_estimators, early_stopping_rounds=None)
+        candidate = xgb.XGBRegressor(**params)
+        candidate.fit(X_fit, y_fit, xgb_model=booster, verbose=False)
+        candidate_mae = float(mean_absolute_error(y_val, candidate.predict(X_val)))
+        
+        accepted = candidate_mae <= baseline_mae + max_mae_increase
+        if accepted:
+            self.model = candidate
+            self.metrics = {**self.metrics, 'last_update': {
+                'baseline_mae': baseline_mae,
+                'candidate_mae': candidate_mae,
+                'n_new_samples': int(len(X_fit))
+            }}
+            logger.info(f"Incremental update accepted: MAE {baseline_mae:.3f}s -> {candidate_mae:.3f}s")
+        else:
+            logger.warning(f"Incremental update rejected: MAE {baseline_mae:.3f}s -> {candidate_mae:.3f}s")
+        
+        return {
+            'accepted': bool(accepted),
+            'baseline_mae': baseline_mae,
+            'candidate_mae': candidate_mae,
+            'n_new_samples': int(len(X_fit)),
+            'n_validation_samples': int(len(X_val)),
+            'rounds_before': int(rounds_before),
+            'rounds_after': int(self.model.get_booster().num_boosted_rounds())
+        }
+    
+    def _compute_medians(self, X) -> Dict[str, float]:
+        """Per-feature training medians, used to fill missing inputs at prediction time."""
+        medians = np.nanmedian(np.asarray(X, dtype=float), axis=0)
+        return {
+            name: float(value)
+            for name, value in zip(self.feature_names, medians)
+            if not np.isnan(value)
+        }
+    
+    def _compile_features(self):
+        """Build the feature-index mapping and fill vector once per loaded model."""
+        self._feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        # Models saved before medians were stored keep the old default of 0
+        self._fill_values = np.array(
+            [self.feature_medians.get(name, 0.0) for name in self.feature_names],
+            dtype=float
+        )
+    
+    def _to_matrix(self, features) -> np.ndarray:
+        """Align dicts, lists of dicts, DataFrames or arrays to the model's feature order."""
+        n_features = len(self.feature_names)
+        
+        if isinstance(features, pd.DataFrame):
+            X = features.reindex(columns=self.feature_names).to_numpy(dtype=float)
+        elif isinstance(features, dict):
+            features = [features]
+        
+        if isinstance(features, list) and features and isinstance(features[0], dict):
+            X = np.full((len(features), n_features), np.nan)
+            index = self._feature_index
+            for row, record in enumerate(features):
+                for name, value in record.items():
+                    col = index.get(name)
+                    if col is not None and value is not None:
+                        X[row, col] = value
+        elif not isinstance(features, pd.DataFrame):
+            X = np.asarray(features, dtype=float)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+            if X.shape[1] != n_features:
+                raise ValueError(f"Expected {n_features} features, got {X.shape[1]}")
+        
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self._fill_values, X)
+        return X
+    
+    def predict_batch(self, features) -> np.ndarray:
+        """
+        Predict lap times for many rows at once.
+        
+        Args:
+            features: DataFrame, list of feature dicts, or 2-D array in feature_names order
         
-        # Ensure all expected features are present
-        for feat in self.feature_names:
-            if feat not in df.columns:
-                df[feat] = 0  # Default missing features to 0
+        Returns:
+            Array of predicted lap times in seconds
+        """
+        if self.model is None:
+            raise ValueError("Model not trained. Call train() first.")
         
-        # Select only model features in correct order
-        df = df[self.feature_names]
+        return self.model.predict(self._to_matrix(features))
+    
+    def predict(self, features: Union[Dict, pd.DataFrame, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        Predict lap time for given features.
         
-        # Fill NaN
-        df = df.fillna(0)
+        Args:
+            features: Feature dict (or 1-D array) for a single lap, or a
+                DataFrame / 2-D array for a batch. Missing features are filled
+                with training medians.
         
-        # Predict
-        prediction = self.model.predict(df.values)[0]
+        Returns:
+            Predicted lap time in seconds (array of predictions for batches)
+        """
+        predictions = self.predict_batch(features)
         
-        return float(prediction)
+        if isinstance(features, dict) or (isinstance(features, np.ndarray) and features.ndim == 1):
+            return float(predictions[0])
+        return predictions
     
     def get_feature_importance(self, top_n: int = 10) -> Dict[str, float]:
         """Get top N most important features."""
@@ -247,13 +400,30 @@ class LapTimePredictor:
         return top_features
     
     def save_model(self, path: str):
-        """Save model to disk."""
+        """
+        Save model to disk.
+        
+        Paths ending in .pkl use the legacy pickle format; anything else is written
+        as a model artifact (UBJSON booster + JSON metadata, see model_artifact).
+        """
         if self.model is None:
             raise ValueError("No model to save")
         
+        if is_artifact_path(path):
+            save_model_artifact(
+                self.model,
+                path,
+                self.feature_names,
+                metrics=self.metrics,
+                data_hash=self.data_hash,
+                feature_medians=self.feature_medians
+            )
+            return
+        
         model_data = {
             'model': self.model,
-            'feature_names': self.feature_names
+            'feature_names': self.feature_names,
+            'feature_medians': self.feature_medians
         }
         
         with open(path, 'wb') as f:
@@ -262,17 +432,52 @@ class LapTimePredictor:
         logger.info(f"Model saved to {path}")
     
     def load_model(self, path: str):
-        """Load model from disk."""
+        """Load model from disk (artifact, or legacy pickle for .pkl paths)."""
+        if is_artifact_path(path):
+            self.model, self.metadata = load_model_artifact(path)
+            self.feature_names = self.metadata['feature_names']
+            self.metrics = self.metadata.get('metrics', {})
+            self.data_hash = self.metadata.get('data_hash')
+            self.feature_medians = self.metadata.get('feature_medians', {})
+            self._compile_features()
+            logger.info(f"Model loaded from {path}")
+            return
+        
         with open(path, 'rb') as f:
             model_data = pickle.load(f)
         
         self.model = model_data['model']
         # Handle both 'feature_names' and 'feature_columns' keys for compatibility
         self.feature_names = model_data.get('feature_names') or model_data.get('feature_columns', [])
+        self.feature_medians = model_data.get('feature_medians', {})
+        self._compile_features()
         
         logger.info(f"Model loaded from {path}")
 
 
+def get_model_path(track: str, models_dir: Optional[Path] = None) -> Path:
+    """
+    Resolve the model file for a track.
+    
+    Artifacts (``.json`` metadata + ``.ubj`` booster) are preferred over legacy
+    pickles. Model files were saved with mixed casing (e.g. 'COTA', 'Road America',
+    'barber'), so existing files are matched case-insensitively before falling back
+    to the normalized artifact name used for newly trained models.
+    """
+    models_dir = Path(models_dir) if models_dir else settings.models_dir
+    
+    if models_dir.exists():
+        for suffix in (METADATA_SUFFIX, ".pkl"):
+            wanted = f"lap_time_predictor_{track}{suffix}".lower()
+            for candidate in models_dir.glob(f"lap_time_predictor_*{suffix}"):
+                if candidate.name.lower() == wanted:
+                    return candidate
+    
+    # The model files use title case for multi-word tracks
+    normalized_track = track.title() if " " in track.lower() else track.lower()
+    return models_dir / f"lap_time_predictor_{normalized_track}{METADATA_SUFFIX}"
+
+
 # Global cache for predictors by track
 _predictor_cache = {}
 
@@ -287,3 +492,14 @@ def get_lap_time_predictor(model_path: Optional[str] = None) -> LapTimePredictor
         _predictor_cache[model_path] = LapTimePredictor(model_path)
     
     return _predictor_cache[model_path]
+
+
+def evict_lap_time_predictor(model_path: Optional[str] = None):
+    """Drop cached predictors so the next request reloads from disk (all if no path given)."""
+    if model_path is None:
+        _predictor_cache.clear()
+        return
+    
+    for cached_path in list(_predictor_cache):
+        if Path(cached_path).resolve() == Path(model_path).resolve():
+            del _predictor_cache[cached_path]
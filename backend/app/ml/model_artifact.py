@@ -0,0 +1,252 @@
+"""
+Model Artifact Format
+Stores XGBoost models as a UBJSON booster plus a JSON metadata sidecar.
+
+Unlike pickle, loading an artifact never executes code, survives XGBoost
+upgrades (the booster format is XGBoost's own stable serialization) and is
+validated before use: the sidecar records the booster checksum, feature
+names and training medians, training metrics and the hash of the training data.
+
+Layout for a base path ``models/lap_time_predictor_barber``:
+    lap_time_predictor_barber.json  - metadata sidecar (the artifact "entry point")
+    lap_time_predictor_barber.ubj   - booster (UBJSON)
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    # Imported by save/load on first use so importing the app stays light
+    import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+METADATA_SUFFIX = ".json"
+BOOSTER_SUFFIX = ".ubj"
+
+
+class ModelArtifactError(ValueError):
+    """Raised when an artifact is missing, corrupted or incompatible."""
+
+
+def artifact_paths(path) -> Tuple[Path, Path]:
+    """Return (metadata_path, booster_path) for an artifact base/sidecar/booster path."""
+    path = Path(path)
+    if path.suffix in (METADATA_SUFFIX, BOOSTER_SUFFIX, ".pkl"):
+        path = path.with_suffix("")
+    return path.with_name(path.name + METADATA_SUFFIX), path.with_name(path.name + BOOSTER_SUFFIX)
+
+
+def is_artifact_path(path) -> bool:
+    """True if the path names an artifact rather than a legacy pickle."""
+    return Path(path).suffix != ".pkl"
+
+
+def hash_training_data(X, y) -> str:
+    """Stable sha256 over the training matrix and targets."""
+    digest = hashlib.sha256()
+    for arr in (X, y):
+        arr = np.ascontiguousarray(np.asarray(arr, dtype=np.float64))
+        digest.update(str(arr.shape).encode())
+        digest.update(arr.tobytes())
+    return digest.hexdigest()
+
+
+def _sha256(buffer) -> str:
+    return hashlib.sha256(buffer).hexdigest()
+
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def save_model_artifact(
+    model: xgb.XGBRegressor,
+    path,
+    feature_names: List[str],
+    metrics: Optional[Dict] = None,
+    data_hash: Optional[str] = None,
+    feature_medians: Optional[Dict[str, float]] = None,
+    extra: Optional[Dict] = None
+) -> Path:
+    """
+    Save a fitted regressor as an artifact. Returns the metadata (sidecar) path.
+
+    The booster is written first and the sidecar last, each atomically; the
+    sidecar pins the booster checksum, so a reader racing a writer detects the
+    mismatch instead of silently loading a half-updated model.
+    """
+    import xgboost as xgb
+
+    booster = model.get_booster()
+    if booster.num_features() != len(feature_names):
+        raise ModelArtifactError(
+            f"Model expects {booster.num_features()} features but {len(feature_names)} names were given"
+        )
+
+    metadata_path, booster_path = artifact_paths(path)
+    metadata_path.parent.mkdir(parents=True, exist_ok=True)
+
+    raw = bytes(booster.save_raw(raw_format="ubj"))
+    _atomic_write_bytes(booster_path, raw)
+
+    params = {k: v for k, v in model.get_params().items() if _is_json_scalar(v)}
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'model_type': f"xgboost.{type(model).__name__}",
+        'xgboost_version': xgb.__version__,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'booster_file': booster_path.name,
+        'booster_sha256': _sha256(raw),
+        'booster_bytes': len(raw),
+        'num_boosted_rounds': int(booster.num_boosted_rounds()),
+        'feature_names': list(feature_names),
+        'n_features': len(feature_names),
+        'feature_medians': feature_medians or {},
+        'params': params,
+        'metrics': metrics or {},
+        'data_hash': data_hash,
+        'extra': extra or {}
+    }
+    _atomic_write_bytes(metadata_path, json.dumps(metadata, indent=2, default=_json_default).encode())
+
+    logger.info(f"Model artifact saved to {metadata_path}")
+    return metadata_path
+
+
+def load_model_artifact(path, verify: bool = True) -> Tuple[xgb.XGBRegressor, Dict]:
+    """
+    Load and validate an artifact. Returns (regressor, metadata).
+
+    The booster file is memory-mapped for the sha256 check, which then reads it
+    straight from the page cache. XGBoost only parses a ``bytearray``, so the
+    booster is copied once for ``load_model``.
+    """
+    import xgboost as xgb
+
+    metadata_path, booster_path = artifact_paths(path)
+    if not metadata_path.exists():
+        raise ModelArtifactError(f"Artifact metadata not found: {metadata_path}")
+
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+
+    version = metadata.get('format_version')
+    if version != FORMAT_VERSION:
+        raise ModelArtifactError(f"Unsupported artifact format version {version} in {metadata_path}")
+
+    booster_path = metadata_path.with_name(metadata.get('booster_file', booster_path.name))
+    if not booster_path.exists():
+        raise ModelArtifactError(f"Booster file not found: {booster_path}")
+
+    with open(booster_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if verify and _sha256(mm) != metadata['booster_sha256']:
+            raise ModelArtifactError(f"Checksum mismatch for {booster_path}")
+        model = xgb.XGBRegressor()
+        model.load_model(bytearray(mm))  # The one copy: load_model accepts no buffer views
+
+    booster = model.get_booster()
+    feature_names = metadata['feature_names']
+    if booster.num_features() != len(feature_names):
+        raise ModelArtifactError(
+            f"Booster has {booster.num_features()} features but metadata lists {len(feature_names)}"
+        )
+    if booster.num_boosted_rounds() != metadata['num_boosted_rounds']:
+        raise ModelArtifactError(
+            f"Booster has {booster.num_boosted_rounds()} rounds but metadata records "
+            f"{metadata['num_boosted_rounds']}"
+        )
+
+    # Restore the sklearn-level parameters so continued training behaves as before
+    model.set_params(**metadata.get('params', {}))
+
+    return model, metadata
+
+
+def convert_pickle(pkl_path, output_path=None) -> Path:
+    """
+    Convert a legacy pickled model dict into an artifact next to it.
+
+    Only run this on pickles you produced yourself - unpickling executes code.
+    """
+    pkl_path = Path(pkl_path)
+    with open(pkl_path, 'rb') as f:
+        model_data = pickle.load(f)
+
+    model = model_data['model']
+    feature_names = model_data.get('feature_names') or model_data.get('feature_columns', [])
+    extra = {'converted_from': pkl_path.name}
+    for key in ('best_params', 'tuning_report'):
+        if model_data.get(key) is not None:
+            extra[key] = model_data[key]
+
+    return save_model_artifact(
+        model,
+        output_path or pkl_path.with_suffix(""),
+        feature_names,
+        metrics=model_data.get('metrics'),
+        feature_medians=model_data.get('feature_medians'),
+        extra=extra
+    )
+
+
+def _is_json_scalar(value) -> bool:
+    return value is None or isinstance(value, (bool, int, float, str))
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage lap time model artifacts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Convert legacy .pkl models to artifacts")
+    convert.add_argument("models_dir", nargs="?", default="models")
+
+    verify = subparsers.add_parser("verify", help="Validate artifacts")
+    verify.add_argument("models_dir", nargs="?", default="models")
+
+    args = parser.parse_args()
+    models_dir = Path(args.models_dir)
+
+    if args.command == "convert":
+        for pkl_path in sorted(models_dir.glob("*.pkl")):
+            metadata_path = convert_pickle(pkl_path)
+            print(f"✅ {pkl_path.name} -> {metadata_path.name}")
+    else:
+        failed = 0
+        for metadata_path in sorted(models_dir.glob(f"*{METADATA_SUFFIX}")):
+            if not metadata_path.with_suffix(BOOSTER_SUFFIX).exists():
+                continue
+            try:
+                _, metadata = load_model_artifact(metadata_path)
+                print(f"✅ {metadata_path.name}: {metadata['n_features']} features, "
+                      f"{metadata['num_boosted_rounds']} rounds")
+            except ModelArtifactError as e:
+                failed += 1
+                print(f"❌ {metadata_path.name}: {e}")
+        raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 from __future__ import annotations
-from typing import Optional, List, Dict, Any, Tuple
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.metrics import mean_absolute_error, r2_score
 from pathlib import Path
 
+from ..data.catalog import get_dataset_catalog
+
+if TYPE_CHECKING:
+    # scikit-learn is imported when a model is first fitted (it takes about a second)
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import PolynomialFeatures
+
 
 def detect_pit_stops_from_lap_times(df_laps: pd.DataFrame, pit_time_threshold: float = 130.0) -> Dict[str, List[int]]:
     """
@@ -62,10 +66,10 @@ def load_pit_stops_from_endurance_data(dataset_root: Path, track: str, race: str
     Returns:
         Dict mapping driver number to list of pit stop lap numbers
     """
-    # Try to find endurance analysis file
-    endurance_file = dataset_root / track / f"23_AnalysisEnduranceWithSections_Race {race}_Anonymized.CSV"
+    # Find the endurance analysis file of the race
+    endurance_file = get_dataset_catalog(dataset_root).resolve(track, race, "sectors")
     
-    if not endurance_file.exists():
+    if endurance_file is None:
         return {}
     
     try:
@@ -229,6 +233,10 @@ class TireDegradationModel:
         if degradation_df.empty:
             raise ValueError("No degradation data available for model fitting")
         
+        from sklearn.linear_model import LinearRegression
+        from sklearn.preprocessing import PolynomialFeatures
+        from sklearn.metrics import mean_absolute_error, r2_score
+        
         # Use tire_age as the primary predictor (more meaningful than lap_number)
         X = degradation_df[['tire_age']].values
         y = degradation_df['degradation_pct'].values
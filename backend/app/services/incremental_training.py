@@ -0,0 +1,86 @@
+"""
+Scheduled incremental model updates for live sessions.
+Periodically queues an incremental training job per track so models keep
+learning from newly completed laps without full retrains.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from ..core.config import settings
+from .training_jobs import get_training_job_manager, QueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+def parse_live_sessions(value: str) -> Dict[str, List[str]]:
+    """Parse "barber:R1,barber:R2,VIR:R1" into {track: [races]}."""
+    sessions: Dict[str, List[str]] = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item or ":" not in item:
+            continue
+        track, race = item.rsplit(":", 1)
+        sessions.setdefault(track.strip(), []).append(race.strip())
+    return sessions
+
+
+class IncrementalUpdateScheduler:
+    """Queue incremental update jobs for each live track on a fixed interval."""
+
+    def __init__(self, sessions: Dict[str, List[str]], interval: float):
+        self.sessions = sessions
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 and bool(self.sessions)
+
+    def run_once(self) -> List[Dict]:
+        """Queue one incremental job per track (deduplicated by the job manager)."""
+        manager = get_training_job_manager()
+        jobs = []
+        for track, races in self.sessions.items():
+            try:
+                jobs.append(manager.submit(track, races, kind="incremental"))
+            except QueueFullError as e:
+                logger.warning(f"Skipping incremental update for {track}: {e}")
+        return jobs
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Incremental update scheduling failed: {e}")
+
+    def start(self):
+        if self.enabled and self._task is None:
+            logger.info(f"Incremental updates every {self.interval}s for {list(self.sessions)}")
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+_scheduler = None
+
+def get_incremental_scheduler() -> IncrementalUpdateScheduler:
+    """Get singleton incremental update scheduler instance."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = IncrementalUpdateScheduler(
+            parse_live_sessions(settings.live_sessions),
+            settings.incremental_update_interval
+        )
+    return _scheduler
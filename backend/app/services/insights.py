@@ -0,0 +1,208 @@
+"""
+AI insight generation for the insights endpoints.
+
+Prompts go to a provider (Gemini, or a local stub for tests and offline use)
+on a small dedicated thread pool, so the event loop never waits on the LLM
+round trip. Each generation has a timeout and the pool size caps how many run
+at once. Responses are cached on disk, keyed by a hash of the structured
+prompt inputs (track/race/vehicle plus the computed stats), so repeat requests
+over the same data skip the LLM until the cache entry expires.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE_MESSAGE = "AI insights unavailable. Please install google-generativeai package."
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised when a provider cannot generate (package missing, no API key)."""
+
+
+class InsightProvider:
+    """Blocking text generation backend."""
+    name = "base"
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        raise NotImplementedError
+
+
+class GeminiProvider(InsightProvider):
+    """Google Gemini via google-generativeai, imported on first use."""
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str], model_name: str):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None and self._error is None:
+                try:
+                    from google.generativeai import configure, GenerativeModel
+                    configure(api_key=self.api_key)
+                    self._model = GenerativeModel(self.model_name)
+                except ImportError:
+                    logger.warning("Google Generative AI not installed. Some features may not work.")
+                    self._error = UNAVAILABLE_MESSAGE
+                except Exception as e:
+                    logger.warning(f"Failed to initialize Gemini: {e}")
+                    self._error = f"AI insights unavailable: {e}"
+            if self._model is None:
+                raise ProviderUnavailableError(self._error)
+            return self._model
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        response = self._get_model().generate_content(prompt, request_options={"timeout": timeout})
+        return response.text
+
+
+class StubProvider(InsightProvider):
+    """
+    Local provider for tests and offline runs.
+
+    ``responder`` maps a prompt to the response text; the default returns a
+    small JSON document so callers exercise their parsing path.
+    """
+    name = "stub"
+
+    def __init__(self, responder: Optional[Callable[[str], str]] = None, delay_s: float = 0.0):
+        self.responder = responder
+        self.delay_s = delay_s
+        self.calls = 0
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        self.calls += 1
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        if self.responder is not None:
+            return self.responder(prompt)
+        return json.dumps({"provider": "stub", "summary": prompt.strip().splitlines()[0] if prompt.strip() else ""})
+
+
+PROVIDERS = {
+    "gemini": lambda: GeminiProvider(settings.gemini_api_key, settings.insights_model),
+    "stub": StubProvider,
+}
+
+
+class InsightCache:
+    """One JSON file per cache key, written atomically; entries older than ``ttl_s`` are misses."""
+
+    def __init__(self, cache_dir: Path, ttl_s: float):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_s = ttl_s
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created_at", 0) > self.ttl_s:
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("text")
+
+    def put(self, key: str, text: str, provider: str):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"created_at": time.time(), "provider": provider, "text": text}))
+        os.replace(tmp, path)
+
+    def clear(self):
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+class InsightService:
+    """Cached, bounded, off-loop text generation."""
+
+    def __init__(self, provider: InsightProvider, cache: InsightCache,
+                 timeout_s: float = 30.0, max_concurrent: int = 2):
+        self.provider = provider
+        self.cache = cache
+        self.timeout_s = timeout_s
+        self.max_concurrent = max_concurrent
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="insights")
+        self.stats = {"hits": 0, "misses": 0, "timeouts": 0, "errors": 0}
+
+    def cache_key(self, prompt: str, inputs: Optional[Dict[str, Any]] = None) -> str:
+        """Hash of the structured inputs (or the prompt itself when there are none) and the provider."""
+        payload = {"provider": self.provider.name, "inputs": inputs if inputs is not None else prompt}
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()[:32]
+
+    async def generate(self, prompt: str, inputs: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Response text for ``prompt``.
+
+        Failures and timeouts return an explanatory message instead of raising
+        (the endpoints fall back to rule-based output) and are not cached.
+        """
+        key = self.cache_key(prompt, inputs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+        self.stats["misses"] += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            text = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self.provider.generate, prompt, self.timeout_s),
+                timeout=self.timeout_s
+            )
+        except ProviderUnavailableError as e:
+            return str(e)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.error(f"AI insight generation timed out after {self.timeout_s}s")
+            return f"Error generating insights: timed out after {self.timeout_s:g}s"
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error generating AI insights: {e}")
+            return f"Error generating insights: {str(e)}"
+
+        self.cache.put(key, text, self.provider.name)
+        return text
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+_service = None
+
+def get_insight_service() -> InsightService:
+    """Get singleton insight service instance."""
+    global _service
+    if _service is None:
+        if settings.insights_provider not in PROVIDERS:
+            raise ValueError(f"Unknown insights provider: {settings.insights_provider}")
+        _service = InsightService(
+            provider=PROVIDERS[settings.insights_provider](),
+            cache=InsightCache(settings.insights_cache_dir, settings.insights_cache_ttl),
+            timeout_s=settings.insights_timeout,
+            max_concurrent=settings.insights_max_concurrent
+        )
+    return _service
@@ -0,0 +1,372 @@
+"""
+Materialized per-race analytics.
+
+Race data in ``settings.dataset_root`` does not change once a race is
+ingested, so the expensive per-race responses (degradation analysis, pit
+inputs per vehicle, default-strategy simulation, consistency scores,
+results and the pre-event pace history) can be computed once and served
+from disk. Races are independent and are computed in parallel processes.
+Each track then gets an aggregate of its races' pace history (best lap,
+qualifying and race pace, degradation rate) that the pre-event prediction
+reads with a single lookup.
+
+``materialize_all`` computes them for every discovered (track, race) into a
+versioned directory per race and then points the race's manifest at it. The
+manifest records the fingerprint (name, size, mtime) of the race's source
+files; when those files change, or ARTIFACT_VERSION is bumped, the artifacts
+stop being served and endpoints compute on demand until the next run.
+
+Run from backend/:
+    python -m app.services.materialize [--track barber] [--race R1] [--force] [--workers 4]
+"""
+from __future__ import annotations
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.responses import Response
+
+from ..core.config import settings
+from ..core.responses import dumps
+from ..data.loader import discover_races, source_fingerprint
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the shape of any artifact changes; older artifacts are then ignored
+ARTIFACT_VERSION = 2
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class MaterializedStore:
+    """
+    Artifacts under ``root/<track>/<race>/v<version>-<fingerprint>/<name>.json``
+    plus ``root/<track>/<race>/manifest.json`` naming the current directory, and
+    one ``root/<track>/track_summary.json`` aggregate per track.
+    """
+
+    def __init__(self, root: Path, dataset_root: Path):
+        self.root = Path(root)
+        self.dataset_root = Path(dataset_root)
+
+    def _race_dir(self, track: str, race: str) -> Path:
+        return self.root / track.lower() / race.upper()
+
+    def manifest(self, track: str, race: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self._race_dir(track, race) / "manifest.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def current(self, track: str, race: str) -> Optional[Dict[str, Any]]:
+        """The manifest if its artifacts match ARTIFACT_VERSION and the current source files."""
+        manifest = self.manifest(track, race)
+        if manifest is None or manifest.get("version") != ARTIFACT_VERSION:
+            return None
+        try:
+            fingerprint = source_fingerprint(self.dataset_root, track, race)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("fingerprint") == fingerprint else None
+
+    def _artifact_bytes(self, track: str, race: str, name: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        manifest = self.current(track, race)
+        if manifest is None or name not in manifest.get("artifacts", {}):
+            return None
+        try:
+            data = (self._race_dir(track, race) / manifest["directory"] / f"{name}.json").read_bytes()
+        except OSError:
+            return None  # Replaced by a newer run between reading the manifest and the file
+        return manifest, data
+
+    def load(self, track: str, race: str, name: str) -> Optional[Any]:
+        """Decoded artifact, or None when it is missing or stale."""
+        found = self._artifact_bytes(track, race, name)
+        return _loads(found[1]) if found is not None else None
+
+    def response(self, track: str, race: str, name: str) -> Optional[Response]:
+        """The stored JSON bytes as a response, without decoding them."""
+        found = self._artifact_bytes(track, race, name)
+        if found is None:
+            return None
+        manifest, data = found
+        return Response(
+            content=data,
+            media_type="application/json",
+            headers={"X-Materialized-At": manifest["created_at"]}
+        )
+
+    def write(self, track: str, race: str, fingerprint: str, artifacts: Dict[str, Any],
+              errors: Dict[str, str], elapsed_ms: Dict[str, float]) -> Dict[str, Any]:
+        """Write a new artifact directory, switch the manifest to it and drop older directories."""
+        race_dir = self._race_dir(track, race)
+        directory = f"v{ARTIFACT_VERSION}-{fingerprint}"
+        target = race_dir / directory
+        staging = race_dir / f".{directory}.{os.getpid()}.{threading.get_ident()}.tmp"
+        staging.mkdir(parents=True, exist_ok=True)
+
+        sizes = {}
+        for name, content in artifacts.items():
+            data = dumps(content)
+            (staging / f"{name}.json").write_bytes(data)
+            sizes[name] = {"bytes": len(data), "elapsed_ms": round(elapsed_ms.get(name, 0.0), 1)}
+
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+
+        manifest = {
+            "version": ARTIFACT_VERSION,
+            "track": track,
+            "race": race,
+            "fingerprint": fingerprint,
+            "directory": directory,
+            "created_at": _now(),
+            "artifacts": sizes,
+            "errors": errors
+        }
+        tmp = race_dir / f"manifest.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, race_dir / "manifest.json")
+
+        for old in race_dir.iterdir():
+            if old.is_dir() and old.name != directory and not old.name.startswith("."):
+                shutil.rmtree(old, ignore_errors=True)
+        return manifest
+
+    def _track_path(self, track: str) -> Path:
+        return self.root / track.lower() / "track_summary.json"
+
+    def track(self, track: str, races: List[str]) -> Optional[Dict[str, Any]]:
+        """The track aggregate if it covers exactly ``races`` and their current source files."""
+        try:
+            summary = _loads(self._track_path(track).read_bytes())
+        except (OSError, ValueError):
+            return None
+        fingerprints = summary.get("fingerprints", {})
+        if summary.get("version") != ARTIFACT_VERSION or sorted(fingerprints) != sorted(r.upper() for r in races):
+            return None
+        try:
+            if any(source_fingerprint(self.dataset_root, track, r) != f for r, f in fingerprints.items()):
+                return None
+        except (OSError, ValueError):
+            return None
+        return summary
+
+    def write_track(self, track: str, fingerprints: Dict[str, str], content: Dict[str, Any]) -> Dict[str, Any]:
+        """Atomically replace the track aggregate, recording the source fingerprint of each race."""
+        summary = {"version": ARTIFACT_VERSION, "track": track, "created_at": _now(),
+                   "fingerprints": fingerprints, **content}
+        path = self._track_path(track)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(dumps(summary))
+        os.replace(tmp, path)
+        return summary
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summary of every materialized race, with whether it is still current."""
+        races = []
+        for path in sorted(self.root.glob("*/*/manifest.json")):
+            manifest = self.manifest(path.parent.parent.name, path.parent.name)
+            if manifest is None:
+                continue
+            current = self.current(manifest["track"], manifest["race"]) is not None
+            races.append({
+                "track": manifest["track"],
+                "race": manifest["race"],
+                "created_at": manifest["created_at"],
+                "current": current,
+                "artifacts": sorted(manifest["artifacts"]),
+                "errors": manifest["errors"]
+            })
+        return races
+
+
+def _builders() -> Dict[str, Callable[[str, str], Any]]:
+    """Artifact name -> function computing it for (track, race); the endpoint modules own the logic."""
+    from ..api.analytics import degradation_analysis
+    from ..api.consistency import race_consistency_scores
+    from ..api.insights import race_history
+    from ..api.results import race_results
+    from ..api.simulation import race_simulation
+    from ..api.strategy import race_pit_inputs
+
+    return {
+        "degradation": lambda track, race: degradation_analysis(track, race),
+        "pit_inputs": race_pit_inputs,
+        "simulation": lambda track, race: race_simulation(track, race),
+        "consistency": race_consistency_scores,
+        "results": race_results,
+        "race_history": race_history,
+    }
+
+
+def materialize_race(track: str, race: str, store: Optional[MaterializedStore] = None,
+                     force: bool = False) -> Dict[str, Any]:
+    """Compute and store every artifact of one race unless the stored ones are current."""
+    store = store or get_materialized_store()
+    if not force:
+        manifest = store.current(track, race)
+        if manifest is not None:
+            return {"track": track, "race": race, "status": "current", "created_at": manifest["created_at"]}
+
+    fingerprint = source_fingerprint(store.dataset_root, track, race)
+    artifacts: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    elapsed_ms: Dict[str, float] = {}
+    for name, build in _builders().items():
+        start = time.perf_counter()
+        try:
+            artifacts[name] = build(track, race)
+        except Exception as e:
+            # HTTPException carries the reason in detail
+            errors[name] = str(getattr(e, "detail", e))
+            logger.warning(f"Materializing {name} for {track} {race} failed: {errors[name]}")
+        elapsed_ms[name] = (time.perf_counter() - start) * 1000
+
+    manifest = store.write(track, race, fingerprint, artifacts, errors, elapsed_ms)
+    return {
+        "track": track,
+        "race": race,
+        "status": "materialized",
+        "created_at": manifest["created_at"],
+        "artifacts": manifest["artifacts"],
+        "errors": errors
+    }
+
+
+def materialize_track(track: str, store: Optional[MaterializedStore] = None) -> Dict[str, Any]:
+    """
+    Aggregate the stored pace history of every race of a track. Skipped while
+    any race lacks a current history (materialize the races first).
+    """
+    from ..api.insights import track_summary
+    from ..data.catalog import get_dataset_catalog
+
+    store = store or get_materialized_store()
+    races = get_dataset_catalog(store.dataset_root).races(track)
+    if store.track(track, races) is not None:
+        return {"track": track, "status": "current"}
+
+    histories, fingerprints = {}, {}
+    for race in races:
+        manifest = store.current(track, race)
+        history = store.load(track, race, "race_history")
+        if manifest is None or history is None:
+            return {"track": track, "status": "skipped", "missing": race}
+        histories[race], fingerprints[race] = history, manifest["fingerprint"]
+    if not histories:
+        return {"track": track, "status": "skipped", "missing": None}
+
+    summary = store.write_track(track, fingerprints, track_summary(histories))
+    return {"track": track, "status": "materialized", "created_at": summary["created_at"]}
+
+
+def _materialize_in_worker(root: str, dataset_root: str, track: str, race: str,
+                           force: bool) -> Dict[str, Any]:
+    """Process pool entry point; the builders read the dataset root from settings."""
+    settings.dataset_root = Path(dataset_root)
+    return materialize_race(track, race, MaterializedStore(Path(root), Path(dataset_root)), force=force)
+
+
+def materialize_all(store: Optional[MaterializedStore] = None, force: bool = False,
+                    track: Optional[str] = None, race: Optional[str] = None,
+                    workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Materialize every discovered race (optionally only one track and/or race).
+
+    Races are independent, so with ``workers`` > 1 (default MATERIALIZE_WORKERS)
+    they are computed in parallel worker processes.
+    """
+    store = store or get_materialized_store()
+    workers = settings.materialize_workers if workers is None else workers
+    pairs = [
+        (found_track, found_race) for found_track, found_race in discover_races(store.dataset_root)
+        if (track is None or found_track == track.lower()) and (race is None or found_race == race.upper())
+    ]
+    stale = pairs if force else [(t, r) for t, r in pairs if store.current(t, r) is None]
+    if workers <= 1 or len(stale) <= 1:
+        summaries = [materialize_race(t, r, store, force=force) for t, r in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(stale)),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                (t, r): pool.submit(_materialize_in_worker, str(store.root), str(store.dataset_root), t, r, force)
+                for t, r in stale
+            }
+            summaries = [
+                futures[(t, r)].result() if (t, r) in futures else materialize_race(t, r, store)
+                for t, r in pairs
+            ]
+
+    # Track aggregates once all of a track's races are stored
+    for found_track in sorted({t for t, _ in pairs}):
+        result = materialize_track(found_track, store)
+        logger.info(f"Materialize {found_track} track summary: {result['status']}")
+    return summaries
+
+
+def start_background_materialize() -> threading.Thread:
+    """Refresh stale artifacts in a daemon thread so startup does not wait for it."""
+    def run():
+        try:
+            for summary in materialize_all():
+                logger.info(f"Materialize {summary['track']} {summary['race']}: {summary['status']}")
+        except Exception as e:
+            logger.error(f"Background materialize failed: {e}")
+
+    thread = threading.Thread(target=run, name="materialize", daemon=True)
+    thread.start()
+    return thread
+
+
+# Singleton instance
+_store = None
+
+def get_materialized_store() -> MaterializedStore:
+    """Get singleton materialized artifact store instance."""
+    global _store
+    if _store is None:
+        _store = MaterializedStore(settings.materialized_dir, settings.dataset_root)
+    return _store
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Precompute per-race analytics artifacts")
+    parser.add_argument("--track", help="Only this track")
+    parser.add_argument("--race", help="Only this race (R1, R2)")
+    parser.add_argument("--force", action="store_true", help="Recompute even if artifacts are current")
+    parser.add_argument("--workers", type=int, help="Parallel worker processes (default MATERIALIZE_WORKERS)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    for summary in materialize_all(force=args.force, track=args.track, race=args.race, workers=args.workers):
+        line = f"{summary['track']:>14} {summary['race']}  {summary['status']}"
+        if summary.get("errors"):
+            line += f"  (failed: {', '.join(sorted(summary['errors']))})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,655 @@
+"""
+Background training job queue for lap time models.
+Jobs run in a separate process pool; records are persisted as JSON so status
+survives the request that created them and can be polled by clients.
+"""
+from __future__ import annotations
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from ..core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: updates from different processes are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+TERMINAL_STATUSES = ("done", "failed", "cancelled")
+
+
+class QueueFullError(Exception):
+    """Raised when the bounded training queue has no free slots."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when cancellation was requested."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+class JobStore:
+    """
+    Persist one JSON record per job, written atomically.
+
+    Records are updated by the server workers and the training process, so
+    ``update`` holds a per-job file lock around its read-modify-write, and a
+    record that reached a terminal status is never changed again. Submissions
+    from every worker serialize on one store-wide lock (``submission_lock``).
+    """
+
+    def __init__(self, jobs_dir: Path):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _cancel_marker(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.cancel"
+
+    def _lock_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f".{job_id}.lock"
+
+    @contextmanager
+    def _locked(self, lock_path: Path):
+        with open(lock_path, "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def submission_lock(self):
+        """Exclusive lock across processes for checking active jobs and saving a new one."""
+        return self._locked(self.jobs_dir / ".submit.lock")
+
+    def save(self, record: Dict) -> Dict:
+        record["updated_at"] = _now()
+        path = self._path(record["job_id"])
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(record, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        path = self._path(job_id)
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def update(self, job_id: str, **fields) -> Optional[Dict]:
+        """Apply fields to a job record; finished (terminal) records are returned unchanged."""
+        with self._locked(self._lock_path(job_id)):
+            record = self.get(job_id)
+            if record is None or record.get("status") in TERMINAL_STATUSES:
+                return record
+            record.update(fields)
+            return self.save(record)
+
+    def list(self, status: Optional[str] = None, track: Optional[str] = None) -> List[Dict]:
+        records = []
+        for path in self.jobs_dir.glob("*.json"):
+            try:
+                with open(path) as f:
+                    record = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if status and record.get("status") != status:
+                continue
+            if track and record.get("track", "").lower() != track.lower():
+                continue
+            records.append(record)
+        return sorted(records, key=lambda r: r.get("created_at", ""), reverse=True)
+
+    def request_cancel(self, job_id: str):
+        self._cancel_marker(job_id).touch()
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return self._cancel_marker(job_id).exists()
+
+    def clear_cancel(self, job_id: str):
+        self._cancel_marker(job_id).unlink(missing_ok=True)
+
+
+SIMPLE_FEATURES = [
+    'lap_number', 'tire_age', 'vehicle_id_encoded', 'sector1', 'sector2', 'sector3', 'prev_lap_time'
+]
+
+ENHANCED_FEATURES = [
+    'lap_number', 'tire_age', 'vehicle_encoded', 'prev_lap_time', 'lap_time_delta',
+    'avg_recent_laptime', 'std_recent_laptime', 'min_recent_laptime', 'max_recent_laptime',
+    'pace_degradation', 'race_progress', 'is_early_race', 'is_mid_race', 'is_late_race',
+    'consistency_score'
+]
+
+
+def encode_vehicle(vehicle_id, buckets: int) -> int:
+    """
+    Stable integer code for a vehicle id. Unlike ``hash()``, which is salted
+    per process, the code is the same in every training and update process.
+    """
+    return zlib.crc32(str(vehicle_id).encode()) % buckets
+
+
+def _with_lap_times(lapt: pd.DataFrame) -> pd.DataFrame:
+    lapt = lapt.copy()
+
+    # Lap time files only carry timestamps - derive lap times from consecutive laps
+    if 'lap_time' not in lapt.columns and 'timestamp' in lapt.columns:
+        lapt = lapt.sort_values(['vehicle_id', 'lap']).reset_index(drop=True)
+        lapt['lap_time'] = lapt.groupby('vehicle_id')['timestamp'].diff().dt.total_seconds()
+    return lapt
+
+
+def create_simple_features(lapt: pd.DataFrame, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Create simple features from lap time data for training.
+    
+    When ``since`` is given only laps completed after it are emitted, while earlier
+    laps still provide context (previous lap time, tire age). Rows also carry the
+    target ``lap_time`` and the lap ``timestamp``, which are not model inputs.
+    """
+    try:
+        lapt = _with_lap_times(lapt)
+        features = []
+
+        for vehicle_id in lapt['vehicle_id'].unique():
+            vehicle_laps = lapt[lapt['vehicle_id'] == vehicle_id].sort_values('timestamp')
+
+            for i, (_, lap) in enumerate(vehicle_laps.iterrows()):
+                if pd.isna(lap['lap_time']) or lap['lap_time'] <= 0:
+                    continue
+                if since is not None and lap['timestamp'] <= since:
+                    continue
+
+                feature_row = {
+                    'timestamp': lap['timestamp'],
+                    'lap_time': lap['lap_time'],
+                    'lap_number': lap.get('lap', i + 1),
+                    'tire_age': i + 1,  # Simple tire age approximation
+                    'vehicle_id_encoded': encode_vehicle(vehicle_id, 1000),
+                    'sector1': lap.get('sector1', lap['lap_time'] * 0.3),  # Rough sector approximation
+                    'sector2': lap.get('sector2', lap['lap_time'] * 0.4),
+                    'sector3': lap.get('sector3', lap['lap_time'] * 0.3),
+                }
+
+                # Add previous lap time as feature if available
+                if i > 0:
+                    prev_lap = vehicle_laps.iloc[i-1]
+                    feature_row['prev_lap_time'] = prev_lap.get('lap_time', lap['lap_time'])
+                else:
+                    feature_row['prev_lap_time'] = lap['lap_time']
+
+                features.append(feature_row)
+
+        return pd.DataFrame(features)
+
+    except Exception as e:
+        logger.error(f"Error creating features: {e}")
+        return pd.DataFrame()
+
+
+def create_enhanced_features(lapt: pd.DataFrame, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Create the enhanced features of train/train_models_optimized.py, which trained
+    the shipped track models (rolling pace, degradation and race phase per vehicle).
+
+    ``since`` and the extra ``lap_time``/``timestamp`` columns work as in
+    :func:`create_simple_features`.
+    """
+    try:
+        lapt = _with_lap_times(lapt)
+        features = []
+
+        for vehicle_id in lapt['vehicle_id'].unique():
+            vehicle_laps = lapt[lapt['vehicle_id'] == vehicle_id].sort_values('timestamp')
+            total_laps = len(vehicle_laps)
+            initial_pace = vehicle_laps.iloc[0]['lap_time']
+
+            for i, (_, lap) in enumerate(vehicle_laps.iterrows()):
+                lap_time = lap['lap_time']
+                if pd.isna(lap_time) or lap_time <= 0 or lap_time > 200:
+                    continue
+                if since is not None and lap['timestamp'] <= since:
+                    continue
+
+                feature_row = {
+                    'timestamp': lap['timestamp'],
+                    'lap_time': lap_time,
+                    'lap_number': lap.get('lap', i + 1),
+                    'tire_age': i + 1,
+                    'vehicle_encoded': encode_vehicle(vehicle_id, 100),
+                }
+
+                # Previous lap features
+                prev_lap_time = vehicle_laps.iloc[i-1]['lap_time'] if i > 0 else lap_time
+                feature_row['prev_lap_time'] = prev_lap_time
+                feature_row['lap_time_delta'] = lap_time - prev_lap_time if i > 0 else 0
+
+                # Rolling statistics over the two preceding laps
+                recent_laps = vehicle_laps.iloc[max(0, i-2):i]['lap_time'].dropna() if i >= 2 else pd.Series(dtype=float)
+                if len(recent_laps) > 0:
+                    feature_row['avg_recent_laptime'] = recent_laps.mean()
+                    feature_row['std_recent_laptime'] = recent_laps.std() if len(recent_laps) > 1 else 0
+                    feature_row['min_recent_laptime'] = recent_laps.min()
+                    feature_row['max_recent_laptime'] = recent_laps.max()
+                else:
+                    feature_row['avg_recent_laptime'] = lap_time
+                    feature_row['std_recent_laptime'] = 0
+                    feature_row['min_recent_laptime'] = lap_time
+                    feature_row['max_recent_laptime'] = lap_time
+
+                # Tire degradation proxy
+                feature_row['pace_degradation'] = lap_time - initial_pace if i > 0 else 0
+
+                # Lap position indicators (early/mid/late race)
+                feature_row['race_progress'] = (i + 1) / total_laps
+                feature_row['is_early_race'] = 1 if (i + 1) <= total_laps * 0.2 else 0
+                feature_row['is_mid_race'] = 1 if 0.2 < (i + 1) / total_laps <= 0.8 else 0
+                feature_row['is_late_race'] = 1 if (i + 1) > total_laps * 0.8 else 0
+
+                # Consistency over the four preceding laps
+                last_laps = vehicle_laps.iloc[max(0, i-4):i]['lap_time'].dropna() if i >= 4 else pd.Series(dtype=float)
+                feature_row['consistency_score'] = last_laps.std() if len(last_laps) > 1 else 0
+
+                features.append(feature_row)
+
+        return pd.DataFrame(features)
+
+    except Exception as e:
+        logger.error(f"Error creating features: {e}")
+        return pd.DataFrame()
+
+
+# Feature builders by name, with the model inputs each one produces
+FEATURE_PIPELINES = {
+    "simple": (create_simple_features, SIMPLE_FEATURES),
+    "enhanced": (create_enhanced_features, ENHANCED_FEATURES),
+}
+
+
+def feature_pipeline_for(feature_names: List[str]) -> Optional[str]:
+    """Name of the feature pipeline that produces every input of a model, if any."""
+    for name, (_, columns) in FEATURE_PIPELINES.items():
+        if set(feature_names) <= set(columns):
+            return name
+    return None
+
+
+def run_training_job(job_id: str, track: str, races: List[str], dataset_root: str,
+                     models_dir: str, jobs_dir: str) -> Dict:
+    """
+    Train a lap time model for one track. Runs inside a worker process.
+
+    Progress is written to the job record after each stage and cancellation is
+    checked between stages, so a running job stops at the next safe point.
+    """
+    from ..data.loader import load_lap_times
+    from ..ml.lap_time_predictor import LapTimePredictor, get_model_path
+    from ..ml.model_artifact import METADATA_SUFFIX
+
+    store = JobStore(Path(jobs_dir))
+
+    def checkpoint(progress: float, message: str):
+        if store.cancel_requested(job_id):
+            raise JobCancelled()
+        store.update(job_id, progress=round(progress, 3), message=message)
+
+    store.update(job_id, status="running", started_at=_now(), progress=0.0, message="Loading race data")
+
+    try:
+        all_features = []
+        for i, race in enumerate(races):
+            checkpoint(0.6 * i / len(races), f"Loading data for {track} {race}")
+            try:
+                start, end, lapt = load_lap_times(Path(dataset_root), track, race)
+            except (ValueError, FileNotFoundError) as e:
+                logger.warning(f"No lap data for {track} {race}: {e}")
+                continue
+
+            features_df = create_simple_features(lapt)
+            if not features_df.empty:
+                all_features.append(features_df)
+
+        if not all_features:
+            raise ValueError(f"No training data available for {track}")
+
+        checkpoint(0.6, "Training model")
+        combined = pd.concat(all_features, ignore_index=True)
+        X = combined.drop(columns=['lap_time', 'timestamp'])
+        y = combined['lap_time']
+
+        predictor = LapTimePredictor()
+        metrics = predictor.train(X.values, y.values, X.columns.tolist())
+
+        checkpoint(0.9, "Saving model")
+        # Always write the artifact format (atomic, checksummed), even over a legacy pickle
+        model_path = get_model_path(track, models_dir=Path(models_dir)).with_suffix(METADATA_SUFFIX)
+        predictor.save_model(str(model_path))
+
+        return store.update(
+            job_id,
+            status="done",
+            progress=1.0,
+            message="Training complete",
+            metrics=metrics,
+            artifact_path=str(model_path),
+            finished_at=_now()
+        )
+    except JobCancelled:
+        store.clear_cancel(job_id)
+        return store.update(job_id, status="cancelled", message="Cancelled while running", finished_at=_now())
+    except Exception as e:
+        logger.error(f"Training job {job_id} failed: {e}")
+        return store.update(job_id, status="failed", error=str(e), message="Training failed", finished_at=_now())
+
+
+def _load_watermarks(models_dir: Path) -> Dict[str, str]:
+    path = Path(models_dir) / "incremental_state.json"
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_watermark(models_dir: Path, key: str, timestamp: pd.Timestamp):
+    path = Path(models_dir) / "incremental_state.json"
+    state = _load_watermarks(models_dir)
+    state[key] = timestamp.isoformat()
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_incremental_update_job(job_id: str, track: str, races: List[str], dataset_root: str,
+                               models_dir: str, jobs_dir: str, min_new_laps: int = 10) -> Dict:
+    """
+    Continue boosting an existing track model with laps completed since the last update.
+    Runs inside a worker process.
+
+    A per-(track, race) timestamp watermark records which laps were already consumed.
+    Rejected updates (validation MAE regressed) leave both the model and the
+    watermark untouched, so those laps are reconsidered with more data next time.
+    """
+    from ..data.loader import load_lap_times
+    from ..ml.lap_time_predictor import LapTimePredictor, get_model_path
+    from ..ml.model_artifact import METADATA_SUFFIX
+
+    store = JobStore(Path(jobs_dir))
+    models_dir = Path(models_dir)
+
+    def checkpoint(progress: float, message: str):
+        if store.cancel_requested(job_id):
+            raise JobCancelled()
+        store.update(job_id, progress=round(progress, 3), message=message)
+
+    store.update(job_id, status="running", started_at=_now(), progress=0.0, message="Loading model")
+
+    try:
+        model_path = get_model_path(track, models_dir=models_dir)
+        if not model_path.exists():
+            raise FileNotFoundError(f"No model for {track} - run a full training first")
+        predictor = LapTimePredictor(str(model_path))
+
+        # New rows must come from the pipeline the model was trained with
+        pipeline = feature_pipeline_for(predictor.feature_names)
+        if pipeline is None:
+            raise ValueError(f"No feature pipeline produces the model inputs {predictor.feature_names}")
+        build_features = FEATURE_PIPELINES[pipeline][0]
+
+        watermarks = _load_watermarks(models_dir)
+        new_features = []
+        latest = {}
+        for i, race in enumerate(races):
+            checkpoint(0.5 * i / len(races), f"Collecting new laps for {track} {race}")
+            start, end, lapt = load_lap_times(Path(dataset_root), track, race)
+            if lapt.empty:
+                continue
+
+            key = f"{track.lower()}|{race.upper()}"
+            since = pd.Timestamp(watermarks[key]) if key in watermarks else None
+            features_df = build_features(lapt, since=since)
+            if not features_df.empty:
+                new_features.append(features_df)
+                latest[key] = lapt['timestamp'].max()
+
+        n_new = sum(len(f) for f in new_features)
+        if n_new < min_new_laps:
+            return store.update(
+                job_id,
+                status="done",
+                progress=1.0,
+                message=f"Skipped: {n_new} new laps (need {min_new_laps})",
+                metrics={'accepted': False, 'n_new_samples': n_new},
+                finished_at=_now()
+            )
+
+        checkpoint(0.5, "Boosting on new laps")
+        # Time order across vehicles and races, so the held-out tail is the most recent laps
+        combined = pd.concat(new_features, ignore_index=True).sort_values('timestamp', kind='stable')
+        missing = [name for name in predictor.feature_names if name not in combined.columns]
+        if missing:
+            raise ValueError(f"{pipeline} features lack model inputs {missing}")
+        report = predictor.update(combined[predictor.feature_names], combined['lap_time'].values)
+
+        artifact_path = None
+        if report['accepted']:
+            checkpoint(0.9, "Saving updated model")
+            artifact_path = model_path.with_suffix(METADATA_SUFFIX)
+            predictor.save_model(str(artifact_path))
+            artifact_path = str(artifact_path)
+            for key, timestamp in latest.items():
+                _save_watermark(models_dir, key, timestamp)
+
+        return store.update(
+            job_id,
+            status="done",
+            progress=1.0,
+            message="Update accepted" if report['accepted'] else "Update rejected: validation MAE regressed",
+            metrics=report,
+            artifact_path=artifact_path,
+            finished_at=_now()
+        )
+    except JobCancelled:
+        store.clear_cancel(job_id)
+        return store.update(job_id, status="cancelled", message="Cancelled while running", finished_at=_now())
+    except Exception as e:
+        logger.error(f"Incremental update job {job_id} failed: {e}")
+        return store.update(job_id, status="failed", error=str(e), message="Incremental update failed", finished_at=_now())
+
+
+JOB_RUNNERS = {
+    "full": run_training_job,
+    "incremental": run_incremental_update_job,
+}
+
+
+class TrainingJobManager:
+    """Bounded queue of training jobs executed in a process pool."""
+
+    def __init__(self, jobs_dir: Path, max_workers: int = 1, max_pending: int = 4):
+        self.store = JobStore(jobs_dir)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._recover_interrupted_jobs()
+
+    def _recover_interrupted_jobs(self):
+        """
+        Jobs left active by a process that is gone can never finish - mark them failed.
+
+        Other server workers share the jobs directory, so jobs whose owning
+        process is alive are left alone. A job owned by this process's PID comes
+        from an earlier process that had the same PID (this manager is new).
+        """
+        for record in self.store.list():
+            owner = record.get("owner_pid")
+            if record.get("status") in ACTIVE_STATUSES and (owner == os.getpid() or not _pid_alive(owner)):
+                self.store.update(
+                    record["job_id"],
+                    status="failed",
+                    error="Interrupted by server restart",
+                    finished_at=_now()
+                )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawn avoids forking a process that already runs the event loop and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    @staticmethod
+    def _job_key(kind: str, track: str, races: List[str]) -> str:
+        return f"{kind}|{track.lower()}|{','.join(sorted(r.upper() for r in races))}"
+
+    def submit(self, track: str, races: List[str], kind: str = "full") -> Dict:
+        """Queue a training job, returning the existing job if an identical one is active."""
+        if kind not in JOB_RUNNERS:
+            raise ValueError(f"Unknown training job kind: {kind}")
+        key = self._job_key(kind, track, races)
+
+        # The thread lock covers this worker's executor; the store lock covers other workers
+        with self._lock, self.store.submission_lock():
+            active = [j for j in self.list_jobs() if j["status"] in ACTIVE_STATUSES]
+            for job in active:
+                if job.get("key") == key:
+                    return {**job, "deduplicated": True}
+
+            if len(active) >= self.max_pending:
+                raise QueueFullError(f"Training queue is full ({self.max_pending} active jobs)")
+
+            job_id = uuid.uuid4().hex[:12]
+            record = self.store.save({
+                "job_id": job_id,
+                "key": key,
+                "kind": kind,
+                "owner_pid": os.getpid(),
+                "track": track,
+                "races": races,
+                "status": "queued",
+                "progress": 0.0,
+                "message": "Waiting for a training worker",
+                "metrics": None,
+                "artifact_path": None,
+                "error": None,
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None
+            })
+
+            job_args = (
+                job_id,
+                track,
+                races,
+                str(settings.dataset_root),
+                str(settings.models_dir),
+                str(self.store.jobs_dir)
+            )
+            runner = JOB_RUNNERS[kind]
+            try:
+                future = self._get_executor().submit(runner, *job_args)
+            except BrokenProcessPool:
+                # A crashed worker poisons the pool - start a fresh one
+                self._executor = None
+                future = self._get_executor().submit(runner, *job_args)
+            self._futures[job_id] = future
+            future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+
+        return {**record, "deduplicated": False}
+
+    def _on_done(self, job_id: str, future: Future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            # Worker crashed before it could record the failure itself
+            self.store.update(job_id, status="failed", error=str(error), finished_at=_now())
+            return
+
+        record = future.result()
+        if record and record.get("status") == "done" and record.get("artifact_path"):
+            # Drop any cached predictor so the next request loads the new model
+            from ..ml.lap_time_predictor import evict_lap_time_predictor
+            evict_lap_time_predictor(record.get("artifact_path"))
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def list_jobs(self, status: Optional[str] = None, track: Optional[str] = None) -> List[Dict]:
+        return self.store.list(status=status, track=track)
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a queued job immediately or ask a running job to stop."""
+        record = self.store.get(job_id)
+        if record is None or record["status"] not in ACTIVE_STATUSES:
+            return record
+
+        with self._lock:
+            future = self._futures.get(job_id)
+
+        if future is not None and future.cancel():
+            return self.store.update(job_id, status="cancelled", message="Cancelled before start", finished_at=_now())
+
+        # Only the marker is written here; the record belongs to the job until it finishes
+        self.store.request_cancel(job_id)
+        return {**record, "message": "Cancellation requested"}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+_manager = None
+
+def get_training_job_manager() -> TrainingJobManager:
+    """Get singleton training job manager instance."""
+    global _manager
+    if _manager is None:
+        _manager = TrainingJobManager(
+            settings.jobs_dir,
+            max_workers=settings.training_workers,
+            max_pending=settings.max_pending_training_jobs
+        )
+    return _manager
@@ -0,0 +1,132 @@
+"""
+Startup warm-up.
+
+A fresh instance answers its first telemetry and prediction requests slowly:
+the race CSV has to be parsed and pivoted into the telemetry cache and the
+track's lap time model loaded (which also imports XGBoost). The warm-up does
+that for the races listed in WARMUP_SESSIONS ("barber:R1,COTA:R2") in a
+background thread once the app is serving, and reports readiness through
+/health/ready while liveness (/health) answers from the start.
+
+Only as many races as the telemetry cache holds stay warm; list the most
+requested races first.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from ..core.config import settings
+from ..core.startup import get_startup_profile
+from ..data.catalog import get_dataset_catalog
+from ..data.telemetry_cache import get_telemetry_cache
+from ..ml.lap_time_predictor import get_lap_time_predictor, get_model_path
+from .incremental_training import parse_live_sessions
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Preload race telemetry and lap time models, recording how long each took."""
+
+    def __init__(self, sessions: Dict[str, List[str]], models: bool = True):
+        self.sessions = sessions
+        self.models = models
+        self.items: List[Dict] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    def _step(self, kind: str, track: str, race: Optional[str], load: Callable[[], object]):
+        started = time.perf_counter()
+        item = {"kind": kind, "track": track, "race": race}
+        try:
+            load()
+            item["status"] = "loaded"
+        except Exception as e:
+            logger.warning(f"Warm-up of {kind} {track} {race or ''} failed: {e}")
+            item.update(status="failed", error=str(e))
+        item["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        with self._lock:
+            self.items.append(item)
+
+    def run(self):
+        """Preload everything configured (blocking)."""
+        self.started_at = time.time()
+        catalog = get_dataset_catalog()
+        for track, races in self.sessions.items():
+            for race in races:
+                if catalog.resolve(track, race, "telemetry") is None:
+                    with self._lock:
+                        self.items.append({"kind": "telemetry", "track": track, "race": race,
+                                           "status": "skipped", "ms": 0.0})
+                    continue
+                self._step("telemetry", track, race, lambda: get_telemetry_cache().get(track, race))
+            model_path = get_model_path(track)
+            if self.models and model_path.exists():
+                self._step("model", track, None, lambda: get_lap_time_predictor(str(model_path)))
+        self.finished_at = time.time()
+        logger.info(f"Warm-up finished in {self.finished_at - self.started_at:.1f}s")
+
+    async def _run_in_background(self):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            await loop.run_in_executor(None, self.run)
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}")
+            self.finished_at = time.time()
+        get_startup_profile().record("warmup", time.perf_counter() - started)
+
+    def start(self):
+        """Start warming up without delaying startup; ready at once when nothing is configured."""
+        if self._task is not None:
+            return
+        if not self.sessions:
+            self.started_at = self.finished_at = time.time()
+            return
+        logger.info(f"Warming up {self.sessions}")
+        self._task = asyncio.create_task(self._run_in_background())
+
+    async def stop(self):
+        # The executor thread finishes its current item; only the wait is cancelled
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def report(self) -> dict:
+        with self._lock:
+            items = list(self.items)
+        duration = None
+        if self.started_at is not None:
+            duration = round(((self.finished_at or time.time()) - self.started_at) * 1000, 1)
+        return {
+            "ready": self.ready,
+            "sessions": self.sessions,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_ms": duration,
+            "items": items
+        }
+
+
+# Singleton instance
+_warmup = None
+
+def get_warmup() -> Warmup:
+    """Get singleton warm-up instance."""
+    global _warmup
+    if _warmup is None:
+        _warmup = Warmup(parse_live_sessions(settings.warmup_sessions), settings.warmup_models)
+    return _warmup
@@ -0,0 +1,197 @@
+"""
+Dataset and model watcher.
+
+Polls ``dataset_root`` (through the dataset catalog) and ``models_dir`` for
+file modification times every WATCH_INTERVAL seconds. Each changed data file
+is mapped to its (track, race) and only that race is dropped from the
+in-memory caches:
+- parsed telemetry, lap comparison and segment assignments, when a telemetry
+  file changed;
+- cached responses naming the race.
+Races that had materialized artifacts are then recomputed, with their track
+aggregate (by one worker only, when several share the files - see
+``rematerialize``). A changed model
+file evicts the cached predictor of its track and the cached prediction
+responses. Every change and the action taken is kept in a short event log
+(GET /datasets/events).
+
+Polling rather than inotify: it needs no extra dependency, works on network
+and container volumes, and the dataset holds tens of files.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from ..core.coalesce import get_response_cache
+from ..core.config import settings
+from ..data.catalog import CatalogEntry, DatasetCatalog, get_dataset_catalog
+from ..data.lap_comparison import get_lap_comparison_engine
+from ..data.telemetry_cache import get_telemetry_cache
+from ..data.track_segments import get_track_segment_store
+from ..ml.lap_time_predictor import evict_lap_time_predictor
+from ..ml.model_artifact import BOOSTER_SUFFIX, METADATA_SUFFIX
+from .materialize import MaterializedStore, get_materialized_store, materialize_race, materialize_track
+
+logger = logging.getLogger(__name__)
+
+# Events kept for /datasets/events
+EVENT_LOG_SIZE = 500
+
+MODEL_PREFIX = "lap_time_predictor_"
+MODEL_SUFFIXES = (METADATA_SUFFIX, BOOSTER_SUFFIX, ".pkl")
+
+
+def _model_files(models_dir: Path) -> Dict[Path, Tuple[int, int]]:
+    if not models_dir.is_dir():
+        return {}
+    files = {}
+    for path in models_dir.glob(f"{MODEL_PREFIX}*"):
+        if path.suffix in MODEL_SUFFIXES and path.is_file():
+            stat = path.stat()
+            files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class DataWatcher:
+    """Detect changed data and model files and invalidate exactly what depends on them."""
+
+    def __init__(self, catalog: DatasetCatalog, models_dir: Path, interval: float,
+                 store: Optional[MaterializedStore] = None):
+        self.catalog = catalog
+        self.models_dir = Path(models_dir)
+        self.interval = interval
+        self.store = store
+        # Caches are per process, so every worker polls; the shared artifacts are rewritten by one
+        self.rematerialize = True
+        self.events: Deque[Dict] = deque(maxlen=EVENT_LOG_SIZE)
+        self._poll_events: Optional[List[Dict]] = None
+        self._models = _model_files(self.models_dir)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def _log(self, kind: str, **fields) -> Dict:
+        event = {"time": time.time(), "kind": kind, **fields}
+        self.events.append(event)
+        if self._poll_events is not None:
+            self._poll_events.append(event)
+        logger.info(f"Watcher {kind}: {fields}")
+        return event
+
+    def _invalidate_race(self, track: str, race: Optional[str], telemetry: bool) -> List[str]:
+        actions = []
+        if telemetry:
+            get_telemetry_cache().invalidate(track, race)
+            get_lap_comparison_engine().invalidate(track, race)
+            get_track_segment_store().invalidate(track, race=race)
+            actions.append("telemetry_cache")
+        get_response_cache().invalidate_race(track, race)
+        actions.append("response_cache")
+        return actions
+
+    def _check_dataset(self) -> Set[Tuple[str, str]]:
+        """Invalidate per changed data file; returns the races to re-materialize."""
+        changes = self.catalog.rescan()
+        affected: Dict[Tuple[str, Optional[str]], List[CatalogEntry]] = {}
+        for change, entries in changes.items():
+            for entry in entries:
+                affected.setdefault((entry.track, entry.race), []).append(entry)
+                self._log("dataset", change=change, path=str(entry.path), track=entry.track,
+                          race=entry.race, file_kind=entry.kind)
+
+        rematerialize = set()
+        for (track, race), entries in affected.items():
+            telemetry = any(e.kind == "telemetry" for e in entries)
+            actions = self._invalidate_race(track, race, telemetry)
+            self._log("invalidate", track=track, race=race, actions=actions)
+            races = [race] if race is not None else self.catalog.races(track)
+            rematerialize.update((track, r) for r in races)
+        return rematerialize
+
+    def _check_models(self):
+        current = _model_files(self.models_dir)
+        changed = {p for p in current.keys() | self._models.keys() if current.get(p) != self._models.get(p)}
+        self._models = current
+        for path in sorted(changed):
+            track = path.stem[len(MODEL_PREFIX):]
+            # Predictors are cached under the metadata (or legacy pickle) path
+            for suffix in (METADATA_SUFFIX, ".pkl"):
+                evict_lap_time_predictor(str(path.with_suffix(suffix)))
+            change = "removed" if path not in current else "changed"
+            self._log("model", change=change, path=str(path), track=track)
+        if changed:
+            get_response_cache().invalidate("/predictions")
+
+    def check(self) -> List[Dict]:
+        """Run one poll; returns the events it logged."""
+        with self._lock:
+            # Collected here as well as in the (bounded) event log, which may drop the oldest
+            self._poll_events = events = []
+            try:
+                rematerialize = self._check_dataset()
+                self._check_models()
+
+                store = self.store or get_materialized_store()
+                refresh_tracks = set()
+                for track, race in sorted(rematerialize if self.rematerialize else ()):
+                    if store.manifest(track, race) is None:
+                        continue  # Never materialized; nothing to keep current
+                    try:
+                        summary = materialize_race(track, race, store)
+                        self._log("materialize", track=track, race=race, status=summary["status"],
+                                  errors=summary.get("errors", {}))
+                    except Exception as e:
+                        self._log("materialize", track=track, race=race, status="failed", errors={"all": str(e)})
+                    refresh_tracks.add(track)
+                for track in sorted(refresh_tracks):
+                    result = materialize_track(track, store)
+                    self._log("materialize", track=track, race=None, status=result["status"])
+            finally:
+                self._poll_events = None
+            return events
+
+    def recent(self, limit: int = 100, kind: Optional[str] = None) -> List[Dict]:
+        events = [e for e in self.events if kind is None or e["kind"] == kind]
+        return events[-limit:][::-1]
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await loop.run_in_executor(None, self.check)
+            except Exception as e:
+                logger.error(f"Watcher poll failed: {e}")
+
+    def start(self):
+        if self.enabled and self._task is None:
+            logger.info(f"Watching {self.catalog.root} and {self.models_dir} every {self.interval}s")
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+_watcher = None
+
+def get_data_watcher() -> DataWatcher:
+    """Get singleton data watcher instance."""
+    global _watcher
+    if _watcher is None:
+        _watcher = DataWatcher(get_dataset_catalog(), settings.models_dir, settings.watch_interval)
+    return _watcher
@@ -3,7 +3,6 @@ Weather service using Open-Meteo API for real-time weather data.
 No API key required - completely free and open source.
 """
 
-import httpx
 from typing import Optional, Dict
 from datetime import datetime
 
@@ -68,6 +67,9 @@ class WeatherService:
             "wind_speed_unit": "kmh",
         }
         
+        # Imported here: httpx is only needed once live weather is requested
+        import httpx
+
         try:
             async with httpx.AsyncClient() as client:
                 response = await client.get(cls.BASE_URL, params=params, timeout=10.0)
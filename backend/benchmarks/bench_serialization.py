@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark
+Compares records vs columnar (and optional MessagePack / Arrow) encodings for a
+telemetry-shaped frame, measuring end-to-end encode time and payload size the
+way FastAPI produces them (jsonable_encoder + json.dumps for dict results) and
+through the app's FastJSONResponse serializer.
+
+Usage (from backend/):
+    python benchmarks/bench_serialization.py --rows 10000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core import formats
+from app.core.formats import frame_to_columns, frame_to_records
+from app.core.responses import dumps
+
+CHANNELS = ["speed", "ath", "pbrake_f", "pbrake_r", "gear", "nmot",
+            "accx_can", "accy_can", "Steering_Angle", "VBOX_Lat_Min", "VBOX_Long_Minutes"]
+
+
+def make_frame(n_rows: int) -> pd.DataFrame:
+    """Wide telemetry: 3 key columns + 11 channels, ~5% missing samples."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "vehicle_id": np.repeat(["GR86-002-000", "GR86-004-78", "GR86-010-16"], n_rows // 3 + 1)[:n_rows],
+        "timestamp": pd.Timestamp("2025-04-05 14:00", tz="UTC") + pd.to_timedelta(np.arange(n_rows) * 100, unit="ms"),
+        "lap": np.arange(n_rows) // 900 + 1,
+    })
+    for channel in CHANNELS:
+        values = rng.normal(100, 25, n_rows)
+        values[rng.random(n_rows) < 0.05] = np.nan
+        df[channel] = values
+    return df
+
+
+def encode_json(payload) -> bytes:
+    return json.dumps(jsonable_encoder(payload)).encode()
+
+
+def bench(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tabular response encodings")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    cases = {
+        "records (JSON)": lambda: encode_json({"rows": frame_to_records(df)}),
+        "columns (JSON)": lambda: encode_json({"rows": frame_to_columns(df)}),
+        "records (fast JSON)": lambda: dumps({"rows": frame_to_records(df)}),
+        "columns (fast JSON)": lambda: dumps({"rows": frame_to_columns(df)}),
+    }
+    if formats.msgpack is not None:
+        cases["columns (MessagePack)"] = lambda: formats.tabular_response({}, df, "rows", formats.MSGPACK).body
+    if formats.pa is not None:
+        cases["Arrow IPC"] = lambda: formats.tabular_response({}, df, "rows", formats.ARROW).body
+
+    print("\n" + "="*80)
+    print(f"📦 SERIALIZATION BENCHMARK ({args.rows:,} rows x {len(df.columns)} columns)")
+    print("="*80)
+    print(f"{'Format':<24}{'Time (ms)':>12}{'Size (KB)':>14}")
+    for name, fn in cases.items():
+        ms, size = bench(fn, args.repeat)
+        print(f"{name:<24}{ms:>12.1f}{size / 1024:>14.1f}")
+
+    missing = [name for name, mod in (("msgpack", formats.msgpack), ("pyarrow", formats.pa)) if mod is None]
+    if missing:
+        print(f"\n(skipped: {', '.join(missing)} not installed)")
+
+
+if __name__ == "__main__":
+    main()
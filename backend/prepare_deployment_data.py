@@ -1,8 +1,27 @@
 import os
 import shutil
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from app.data.decimation import minmax_indices
+
+# Fraction of telemetry samples kept per vehicle/channel (1.5GB -> ~15MB)
+KEEP_FRACTION = 0.01
+
+
+def decimate_long_telemetry(df: pd.DataFrame, keep_fraction: float = KEEP_FRACTION) -> pd.DataFrame:
+    """Keep each vehicle/channel trace's per-bucket min and max instead of every Nth row."""
+    df = df.sort_values(["vehicle_id", "telemetry_name", "timestamp"], kind="stable")
+    values = pd.to_numeric(df["telemetry_value"], errors="coerce").to_numpy(dtype=float)
+
+    keep = []
+    for positions in df.groupby(["vehicle_id", "telemetry_name"], sort=False).indices.values():
+        n_out = max(2, int(len(positions) * keep_fraction))
+        keep.append(positions[minmax_indices(values[positions], n_out)])
+
+    return df.iloc[np.sort(np.concatenate(keep))] if keep else df
+
 def prepare_data():
     # Define paths
     project_root = Path(__file__).parent.parent
@@ -65,13 +84,11 @@ def prepare_data():
         # Use chunks if memory is an issue, but for 1.5GB on local machine it should be fine
         # We'll read only necessary columns to save memory if needed, but let's try full read first
         try:
-            # Downsample: Keep 1 row every 100 rows
-            # This reduces 1.5GB -> ~15MB
             df = pd.read_csv(src_file)
             print(f"    Original shape: {df.shape}")
             
-            # Simple downsampling
-            df_sampled = df.iloc[::100, :]
+            # Shape-preserving downsampling: min/max per bucket for each vehicle/channel
+            df_sampled = decimate_long_telemetry(df)
             print(f"    Sampled shape: {df_sampled.shape}")
             
             df_sampled.to_csv(dst_file, index=False)
@@ -1,24 +1,44 @@
 """
 Startup script for the FastAPI application.
 Configures the server to work with Render and other deployment environments.
+
+WORKERS (or WEB_CONCURRENCY) > 1 runs several uvicorn worker processes. They
+then share parsed race frames through memory-mapped files (SHARED_FRAMES)
+instead of each holding its own copy, and startup materialization runs once
+here rather than in every worker. The incremental update scheduler and the
+re-materialization of changed races run in the one worker holding the
+background lock (BACKGROUND_LOCK); training jobs are recovered only when the
+worker that queued them is gone.
 """
 import os
+import subprocess
+import sys
 import uvicorn
 
 if __name__ == "__main__":
     # Get port from environment variable (Render provides this)
     # Default to 8000 for local development
     port = int(os.environ.get("PORT", 8000))
-    
+
     # Bind to 0.0.0.0 to accept external connections (required for Render)
     host = os.environ.get("HOST", "0.0.0.0")
-    
+
+    # Only use reload in development (reload runs a single process)
+    reload = os.environ.get("ENV", "production") == "development"
+    workers = 1 if reload else int(os.environ.get("WORKERS", os.environ.get("WEB_CONCURRENCY", "1")))
+
+    if workers > 1:
+        os.environ.setdefault("SHARED_FRAMES", "1")
+        if os.environ.get("MATERIALIZE_ON_STARTUP") == "1":
+            subprocess.Popen([sys.executable, "-m", "app.services.materialize"])
+            os.environ["MATERIALIZE_ON_STARTUP"] = "0"
+
     # Run the FastAPI application
     uvicorn.run(
         "app.main:app",
         host=host,
         port=port,
         log_level="info",
-        # Only use reload in development
-        reload=os.environ.get("ENV", "production") == "development"
+        reload=reload,
+        workers=workers
     )
@@ -0,0 +1,46 @@
+"""
+Shared test helpers.
+
+``synthetic_race`` builds the in-memory barber R1 race used by the telemetry
+tests; each test file only supplies the signals of its own scenario.
+"""
+
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.data.telemetry_cache import CachedRace
+
+VEHICLES = ("GR86-002-000", "GR86-004-78")
+RACE_START = pd.Timestamp("2025-04-05 14:00:00", tz="UTC")
+
+
+def synthetic_race(channels: Callable[[int, str], Dict[str, np.ndarray]],
+                   vehicles: Sequence[str] = VEHICLES,
+                   shuffle_seed: Optional[int] = None) -> CachedRace:
+    """
+    CachedRace for barber R1 from a per-vehicle channel generator.
+
+    ``channels(index, vehicle_id)`` returns the vehicle's columns: ``seconds``
+    since the race start plus any telemetry channels (``lap``, ``speed``, ...).
+    Rows are shuffled with ``shuffle_seed`` to mimic unsorted source files.
+    """
+    frames = []
+    for i, vehicle in enumerate(vehicles):
+        columns = dict(channels(i, vehicle))
+        seconds = columns.pop("seconds")
+        frames.append(pd.DataFrame({
+            "vehicle_id": vehicle,
+            "timestamp": RACE_START + pd.to_timedelta(seconds, unit="s"),
+            **columns
+        }))
+    frame = pd.concat(frames, ignore_index=True)
+    if shuffle_seed is not None:
+        frame = frame.sample(frac=1.0, random_state=shuffle_seed)
+    return CachedRace.from_frame("barber", "R1", frame)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Dataset Catalog Test
+Scans a temporary dataset with the layouts and filename conventions of the
+real tracks and checks file classification, loader resolution and rescans.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.data.catalog import DatasetCatalog
+from app.data.loader import discover_races, get_track_directory, load_lap_times
+
+LAP_CSV = "vehicle_id,lap,timestamp\nGR86-002-000,1,2025-09-06T18:40:00Z\n"
+
+FILES = [
+    # Flat track directories
+    "barber/R1_barber_lap_start.csv",
+    "barber/R1_barber_lap_end.csv",
+    "barber/R1_barber_lap_time.csv",
+    "barber/R1_barber_telemetry_data.csv",
+    "barber/03_Provisional Results_Race 1_Anonymized.CSV",
+    "barber/03_Results GR Cup Race 1 Official_Anonymized.CSV",
+    "barber/26_Weather_Race 1_Anonymized.CSV",
+    "barber/23_AnalysisEnduranceWithSections_Race 1_Anonymized.CSV",
+    "indianapolis/R2_indianapolis_motor_speedway_lap_start.csv",
+    "indianapolis/R2_indianapolis_motor_speedway_lap_end.csv",
+    "indianapolis/R2_indianapolis_motor_speedway_lap_time.csv",
+    "indianapolis/GR Drivers Championship-1.csv",
+    # "Race N" folders
+    "COTA/Race 1/COTA_lap_start_time_R1.csv",
+    "COTA/Race 1/COTA_lap_end_time_R1.csv",
+    "COTA/Race 1/COTA_lap_time_R1.csv",
+    "COTA/Race 1/R1_cota_telemetry_data.csv",
+    "COTA/Race 1/03_Provisional Results_ Race 1_Anonymized.CSV",
+    "Sebring/Race 2/Sebring_lap_start_time_R2.csv",
+    "Sebring/Race 2/Sebring_lap_end_time_R2.csv",
+    "Sebring/Race 2/Sebring_lap_time_R2.csv",
+    "Sebring/Race 2/sebring_telemetry_R2.csv",
+    "Sonoma/Race 1/03_Results_Anonymized.CSV",
+]
+
+
+def make_dataset(root: Path):
+    for name in FILES:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(LAP_CSV if "lap_" in name else "x\n")
+
+
+def test_classification_and_resolution():
+    """Every convention resolves to the right file; loaders and discovery use the catalog."""
+    print("\n" + "="*80)
+    print("📚 DATASET CATALOG: CLASSIFICATION")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_dataset(root)
+        catalog = DatasetCatalog(root)
+        print(f"  tracks: {catalog.tracks()}")
+
+        assert catalog.tracks() == ["barber", "cota", "indianapolis", "sebring", "sonoma"]
+        assert catalog.races("barber") == ["R1"] and catalog.races("Sebring") == ["R2"]
+        assert catalog.races("sonoma") == []  # Results only, no lap timing
+        assert catalog.resolve("barber", "R1", "lap_time").name == "R1_barber_lap_time.csv"
+        assert catalog.resolve("barber", "R1", "results").name.startswith("03_Provisional")
+        assert catalog.resolve("barber", "R1", "sectors").name.startswith("23_AnalysisEndurance")
+        assert catalog.resolve("COTA", "R1", "lap_start").name == "COTA_lap_start_time_R1.csv"
+        assert catalog.resolve("cota", "r1", "results").name == "03_Provisional Results_ Race 1_Anonymized.CSV"
+        assert catalog.resolve("sebring", "R2", "telemetry").name == "sebring_telemetry_R2.csv"
+        assert catalog.resolve("sonoma", "R1", "results").name == "03_Results_Anonymized.CSV"
+        assert catalog.resolve("indianapolis", None, "other").name == "GR Drivers Championship-1.csv"
+        assert catalog.resolve("barber", "R2", "lap_time") is None
+        assert len(catalog.race_files("barber", "R1")) == 8
+
+        assert discover_races(root) == [("barber", "R1"), ("cota", "R1"), ("indianapolis", "R2"), ("sebring", "R2")]
+        start, end, lapt = load_lap_times(root, "sebring", "R2")
+        assert list(lapt["vehicle_id"]) == ["GR86-002-000"]
+        try:
+            get_track_directory(root, "monza")
+            raise AssertionError("expected ValueError")
+        except ValueError:
+            pass
+        try:
+            get_track_directory(root, "vir")
+            raise AssertionError("expected FileNotFoundError")
+        except FileNotFoundError:
+            pass
+
+
+def test_refresh_reports_changes():
+    """A rescan picks up new, removed and modified files."""
+    print("\n" + "="*80)
+    print("📚 DATASET CATALOG: REFRESH")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_dataset(root)
+        catalog = DatasetCatalog(root)
+        assert catalog.refresh() == {"added": sorted(str(root / f) for f in FILES), "removed": [], "changed": []}
+
+        (root / "barber" / "R2_barber_lap_time.csv").write_text(LAP_CSV)
+        (root / "barber" / "26_Weather_Race 1_Anonymized.CSV").unlink()
+        (root / "barber" / "R1_barber_lap_time.csv").write_text(LAP_CSV * 2)
+        changes = catalog.refresh()
+        print(f"  {changes}")
+        assert [Path(p).name for p in changes["added"]] == ["R2_barber_lap_time.csv"]
+        assert [Path(p).name for p in changes["removed"]] == ["26_Weather_Race 1_Anonymized.CSV"]
+        assert [Path(p).name for p in changes["changed"]] == ["R1_barber_lap_time.csv"]
+        assert catalog.races("barber") == ["R1", "R2"]
+        assert catalog.resolve("barber", "R1", "weather") is None
+
+
+def test_weather_for_tracks_without_data():
+    """Weather is looked up by configured coordinates, not by the tracks found on disk."""
+    print("\n" + "="*80)
+    print("🌦️ WEATHER TRACK LOOKUP")
+    print("="*80)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services.weather import WeatherService
+
+    async def fake_weather(latitude, longitude):
+        return {"temperature": 21.0, "latitude": latitude, "longitude": longitude}
+
+    original = WeatherService.__dict__["get_weather"]
+    WeatherService.get_weather = staticmethod(fake_weather)
+    try:
+        client = TestClient(app)
+        response = client.get("/weather/COTA")
+        print(f"  /weather/COTA: {response.status_code} {response.json()}")
+        assert response.status_code == 200 and response.json()["latitude"] == 30.1328
+        assert client.get("/weather/Road America").status_code == 200
+        assert client.get("/weather/nowhere").status_code == 404
+    finally:
+        WeatherService.get_weather = original
+
+
+if __name__ == "__main__":
+    test_classification_and_resolution()
+    test_refresh_reports_changes()
+    test_weather_for_tracks_without_data()
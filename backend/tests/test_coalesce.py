@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Request Coalescing Test
+Fires identical concurrent GETs at a slow endpoint behind the coalescing
+middleware and checks that it runs once, then serves cached responses with
+ETag revalidation.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.coalesce import CoalescingMiddleware, ResponseCache
+
+
+def make_app(cache: ResponseCache):
+    calls = {"slow": 0, "fail": 0}
+    app = FastAPI()
+    app.add_middleware(CoalescingMiddleware, prefixes=["/analytics"], cache=cache)
+
+    @app.get("/analytics/slow/{track}")
+    def slow(track: str, laps: int = 10):
+        calls["slow"] += 1
+        time.sleep(0.3)
+        return {"track": track, "laps": laps, "call": calls["slow"]}
+
+    @app.get("/analytics/fail")
+    def fail():
+        calls["fail"] += 1
+        raise HTTPException(status_code=404, detail="missing")
+
+    @app.get("/other")
+    def other():
+        return {"ok": True}
+
+    return app, calls
+
+
+def test_single_flight():
+    """Concurrent identical requests share one computation."""
+    print("\n" + "="*80)
+    print("🔀 COALESCE: SINGLE FLIGHT")
+    print("="*80)
+
+    cache = ResponseCache(ttl=60)
+    app, calls = make_app(cache)
+    with TestClient(app) as client:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(client.get("/analytics/slow/barber?laps=5&x=1")))
+            for _ in range(8)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        print(f"  8 requests in {elapsed * 1000:.0f} ms, endpoint ran {calls['slow']}x: {cache.stats}")
+
+        assert calls["slow"] == 1
+        assert all(r.status_code == 200 and r.json()["call"] == 1 for r in results)
+        assert sorted(r.headers["x-cache"] for r in results).count("MISS") == 1
+        assert len({r.headers["etag"] for r in results}) == 1
+
+        # Query order does not matter; different parameters are a different request
+        again = client.get("/analytics/slow/barber?x=1&laps=5")
+        assert again.headers["x-cache"] == "HIT" and calls["slow"] == 1
+        assert client.get("/analytics/slow/barber?laps=6").json()["call"] == 2
+
+
+def test_etag_and_ttl():
+    """If-None-Match gets a 304; errors and other paths are not cached; entries expire."""
+    print("\n" + "="*80)
+    print("🔀 COALESCE: ETAG AND TTL")
+    print("="*80)
+
+    cache = ResponseCache(ttl=0.5)
+    app, calls = make_app(cache)
+    with TestClient(app) as client:
+        first = client.get("/analytics/slow/cota")
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "max-age=0"
+
+        revalidated = client.get("/analytics/slow/cota", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304 and revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+        assert client.get("/analytics/fail").status_code == 404
+        assert client.get("/analytics/fail").status_code == 404
+        assert calls["fail"] == 2
+        assert "x-cache" not in client.get("/other").headers
+
+        time.sleep(0.6)
+        expired = client.get("/analytics/slow/cota", headers={"If-None-Match": etag})
+        assert calls["slow"] == 2
+        assert expired.status_code == 200 and expired.headers["etag"] != etag  # Body changed ("call": 2)
+
+        cache.invalidate("/analytics/slow")
+        assert client.get("/analytics/slow/cota").headers["x-cache"] == "MISS"
+
+
+if __name__ == "__main__":
+    test_single_flight()
+    test_etag_and_ttl()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Compute Dispatch Test
+Checks per-endpoint concurrency limits, queue rejection and metrics of the
+compute dispatcher, and that the event loop keeps answering while a slow
+offloaded handler runs.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import compute
+from app.core.compute import ComputeBusyError, ComputeDispatcher, offload
+
+
+def test_endpoint_limits_and_queue():
+    """At most ``limit`` calls of one endpoint run at once; extra waiters past max_queue are rejected."""
+    print("\n" + "="*80)
+    print("⚙️  COMPUTE: LIMITS AND QUEUE")
+    print("="*80)
+
+    dispatcher = ComputeDispatcher(max_workers=4, default_limit=2, max_queue=3, limits={"sim": 1})
+    active = {"slow": 0, "sim": 0}
+    peak = {"slow": 0, "sim": 0}
+    lock = threading.Lock()
+
+    def work(name: str):
+        with lock:
+            active[name] += 1
+            peak[name] = max(peak[name], active[name])
+        time.sleep(0.05)
+        with lock:
+            active[name] -= 1
+        return name
+
+    async def scenario():
+        slow = [dispatcher.run("slow.a", work, "slow") for _ in range(3)]
+        sims = [dispatcher.run("sim.race", work, "sim") for _ in range(3)]
+        results = await asyncio.gather(*slow, *sims)
+        assert results == ["slow"] * 3 + ["sim"] * 3
+
+        # Fill the queue of one endpoint, then one more is turned away
+        waiting = [asyncio.ensure_future(dispatcher.run("sim.race", work, "sim")) for _ in range(3)]
+        await asyncio.sleep(0)
+        try:
+            await dispatcher.run("sim.race", work, "sim")
+            raise AssertionError("expected ComputeBusyError")
+        except ComputeBusyError:
+            pass
+        await asyncio.gather(*waiting)
+
+    asyncio.run(scenario())
+    assert peak == {"slow": 2, "sim": 1}
+
+    snapshot = dispatcher.snapshot()
+    sim = snapshot["endpoints"]["sim.race"]
+    print(f"  sim.race: {sim}")
+    assert sim["limit"] == 1 and sim["completed"] == 6 and sim["rejected"] == 1
+    assert sim["waiting"] == 0 and sim["running"] == 0
+    assert sim["queue_ms"]["max"] >= 50  # Later calls waited behind the limit
+    assert snapshot["endpoints"]["slow.a"]["limit"] == 2
+    dispatcher.shutdown()
+
+
+def test_loop_stays_responsive():
+    """A liveness route answers while an offloaded handler is busy."""
+    print("\n" + "="*80)
+    print("⚙️  COMPUTE: EVENT LOOP RESPONSIVENESS")
+    print("="*80)
+
+    compute._dispatcher = ComputeDispatcher(max_workers=2, default_limit=2, max_queue=4)
+    app = FastAPI()
+
+    @app.get("/slow/{seconds}")
+    @offload("test.slow")
+    def slow(seconds: float, label: str = "x"):
+        time.sleep(seconds)
+        return {"label": label}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    try:
+        with TestClient(app) as client:
+            result = {}
+            thread = threading.Thread(target=lambda: result.update(client.get("/slow/0.5?label=y").json()))
+            thread.start()
+            time.sleep(0.1)
+            start = time.perf_counter()
+            assert client.get("/ping").json() == {"ok": True}
+            elapsed = time.perf_counter() - start
+            thread.join()
+            print(f"  ping answered in {elapsed * 1000:.1f} ms during a 500 ms handler")
+            assert elapsed < 0.3
+            assert result == {"label": "y"}
+            assert client.get("/slow/abc").status_code == 422  # Signature still drives validation
+    finally:
+        compute._dispatcher.shutdown()
+        compute._dispatcher = None
+
+
+if __name__ == "__main__":
+    test_endpoint_limits_and_queue()
+    test_loop_stays_responsive()
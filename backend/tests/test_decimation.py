@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Telemetry Decimation Test
+Checks that LTTB / min-max traces stay within budget and keep the trace shape,
+that the level-of-detail pyramid aggregates match the raw samples, and that
+these derived structures are built once, on first use.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import synthetic_race
+from app.data.decimation import lttb_indices, minmax_indices
+from app.data.lod_pyramid import TelemetryPyramid
+from app.data.telemetry_cache import CachedRace
+
+
+def speed_trace(n: int, seed: int = 0):
+    """Noisy speed with one sharp braking spike per 'lap'."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) * 0.1
+    speed = 140 + 30 * np.sin(t / 8) + rng.normal(0, 1, n)
+    speed[::997] = 40  # Heavy braking samples that must survive decimation
+    return t, speed
+
+
+def make_race(n_per_vehicle: int) -> CachedRace:
+    def channels(i, vehicle):
+        t, speed = speed_trace(n_per_vehicle, seed=i)
+        return {
+            "seconds": t,
+            "lap": (t // 100).astype(int) + 1,
+            "speed": speed,
+            "pbrake_f": np.clip(150 - speed, 0, None),
+        }
+
+    return synthetic_race(channels)
+
+
+def test_selectors():
+    """Both selectors respect the budget, keep endpoints, and min-max keeps every extreme."""
+    print("\n" + "="*80)
+    print("📉 DECIMATION SELECTORS")
+    print("="*80)
+
+    t, speed = speed_trace(20000)
+    lttb = lttb_indices(t, speed, 500)
+    minmax = minmax_indices(speed, 500)
+    print(f"  LTTB: {len(lttb)} points, min-max: {len(minmax)} points")
+
+    assert len(lttb) == 500 and lttb[0] == 0 and lttb[-1] == len(speed) - 1
+    assert np.all(np.diff(lttb) > 0)
+    assert len(minmax) <= 502
+    assert speed[minmax].min() == speed.min() and speed[minmax].max() == speed.max()
+
+
+def test_cached_trace():
+    """Race traces come from the precomputed levels and stay within target_points per vehicle."""
+    print("\n" + "="*80)
+    print("🗜️ CACHED TELEMETRY TRACE")
+    print("="*80)
+
+    race = make_race(60000)
+    print(f"  Levels: { {v: sorted(levels) for v, levels in race.decimated.items()} }")
+    assert race.decimated["GR86-002-000"]
+
+    trace, source_rows = race.trace(target_points=1000, method="minmax")
+    counts = trace.groupby("vehicle_id").size()
+    print(f"  Trace rows per vehicle: {counts.to_dict()} from {source_rows} samples")
+
+    assert source_rows == len(race.frame)
+    assert (counts <= 1000).all()
+    assert trace.groupby("vehicle_id")["timestamp"].apply(lambda s: s.is_monotonic_increasing).all()
+    assert trace["speed"].min() == race.frame["speed"].min()
+
+    lap, _ = race.trace(vehicle_id="GR86-004-78", lap_number=3, channels=["speed"], target_points=200)
+    assert len(lap) <= 200 and (lap["lap"] == 3).all()
+    assert list(lap.columns) == ["vehicle_id", "timestamp", "lap", "speed"]
+
+
+def test_lod_pyramid():
+    """Each zoom reads at most max_buckets rows and aggregates equal the raw window."""
+    print("\n" + "="*80)
+    print("🔺 TELEMETRY LOD PYRAMID")
+    print("="*80)
+
+    race = make_race(60000)
+    vehicle = "GR86-002-000"
+    lo, hi = race.vehicle_ranges[vehicle]
+    raw = race.frame.iloc[lo:hi]
+
+    factor, full = race.pyramid.query(vehicle, max_buckets=1000)
+    print(f"  Full race: level {factor}x, {len(full)} buckets")
+    assert factor == 100 and len(full) == 600
+    assert full["count"].sum() == len(raw)
+    assert full["speed_min"].min() == raw["speed"].min()
+    assert np.isclose((full["speed_mean"] * full["count"]).sum() / full["count"].sum(), raw["speed"].mean())
+
+    # Zoom into five minutes (3000 samples): the finer 10x level fits the budget
+    start = raw["timestamp"].iloc[1000]
+    end = start + pd.Timedelta(minutes=5)
+    factor, zoom = race.pyramid.query(vehicle, start.value, end.value, max_buckets=1000, channels=["speed"])
+    print(f"  Five minutes: level {factor}x, {len(zoom)} buckets")
+    assert factor == 10 and len(zoom) <= 1000
+    assert list(zoom.columns) == ["vehicle_id", "t_start", "t_end", "count", "speed_min", "speed_max", "speed_mean"]
+
+    factor, tiny = race.pyramid.query(vehicle, start.value, start.value + 5 * 10**9, max_buckets=1000)
+    assert factor == 1 and len(tiny) == 51
+
+
+def test_derived_structures_built_on_first_use():
+    """Loading a race builds no derived structure; concurrent first requests share one build."""
+    print("\n" + "="*80)
+    print("💤 LAZY DERIVED STRUCTURES")
+    print("="*80)
+
+    race = make_race(20000)
+    assert race._derived == {}
+
+    builds = []
+    original = TelemetryPyramid.__dict__["build"]
+
+    def counting_build(*args, **kwargs):
+        builds.append(threading.get_ident())
+        return original.__func__(TelemetryPyramid, *args, **kwargs)
+
+    TelemetryPyramid.build = staticmethod(counting_build)
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(race.pyramid)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        TelemetryPyramid.build = original
+    print(f"  {len(results)} concurrent requests, {len(builds)} pyramid build(s); built: {sorted(race._derived)}")
+    assert len(builds) == 1 and all(r is results[0] for r in results)
+    assert sorted(race._derived) == ["pyramid"]
+
+
+if __name__ == "__main__":
+    test_selectors()
+    test_cached_trace()
+    test_lod_pyramid()
+    test_derived_structures_built_on_first_use()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Telemetry Events Test
+Extracts brake zones and gear shifts from a synthetic race and checks them
+against a straightforward per-sample loop.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import synthetic_race
+from app.data.events import brake_point_consistency, extract_brake_zones, extract_gear_shifts
+from app.data.feature_engine import FeatureEngine
+from app.data.telemetry_cache import CachedRace
+
+LAP_LENGTH = 3700.0
+CORNERS = [800.0, 2000.0, 3200.0]
+SAMPLES_PER_LAP = 925  # 40 m/s at 10 Hz
+
+
+def make_race(laps: int = 5) -> CachedRace:
+    """Two vehicles braking at three corners; vehicle B brakes 20 m later; one stray brake tap."""
+    rng = np.random.default_rng(7)
+
+    def channels(v, vehicle):
+        n = laps * SAMPLES_PER_LAP
+        i = np.arange(n)
+        distance = (i % SAMPLES_PER_LAP) * LAP_LENGTH / SAMPLES_PER_LAP
+        lap = i // SAMPLES_PER_LAP + 1
+        brake = np.zeros(n)
+        for corner in CORNERS:
+            jitter = rng.normal(0, 3, laps)[lap - 1]
+            zone = (distance >= corner + 20 * v + jitter) & (distance < corner + 20 * v + jitter + 80)
+            brake[zone] = 60 + 10 * v
+        brake[(lap == 2) & (distance >= 1400) & (distance < 1420)] = 30  # One-off, not a corner
+        pbrake_r = brake * 0.4
+        brake[:4] = np.nan  # Must not inherit the previous vehicle's pressure
+        return {
+            "seconds": i * 0.1,
+            "lap": lap,
+            "pbrake_f": brake,
+            "pbrake_r": pbrake_r,
+            "gear": np.clip(1 + (distance // 600), 1, 6),
+            "nmot": 5000 + (distance % 600) * 3,
+            "Laptrigger_lapdist_dls": np.where(i % 2 == 0, distance, np.nan)
+        }
+
+    return synthetic_race(channels)
+
+
+def naive_zones(df: pd.DataFrame):
+    zones = []
+    for vehicle, group in df.groupby("vehicle_id", sort=False):
+        total = group["pbrake_f"].ffill().to_numpy() + group["pbrake_r"].ffill().fillna(0).to_numpy()
+        on, begin = False, None
+        for k, value in enumerate(total > 10):
+            if value and not on:
+                begin = k
+            if on and not value:
+                zones.append((vehicle, begin, k - 1, total[begin:k].max()))
+            on = value
+        if on:
+            zones.append((vehicle, begin, len(total) - 1, total[begin:].max()))
+    return zones
+
+
+def test_brake_zones_and_shifts():
+    """Vectorized extraction matches the per-sample loop."""
+    print("\n" + "="*80)
+    print("🛑 EVENTS: BRAKE ZONES AND GEAR SHIFTS")
+    print("="*80)
+
+    race = make_race()
+    zones = race.events.brake_zones.frame
+    expected = naive_zones(race.frame)
+    print(f"  Brake zones: {len(zones)}, gear shifts: {len(race.events.gear_shifts)}")
+
+    assert len(zones) == len(expected) == 2 * (5 * 3 + 1)
+    assert np.allclose(zones["peak_pressure"], [z[3] for z in expected])
+    assert np.allclose(zones["duration"], [(z[2] - z[1]) * 0.1 for z in expected], atol=1e-4)
+    assert zones["brake_distance"].between(70, 90).sum() == 30
+
+    lap3 = race.events.brake_zones.select("GR86-004-78", 3)
+    assert len(lap3) == 3 and (lap3["lap"] == 3).all()
+
+    shifts = race.events.gear_shifts.select("GR86-002-000")
+    per_lap = shifts.groupby("lap").size()
+    assert (per_lap.loc[2:] == 6).all()  # 5 up each lap and 6->1 down at the line (from lap 2)
+    up = shifts[shifts["to_gear"] > shifts["from_gear"]]
+    assert up["shift_rpm"].min() > 6700 and (up["rpm_after"] < 5100).all()
+
+
+def test_brake_point_consistency():
+    """Corners are found across the field; the stray tap is not a corner."""
+    print("\n" + "="*80)
+    print("🎯 EVENTS: BRAKE POINT CONSISTENCY")
+    print("="*80)
+
+    race = make_race()
+    stats = brake_point_consistency(race.events.brake_zones.frame, "GR86-004-78")
+    print(stats[["corner", "corner_distance", "laps", "brake_start_mean", "brake_start_std", "brake_later_than_field"]])
+
+    assert list(stats["corner"]) == [0, 1, 2]
+    assert (stats["laps"] == 5).all()
+    assert np.allclose(stats["brake_start_mean"], np.array(CORNERS) + 20, atol=8)
+    assert (stats["brake_later_than_field"] > 5).all()
+    assert (stats["brake_start_std"] < 8).all()
+
+
+def test_feature_engine_metrics():
+    """FeatureEngine lap metrics are built on the event extraction."""
+    race = make_race()
+    lap = race.frame[(race.frame["vehicle_id"] == "GR86-002-000") & (race.frame["lap"] == 2)]
+    brake = FeatureEngine.calculate_brake_point_metrics(lap)
+    assert brake["num_brake_zones"] == 4
+    assert brake["total_brake_distance"] > 3 * 70
+    gears = FeatureEngine.calculate_gear_shift_efficiency(lap)
+    assert gears["total_shifts"] == 5 and gears["upshifts"] == 5  # Downshift at the line belongs to the lap boundary
+    assert extract_brake_zones(lap.iloc[:0]).empty and extract_gear_shifts(lap.iloc[:0]).empty
+
+
+if __name__ == "__main__":
+    test_brake_zones_and_shifts()
+    test_brake_point_consistency()
+    test_feature_engine_metrics()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Insight Service Test
+Runs the AI insight service against the local stub provider: caching by
+prompt inputs, TTL expiry, timeouts and the concurrency cap.
+"""
+
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.insights import InsightCache, InsightService, StubProvider
+
+
+def test_cache_by_inputs():
+    """Same inputs hit the cache; different stats miss; expired entries regenerate."""
+    print("\n" + "="*80)
+    print("🤖 INSIGHTS: CACHE")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = StubProvider(responder=lambda prompt: f"insight for {prompt}")
+        cache = InsightCache(Path(tmp), ttl_s=60)
+        service = InsightService(provider, cache, timeout_s=5)
+        inputs = {"kind": "driver_training", "track": "barber", "race": "R1", "vehicle_id": "GR86-002-000",
+                  "metrics": {"avg_lap_time": 98.1}}
+
+        async def scenario():
+            first = await service.generate("prompt A", inputs)
+            again = await service.generate("prompt A (reworded)", inputs)
+            other = await service.generate("prompt A", {**inputs, "metrics": {"avg_lap_time": 97.4}})
+            return first, again, other
+
+        first, again, other = asyncio.run(scenario())
+        assert first == again == "insight for prompt A"
+        assert provider.calls == 2 and service.stats["hits"] == 1
+        assert len(list(Path(tmp).glob("*.json"))) == 2
+
+        # A fresh service over the same directory reuses the stored responses
+        reopened = InsightService(StubProvider(), InsightCache(Path(tmp), ttl_s=60))
+        assert asyncio.run(reopened.generate("x", inputs)) == "insight for prompt A"
+
+        expired = InsightService(provider, InsightCache(Path(tmp), ttl_s=0))
+        time.sleep(0.01)
+        asyncio.run(expired.generate("prompt B", inputs))
+        assert provider.calls == 3
+        for s in (service, reopened, expired):
+            s.shutdown()
+
+
+def test_timeout_and_concurrency():
+    """Slow generations time out without being cached; at most max_concurrent run together."""
+    print("\n" + "="*80)
+    print("🤖 INSIGHTS: TIMEOUT AND CONCURRENCY")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        slow = InsightService(StubProvider(delay_s=0.5), InsightCache(Path(tmp), ttl_s=60), timeout_s=0.1)
+        text = asyncio.run(slow.generate("slow prompt"))
+        assert "timed out" in text and slow.stats["timeouts"] == 1
+        assert not list(Path(tmp).glob("*.json"))
+        slow.shutdown()
+
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def responder(prompt):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return prompt
+
+        service = InsightService(StubProvider(responder), InsightCache(Path(tmp), ttl_s=60),
+                                 timeout_s=5, max_concurrent=2)
+
+        async def scenario():
+            start = time.perf_counter()
+            ticks = 0
+            pending = asyncio.gather(*[service.generate(f"p{i}") for i in range(6)])
+            while not pending.done():
+                await asyncio.sleep(0.01)  # The loop keeps running while generations are in flight
+                ticks += 1
+            return await pending, ticks, time.perf_counter() - start
+
+        results, ticks, elapsed = asyncio.run(scenario())
+        print(f"  6 generations in {elapsed * 1000:.0f} ms, peak {peak[0]} concurrent, {ticks} loop ticks")
+        assert results == [f"p{i}" for i in range(6)]
+        assert peak[0] == 2 and ticks >= 5
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    test_cache_by_inputs()
+    test_timeout_and_concurrency()
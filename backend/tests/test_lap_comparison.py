@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Lap Comparison Test
+Resamples synthetic laps with known speed profiles onto a distance grid and
+checks the time and speed deltas against the analytic values.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import synthetic_race
+from app.data.feature_engine import FeatureEngine
+from app.data.lap_comparison import DRIVER_BEST, FIELD_BEST, SPECIFIC_LAP, ResampledRace
+from app.data.telemetry_cache import CachedRace
+
+LAP_LENGTH = 3700.0
+BASE_SPEED = 40.0  # m/s
+
+
+def lap_samples(slow_from: float = None, slow_to: float = None, speed: float = BASE_SPEED):
+    """(seconds, distance, speed_kph) at 10 Hz for one lap; half speed inside [slow_from, slow_to)."""
+    d = np.linspace(0, LAP_LENGTH, 37001)
+    v = np.full_like(d, speed)
+    if slow_from is not None:
+        v[(d >= slow_from) & (d < slow_to)] = speed / 2
+    t = np.concatenate([[0], np.cumsum(np.diff(d) / v[:-1])])
+    seconds = np.arange(0, t[-1], 0.1)
+    distance = np.interp(seconds, t, d)
+    return seconds, distance, np.interp(distance, d, v) * 3.6
+
+
+def make_race() -> CachedRace:
+    """Vehicle A: 3 laps, lap 2 loses time at 1000-1200 m. Vehicle B: uniformly 5% slower."""
+    plans = {
+        "GR86-002-000": [{}, {"slow_from": 1000.0, "slow_to": 1200.0}, {}],
+        "GR86-004-78": [{"speed": BASE_SPEED * 0.95}] * 2,
+    }
+
+    def channels(v, vehicle):
+        offset = 0.0
+        parts = {"seconds": [], "lap": [], "speed": [], "Laptrigger_lapdist_dls": []}
+        for lap, plan in enumerate(plans[vehicle], start=1):
+            seconds, distance, speed = lap_samples(**plan)
+            parts["seconds"].append(offset + seconds)
+            parts["lap"].append(np.full(len(seconds), lap))
+            parts["speed"].append(speed)
+            parts["Laptrigger_lapdist_dls"].append(np.where(np.arange(len(distance)) % 5 == 0, distance, np.nan))
+            offset += seconds[-1] + 0.1
+        return {name: np.concatenate(arrays) for name, arrays in parts.items()}
+
+    return synthetic_race(channels)
+
+
+def test_batch_comparison():
+    """Every lap against its driver's best and the field best in one batch."""
+    print("\n" + "="*80)
+    print("📐 LAP COMPARISON: BATCH")
+    print("="*80)
+
+    resampled = ResampledRace.build(make_race(), step_m=5.0)
+    assert len(resampled) == 5
+    assert resampled.grid[0] == 40.0 and resampled.grid[-1] < LAP_LENGTH * 0.98
+
+    summary = resampled.compare_all(resampled.reference_rows(DRIVER_BEST))
+    print(summary[["vehicle_id", "lap", "grid_elapsed", "reference_lap", "time_delta", "worst_segment_start"]])
+
+    slow = summary[(summary["vehicle_id"] == "GR86-002-000") & (summary["lap"] == 2)].iloc[0]
+    expected_loss = 200 / (BASE_SPEED / 2) - 200 / BASE_SPEED  # 5 s
+    assert abs(slow["time_delta"] - expected_loss) < 0.05
+    assert 1000 <= slow["worst_segment_start"] + 100 and slow["worst_segment_start"] <= 1200
+    assert slow["speed_delta_mean"] < 0
+
+    # Each driver's best lap is its own reference
+    assert (summary.loc[summary["lap"] == summary["reference_lap"], "time_delta"].abs() < 1e-9).all()
+
+    field = resampled.compare_all(resampled.reference_rows(FIELD_BEST))
+    assert (field["reference_vehicle_id"] == "GR86-002-000").all()
+    b = field[field["vehicle_id"] == "GR86-004-78"]["time_delta"]
+    grid_span = resampled.grid[-1] - resampled.grid[0]
+    expected = grid_span / (BASE_SPEED * 0.95) - grid_span / BASE_SPEED
+    assert np.allclose(b, expected, atol=0.05)
+    assert abs(resampled.grid_elapsed.min() - grid_span / BASE_SPEED) < 0.05  # Time across the grid, not the lap
+
+    specific = resampled.reference_rows(SPECIFIC_LAP, "GR86-002-000", 2)
+    assert (resampled.laps[specific] == 2).all()
+
+
+def test_feature_engine_speed_delta():
+    """FeatureEngine.calculate_speed_delta compares two raw lap frames."""
+    print("\n" + "="*80)
+    print("🏎️  LAP COMPARISON: SPEED DELTA")
+    print("="*80)
+
+    race = make_race()
+    laps = race.vehicle_frame("GR86-002-000")
+    delta = FeatureEngine.calculate_speed_delta(laps[laps["lap"] == 2].copy(), laps[laps["lap"] == 1].copy())
+
+    in_slow_zone = delta["distance"].between(1010, 1190)
+    assert np.allclose(delta.loc[in_slow_zone, "speed_delta"], -BASE_SPEED / 2 * 3.6, atol=1.0)
+    assert delta.loc[delta["distance"] < 990, "speed_delta"].abs().max() < 1.0
+    assert abs(delta["time_delta"].iloc[-1] - 5.0) < 0.05
+    print(f"  {len(delta)} points, final delta {delta['time_delta'].iloc[-1]:.3f}s")
+
+
+if __name__ == "__main__":
+    test_batch_comparison()
+    test_feature_engine_speed_delta()
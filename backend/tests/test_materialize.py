@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Materialized Analytics Test
+Materializes races copied into a temporary dataset root, checks the endpoints
+serve the stored artifacts, that touching a source file invalidates them, and
+that the pre-event prediction reads the track aggregate with one lookup.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import orjson
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+
+from app.api.analytics import degradation_analysis
+from app.api import insights as insights_api
+from app.api.insights import race_history
+from app.core import compute
+from app.core.config import settings
+from app.data.loader import discover_races
+from app.services import insights, materialize
+from app.services.insights import InsightCache, InsightService, StubProvider
+from app.services.materialize import MaterializedStore, materialize_all
+
+SOURCE = Path(__file__).parent.parent / "data" / "barber"
+
+
+@contextmanager
+def barber_dataset(races=("R1",)):
+    """Temporary dataset root with copies of barber races, used as settings.dataset_root."""
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_root = Path(tmp) / "data"
+        (dataset_root / "barber").mkdir(parents=True)
+        for race in races:
+            for name in (f"{race}_barber_lap_start.csv", f"{race}_barber_lap_end.csv",
+                         f"{race}_barber_lap_time.csv",
+                         f"03_Provisional Results_{race.replace('R', 'Race ')}_Anonymized.CSV"):
+                shutil.copy(SOURCE / name, dataset_root / "barber" / name)
+
+        original_root = settings.dataset_root
+        settings.dataset_root = dataset_root
+        store = MaterializedStore(Path(tmp) / "materialized", dataset_root)
+        materialize._store = store
+        try:
+            yield store
+        finally:
+            settings.dataset_root = original_root
+            materialize._store = None
+
+
+def test_materialize_and_invalidate():
+    """Artifacts are written once, served while current and dropped when a source file changes."""
+    print("\n" + "="*80)
+    print("🗄️  MATERIALIZE: ARTIFACTS AND INVALIDATION")
+    print("="*80)
+
+    with barber_dataset() as store:
+        assert discover_races(store.dataset_root) == [("barber", "R1")]
+
+        summary, = materialize_all(store)
+        print(f"  {summary['status']}: {summary['artifacts']}")
+        assert summary["status"] == "materialized"
+        assert {"degradation", "pit_inputs", "simulation", "results", "race_history"} <= set(summary["artifacts"])
+        assert "consistency" in summary["artifacts"] and "consistency" not in summary["errors"]
+        assert materialize_all(store)[0]["status"] == "current"
+        assert store.track("barber", ["R1"])["history"].keys() == {"R1"}
+
+        # Endpoints serve the stored bytes, identical to computing on demand
+        response = store.response("barber", "R1", "degradation")
+        assert response is not None and response.headers["x-materialized-at"] == summary["created_at"]
+        assert orjson.loads(response.body) == orjson.loads(orjson.dumps(
+            degradation_analysis("barber", "R1"), option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+        pit_inputs = store.load("barber", "R1", "pit_inputs")
+        assert pit_inputs["vehicles"] and all("pit_window" in v for v in pit_inputs["vehicles"].values())
+
+        # A changed source file makes everything stale
+        lap_time = store.dataset_root / "barber" / "R1_barber_lap_time.csv"
+        stat = lap_time.stat()
+        os.utime(lap_time, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert store.current("barber", "R1") is None
+        assert store.load("barber", "R1", "results") is None
+        assert store.track("barber", ["R1"]) is None
+
+        again, = materialize_all(store)
+        assert again["status"] == "materialized"
+        versions = [p.name for p in (store.root / "barber" / "R1").iterdir() if p.is_dir()]
+        print(f"  after source change: {versions}")
+        assert len(versions) == 1 and versions[0] == store.manifest("barber", "R1")["directory"]
+        assert store.list()[0]["current"]
+
+
+def test_parallel_history_lookup():
+    """Races materialize in worker processes; pre-event prediction then reads history without computing."""
+    print("\n" + "="*80)
+    print("🗄️  MATERIALIZE: PARALLEL RACES AND PRE-EVENT LOOKUP")
+    print("="*80)
+
+    with barber_dataset(("R1", "R2")) as store:
+        summaries = materialize_all(store, workers=2)
+        print(f"  {[(s['race'], s['status']) for s in summaries]}")
+        assert [s["status"] for s in summaries] == ["materialized", "materialized"]
+        histories = {}
+        for race in ("R1", "R2"):
+            histories[race] = orjson.loads(orjson.dumps(race_history("barber", race)))
+            assert store.load("barber", race, "race_history") == histories[race]
+
+        # One aggregate per track, current until a race's source files change
+        summary = store.track("barber", ["R1", "R2"])
+        print(f"  track summary: best lap {summary['best_lap']:.3f}s, degradation {summary['degradation_rate']:.4f}s/lap")
+        assert summary["history"] == histories
+        assert summary["best_lap"] == min(h["best_historical_lap"] for h in histories.values())
+        assert store.track("barber", ["R1"]) is None
+
+        compute._dispatcher = compute.ComputeDispatcher(max_workers=2, default_limit=2, max_queue=4)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            insights._service = InsightService(StubProvider(), InsightCache(Path(cache_dir), ttl_s=60))
+            try:
+                from app.main import app
+                history_lookup = insights_api._pre_event_history
+                insights_api._pre_event_history = None  # Must not be needed with a current aggregate
+                try:
+                    with TestClient(app) as client:
+                        response = client.get("/insights/pre-event-prediction/barber?weather=dry")
+                finally:
+                    insights_api._pre_event_history = history_lookup
+                assert response.status_code == 200
+                assert sorted(response.json()["predictions"]) == ["R1", "R2"]
+                assert response.json()["track_summary"]["best_lap"] == summary["best_lap"]
+                assert "insights.pre_event" not in compute._dispatcher.snapshot()["endpoints"]
+            finally:
+                insights._service.shutdown()
+                insights._service = None
+                compute._dispatcher.shutdown()
+                compute._dispatcher = None
+
+
+if __name__ == "__main__":
+    test_materialize_and_invalidate()
+    test_parallel_history_lookup()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Model Lifecycle Test
+Tests incremental updates and artifact storage of the XGBoost lap time predictor
+on synthetic laps.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.ml.lap_time_predictor import LapTimePredictor
+from app.ml.model_artifact import ModelArtifactError, artifact_paths
+from app.services.training_jobs import JobStore, run_incremental_update_job
+
+BACKEND_DIR = Path(__file__).parent.parent
+FEATURES = ['tire_age', 'prev_lap_time', 'avg_throttle']
+
+
+def make_laps(n: int, seed: int = 0):
+    """Synthetic laps: lap time grows with tire age and tracks the previous lap."""
+    rng = np.random.default_rng(seed)
+    tire_age = rng.integers(1, 30, size=n)
+    prev_lap = 98 + rng.normal(0, 0.5, size=n)
+    throttle = rng.uniform(40, 80, size=n)
+    X = np.column_stack([tire_age, prev_lap, throttle])
+    y = 0.6 * prev_lap + 0.05 * tire_age + 40 + rng.normal(0, 0.1, size=n)
+    return X, y
+
+
+def trained_predictor() -> LapTimePredictor:
+    predictor = LapTimePredictor()
+    X, y = make_laps(300)
+    predictor.train(X, y, FEATURES)
+    return predictor
+
+
+def test_incremental_update_accepts_improvement():
+    """Continuing boosting on consistent new laps should be accepted."""
+    print("\n" + "="*80)
+    print("🔁 INCREMENTAL UPDATE")
+    print("="*80)
+
+    predictor = trained_predictor()
+    X_new, y_new = make_laps(80, seed=1)
+
+    report = predictor.update(X_new, y_new, n_estimators=10, max_mae_increase=0.05)
+    print(f"  Baseline MAE: {report['baseline_mae']:.3f}s -> candidate {report['candidate_mae']:.3f}s")
+    print(f"  Rounds: {report['rounds_before']} -> {report['rounds_after']}")
+
+    assert report['accepted']
+    assert report['rounds_after'] == report['rounds_before'] + 10
+
+
+def test_incremental_update_rejects_regression():
+    """An update fit on corrupted laps must not replace the model."""
+    print("\n" + "="*80)
+    print("🛡️ INCREMENTAL UPDATE GUARD")
+    print("="*80)
+
+    predictor = trained_predictor()
+    rounds_before = predictor.model.get_booster().num_boosted_rounds()
+
+    X_new, y_new = make_laps(60, seed=2)
+    X_val, y_val = make_laps(40, seed=3)
+    y_bad = y_new + 15.0  # Mislabelled laps (e.g. pit laps) pull predictions away
+
+    report = predictor.update(X_new, y_bad, X_val=X_val, y_val=y_val, n_estimators=20)
+    print(f"  Baseline MAE: {report['baseline_mae']:.3f}s -> candidate {report['candidate_mae']:.3f}s")
+
+    assert not report['accepted']
+    assert predictor.model.get_booster().num_boosted_rounds() == rounds_before
+
+
+def test_incremental_update_aligns_dataframes():
+    """Update rows given as a DataFrame are matched by column name, and a timestamp column orders the holdout."""
+    print("\n" + "="*80)
+    print("🧭 INCREMENTAL UPDATE ALIGNMENT")
+    print("="*80)
+
+    X_new, y_new = make_laps(80, seed=1)
+    expected = trained_predictor().update(X_new, y_new, n_estimators=10)
+
+    df = pd.DataFrame(X_new, columns=FEATURES)[FEATURES[::-1]]
+    report = trained_predictor().update(df, y_new, n_estimators=10)
+    print(f"  Array MAE {expected['candidate_mae']:.4f}s, reordered DataFrame {report['candidate_mae']:.4f}s")
+    assert report['baseline_mae'] == expected['baseline_mae']
+    assert abs(report['candidate_mae'] - expected['candidate_mae']) < 1e-6
+
+    # Rows shuffled but timestamped: the holdout is still the latest laps
+    df = pd.DataFrame(X_new, columns=FEATURES)
+    df['timestamp'] = pd.date_range("2025-09-06 18:40", periods=len(df), freq="2min", tz="UTC")
+    shuffled = np.random.default_rng(7).permutation(len(df))
+    report = trained_predictor().update(df.iloc[shuffled], y_new[shuffled], n_estimators=10)
+    assert report['baseline_mae'] == expected['baseline_mae']
+
+
+def test_incremental_job_uses_model_feature_pipeline():
+    """The job builds rows with the shipped model's (enhanced) features and fails for unknown inputs."""
+    print("\n" + "="*80)
+    print("🧩 INCREMENTAL UPDATE FEATURE PIPELINE")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models_dir, jobs_dir = Path(tmp) / "models", Path(tmp) / "jobs"
+        models_dir.mkdir()
+        for suffix in (".json", ".ubj"):
+            shutil.copy(BACKEND_DIR / "models" / f"lap_time_predictor_barber{suffix}", models_dir)
+        store = JobStore(jobs_dir)
+
+        store.save({"job_id": "shipped", "status": "queued"})
+        record = run_incremental_update_job("shipped", "barber", ["R1"], str(BACKEND_DIR / "data"),
+                                            str(models_dir), str(jobs_dir))
+        print(f"  Shipped model: {record['status']} - {record['message']}")
+        assert record['status'] == "done" and record['metrics']['n_new_samples'] > 0
+
+        predictor = trained_predictor()  # Inputs no feature pipeline produces
+        for path in models_dir.iterdir():
+            path.unlink()
+        predictor.save_model(str(models_dir / "lap_time_predictor_barber.json"))
+        store.save({"job_id": "foreign", "status": "queued"})
+        record = run_incremental_update_job("foreign", "barber", ["R1"], str(BACKEND_DIR / "data"),
+                                            str(models_dir), str(jobs_dir))
+        print(f"  Unknown inputs: {record['status']} - {record['error']}")
+        assert record['status'] == "failed" and "avg_throttle" in record['error']
+
+
+def test_vehicle_encoding_is_stable_across_processes():
+    """Feature rows encode a vehicle identically in every (spawned) process."""
+    print("\n" + "="*80)
+    print("🔢 STABLE VEHICLE ENCODING")
+    print("="*80)
+
+    import subprocess
+
+    code = (
+        "from app.services.training_jobs import encode_vehicle\n"
+        "print(encode_vehicle('GR86-004-78', 100), encode_vehicle('GR86-004-78', 1000))\n"
+    )
+    outputs = {
+        subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True,
+                       text=True, check=True, env={**os.environ, "PYTHONHASHSEED": seed}).stdout.strip()
+        for seed in ("1", "2")
+    }
+    print(f"  codes: {outputs}")
+    assert len(outputs) == 1
+
+
+def test_predict_input_forms():
+    """Dicts, DataFrames and arrays give identical predictions; gaps use training medians."""
+    print("\n" + "="*80)
+    print("🎯 PREDICTION INPUT ALIGNMENT")
+    print("="*80)
+
+    predictor = trained_predictor()
+    X, _ = make_laps(10, seed=5)
+    df = pd.DataFrame(X, columns=FEATURES)
+
+    batch = predictor.predict_batch(X)
+    assert np.allclose(predictor.predict(df[FEATURES[::-1]]), batch)  # Column order is irrelevant
+    assert np.allclose(predictor.predict_batch(df.to_dict("records")), batch)
+    assert abs(predictor.predict(dict(zip(FEATURES, X[0]))) - batch[0]) < 1e-5
+
+    partial = {'prev_lap_time': X[0, 1], 'unknown_feature': 1.0}
+    filled = dict(zip(FEATURES, [predictor.feature_medians[f] for f in FEATURES]))
+    filled['prev_lap_time'] = X[0, 1]
+    print(f"  Medians: {predictor.feature_medians}")
+    assert abs(predictor.predict(partial) - predictor.predict(filled)) < 1e-5
+
+
+def test_artifact_round_trip():
+    """Artifacts reload with identical predictions, features and metadata."""
+    print("\n" + "="*80)
+    print("💾 MODEL ARTIFACT ROUND TRIP")
+    print("="*80)
+
+    predictor = trained_predictor()
+    X, _ = make_laps(20, seed=4)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "lap_time_predictor_test.json"
+        predictor.save_model(str(path))
+        loaded = LapTimePredictor(str(path))
+
+        print(f"  Files: {sorted(p.name for p in Path(tmp).iterdir())}")
+        assert loaded.feature_names == FEATURES
+        assert loaded.metadata['data_hash'] == predictor.data_hash
+        assert loaded.feature_medians == predictor.feature_medians
+        assert loaded.metrics['test_mae'] == predictor.metrics['test_mae']
+        assert np.allclose(loaded.model.predict(X), predictor.model.predict(X))
+
+
+def test_artifact_rejects_tampered_booster():
+    """A booster that no longer matches its recorded checksum is refused."""
+    print("\n" + "="*80)
+    print("🔒 MODEL ARTIFACT CHECKSUM")
+    print("="*80)
+
+    predictor = trained_predictor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "lap_time_predictor_test.json"
+        predictor.save_model(str(path))
+        _, booster_path = artifact_paths(path)
+        with open(booster_path, "ab") as f:
+            f.write(b"\x00")
+
+        try:
+            LapTimePredictor(str(path))
+        except ModelArtifactError as e:
+            print(f"  Rejected: {e}")
+        else:
+            raise AssertionError("Tampered artifact was loaded")
+
+
+if __name__ == "__main__":
+    test_incremental_update_accepts_improvement()
+    test_incremental_update_rejects_regression()
+    test_incremental_update_aligns_dataframes()
+    test_incremental_job_uses_model_feature_pipeline()
+    test_vehicle_encoding_is_stable_across_processes()
+    test_predict_input_forms()
+    test_artifact_round_trip()
+    test_artifact_rejects_tampered_booster()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Response Format Test
+Checks that the columnar encoding carries the same values as the record encoding.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.formats import frame_to_columns, frame_to_records, tabular_response, COLUMNS, RECORDS
+from app.core.responses import dumps
+
+
+def make_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "vehicle_id": ["GR86-002-000", "GR86-002-000", None],
+        "timestamp": pd.to_datetime(["2025-04-05 14:00:00.1", None, "2025-04-05 14:00:00.3"], utc=True),
+        "lap": [1, 1, 2],
+        "speed": [120.5, np.nan, 131.0],
+    })
+
+
+def test_columns_match_records():
+    """Column arrays hold the same values as the per-row dicts, NaN/NaT as None."""
+    print("\n" + "="*80)
+    print("🧱 COLUMNAR RESPONSE FORMAT")
+    print("="*80)
+
+    df = make_frame()
+    columns = frame_to_columns(df)
+    records = frame_to_records(df)
+    print(f"  Columns: {columns}")
+
+    assert list(columns) == list(df.columns)
+    for name in ["vehicle_id", "lap", "speed"]:
+        assert columns[name] == [row[name] for row in records]
+    assert columns["timestamp"] == ["2025-04-05T14:00:00.100Z", None, "2025-04-05T14:00:00.300Z"]
+
+
+def test_tabular_response_shapes():
+    """Records mode keeps the legacy shape; columns mode adds format and column names."""
+    print("\n" + "="*80)
+    print("📐 TABULAR RESPONSE SHAPES")
+    print("="*80)
+
+    df = make_frame()
+    legacy = tabular_response({"track": "barber"}, df, "rows", RECORDS)
+    columnar = tabular_response({"track": "barber"}, df, "rows", COLUMNS)
+
+    assert legacy == {"track": "barber", "rows": frame_to_records(df)}
+    assert columnar["format"] == "columns"
+    assert columnar["columns"] == list(df.columns)
+    assert columnar["rows"]["speed"] == [120.5, None, 131.0]
+
+
+def test_fast_json_native_types():
+    """NumPy/pandas scalars, arrays, timestamps and NaN serialize without manual casts."""
+    print("\n" + "="*80)
+    print("⚡ FAST JSON SERIALIZATION")
+    print("="*80)
+
+    import json
+
+    speeds = pd.Series([120.5, 131.0], index=[1, 2])
+    payload = {
+        "count": np.int64(3),
+        "mean": np.float64(98.5),
+        "missing": np.float64("nan"),
+        "flag": np.bool_(True),
+        "array": np.array([1.5, np.nan]),
+        "when": pd.Timestamp("2025-04-05 14:00", tz="UTC"),
+        "never": pd.NaT,
+        "by_lap": speeds.to_dict(),
+        "series": speeds,
+    }
+    decoded = json.loads(dumps(payload))
+    print(f"  Decoded: {decoded}")
+
+    assert decoded["count"] == 3 and decoded["mean"] == 98.5
+    assert decoded["missing"] is None and decoded["never"] is None
+    assert decoded["flag"] is True
+    assert decoded["array"] == [1.5, None]
+    assert decoded["when"].startswith("2025-04-05T14:00:00")
+    assert decoded["by_lap"] == {"1": 120.5, "2": 131.0}
+    assert decoded["series"] == [120.5, 131.0]
+
+
+if __name__ == "__main__":
+    test_columns_match_records()
+    test_tabular_response_shapes()
+    test_fast_json_native_types()
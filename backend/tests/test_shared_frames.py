@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Shared Frames Test
+Stores a race's wide telemetry and lap tables as memory-mapped columns, checks
+they round-trip unchanged, that another process attaches without rebuilding
+and that a changed source file produces a new version.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.data.loader import load_race_telemetry_wide, read_lap_times
+from app.data.shared_frames import SharedFrameStore, sort_telemetry_frame
+from app.data.telemetry_cache import TelemetryCache
+
+BACKEND_DIR = Path(__file__).parent.parent
+SOURCE = BACKEND_DIR / "data" / "barber"
+
+
+def make_dataset(root: Path):
+    """barber R1 lap tables plus synthetic long-format telemetry with a missing timestamp."""
+    (root / "barber").mkdir(parents=True)
+    for name in ("R1_barber_lap_start.csv", "R1_barber_lap_end.csv", "R1_barber_lap_time.csv"):
+        shutil.copy(SOURCE / name, root / "barber" / name)
+
+    rows = []
+    start = pd.Timestamp("2025-09-06 18:40:00", tz="UTC")
+    for vehicle in ["GR86-004-78", "GR86-002-000"]:
+        ts = start + pd.to_timedelta(np.arange(300) * 100, unit="ms")
+        for name, values in (("speed", np.linspace(80, 180, 300)), ("gear", np.arange(300) % 6 + 1)):
+            rows.append(pd.DataFrame({"vehicle_id": vehicle, "timestamp": ts, "lap": np.arange(300) // 60 + 1,
+                                      "telemetry_name": name, "telemetry_value": values}))
+    df = pd.concat(rows)
+    df.iloc[5, df.columns.get_loc("timestamp")] = pd.NaT
+    df.to_csv(root / "barber" / "R1_barber_telemetry_data.csv", index=False)
+
+
+def test_round_trip_and_attach():
+    """Stored frames equal the parsed ones, are read-only mappings and are shared with other processes."""
+    print("\n" + "="*80)
+    print("🧠 SHARED FRAMES: ROUND TRIP AND ATTACH")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_root, frames_dir = Path(tmp) / "data", Path(tmp) / "frames"
+        make_dataset(dataset_root)
+        store = SharedFrameStore(frames_dir, dataset_root)
+
+        wide = store.telemetry_wide("barber", "R1")
+        expected = sort_telemetry_frame(load_race_telemetry_wide(dataset_root, "barber", "R1"))
+        pd.testing.assert_frame_equal(wide, expected)
+        assert not wide["speed"].to_numpy().flags.writeable  # A view of the mapped file
+        assert not wide["timestamp"].array._ndarray.flags.writeable
+
+        for table, parsed in zip(store.lap_times("barber", "R1"), read_lap_times(dataset_root, "barber", "R1")):
+            pd.testing.assert_frame_equal(table, parsed)
+
+        cache = TelemetryCache(dataset_root, shared=store)
+        cached = cache.get("barber", "R1")
+        assert cached.vehicles == ["GR86-002-000", "GR86-004-78"] and len(cached.frame) == len(expected)
+
+        # A second process attaches to the stored files instead of writing its own
+        manifests = sorted(frames_dir.rglob("manifest.json"))
+        mtimes = [p.stat().st_mtime_ns for p in manifests]
+        code = (
+            "from app.data.loader import load_lap_times\n"
+            "from app.data.telemetry_cache import get_telemetry_cache\n"
+            "from app.core.config import settings\n"
+            "start, end, lapt = load_lap_times(settings.dataset_root, 'barber', 'R1')\n"
+            "print(len(lapt), len(get_telemetry_cache().get('barber', 'R1').frame))\n"
+        )
+        env = {**os.environ, "SHARED_FRAMES": "1", "DATASET_ROOT": str(dataset_root),
+               "SHARED_FRAMES_DIR": str(frames_dir)}
+        output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout.split()
+        print(f"  {len(manifests)} stored frames; other process read {output[0]} laps, {output[1]} telemetry rows")
+        assert output == [str(len(read_lap_times(dataset_root, "barber", "R1")[2])), str(len(expected))]
+        assert sorted(frames_dir.rglob("manifest.json")) == manifests
+        assert [p.stat().st_mtime_ns for p in manifests] == mtimes
+
+
+def test_source_change_creates_new_version():
+    """Touching a source file stores a new fingerprint directory and removes the old one."""
+    print("\n" + "="*80)
+    print("🧠 SHARED FRAMES: SOURCE CHANGE")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_root, frames_dir = Path(tmp) / "data", Path(tmp) / "frames"
+        make_dataset(dataset_root)
+        store = SharedFrameStore(frames_dir, dataset_root)
+
+        store.lap_times("barber", "R1")
+        before = [p.name for p in (frames_dir / "barber" / "R1" / "lap_time").iterdir() if p.is_dir()]
+
+        lap_time = dataset_root / "barber" / "R1_barber_lap_time.csv"
+        stat = lap_time.stat()
+        os.utime(lap_time, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        store.lap_times("barber", "R1")
+        after = [p.name for p in (frames_dir / "barber" / "R1" / "lap_time").iterdir() if p.is_dir()]
+        print(f"  {before} -> {after}")
+        assert len(before) == len(after) == 1 and before != after
+
+
+def test_one_worker_runs_background_services():
+    """Only the first process to take the background lock becomes leader, until it exits."""
+    print("\n" + "="*80)
+    print("🧠 SHARED FRAMES: BACKGROUND LEADER")
+    print("="*80)
+
+    from app.core import leader
+
+    code = (
+        "import sys\n"
+        "from app.core.leader import acquire_leadership\n"
+        "print(acquire_leadership(sys.argv[1]))\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = Path(tmp) / "background.lock"
+
+        def other_worker() -> str:
+            return subprocess.run([sys.executable, "-c", code, str(lock_path)], cwd=BACKEND_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+
+        try:
+            assert leader.acquire_leadership(lock_path) and leader.is_leader()
+            assert leader.acquire_leadership(lock_path)  # Idempotent in the leader
+            while_held = other_worker()
+            leader.release_leadership()
+            after_release = other_worker()
+        finally:
+            leader.release_leadership()
+        print(f"  other worker while held: {while_held}, after release: {after_release}")
+        assert (while_held, after_release) == ("False", "True")
+
+
+if __name__ == "__main__":
+    test_round_trip_and_attach()
+    test_source_change_creates_new_version()
+    test_one_worker_runs_background_services()
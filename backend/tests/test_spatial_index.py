@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Spatial Index Test
+Looks up map points in the per-race GPS grid and checks the closest sample of
+every lap against a brute-force scan of the race.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.data.spatial_index import gps_degrees, to_local_xy
+from test_track_segments import ORIGIN, make_race
+
+
+def brute_force(race, lat, lon, radius):
+    """(vehicle, lap) -> (row, distance) of the nearest sample, scanning every row."""
+    frame = race.frame
+    x, y = to_local_xy(gps_degrees(frame["VBOX_Lat_Min"].to_numpy()),
+                       gps_degrees(frame["VBOX_Long_Minutes"].to_numpy()), race.spatial.origin)
+    qx, qy = to_local_xy(np.array([lat]), np.array([lon]), race.spatial.origin)
+    d = np.hypot(x - qx[0], y - qy[0])
+    near = pd.DataFrame({"vehicle_id": frame["vehicle_id"], "lap": frame["lap"], "d": d})
+    near = near[near["d"] <= radius]
+    best = near.loc[near.groupby(["vehicle_id", "lap"])["d"].idxmin()]
+    return {(v, lap): (row, dist) for row, v, lap, dist in zip(best.index, best["vehicle_id"], best["lap"], best["d"])}
+
+
+def test_nearest_per_lap():
+    """Every lap passing the point is found, with the same nearest sample as a full scan."""
+    print("\n" + "="*80)
+    print("📍 SPATIAL INDEX: NEAREST SAMPLES PER LAP")
+    print("="*80)
+
+    race = make_race()
+    assert race.spatial is not None and len(race.spatial) == race.frame["VBOX_Lat_Min"].ne(0).sum()
+
+    # A point on the first straight, 500 m from the line
+    lat, lon = ORIGIN[0], ORIGIN[1] + 500 / (111_320.0 * np.cos(np.radians(ORIGIN[0])))
+    start = time.perf_counter()
+    samples = race.samples_near(lat, lon, 10.0)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"  {len(samples)} samples in {elapsed:.2f} ms from {len(race.frame)} rows")
+    print(samples[["vehicle_id", "lap", "offset_m", "speed", "Laptrigger_lapdist_dls"]])
+
+    expected = brute_force(race, lat, lon, 10.0)
+    got = {(v, lap): off for v, lap, off in zip(samples["vehicle_id"], samples["lap"], samples["offset_m"])}
+    assert set(got) == set(expected)
+    assert len(got) == 7  # Vehicle A's pit lap runs 60 m away
+    assert all(abs(got[k] - expected[k][1]) < 0.01 for k in got)
+    # Lap distance is carried from the previous row where the beacon channel is missing
+    assert samples["Laptrigger_lapdist_dls"].between(480, 520).all()
+
+    one = race.samples_near(lat, lon, 10.0, vehicle_id="GR86-004-78", channels=["speed"])
+    assert list(one.columns) == ["vehicle_id", "timestamp", "lap", "offset_m", "speed"]
+    assert (one["vehicle_id"] == "GR86-004-78").all() and len(one) == 4
+
+    # Far from the track there is nothing
+    assert race.samples_near(ORIGIN[0] + 0.01, ORIGIN[1], 10.0).empty
+
+
+if __name__ == "__main__":
+    test_nearest_per_lap()
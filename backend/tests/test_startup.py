@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Startup Budget Test
+Imports the app in a fresh interpreter and checks it stays within the import
+time budget without loading scikit-learn, XGBoost, SciPy, Gemini or httpx,
+which are imported when first used.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+
+from app.core.startup import BACKEND_DIR, profile_imports
+
+# Seconds allowed for `import app.main`; raise on slow machines with IMPORT_BUDGET_S
+IMPORT_BUDGET_S = float(os.getenv("IMPORT_BUDGET_S", "2.0"))
+
+
+def test_import_budget():
+    """Importing the app loads no heavy module and fits the budget."""
+    print("\n" + "="*80)
+    print("⏱️  STARTUP: IMPORT BUDGET")
+    print("="*80)
+
+    profile = profile_imports(top=8)
+    print(f"  import app.main: {profile['seconds']:.3f}s (budget {IMPORT_BUDGET_S}s)")
+    for name, ms in profile["packages_ms"].items():
+        print(f"    {ms:>8.1f} ms  {name}")
+
+    assert profile["heavy_modules"] == [], f"Imported at startup: {profile['heavy_modules']}"
+    assert profile["seconds"] < IMPORT_BUDGET_S
+
+
+def test_heavy_modules_load_on_first_use():
+    """Fitting a degradation model pulls scikit-learn in; the startup profile reports the phases."""
+    print("\n" + "="*80)
+    print("⏱️  STARTUP: LAZY LOADING AND PROFILE")
+    print("="*80)
+
+    code = (
+        "import sys\n"
+        "import pandas as pd\n"
+        "import app.main\n"
+        "from app.ml.tire_degradation import TireDegradationModel\n"
+        "assert 'sklearn' not in sys.modules\n"
+        "df = pd.DataFrame({'tire_age': [1, 2, 3, 4], 'degradation_pct': [0.0, 0.2, 0.5, 0.9],"
+        " 'baseline_time': [100.0] * 4})\n"
+        "TireDegradationModel().fit_degradation_model(df)\n"
+        "assert 'sklearn' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, check=True)
+
+    from app.main import app
+    with TestClient(app) as client:
+        report = client.get("/health/startup").json()
+    print(f"  {report['phases_ms']}")
+    assert {"import", "dataset_catalog", "background_services"} <= set(report["phases_ms"])
+    assert report["started_at"] is not None
+
+
+if __name__ == "__main__":
+    test_import_budget()
+    test_heavy_modules_load_on_first_use()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Telemetry Index Test
+Checks the vehicle / lap / time / distance indexes against plain boolean scans.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import synthetic_race
+from app.data.telemetry_cache import CachedRace
+from app.data.lap_segmenter import LapSegmenter
+
+LAP_LENGTH = 3700.0  # metres
+SAMPLES_PER_LAP = 900
+
+
+def make_race(laps: int = 4) -> CachedRace:
+    """Two vehicles at 10 Hz; lap distance only updates every 5th sample, one lap field corrupted."""
+    n = laps * SAMPLES_PER_LAP
+
+    def channels(i, vehicle):
+        lap = np.arange(n) // SAMPLES_PER_LAP + 1
+        distance = (np.arange(n) % SAMPLES_PER_LAP) * LAP_LENGTH / SAMPLES_PER_LAP
+        distance[np.arange(n) % 5 != 0] = np.nan
+        lap[SAMPLES_PER_LAP + 10:SAMPLES_PER_LAP + 20] = 1  # Stale lap field mid-lap 2
+        return {
+            "seconds": np.arange(n) * 0.1 + i * 3.0,
+            "lap": lap,
+            "speed": 120 + 40 * np.sin(np.arange(n) / 50),
+            "Laptrigger_lapdist_dls": distance
+        }
+
+    return synthetic_race(channels, shuffle_seed=1)
+
+
+def test_lap_and_time_lookups():
+    """Lap rows and time ranges match boolean scans over the frame."""
+    print("\n" + "="*80)
+    print("🗂️  TELEMETRY INDEX: LAPS AND TIME")
+    print("="*80)
+
+    race = make_race()
+    index = race.index
+    frame = race.frame
+    vehicle = "GR86-004-78"
+
+    assert index.laps(vehicle) == [1, 2, 3, 4]
+    assert index.has_lap(3) and not index.has_lap(9)
+    for lap in index.laps(vehicle):
+        expected = np.flatnonzero((frame["vehicle_id"] == vehicle).to_numpy() & (frame["lap"] == lap).to_numpy())
+        assert np.array_equal(index.rows_for_lap(vehicle, lap), expected)
+    print(f"  Lap 1 rows (incl. stale lap field): {len(index.rows_for_lap(vehicle, 1))}")
+
+    start = pd.Timestamp("2025-04-05 14:02:00", tz="UTC")
+    end = pd.Timestamp("2025-04-05 14:03:00", tz="UTC")
+    lo, hi = index.time_range(vehicle, start.value, end.value)
+    mask = (frame["vehicle_id"] == vehicle) & frame["timestamp"].between(start, end)
+    assert np.array_equal(np.arange(lo, hi), np.flatnonzero(mask.to_numpy()))
+
+    # Lap rows clipped to the time window
+    clipped = index.rows_for_lap(vehicle, 1, lo, hi)
+    assert np.array_equal(clipped, np.flatnonzero((mask & (frame["lap"] == 1)).to_numpy()))
+
+
+def test_distance_lookups():
+    """Distance windows and buckets come back ordered by forward-filled lap distance."""
+    print("\n" + "="*80)
+    print("📏 TELEMETRY INDEX: LAP DISTANCE")
+    print("="*80)
+
+    race = make_race()
+    vehicle = "GR86-002-000"
+    rows, distances = race.index.rows_by_distance(vehicle, 3, 1000.0, 1500.0)
+    assert np.all(np.diff(distances) >= 0)
+    assert distances.min() >= 1000.0 and distances.max() < 1500.0
+    assert (race.frame["lap"].iloc[rows] == 3).all()
+    assert (race.frame["vehicle_id"].iloc[rows] == vehicle).all()
+    print(f"  Lap 3, 1000-1500 m: {len(rows)} samples")
+
+    starts, offsets, bucket_rows = race.index.distance_buckets(vehicle, 3, 100.0)
+    assert len(offsets) == len(starts) + 1 and offsets[-1] == len(bucket_rows)
+    assert starts[0] == 0.0 and len(starts) == 37
+    filled = race.frame["Laptrigger_lapdist_dls"].groupby(race.frame["vehicle_id"]).ffill()
+    for i in (0, 10, 36):
+        bucket = filled.iloc[bucket_rows[offsets[i]:offsets[i + 1]]]
+        assert bucket.between(starts[i], starts[i] + 100.0, inclusive="left").all()
+
+
+def test_cached_lap_segmentation():
+    """Segmenting through the index matches the boolean-mask assignment."""
+    print("\n" + "="*80)
+    print("✂️  TELEMETRY INDEX: LAP SEGMENTATION")
+    print("="*80)
+
+    race = make_race()
+    vehicle = "GR86-002-000"
+    first = race.vehicle_frame(vehicle)["timestamp"].iloc[0]
+    # Lap files run on a different clock: shift by 7 s, no end for the last lap
+    lap_starts = [first + pd.Timedelta(seconds=7 + 90 * k) for k in range(4)]
+    df_laps = pd.DataFrame({
+        "lap_number": [1, 2, 3, 4],
+        "vehicle_id": vehicle,
+        "lap_start_time": lap_starts,
+        "lap_end_time": lap_starts[1:] + [pd.NaT]
+    })
+
+    segmenter = LapSegmenter()
+    expected = segmenter.assign_laps_to_telemetry(race.vehicle_frame(vehicle), df_laps)
+    lap_data = segmenter.segment_cached(race, df_laps, vehicle)
+
+    assert sorted(lap_data) == sorted(expected["lap_number"].unique())
+    for lap_num, lap_frame in lap_data.items():
+        assert lap_frame.index.equals(expected.index[expected["lap_number"] == lap_num])
+        assert "lap" not in lap_frame.columns
+    print(f"  Laps: {[len(lap_data[k]) for k in sorted(lap_data)]}")
+
+
+if __name__ == "__main__":
+    test_lap_and_time_lookups()
+    test_distance_lookups()
+    test_cached_lap_segmentation()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Telemetry Pagination Test
+Walks a synthetic race through the telemetry cache page by page.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.data.telemetry_cache import CachedRace, InvalidCursorError
+
+
+def make_race(n_per_vehicle: int = 250) -> CachedRace:
+    """Three vehicles at 10 Hz, 50 samples per lap, with a duplicated timestamp."""
+    frames = []
+    start = pd.Timestamp("2025-04-05 14:00:00", tz="UTC")
+    for vehicle in ["GR86-004-78", "GR86-002-000", "GR86-010-16"]:
+        ts = start + pd.to_timedelta(np.arange(n_per_vehicle) * 100, unit="ms")
+        frames.append(pd.DataFrame({
+            "vehicle_id": vehicle,
+            "timestamp": ts,
+            "lap": np.arange(n_per_vehicle) // 50 + 1,
+            "speed": np.linspace(80, 180, n_per_vehicle),
+            "gear": np.arange(n_per_vehicle) % 6 + 1
+        }))
+    df = pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=0)
+    dup = df.iloc[[0]].assign(lap=99)  # Same vehicle/timestamp, different lap
+    return CachedRace.from_frame("barber", "R1", pd.concat([df, dup], ignore_index=True))
+
+
+def walk(race: CachedRace, **kwargs) -> pd.DataFrame:
+    pages, cursor = [], None
+    while True:
+        page = race.page(cursor=cursor, **kwargs)
+        pages.append(page.frame)
+        cursor = page.next_cursor
+        if cursor is None:
+            return pd.concat(pages)
+
+
+def test_walk_entire_race():
+    """Every row is returned exactly once, in (vehicle, timestamp) order."""
+    print("\n" + "="*80)
+    print("📄 TELEMETRY PAGINATION")
+    print("="*80)
+
+    race = make_race()
+    rows = walk(race, limit=97)
+    print(f"  Rows: {len(rows)} of {len(race.frame)} across vehicles {race.vehicles}")
+
+    assert len(rows) == len(race.frame)
+    assert rows.index.is_unique
+    assert list(rows.index) == list(range(len(race.frame)))
+
+
+def test_filters_and_channels():
+    """Vehicle, time window, lap and channel filters compose with cursors."""
+    print("\n" + "="*80)
+    print("🔎 TELEMETRY FILTERS")
+    print("="*80)
+
+    race = make_race()
+    start = pd.Timestamp("2025-04-05 14:00:05", tz="UTC")
+    end = pd.Timestamp("2025-04-05 14:00:15", tz="UTC")
+
+    window = walk(race, vehicle_id="GR86-010-16", start_time=start, end_time=end, limit=30)
+    assert len(window) == 101
+    assert window["timestamp"].between(start, end).all()
+    assert (window["vehicle_id"] == "GR86-010-16").all()
+
+    lap = walk(race, lap_number=3, channels=["speed"], limit=40)
+    assert len(lap) == 150
+    assert list(lap.columns) == ["vehicle_id", "timestamp", "lap", "speed"]
+
+
+def test_rejects_foreign_cursor():
+    """A cursor from one query cannot be replayed against different filters."""
+    print("\n" + "="*80)
+    print("🚫 TELEMETRY CURSOR VALIDATION")
+    print("="*80)
+
+    race = make_race()
+    cursor = race.page(vehicle_id="GR86-002-000", limit=10).next_cursor
+
+    for bad in [cursor, "not-a-cursor"]:
+        try:
+            race.page(vehicle_id="GR86-004-78", cursor=bad, limit=10)
+        except InvalidCursorError as e:
+            print(f"  Rejected: {e}")
+        else:
+            raise AssertionError("Foreign cursor was accepted")
+
+
+if __name__ == "__main__":
+    test_walk_entire_race()
+    test_filters_and_channels()
+    test_rejects_foreign_cursor()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Track Segments Test
+Drives two vehicles round a synthetic stadium-shaped circuit with GPS and
+lateral g, then checks the detected corners, row assignment and per-corner
+time loss.
+"""
+
+import sys
+import gc
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import synthetic_race
+from app.data.spatial_index import GridIndex
+from app.data.telemetry_cache import CachedRace
+from app.data.track_segments import SegmentMap, TrackSegmentStore, assign_segments, time_loss
+
+STRAIGHT = 1000.0
+RADIUS = 100.0
+LAP_LENGTH = 2 * STRAIGHT + 2 * np.pi * RADIUS
+ORIGIN = (33.53, -86.62)
+SPEED = 40.0  # m/s
+
+
+def circuit(distance: np.ndarray):
+    """(x, y, heading-change sign) on a counter-clockwise stadium: straight, turn, straight, turn."""
+    d = distance % LAP_LENGTH
+    arc = np.pi * RADIUS
+    x = np.empty_like(d)
+    y = np.empty_like(d)
+    s1 = d < STRAIGHT
+    t1 = (d >= STRAIGHT) & (d < STRAIGHT + arc)
+    s2 = (d >= STRAIGHT + arc) & (d < 2 * STRAIGHT + arc)
+    t2 = d >= 2 * STRAIGHT + arc
+    x[s1], y[s1] = d[s1], 0.0
+    a = (d[t1] - STRAIGHT) / RADIUS
+    x[t1], y[t1] = STRAIGHT + RADIUS * np.sin(a), RADIUS - RADIUS * np.cos(a)
+    x[s2], y[s2] = STRAIGHT - (d[s2] - STRAIGHT - arc), 2 * RADIUS
+    a = (d[t2] - 2 * STRAIGHT - arc) / RADIUS
+    x[t2], y[t2] = -RADIUS * np.sin(a), RADIUS + RADIUS * np.cos(a)
+    lateral = np.where(t1 | t2, SPEED ** 2 / RADIUS / 9.81, 0.0)
+    return x, y, lateral
+
+
+def make_race(laps: int = 4) -> CachedRace:
+    """Vehicle B loses 2 s in the second corner on every lap; vehicle A spends its last lap in the pit lane."""
+    rng = np.random.default_rng(3)
+
+    def channels(v, vehicle):
+        d = np.linspace(0, LAP_LENGTH * laps, 200_001)
+        speed = np.full_like(d, SPEED)
+        if v == 1:
+            in_t2 = (d % LAP_LENGTH) >= 2 * STRAIGHT + np.pi * RADIUS
+            speed[in_t2] = (np.pi * RADIUS) / (np.pi * RADIUS / SPEED + 2.0)
+        t = np.concatenate([[0], np.cumsum(np.diff(d) / speed[:-1])])
+        seconds = np.arange(0, t[-1], 0.1)
+        distance = np.interp(seconds, t, d)
+        x, y, lateral = circuit(distance)
+        y = y + rng.normal(0, 0.5, len(y))
+        if v == 0:
+            pits = distance >= LAP_LENGTH * (laps - 1)
+            y[pits] -= 60  # Pit lane, well off the racing line
+        lat = ORIGIN[0] + y / 110_574.0
+        lon = ORIGIN[1] + x / (111_320.0 * np.cos(np.radians(ORIGIN[0])))
+        no_fix = np.arange(len(seconds)) % 50 == 7
+        lap_distance = distance % LAP_LENGTH
+        return {
+            "seconds": seconds,
+            "lap": (distance // LAP_LENGTH).astype(int) + 1,
+            "speed": np.interp(distance, d, speed) * 3.6,
+            "accy_can": lateral,
+            "VBOX_Lat_Min": np.where(no_fix, 0.0, lat),
+            "VBOX_Long_Minutes": np.where(no_fix, 0.0, lon),
+            "Laptrigger_lapdist_dls": np.where(np.arange(len(seconds)) % 2 == 0, lap_distance, np.nan)
+        }
+
+    return synthetic_race(channels)
+
+
+def test_grid_index_nearest():
+    """Grid lookups agree with brute force within the cell size."""
+    rng = np.random.default_rng(0)
+    px, py = rng.uniform(0, 500, 2000), rng.uniform(0, 500, 2000)
+    index = GridIndex(px, py, 20.0)
+    qx, qy = rng.uniform(-30, 530, 3000), rng.uniform(-30, 530, 3000)
+    nearest, distance = index.nearest(qx, qy, 20.0)
+
+    d2 = (px[None, :] - qx[:, None]) ** 2 + (py[None, :] - qy[:, None]) ** 2
+    brute = d2.argmin(axis=1)
+    brute_distance = np.sqrt(d2.min(axis=1))
+    found = brute_distance <= 20.0
+    assert (nearest[found] == brute[found]).all()
+    assert (nearest[~found] == -1).all()
+    assert np.allclose(distance[found], brute_distance[found])
+
+    near = index.within(250.0, 250.0, 15.0)
+    assert set(near) == set(np.flatnonzero((px - 250) ** 2 + (py - 250) ** 2 <= 225))
+
+
+def test_segment_detection_and_time_loss():
+    """Two left-hand corners are found and vehicle B's loss is pinned on T2."""
+    print("\n" + "="*80)
+    print("🗺️  TRACK SEGMENTS: CORNERS AND TIME LOSS")
+    print("="*80)
+
+    race = make_race()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TrackSegmentStore(Path(tmp))
+        segment_map, segments, lap_times = store.race_segments(race)
+        for s in segment_map.segments:
+            print(f"  {s.name:>3} {s.kind:<8} {s.start_m:7.1f}-{s.end_m:7.1f} {s.direction or ''} {s.min_radius_m or ''}")
+
+        corners = [s for s in segment_map.segments if s.kind == "corner"]
+        assert [s.name for s in corners] == ["T1", "T2"]
+        assert all(s.direction == "left" for s in corners)
+        assert abs(corners[0].start_m - STRAIGHT) < 40
+        assert abs(corners[1].start_m - (2 * STRAIGHT + np.pi * RADIUS)) < 40
+        assert all(abs(s.min_radius_m - RADIUS) < 15 for s in corners)
+        assert segment_map.reference["vehicle_id"] == "GR86-002-000"
+
+        # Pit-lane rows are off the line; everything else on the circuit is assigned
+        pits = (race.frame["vehicle_id"] == "GR86-002-000") & (race.frame["lap"] == 4)
+        assert (segments[pits.to_numpy()] == -1).mean() > 0.85  # The shifted corners cross the line in places
+        assert (segments[~pits.to_numpy()] >= 0).all()
+        assert len(lap_times) == 7  # Pit lap is incomplete
+
+        loss = time_loss(segment_map, lap_times)
+        b = loss[loss["vehicle_id"] == "GR86-004-78"].set_index("segment")
+        print(b[["kind", "best_time", "field_best_time", "mean_loss"]])
+        assert abs(b.loc["T2", "mean_loss"] - 2.0) < 0.2
+        assert b.drop(index="T2")["mean_loss"].abs().max() < 0.2
+
+        # Stored map round-trips and is picked up by a fresh store
+        stored = TrackSegmentStore(Path(tmp)).get_map("barber")
+        assert [s.name for s in stored.segments] == [s.name for s in segment_map.segments]
+        assert np.allclose(stored.line_x, segment_map.line_x, atol=0.01)
+        reassigned = assign_segments(stored, race)
+        assert (reassigned == segments).mean() > 0.999
+        assert SegmentMap.from_dict(segment_map.to_dict()).origin == segment_map.origin
+
+        # Neither the assignments nor the resampled laps keep a dropped race alive
+        key = ("barber", "R1")
+        assert store._races[key][0]() is race
+        del race, pits, reassigned
+        gc.collect()
+        assert store._races[key][0]() is None
+
+        # Forgetting the map removes the stored file even when it was never loaded
+        TrackSegmentStore(Path(tmp)).invalidate("barber", forget_map=True)
+        assert not (Path(tmp) / "barber.json").exists()
+
+
+if __name__ == "__main__":
+    test_grid_index_nearest()
+    test_segment_detection_and_time_loss()
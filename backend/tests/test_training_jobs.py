@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Training Job Store Test
+Checks how job records shared by several server workers are recovered and
+updated: only jobs of dead processes are failed on startup, concurrent
+updates and submissions from several processes are serialized and a finished
+job is never reverted by a late cancel.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.training_jobs import JobStore, TrainingJobManager, _now
+
+
+def dead_pid() -> int:
+    """PID of a process that has already exited."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_recovery_keeps_jobs_of_live_workers():
+    """Active jobs are failed only when their owning process is gone."""
+    print("\n" + "="*80)
+    print("♻️ TRAINING JOBS: RECOVERY")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(Path(tmp))
+        other_worker = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            owners = {"live": other_worker.pid, "dead": dead_pid(), "legacy": None, "reused": os.getpid()}
+            for job_id, pid in owners.items():
+                store.save({"job_id": job_id, "status": "running", "owner_pid": pid})
+
+            TrainingJobManager(Path(tmp))
+            statuses = {job_id: store.get(job_id)["status"] for job_id in owners}
+            print(f"  {statuses}")
+            assert statuses == {"live": "running", "dead": "failed", "legacy": "failed", "reused": "failed"}
+        finally:
+            other_worker.kill()
+            other_worker.wait()
+
+
+def write_field(jobs_dir: str, field: str, n: int):
+    """Worker process: write 1..n into its own field of a shared record."""
+    store = JobStore(Path(jobs_dir))
+    for i in range(1, n + 1):
+        store.update("shared", **{field: i})
+
+
+def test_updates_are_serialized_and_final():
+    """Concurrent processes lose no updates, and terminal records stay as they are."""
+    print("\n" + "="*80)
+    print("🔐 TRAINING JOBS: UPDATE LOCKING")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(Path(tmp))
+        store.save({"job_id": "shared", "status": "running"})
+        code = (
+            "import sys\n"
+            "from tests.test_training_jobs import write_field\n"
+            "write_field(sys.argv[1], sys.argv[2], 300)\n"
+        )
+        backend = Path(__file__).parent.parent
+        fields = ["progress", "message", "metrics"]
+        workers = [subprocess.Popen([sys.executable, "-c", code, tmp, field], cwd=backend) for field in fields]
+        for worker in workers:
+            assert worker.wait() == 0
+        record = store.get("shared")
+        print(f"  after 3 x 300 concurrent updates: {[record.get(f) for f in fields]}")
+        assert all(record.get(f) == 300 for f in fields)  # No write reverted another process's field
+
+        record = store.update("shared", status="done", finished_at=_now())
+        assert store.update("shared", status="running", message="stale") == record
+
+        # A running job finishing while cancel is requested keeps its final status
+        manager = TrainingJobManager(Path(tmp))
+        store.save({"job_id": "job", "status": "running", "owner_pid": os.getpid()})
+        store.update("job", status="done", finished_at=_now())
+        assert manager.cancel("job")["status"] == "done"
+        store.save({"job_id": "job2", "status": "running", "owner_pid": os.getpid()})
+        response = manager.cancel("job2")
+        assert response["message"] == "Cancellation requested" and store.cancel_requested("job2")
+        assert store.get("job2").get("message") is None
+
+
+class HeldExecutor:
+    """Executor stand-in whose jobs never start, so submitted jobs stay queued."""
+
+    def submit(self, *args):
+        return Future()
+
+
+def submit_jobs(jobs_dir: str, n: int):
+    """Worker process: once the start file exists, submit jobs for races 0..n-1."""
+    manager = TrainingJobManager(Path(jobs_dir), max_pending=n)
+    manager._executor = HeldExecutor()
+    while not (Path(jobs_dir) / "start").exists():
+        time.sleep(0.001)
+    for i in range(n):
+        manager.submit("barber", [f"R{i}"])
+
+
+def test_submissions_are_deduplicated_across_processes():
+    """Identical jobs submitted by several processes at once are queued once."""
+    print("\n" + "="*80)
+    print("🧾 TRAINING JOBS: CROSS-PROCESS DEDUPLICATION")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        code = (
+            "import sys\n"
+            "from tests.test_training_jobs import submit_jobs\n"
+            "submit_jobs(sys.argv[1], 30)\n"
+        )
+        backend = Path(__file__).parent.parent
+        workers = [subprocess.Popen([sys.executable, "-c", code, tmp], cwd=backend) for _ in range(4)]
+        time.sleep(2)
+        (Path(tmp) / "start").touch()
+        for worker in workers:
+            assert worker.wait() == 0
+        keys = [record["key"] for record in JobStore(Path(tmp)).list()]
+        print(f"  4 processes x 30 submissions -> {len(keys)} jobs")
+        assert len(keys) == len(set(keys)) == 30
+
+
+if __name__ == "__main__":
+    test_recovery_keeps_jobs_of_live_workers()
+    test_updates_are_serialized_and_final()
+    test_submissions_are_deduplicated_across_processes()
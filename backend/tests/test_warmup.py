@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Startup Warm-up Test
+Preloads a synthetic race and the barber lap time model, and checks that
+/health/ready reports 503 while warming up and 200 afterwards while /health
+answers throughout.
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.data import telemetry_cache
+from app.data.telemetry_cache import TelemetryCache
+from app.ml.lap_time_predictor import _predictor_cache, get_model_path
+from app.services import warmup
+from app.services.warmup import Warmup
+
+
+def write_telemetry(path: Path, n: int = 200):
+    """Long-format telemetry (one row per channel sample) for two vehicles."""
+    rows = []
+    start = pd.Timestamp("2025-09-06 18:40:00", tz="UTC")
+    for vehicle in ["GR86-002-000", "GR86-004-78"]:
+        ts = start + pd.to_timedelta(np.arange(n) * 100, unit="ms")
+        for name, values in (("speed", np.linspace(80, 180, n)), ("aps", np.linspace(0, 100, n))):
+            rows.append(pd.DataFrame({
+                "vehicle_id": vehicle, "timestamp": ts, "lap": np.arange(n) // 50 + 1,
+                "telemetry_name": name, "telemetry_value": values
+            }))
+    pd.concat(rows).to_csv(path, index=False)
+
+
+class temp_dataset:
+    """Temporary dataset root with barber R1 telemetry, used by the telemetry cache."""
+
+    def __enter__(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        (root / "barber").mkdir()
+        write_telemetry(root / "barber" / "R1_barber_telemetry_data.csv")
+        self._original = settings.dataset_root, telemetry_cache._telemetry_cache
+        settings.dataset_root = root
+        telemetry_cache._telemetry_cache = TelemetryCache(root)
+        return root
+
+    def __exit__(self, *exc):
+        settings.dataset_root, telemetry_cache._telemetry_cache = self._original
+        self._tmp.cleanup()
+
+
+def test_warmup_preloads_races_and_models():
+    """Configured telemetry lands in the cache and the model in the predictor cache, with timings."""
+    print("\n" + "="*80)
+    print("🔥 WARM-UP: PRELOAD")
+    print("="*80)
+
+    with temp_dataset():
+        model_path = str(get_model_path("barber"))
+        _predictor_cache.pop(model_path, None)
+
+        preload = Warmup({"barber": ["R1", "R2"]})
+        assert not preload.ready
+        preload.run()
+        report = preload.report()
+        for item in report["items"]:
+            print(f"  {item}")
+
+        assert report["ready"] and report["duration_ms"] >= 0
+        assert [(i["kind"], i["race"], i["status"]) for i in report["items"]] == [
+            ("telemetry", "R1", "loaded"), ("telemetry", "R2", "skipped"), ("model", None, "loaded")
+        ]
+        assert ("barber", "R1") in telemetry_cache.get_telemetry_cache()._races
+        assert model_path in _predictor_cache
+
+
+def test_readiness_separate_from_liveness():
+    """/health/ready is 503 until the background warm-up finishes; /health is 200 throughout."""
+    print("\n" + "="*80)
+    print("🔥 WARM-UP: READINESS")
+    print("="*80)
+
+    gate = threading.Event()
+
+    class GatedWarmup(Warmup):
+        def run(self):
+            gate.wait(10)
+            super().run()
+
+    with temp_dataset():
+        warmup._warmup = GatedWarmup({"barber": ["R1"]}, models=False)
+        try:
+            from app.main import app
+            with TestClient(app) as client:
+                assert client.get("/health").status_code == 200
+                response = client.get("/health/ready")
+                print(f"  before: {response.status_code} {response.json()['status']}")
+                assert response.status_code == 503 and response.json()["status"] == "warming_up"
+
+                gate.set()
+                deadline = time.time() + 10
+                while time.time() < deadline:
+                    response = client.get("/health/ready")
+                    phases = client.get("/health/startup").json()["phases_ms"]
+                    if response.status_code == 200 and "warmup" in phases:
+                        break
+                    time.sleep(0.05)
+                print(f"  after: {response.status_code} {response.json()['items']}, warmup {phases.get('warmup')} ms")
+                assert response.status_code == 200 and response.json()["status"] == "ready"
+                assert response.json()["items"][0]["status"] == "loaded"
+                assert "warmup" in phases
+        finally:
+            gate.set()
+            warmup._warmup = None
+
+
+if __name__ == "__main__":
+    test_warmup_preloads_races_and_models()
+    test_readiness_separate_from_liveness()
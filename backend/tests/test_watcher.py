@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Data Watcher Test
+Changes files in a temporary dataset and models directory and checks that one
+poll invalidates only the affected race, re-materializes it and logs events.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core import coalesce
+from app.core.coalesce import CachedResponse, ResponseCache
+from app.core.config import settings
+from app.data.catalog import DatasetCatalog
+from app.ml import lap_time_predictor
+from app.services.materialize import MaterializedStore, materialize_race
+from app.services.watcher import EVENT_LOG_SIZE, DataWatcher
+
+SOURCE = Path(__file__).parent.parent / "data" / "barber"
+
+CACHED_PATHS = [
+    "/analytics/degradation/barber/R1",
+    "/analytics/degradation/barber/R2",
+    "/insights/pre-event-prediction/barber",
+    "/analytics/degradation/cota/R1",
+    "/predictions/lap-time/barber",
+]
+
+
+def _touch(path: Path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_poll_invalidates_affected_race():
+    """A changed R1 file drops R1 and track-wide responses, re-materializes R1 and is logged."""
+    print("\n" + "="*80)
+    print("👀 DATA WATCHER: DATASET AND MODEL CHANGES")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_root = Path(tmp) / "data"
+        models_dir = Path(tmp) / "models"
+        (dataset_root / "barber").mkdir(parents=True)
+        models_dir.mkdir()
+        for race in ("R1", "R2"):
+            for name in (f"{race}_barber_lap_start.csv", f"{race}_barber_lap_end.csv",
+                         f"{race}_barber_lap_time.csv"):
+                shutil.copy(SOURCE / name, dataset_root / "barber" / name)
+        model_path = models_dir / "lap_time_predictor_barber.json"
+        model_path.write_text("{}")
+
+        original_root, original_cache = settings.dataset_root, coalesce._cache
+        settings.dataset_root = dataset_root
+        coalesce._cache = cache = ResponseCache(ttl=60)
+        try:
+            catalog = DatasetCatalog(dataset_root)
+            catalog.refresh()
+            store = MaterializedStore(Path(tmp) / "materialized", dataset_root)
+            assert materialize_race("barber", "R1", store)["status"] == "materialized"
+            watcher = DataWatcher(catalog, models_dir, interval=0, store=store)
+            assert watcher.check() == []
+
+            for path in CACHED_PATHS:
+                cache.put(f"GET {path}  ", CachedResponse(200, None, b"{}", '"x"', time.monotonic()))
+            lap_time_predictor._predictor_cache[str(model_path)] = object()
+
+            _touch(dataset_root / "barber" / "R1_barber_lap_time.csv")
+            model_path.write_text('{"version": 2}')
+            events = watcher.check()
+            for event in events:
+                print(f"  {event['kind']}: {({k: v for k, v in event.items() if k not in ('kind', 'time')})}")
+
+            remaining = sorted(key.split(" ")[1] for key in cache._entries)
+            assert remaining == ["/analytics/degradation/barber/R2", "/analytics/degradation/cota/R1"]
+            assert str(model_path) not in lap_time_predictor._predictor_cache
+            assert [e["kind"] for e in events] == ["dataset", "invalidate", "model", "materialize", "materialize"]
+            assert events[0]["change"] == "changed" and events[0]["race"] == "R1"
+            assert events[3]["race"] == "R1" and events[3]["status"] == "materialized"
+            # The track aggregate needs every race's history; R2 was never materialized
+            assert events[4]["race"] is None and events[4]["status"] == "skipped"
+            assert store.current("barber", "R1") is not None
+            assert store.manifest("barber", "R2") is None  # Never materialized, not started now
+
+            # A new race is picked up but not materialized; the log is newest first
+            shutil.copy(SOURCE / "R2_barber_lap_time.csv", dataset_root / "barber" / "R3_barber_lap_time.csv")
+            events = watcher.check()
+            assert [(e["kind"], e.get("change")) for e in events] == [("dataset", "added"), ("invalidate", None)]
+            assert watcher.recent(1)[0]["kind"] == "invalidate"
+            assert [e["race"] for e in watcher.recent(kind="dataset")] == ["R3", "R1"]
+
+            # With the event log full, a poll still returns what it logged
+            watcher.events.extend({"kind": "filler"} for _ in range(EVENT_LOG_SIZE))
+            _touch(dataset_root / "barber" / "R3_barber_lap_time.csv")
+            events = watcher.check()
+            print(f"  Poll with a full log: {[e['kind'] for e in events]}")
+            assert [(e["kind"], e.get("race")) for e in events] == [("dataset", "R3"), ("invalidate", "R3")]
+        finally:
+            settings.dataset_root = original_root
+            coalesce._cache = original_cache
+
+
+if __name__ == "__main__":
+    test_poll_invalidates_affected_race()
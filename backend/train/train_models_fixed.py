@@ -17,6 +17,11 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import xgboost as xgb
 
+# Make the backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.ml.model_artifact import save_model_artifact, load_model_artifact, is_artifact_path
+from app.services.training_jobs import encode_vehicle
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -48,7 +53,7 @@ class SimpleLapTimePredictor:
                     'lap_time': lap['lap_time'],
                     'lap_number': lap.get('lap', i + 1),
                     'tire_age': i + 1,  # Simple tire age approximation
-                    'vehicle_encoded': hash(str(vehicle_id)) % 100,  # Simple vehicle encoding
+                    'vehicle_encoded': encode_vehicle(vehicle_id, 100),
                 }
                 
                 # Add previous lap time if available
@@ -132,24 +137,22 @@ class SimpleLapTimePredictor:
         
         return self.model.predict(X)
 
-    def save_model(self, filepath: str):
-        """Save the trained model"""
+    def save_model(self, filepath: str, metrics: dict = None):
+        """Save the trained model as an artifact (a .pkl path is saved next to it as .json/.ubj)"""
         if not self.is_trained:
             raise ValueError("No trained model to save")
         
-        model_data = {
-            'model': self.model,
-            'feature_columns': self.feature_columns,
-            'is_trained': self.is_trained
-        }
-        
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
-        
-        logger.info(f"Model saved to {filepath}")
+        save_model_artifact(self.model, filepath, self.feature_columns, metrics=metrics)
 
     def load_model(self, filepath: str):
-        """Load a trained model"""
+        """Load a trained model (artifact, or a legacy pickle you produced yourself)"""
+        if is_artifact_path(filepath):
+            self.model, metadata = load_model_artifact(filepath)
+            self.feature_columns = metadata['feature_names']
+            self.is_trained = True
+            logger.info(f"Model loaded from {filepath}")
+            return
+        
         with open(filepath, 'rb') as f:
             model_data = pickle.load(f)
         
@@ -271,8 +274,8 @@ def train_models_for_tracks():
         metrics = predictor.train(X, y)
         
         # Save the model
-        model_path = "models/lap_time_predictor.pkl"
-        predictor.save_model(model_path)
+        model_path = "models/lap_time_predictor.json"
+        predictor.save_model(model_path, metrics)
         
         # Save training summary
         summary = {
@@ -2,7 +2,8 @@
 """
 Optimized ML Model Training Script with Hyperparameter Tuning
 - Uses Optuna for hyperparameter optimization
-- Implements k-fold cross-validation
+- Implements k-fold cross-validation with per-fold pruning and early stopping
+- Persists studies in SQLite per track and training data, warm-starting from the previous best
 - Parallel training across tracks
 - Enhanced feature engineering
 """
@@ -16,7 +17,8 @@ import logging
 import pickle
 import requests
 import json
-from sklearn.model_selection import train_test_split, cross_val_score
+import time
+from sklearn.model_selection import train_test_split, KFold
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import xgboost as xgb
 import lightgbm as lgb
@@ -26,6 +28,11 @@ import warnings
 
 warnings.filterwarnings('ignore')
 
+# Make the backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.ml.model_artifact import save_model_artifact, load_model_artifact, is_artifact_path, hash_training_data
+from app.services.training_jobs import create_enhanced_features
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -36,94 +43,88 @@ optuna.logging.set_verbosity(optuna.logging.WARNING)
 # API base URL
 API_BASE = "http://localhost:8000"
 
+# Local SQLite study store (one database per track so parallel jobs never share a lock)
+OPTUNA_STORAGE_DIR = Path("models") / "optuna"
+
 
 class OptimizedLapTimePredictor:
     """Optimized lap time predictor with hyperparameter tuning"""
     
-    def __init__(self, use_optuna=True, n_trials=20):
+    def __init__(self, use_optuna=True, n_trials=20, timeout=None, early_stopping_rounds=30,
+                 n_folds=5, storage_dir=OPTUNA_STORAGE_DIR, resume=True):
         self.model = None
         self.feature_columns = None
         self.is_trained = False
         self.use_optuna = use_optuna
         self.n_trials = n_trials
+        self.timeout = timeout  # Wall-clock budget for tuning in seconds (None = unlimited)
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_folds = n_folds
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        self.resume = resume
         self.best_params = None
+        self.tuning_report = None
+        self.feature_medians = {}
         
     def create_enhanced_features(self, lap_data: pd.DataFrame) -> pd.DataFrame:
-        """Create enhanced features with domain knowledge"""
-        features = []
+        """Create enhanced features with domain knowledge (shared with incremental updates)"""
+        features = create_enhanced_features(lap_data)
+        return features.drop(columns=['timestamp'], errors='ignore')
+    
+    def _create_study(self, study_name: str, data_hash: str):
+        """
+        Create or resume the Optuna study for this training data in the local SQLite store.
         
-        for vehicle_id in lap_data['vehicle_id'].unique():
-            vehicle_laps = lap_data[lap_data['vehicle_id'] == vehicle_id].sort_values('timestamp')
-            
-            for i, (_, lap) in enumerate(vehicle_laps.iterrows()):
-                if pd.isna(lap['lap_time']) or lap['lap_time'] <= 0 or lap['lap_time'] > 200:
-                    continue
-                    
-                feature_row = {
-                    'lap_time': lap['lap_time'],
-                    'lap_number': lap.get('lap', i + 1),
-                    'tire_age': i + 1,
-                    'vehicle_encoded': hash(str(vehicle_id)) % 100,
-                }
-                
-                # Previous lap features
-                if i > 0:
-                    prev_lap = vehicle_laps.iloc[i-1]
-                    feature_row['prev_lap_time'] = prev_lap.get('lap_time', lap['lap_time'])
-                    feature_row['lap_time_delta'] = lap['lap_time'] - prev_lap.get('lap_time', lap['lap_time'])
-                else:
-                    feature_row['prev_lap_time'] = lap['lap_time']
-                    feature_row['lap_time_delta'] = 0
-                
-                # Rolling statistics (3-lap window)
-                if i >= 2:
-                    recent_laps = vehicle_laps.iloc[max(0, i-2):i]['lap_time'].dropna()
-                    if len(recent_laps) > 0:
-                        feature_row['avg_recent_laptime'] = recent_laps.mean()
-                        feature_row['std_recent_laptime'] = recent_laps.std() if len(recent_laps) > 1 else 0
-                        feature_row['min_recent_laptime'] = recent_laps.min()
-                        feature_row['max_recent_laptime'] = recent_laps.max()
-                    else:
-                        feature_row['avg_recent_laptime'] = lap['lap_time']
-                        feature_row['std_recent_laptime'] = 0
-                        feature_row['min_recent_laptime'] = lap['lap_time']
-                        feature_row['max_recent_laptime'] = lap['lap_time']
-                else:
-                    feature_row['avg_recent_laptime'] = lap['lap_time']
-                    feature_row['std_recent_laptime'] = 0
-                    feature_row['min_recent_laptime'] = lap['lap_time']
-                    feature_row['max_recent_laptime'] = lap['lap_time']
-                
-                # Tire degradation proxy
-                if i > 0:
-                    initial_pace = vehicle_laps.iloc[0].get('lap_time', lap['lap_time'])
-                    feature_row['pace_degradation'] = lap['lap_time'] - initial_pace
-                else:
-                    feature_row['pace_degradation'] = 0
-                
-                # Lap position indicators (early/mid/late race)
-                total_laps = len(vehicle_laps)
-                feature_row['race_progress'] = (i + 1) / total_laps if total_laps > 0 else 0
-                feature_row['is_early_race'] = 1 if (i + 1) <= total_laps * 0.2 else 0
-                feature_row['is_mid_race'] = 1 if 0.2 < (i + 1) / total_laps <= 0.8 else 0
-                feature_row['is_late_race'] = 1 if (i + 1) > total_laps * 0.8 else 0
-                
-                # Consistency metrics
-                if i >= 4:
-                    last_5_laps = vehicle_laps.iloc[max(0, i-4):i]['lap_time'].dropna()
-                    if len(last_5_laps) > 1:
-                        feature_row['consistency_score'] = last_5_laps.std()
-                    else:
-                        feature_row['consistency_score'] = 0
-                else:
-                    feature_row['consistency_score'] = 0
-                
-                features.append(feature_row)
+        Studies are named by the training-data hash, so trials (and the pruner's medians)
+        never mix data sets. Returns the study and the best params of the most recent
+        study on other data for this track, if any, to warm-start from.
+        """
+        pruner = optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
+        
+        if self.storage_dir is None:
+            return optuna.create_study(direction='minimize', pruner=pruner), None
         
-        return pd.DataFrame(features)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        db_name = study_name.replace(' ', '_').lower()
+        storage = f"sqlite:///{(self.storage_dir / f'{db_name}.db').resolve()}"
+        data_study_name = f"{study_name}-{data_hash[:16]}"
+        
+        summaries = [s for s in optuna.get_all_study_summaries(storage)
+                     if s.study_name.startswith(f"{study_name}-")]
+        if not self.resume:
+            for summary in summaries:
+                optuna.delete_study(study_name=summary.study_name, storage=storage)
+            summaries = []
+        
+        # Most recent study on other data that completed at least one trial
+        previous = [s for s in summaries if s.study_name != data_study_name and s.best_trial is not None]
+        previous.sort(key=lambda s: s.datetime_start)
+        previous_params = previous[-1].best_trial.params if previous else None
+        
+        study = optuna.create_study(
+            direction='minimize',
+            study_name=data_study_name,
+            storage=storage,
+            pruner=pruner,
+            load_if_exists=True
+        )
+        return study, previous_params
     
-    def optimize_hyperparameters(self, X, y):
-        """Use Optuna to find optimal hyperparameters"""
+    def optimize_hyperparameters(self, X, y, study_name: str = "lap_time_predictor"):
+        """
+        Use Optuna to find optimal hyperparameters.
+        
+        Each trial runs k-fold CV where every fold trains with XGBoost early stopping,
+        and the running CV MAE is reported after each fold so the median pruner can
+        abandon unpromising trials early. Studies are stored per track and training-data
+        hash in SQLite: a retrain on the same data resumes its study, and a retrain on new
+        data starts a fresh study that re-evaluates the previous best params first.
+        """
+        X = X.reset_index(drop=True)
+        y = pd.Series(y).reset_index(drop=True)
+        kfold = KFold(n_splits=self.n_folds, shuffle=True, random_state=42)
+        folds = list(kfold.split(X))
+        fold_seconds = []
         
         def objective(trial):
             params = {
@@ -140,27 +141,95 @@ class OptimizedLapTimePredictor:
                 'n_jobs': -1
             }
             
-            model = xgb.XGBRegressor(**params)
+            fold_maes = []
+            best_iterations = []
             
-            # 5-fold cross-validation
-            scores = cross_val_score(
-                model, X, y, cv=5, 
-                scoring='neg_mean_absolute_error',
-                n_jobs=-1
-            )
+            for fold_idx, (train_idx, valid_idx) in enumerate(folds):
+                fold_start = time.perf_counter()
+                
+                # Early stopping caps each fold at the point validation MAE stops improving
+                model = xgb.XGBRegressor(
+                    **params,
+                    eval_metric='mae',
+                    callbacks=[xgb.callback.EarlyStopping(
+                        rounds=self.early_stopping_rounds,
+                        metric_name='mae',
+                        save_best=True
+                    )]
+                )
+                model.fit(
+                    X.iloc[train_idx], y.iloc[train_idx],
+                    eval_set=[(X.iloc[valid_idx], y.iloc[valid_idx])],
+                    verbose=False
+                )
+                
+                fold_maes.append(mean_absolute_error(y.iloc[valid_idx], model.predict(X.iloc[valid_idx])))
+                best_iterations.append(model.best_iteration + 1)
+                fold_seconds.append(time.perf_counter() - fold_start)
+                
+                # Report running CV MAE so the pruner can stop bad trials between folds
+                trial.report(float(np.mean(fold_maes)), fold_idx)
+                if trial.should_prune():
+                    trial.set_user_attr('folds_completed', fold_idx + 1)
+                    raise optuna.TrialPruned()
+            
+            trial.set_user_attr('folds_completed', len(folds))
+            trial.set_user_attr('best_iteration', int(np.mean(best_iterations)))
             
-            return -scores.mean()  # Return positive MAE
+            return float(np.mean(fold_maes))  # Return positive MAE
+        
+        study, previous_params = self._create_study(study_name, hash_training_data(X, y))
+        previous_trials = len(study.trials)
+        
+        completed = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+        if completed:
+            logger.info(f"Resuming study '{study.study_name}' ({len(completed)} completed trials)")
+        elif previous_params:
+            # Warm start: re-evaluate the previous data's best params on the current data first
+            study.enqueue_trial(previous_params)
+            logger.info(f"Starting study '{study.study_name}' from the previous best params")
+        
+        start_time = time.perf_counter()
+        study.optimize(objective, n_trials=self.n_trials, timeout=self.timeout, show_progress_bar=False)
+        elapsed = time.perf_counter() - start_time
+        
+        new_trials = study.trials[previous_trials:]
+        pruned = [t for t in new_trials if t.state == optuna.trial.TrialState.PRUNED]
+        complete = [t for t in new_trials if t.state == optuna.trial.TrialState.COMPLETE]
         
-        study = optuna.create_study(direction='minimize')
-        study.optimize(objective, n_trials=self.n_trials, show_progress_bar=False)
+        # Wall-clock saved = folds skipped by pruning, valued at the mean fold duration
+        avg_fold_seconds = float(np.mean(fold_seconds)) if fold_seconds else 0.0
+        folds_skipped = sum(len(folds) - t.user_attrs.get('folds_completed', len(folds)) for t in pruned)
+        
+        self.best_params = dict(study.best_params)
+        best_iteration = study.best_trial.user_attrs.get('best_iteration')
+        if best_iteration:
+            # Early stopping found the useful tree count; don't grow past it on the final fit
+            self.best_params['n_estimators'] = int(best_iteration)
+        
+        self.tuning_report = {
+            'study_name': study.study_name,
+            'previous_trials': previous_trials,
+            'trials_run': len(new_trials),
+            'trials_completed': len(complete),
+            'trials_pruned': len(pruned),
+            'folds_skipped': int(folds_skipped),
+            'elapsed_seconds': round(elapsed, 2),
+            'estimated_seconds_saved': round(folds_skipped * avg_fold_seconds, 2),
+            'time_budget_seconds': self.timeout,
+            'best_cv_mae': float(study.best_value)
+        }
         
-        self.best_params = study.best_params
         logger.info(f"Best hyperparameters: {self.best_params}")
         logger.info(f"Best CV MAE: {study.best_value:.3f}s")
+        logger.info(
+            f"Tuning: {len(new_trials)} trials ({len(pruned)} pruned) in {elapsed:.1f}s, "
+            f"~{self.tuning_report['estimated_seconds_saved']:.1f}s saved by pruning"
+        )
         
         return self.best_params
 
-    def train(self, X: pd.DataFrame, y: pd.Series) -> dict:
+    def train(self, X: pd.DataFrame, y: pd.Series, study_name: str = "lap_time_predictor") -> dict:
         """Train the XGBoost model with optional hyperparameter tuning"""
         try:
             # Store feature columns
@@ -169,7 +238,7 @@ class OptimizedLapTimePredictor:
             # Hyperparameter optimization
             if self.use_optuna:
                 logger.info("Optimizing hyperparameters...")
-                params = self.optimize_hyperparameters(X, y)
+                params = dict(self.optimize_hyperparameters(X, y, study_name=study_name))
                 params['random_state'] = 42
                 params['n_jobs'] = -1
             else:
@@ -193,6 +262,9 @@ class OptimizedLapTimePredictor:
                 X, y, test_size=0.2, random_state=42, shuffle=False
             )
             
+            # Training medians fill missing features at prediction time
+            self.feature_medians = {k: float(v) for k, v in X_train.median().dropna().items()}
+            
             # Train model
             self.model = xgb.XGBRegressor(**params)
             
@@ -213,7 +285,8 @@ class OptimizedLapTimePredictor:
                 'train_samples': len(X_train),
                 'test_samples': len(X_test),
                 'features': len(X.columns),
-                'hyperparameters': params
+                'hyperparameters': params,
+                'tuning_report': self.tuning_report if self.use_optuna else None
             }
             
             self.is_trained = True
@@ -241,16 +314,29 @@ class OptimizedLapTimePredictor:
         
         return self.model.predict(X)
     
-    def save(self, filepath: str):
-        """Save the trained model"""
+    def save(self, filepath: str, metrics: dict = None):
+        """Save the trained model (artifact format, or legacy pickle for .pkl paths)"""
         if not self.is_trained:
             raise ValueError("Model not trained")
         
+        if is_artifact_path(filepath):
+            save_model_artifact(
+                self.model,
+                filepath,
+                self.feature_columns,
+                metrics={k: v for k, v in (metrics or {}).items() if k != 'tuning_report'},
+                feature_medians=self.feature_medians,
+                extra={'best_params': self.best_params, 'tuning_report': self.tuning_report}
+            )
+            return
+        
         model_data = {
             'model': self.model,
             'feature_columns': self.feature_columns,
             'is_trained': self.is_trained,
-            'best_params': self.best_params
+            'best_params': self.best_params,
+            'tuning_report': self.tuning_report,
+            'feature_medians': self.feature_medians
         }
         
         with open(filepath, 'wb') as f:
@@ -260,6 +346,16 @@ class OptimizedLapTimePredictor:
     
     def load(self, filepath: str):
         """Load a trained model"""
+        if is_artifact_path(filepath):
+            self.model, metadata = load_model_artifact(filepath)
+            self.feature_columns = metadata['feature_names']
+            self.is_trained = True
+            self.feature_medians = metadata.get('feature_medians', {})
+            self.best_params = metadata['extra'].get('best_params')
+            self.tuning_report = metadata['extra'].get('tuning_report')
+            logger.info(f"Model loaded from {filepath}")
+            return
+        
         with open(filepath, 'rb') as f:
             model_data = pickle.load(f)
         
@@ -267,6 +363,8 @@ class OptimizedLapTimePredictor:
         self.feature_columns = model_data['feature_columns']
         self.is_trained = model_data['is_trained']
         self.best_params = model_data.get('best_params')
+        self.tuning_report = model_data.get('tuning_report')
+        self.feature_medians = model_data.get('feature_medians', {})
         
         logger.info(f"Model loaded from {filepath}")
 
@@ -319,14 +417,20 @@ def load_lap_times_from_api(track: str, race: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 
-def train_single_track(track: str, use_optuna: bool = True, n_trials: int = 20) -> tuple:
+def train_single_track(track: str, use_optuna: bool = True, n_trials: int = 20,
+                       timeout: float = None, resume: bool = True) -> tuple:
     """Train model for a single track"""
     logger.info(f"Training model for {track}")
     
     try:
         races = ["R1", "R2"]
         all_features = []
-        predictor = OptimizedLapTimePredictor(use_optuna=use_optuna, n_trials=n_trials)
+        predictor = OptimizedLapTimePredictor(
+            use_optuna=use_optuna,
+            n_trials=n_trials,
+            timeout=timeout,
+            resume=resume
+        )
         
         for race in races:
             try:
@@ -360,8 +464,8 @@ def train_single_track(track: str, use_optuna: bool = True, n_trials: int = 20)
         X = combined_features.drop(['lap_time'], axis=1)
         y = combined_features['lap_time']
         
-        # Train model
-        metrics = predictor.train(X, y)
+        # Train model (study is keyed by track and training data; new data warm-starts from the previous best)
+        metrics = predictor.train(X, y, study_name=f"lap_time_{track}")
         
         return (track, predictor, metrics)
         
@@ -370,7 +474,8 @@ def train_single_track(track: str, use_optuna: bool = True, n_trials: int = 20)
         return (track, None, None)
 
 
-def train_models_parallel(use_optuna: bool = True, n_trials: int = 20, n_jobs: int = 2):
+def train_models_parallel(use_optuna: bool = True, n_trials: int = 20, n_jobs: int = 2,
+                          timeout: float = None, resume: bool = True):
     """Train lap time prediction models for all tracks in parallel"""
     
     # Create models directory
@@ -381,10 +486,12 @@ def train_models_parallel(use_optuna: bool = True, n_trials: int = 20, n_jobs: i
     
     logger.info(f"Training models for {len(tracks)} tracks in parallel ({n_jobs} jobs)")
     logger.info(f"Hyperparameter optimization: {'ON' if use_optuna else 'OFF'}")
+    if use_optuna and timeout:
+        logger.info(f"Tuning time budget: {timeout:.0f}s per track")
     
     # Train models in parallel
     results = Parallel(n_jobs=n_jobs)(
-        delayed(train_single_track)(track, use_optuna, n_trials) 
+        delayed(train_single_track)(track, use_optuna, n_trials, timeout, resume) 
         for track in tracks
     )
     
@@ -392,14 +499,20 @@ def train_models_parallel(use_optuna: bool = True, n_trials: int = 20, n_jobs: i
     for track, predictor, metrics in results:
         if predictor is not None and metrics is not None:
             # Save model
-            model_path = models_dir / f"lap_time_predictor_{track}.pkl"
-            predictor.save(str(model_path))
+            model_path = models_dir / f"lap_time_predictor_{track}.json"
+            predictor.save(str(model_path), metrics)
             
             logger.info(f"✅ {track} model training completed!")
             logger.info(f"   Test MAE: {metrics['test_mae']:.3f}s")
             logger.info(f"   Test RMSE: {metrics['test_rmse']:.3f}s")
             logger.info(f"   Test R²: {metrics['test_r2']:.3f}")
             logger.info(f"   Features: {metrics['features']}")
+            report = metrics.get('tuning_report')
+            if report:
+                logger.info(
+                    f"   Tuning: {report['trials_run']} trials, {report['trials_pruned']} pruned, "
+                    f"{report['elapsed_seconds']:.1f}s elapsed, ~{report['estimated_seconds_saved']:.1f}s saved"
+                )
         else:
             logger.info(f"❌ {track} model training failed")
     
@@ -413,6 +526,8 @@ if __name__ == "__main__":
     parser.add_argument('--no-optuna', action='store_true', help='Disable hyperparameter optimization')
     parser.add_argument('--trials', type=int, default=20, help='Number of Optuna trials')
     parser.add_argument('--jobs', type=int, default=2, help='Number of parallel jobs')
+    parser.add_argument('--timeout', type=float, default=None, help='Tuning time budget per track in seconds')
+    parser.add_argument('--fresh', action='store_true', help='Discard stored Optuna studies instead of resuming')
     
     args = parser.parse_args()
     
@@ -420,5 +535,7 @@ if __name__ == "__main__":
     train_models_parallel(
         use_optuna=not args.no_optuna,
         n_trials=args.trials,
-        n_jobs=args.jobs
+        n_jobs=args.jobs,
+        timeout=args.timeout,
+        resume=not args.fresh
     )